@@ -95,6 +95,25 @@ if crontab is not None:
                 'expires': 3600,  # 1 hour expiry
             }
         },
+        
+        'scan-deadlines': {
+            'task': 'lms_notifications.tasks.scan_deadlines',
+            'schedule': crontab(minute=30),  # Every hour; each run covers the time since the last
+            'options': {
+                'queue': 'notifications',
+                'expires': 3600,  # 1 hour expiry
+            }
+        },
+        
+        # Certificate tasks: sweep up completions whose run was not queued
+        'process-certificate-queue': {
+            'task': 'certificates.tasks.process_certificate_queue',
+            'schedule': crontab(minute='*/10'),  # Every 10 minutes
+            'options': {
+                'queue': 'default',
+                'expires': 600,  # 10 minute expiry
+            }
+        },
     }
 else:
     # Fallback when celery is not available
@@ -128,6 +147,12 @@ CELERY_TASK_ROUTES = {
     'lms_notifications.tasks.send_deadline_reminders': {'queue': 'notifications'},
     'lms_notifications.tasks.send_unread_message_digest': {'queue': 'notifications'},
     'lms_notifications.tasks.send_feedback_reminders': {'queue': 'notifications'},
+    'lms_notifications.tasks.scan_deadlines': {'queue': 'notifications'},
+    'lms_notifications.tasks.send_bulk_notification': {'queue': 'notifications'},
+    
+    # Certificate tasks
+    'certificates.tasks.process_certificate_queue': {'queue': 'default'},
+    'certificates.tasks.register_certificate_storage': {'queue': 'default'},
 }
 
 # Task settings
@@ -166,6 +166,7 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'django.contrib.humanize',
     'django.contrib.sites',
+    'django.contrib.postgres',
     'corsheaders',
     'django_extensions',
     
@@ -214,6 +215,7 @@ INSTALLED_APPS = [
 # ==============================================
 
 MIDDLEWARE = [
+    'core.middleware.request_metrics_middleware.RequestMetricsMiddleware',  # Per-view query and latency budgets
     'core.middleware.domain_fix_middleware.DomainFixMiddleware',  # Fix URLs with trailing dots
     'django.middleware.gzip.GZipMiddleware',  # Enable GZIP compression
     'django.middleware.security.SecurityMiddleware',
@@ -315,9 +317,10 @@ AUTH_PASSWORD_VALIDATORS = [
 # SESSION CONFIGURATION - OPTIMIZED FOR PRODUCTION PERSISTENCE
 # ==============================================
 
-# Use Redis for session storage for better persistence across deployments
-SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+# Sessions are read through Redis and persisted to django_session for durability
+SESSION_ENGINE = 'core.session_backends'
 SESSION_CACHE_ALIAS = 'sessions'  # Use the sessions cache alias defined below
+SESSION_DB_REFRESH_INTERVAL = 300  # Rewrite unchanged sessions to the DB at most every 5 minutes
 
 # Extended session duration to prevent auto-logout
 SESSION_COOKIE_AGE = 86400  # 24 hours (extended for better user experience)
@@ -458,6 +461,78 @@ CACHES = {
     }
 }
 
+# Event logs (assignment interactions, notification activity) are buffered and
+# written in batches by core.event_ingestion. Set EVENT_INGESTION_REDIS_URL to
+# keep pending events in a Redis stream so they survive worker restarts.
+EVENT_INGESTION_BATCH_SIZE = 200
+EVENT_INGESTION_FLUSH_INTERVAL = 5  # seconds
+EVENT_INGESTION_REDIS_URL = get_env('EVENT_INGESTION_REDIS_URL')
+# Per-log sample rates and retention, keyed by model label (see core.event_ingestion)
+EVENT_INGESTION_POLICIES = {
+    'core.RequestMetric': {'sample_rate': 1.0, 'retention_days': 14},
+}
+
+# Video, audio and quiz heartbeats accumulate in the cache and are written to
+# TopicProgress / QuizAttempt at most this often (see core.heartbeat)
+HEARTBEAT_PERSIST_INTERVAL = 60  # seconds
+HEARTBEAT_MAX_EVENT_SECONDS = 300
+
+# Calendar views read the CalendarEntry index (see calendar_app.calendar_index).
+# Run rebuild_calendar_index once after deploying; False uses per-type queries.
+CALENDAR_USE_INDEX = get_bool_env('CALENDAR_USE_INDEX', True)
+CALENDAR_ICAL_CACHE_TIMEOUT = 900  # seconds
+
+# Stored todo feeds (core.todo_feed): staff lists summarise a whole branch,
+# so they are rebuilt at least this often.
+TODO_FEED_STAFF_TTL = 300  # seconds
+
+# Public branch portal landing pages and fragments (branch_portal.landing_cache);
+# signals start a new version on change, so this only bounds stale figures
+# such as student counts.
+BRANCH_PORTAL_CACHE_TIMEOUT = 3600  # seconds
+
+# Certificate issuance queue (certificates.issuance): completions are issued
+# in batches by the worker, which also renders and registers the PDFs.
+CERTIFICATE_ISSUE_BATCH_SIZE = 200
+CERTIFICATE_ISSUE_MAX_ATTEMPTS = 5
+CERTIFICATE_RENDER_ON_ISSUE = True
+
+# Grade rows written per transaction by the gradebook sync (gradebook.sync)
+GRADEBOOK_SYNC_CHUNK_SIZE = 1000
+
+# Per-request metrics (core.performance.request_metrics): queries, SQL time,
+# repeated statements, cache lookups and wall time per URL name. Budgets are
+# keyed by URL name, 'default' covering the rest; 'log' or 'raise' when over.
+REQUEST_METRICS_ENABLED = get_bool_env('REQUEST_METRICS_ENABLED', True)
+REQUEST_METRICS_IGNORE_PATHS = ['/static/', '/media/', '/favicon.ico']
+REQUEST_METRICS_DUPLICATE_THRESHOLD = 5
+REQUEST_METRICS_BUDGETS = {
+    'default': {'queries': 200, 'duplicates': 50, 'wall_ms': 5000},
+}
+REQUEST_METRICS_BUDGET_ACTION = 'log'
+
+# Direct uploads (core.direct_uploads): 's3' presigns requests to the media
+# bucket, 'local' takes a PUT through Django, 'auto' follows DEFAULT_FILE_STORAGE.
+# Uploads over the threshold go as S3 multipart uploads of PART_SIZE parts.
+DIRECT_UPLOAD_BACKEND = get_env('DIRECT_UPLOAD_BACKEND', 'auto')
+DIRECT_UPLOAD_EXPIRE = 3600
+DIRECT_UPLOAD_MULTIPART_THRESHOLD = 100 * 1024 * 1024
+DIRECT_UPLOAD_PART_SIZE = 64 * 1024 * 1024
+
+# Deadline scanner (lms_notifications.deadlines): days before a deadline to
+# send due-soon reminders, per entity type; certificates also follow each
+# recipient's reminder intervals. A first scan starts INITIAL_LOOKBACK seconds back.
+# Scans of one entity type hold a lease of SCAN_LOCK_TIMEOUT seconds.
+DEADLINE_REMINDER_LEADS = {
+    'assignment': [2],
+    'quiz': [1],
+    'topic': [2],
+    'course': [7],
+    'certificate': [30, 7, 1],
+}
+DEADLINE_INITIAL_LOOKBACK = 24 * 60 * 60
+DEADLINE_SCAN_LOCK_TIMEOUT = 30 * 60
+
 # ==============================================
 # EMAIL CONFIGURATION
 # ==============================================
@@ -636,6 +711,15 @@ MEDIA_URL = '/media/'
 # Use environment variable for media root (server-independent)
 MEDIA_ROOT = get_env('MEDIA_ROOT', str(BASE_DIR / 'media_local'))  # Fallback for development only
 
+# Course video delivery: 'proxy' streams through Django, 'redirect' sends a
+# presigned S3 URL, 'cdn' a CloudFront signed URL and 'accel' an nginx
+# X-Accel-Redirect (see courses.media_delivery)
+VIDEO_DELIVERY_MODE = get_env('VIDEO_DELIVERY_MODE', 'proxy')
+VIDEO_URL_EXPIRE = 4 * 3600  # signed URLs must outlive a viewing session
+VIDEO_CDN_DOMAIN = get_env('VIDEO_CDN_DOMAIN')
+VIDEO_CDN_KEY_ID = get_env('VIDEO_CDN_KEY_ID')
+VIDEO_CDN_PRIVATE_KEY = get_env('VIDEO_CDN_PRIVATE_KEY')
+
 # ==============================================
 # CELERY CONFIGURATION
 # ==============================================
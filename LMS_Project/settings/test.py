@@ -64,6 +64,13 @@ CSRF_COOKIE_SECURE = False  # HTTP for testing
 CSRF_COOKIE_HTTPONLY = False
 CSRF_COOKIE_SAMESITE = 'Lax'
 
+# Fail requests that go over their query budget; wall-clock budgets depend on
+# the machine running the tests, so they are left out here
+REQUEST_METRICS_BUDGETS = {
+    'default': {'queries': 200, 'duplicates': 50},
+}
+REQUEST_METRICS_BUDGET_ACTION = 'raise'
+
 # Cache configuration - Use database cache for testing
 CACHES = {
     'default': {
@@ -27,7 +27,7 @@ from core.rbac_validators import ConditionalAccessValidator
 from core.rbac_decorators import require_globaladmin
 from .zoom import get_zoom_client
 # Import AI token models
-from tinymce_editor.models import BranchAITokenLimit, AITokenUsage
+from tinymce_editor.models import BranchAITokenLimit, AITokenUsage, AITokenUsageDay, AITokenUsageMonth
 
 logger = logging.getLogger(__name__)
 
@@ -1357,6 +1357,9 @@ LMS System''',
                     # Global Admin: Show all branches with AI token data
                     branches = Branch.objects.all().select_related('business').prefetch_related('ai_token_limits')
                     ai_branches_data = []
+                    month_usage = dict(AITokenUsageMonth.objects.filter(
+                        month=AITokenUsageMonth.current_month()
+                    ).values_list('branch_id', 'tokens_used'))
                     
                     for branch in branches:
                         # Get or create token limits for this branch
@@ -1364,6 +1367,7 @@ LMS System''',
                             branch=branch,
                             defaults={'monthly_token_limit': 10000, 'is_unlimited': False}
                         )
+                        token_limits.cache_month_usage(month_usage.get(branch.id, 0))
                         
                         # Get current month usage
                         current_usage = token_limits.get_current_month_usage()
@@ -1410,18 +1414,15 @@ LMS System''',
                         user__branch=branch
                     ).select_related('user').order_by('-created_at')[:10]
                     
-                    # Get top users this month  
-                    now = timezone.now()
-                    start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-                    
-                    top_users = AITokenUsage.objects.filter(
+                    # Get top users this month from the daily rollups
+                    top_users = AITokenUsageDay.objects.filter(
                         user__branch=branch,
-                        created_at__gte=start_of_month
+                        day__gte=AITokenUsageMonth.current_month()
                     ).values(
                         'user__username', 'user__email'
                     ).annotate(
                         total_tokens=Sum('tokens_used'),
-                        request_count=Count('id')
+                        request_count=Sum('request_count')
                     ).order_by('-total_tokens')[:5]
                     
                     ai_token_data = {
@@ -0,0 +1,209 @@
+"""
+File delivery for assignment submissions.
+
+Single files are served through the storage backend: storages that can sign
+URLs (MediaS3Storage) redirect to a short-lived presigned URL, other storages
+stream the file from storage.open() instead of a local path.
+
+stream_submissions_zip() builds a "download all submissions" archive on the
+fly. Files are fetched from storage by a small thread pool that keeps at most
+ASSIGNMENT_ZIP_PREFETCH files open ahead of the one being written, while the
+archive itself is written to the response chunk by chunk, so memory use does
+not grow with the number or size of submissions.
+"""
+
+import logging
+import os
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponseRedirect, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+
+def presigned_download_url(field_file, filename):
+    """Return a presigned attachment URL for field_file, or None if its storage can't sign"""
+    storage = field_file.storage
+    if not hasattr(storage, 'presigned_url'):
+        return None
+    try:
+        return storage.presigned_url(
+            field_file.name,
+            expire=getattr(settings, 'ASSIGNMENT_DOWNLOAD_URL_EXPIRE', 300),
+            parameters={'ResponseContentDisposition': content_disposition_header(True, filename)}
+        )
+    except Exception as e:
+        logger.warning(f"Could not presign download URL for {field_file.name}: {e}")
+        return None
+
+
+def file_download_response(field_file, filename=None):
+    """Attachment response for a stored file that works with local and S3 storage"""
+    filename = filename or os.path.basename(field_file.name)
+    url = presigned_download_url(field_file, filename)
+    if url:
+        return HttpResponseRedirect(url)
+    return FileResponse(
+        field_file.storage.open(field_file.name, 'rb'),
+        as_attachment=True,
+        filename=filename
+    )
+
+
+class _ZipSink:
+    """Unseekable file object collecting the bytes written by ZipFile"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _open_entry(arcname, field_file):
+    # Reading the first chunk makes remote storages start the download in
+    # the pool thread.
+    handle = field_file.storage.open(field_file.name, 'rb')
+    try:
+        first_chunk = handle.read(CHUNK_SIZE)
+    except Exception:
+        handle.close()
+        raise
+    return arcname, handle, first_chunk
+
+
+def _discard(future):
+    if future.cancel():
+        return
+    try:
+        _, handle, _ = future.result()
+        handle.close()
+    except Exception:
+        pass
+
+
+def iter_zip(entries, prefetch=None):
+    """
+    Yield a zip archive of entries, an iterable of (arcname, field_file).
+
+    Files that can't be read from storage are skipped and listed in
+    MISSING_FILES.txt at the end of the archive.
+    """
+    if prefetch is None:
+        prefetch = getattr(settings, 'ASSIGNMENT_ZIP_PREFETCH', 4)
+    prefetch = max(1, prefetch)
+
+    entries = iter(entries)
+    sink = _ZipSink()
+    missing = []
+    pending = deque()
+    executor = ThreadPoolExecutor(max_workers=prefetch, thread_name_prefix='assignment-zip')
+
+    def fill():
+        while len(pending) < prefetch:
+            entry = next(entries, None)
+            if entry is None:
+                return
+            pending.append(executor.submit(_open_entry, *entry))
+
+    try:
+        # Stored, not deflated: submissions are mostly already-compressed
+        # documents and images.
+        with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+            fill()
+            while pending:
+                future = pending.popleft()
+                fill()
+                try:
+                    arcname, handle, chunk = future.result()
+                except Exception as e:
+                    logger.warning(f"Skipping submission file in zip download: {e}")
+                    missing.append(str(e))
+                    continue
+                with handle, archive.open(arcname, 'w', force_zip64=True) as target:
+                    while chunk:
+                        target.write(chunk)
+                        yield sink.drain()
+                        chunk = handle.read(CHUNK_SIZE)
+                yield sink.drain()
+
+            if missing:
+                archive.writestr('MISSING_FILES.txt', '\n'.join(missing) + '\n')
+        # Central directory, written when the archive closes
+        yield sink.drain()
+    finally:
+        for future in pending:
+            _discard(future)
+        executor.shutdown(wait=False)
+
+
+def _safe_name(name):
+    return os.path.basename((name or '').replace('\\', '/')) or 'file'
+
+
+def submission_zip_entries(submissions):
+    """
+    (arcname, field_file) pairs for the submission files and file iterations
+    of submissions, grouped in one folder per learner.
+    """
+    from .models import FileSubmissionIteration
+
+    submissions = list(submissions)
+    iterations = {}
+    for iteration in FileSubmissionIteration.objects.filter(
+        submission__in=submissions
+    ).order_by('iteration_number'):
+        iterations.setdefault(iteration.submission_id, []).append(iteration)
+
+    used = set()
+
+    def unique(arcname):
+        base, ext = os.path.splitext(arcname)
+        candidate, n = arcname, 1
+        while candidate in used:
+            n += 1
+            candidate = f"{base} ({n}){ext}"
+        used.add(candidate)
+        return candidate
+
+    entries = []
+    for submission in submissions:
+        user = submission.user
+        folder = _safe_name(user.username if user else f'submission_{submission.pk}')
+        if submission.submission_file:
+            name = _safe_name(submission.submission_file.name)
+            entries.append((unique(f"{folder}/{name}"), submission.submission_file))
+        for iteration in iterations.get(submission.pk, []):
+            if not iteration.file:
+                continue
+            name = _safe_name(iteration.file_name or iteration.file.name)
+            entries.append((
+                unique(f"{folder}/iteration_{iteration.iteration_number}/{name}"),
+                iteration.file
+            ))
+    return entries
+
+
+def stream_submissions_zip(submissions, filename):
+    """Streaming attachment response with the files of submissions"""
+    response = StreamingHttpResponse(
+        iter_zip(submission_zip_entries(submissions)),
+        content_type='application/zip'
+    )
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    return response
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.24 on 2026-10-18 21:50
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignments', '0006_auto_20251111_0047'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='assignmentinteractionlog',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -1546,7 +1546,8 @@ class AssignmentInteractionLog(models.Model):
         blank=True,
         help_text="Duration of interaction in seconds (for timed interactions)"
     )
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when the event happened; rows are written in batches by core.event_ingestion
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         app_label = 'assignments'
@@ -1562,7 +1563,14 @@ class AssignmentInteractionLog(models.Model):
 
     @classmethod
     def log_interaction(cls, assignment, user, interaction_type, request=None, submission=None, **extra_data):
-        """Helper method to easily log interactions"""
+        """
+        Helper method to easily log interactions.
+
+        The row is written in a batch by core.event_ingestion once the current
+        transaction commits, subject to the log's sampling policy.
+        """
+        from core.event_ingestion import log_event
+
         interaction_data = extra_data
         ip_address = None
         user_agent = None
@@ -1573,7 +1581,8 @@ class AssignmentInteractionLog(models.Model):
             user_agent = request.META.get('HTTP_USER_AGENT', '')
             session_key = request.session.session_key
         
-        return cls.objects.create(
+        log_event(
+            cls,
             assignment=assignment,
             user=user,
             interaction_type=interaction_type,
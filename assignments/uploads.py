@@ -0,0 +1,71 @@
+"""
+Direct upload policy for assignment submission files (see core.direct_uploads).
+
+The submission form uploads the file first and posts the upload token as
+upload_token instead of the file; the submission views claim it with
+core.direct_uploads.claim() for the assignment it was checked against.
+"""
+
+import os
+import uuid
+
+from core.direct_uploads import UploadPolicy, UploadRejected, size_display
+
+from .models import Assignment, secure_filename
+
+DEFAULT_MAX_FILE_SIZE = 629145600  # 600MB, as Assignment.max_file_size
+
+# Detected types never accepted, whatever the assignment allows
+BLOCKED_TYPES = (
+    'application/x-dosexec', 'application/x-executable', 'application/x-msdownload',
+    'application/x-mach-binary', 'application/x-sharedlib', 'application/x-elf',
+    'text/x-shellscript', 'text/x-msdos-batch',
+)
+
+# Extensions whose content has to be detected as the matching type
+SIGNATURE_PREFIXES = {
+    '.pdf': ('application/pdf',),
+    '.jpg': ('image/',), '.jpeg': ('image/',), '.png': ('image/',), '.gif': ('image/',), '.webp': ('image/',),
+    '.mp4': ('video/',), '.mov': ('video/',), '.avi': ('video/',), '.wmv': ('video/',),
+}
+
+
+class AssignmentFilePolicy(UploadPolicy):
+    source_app = 'assignments'
+    source_model = 'AssignmentSubmission'
+
+    def prepare(self, user, filename, content_type, size, context):
+        try:
+            assignment = Assignment.objects.get(pk=int(context.get('assignment_id')))
+        except (Assignment.DoesNotExist, TypeError, ValueError):
+            raise UploadRejected('Assignment not found.')
+        if not assignment.is_available_for_user(user):
+            raise UploadRejected("You don't have permission to submit to this assignment.")
+
+        allowed = [ext.strip().lower() for ext in assignment.allowed_file_types.split(',') if ext.strip()]
+        extension = os.path.splitext(filename)[1].lower()
+        if allowed and extension not in allowed:
+            raise UploadRejected(f'File type not allowed. Allowed types: {assignment.allowed_file_types}')
+
+        context = {'assignment_id': assignment.id, 'max_size': assignment.max_file_size or DEFAULT_MAX_FILE_SIZE}
+        if size > self.get_max_size(context):
+            raise UploadRejected(
+                f'File size exceeds the maximum allowed size ({size_display(self.get_max_size(context))})'
+            )
+        return context
+
+    def get_max_size(self, context):
+        return context.get('max_size') or DEFAULT_MAX_FILE_SIZE
+
+    def storage_name(self, user, filename, context):
+        # The prefix keeps names unique, as S3 storage does not check for existing objects
+        return (
+            f"assignment_content/submissions/{context['assignment_id']}/{user.id}/"
+            f"{uuid.uuid4().hex[:8]}_{secure_filename(filename)[:200]}"
+        )
+
+    def signature_allowed(self, detected, upload):
+        if detected in BLOCKED_TYPES:
+            return False
+        prefixes = SIGNATURE_PREFIXES.get(os.path.splitext(upload.original_filename)[1].lower())
+        return not prefixes or detected.startswith(prefixes)
@@ -22,6 +22,7 @@ urlpatterns = [
     path('submission/<int:submission_id>/view-pdf/', views.view_pdf_inline, name='view_pdf_inline'),
     path('submission/<int:submission_id>/test-pdf/', views.test_pdf_viewer, name='test_pdf_viewer'),
     path('download/<str:file_type>/<int:file_id>/', views.download_file, name='download_file'),
+    path('<int:assignment_id>/submissions/download/', views.download_all_submissions, name='download_all_submissions'),
     path('question/<int:question_id>/delete/', views.question_delete, name='question_delete'),
     path('question/create/<int:quiz_id>/', views.question_create, name='question_create'),
     
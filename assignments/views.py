@@ -16,8 +16,8 @@ from django.core.paginator import Paginator
 from django.db import transaction, IntegrityError
 from django.db.models import Count, F, Max, OuterRef, Q, Subquery
 from django.http import (FileResponse, Http404, HttpResponse,
-                         HttpResponseForbidden, HttpResponseRedirect,
-                         JsonResponse)
+                         HttpResponseBadRequest, HttpResponseForbidden,
+                         HttpResponseRedirect, JsonResponse)
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils import timezone
@@ -48,6 +48,7 @@ from .models import (Assignment, AssignmentAttachment, AssignmentCourse,
                     TextQuestionAnswerIteration, TextQuestionIterationFeedback,
                     TextSubmissionAnswerIteration, TextSubmissionIterationFeedback,
                     AssignmentInteractionLog, AssignmentSessionLog)
+from core.direct_uploads import StoredUpload, claim as claim_upload, find as find_upload
 from core.rbac_validators import ConditionalAccessValidator
 
 # Configure logger
@@ -1038,8 +1039,17 @@ def assignment_detail(request, assignment_id):
                 messages.error(request, "You cannot edit this submission. It has already been submitted and is being graded, or has been graded.")
                 return redirect('assignments:assignment_detail', assignment_id=assignment.id)
         
+        if submission and submission.status != 'returned' and not submission.can_be_edited_by_student():
+            messages.error(request, "You cannot edit this submission. It has already been submitted.")
+            return redirect('assignments:assignment_detail', assignment_id=assignment.id)
+        
         # FILE UPLOAD VALIDATION: Made optional - removed required validation
-        uploaded_file = request.FILES.get('submission_file')
+        # The form uploads large files straight to storage and posts the upload token instead;
+        # it is claimed only once the submission is known to be editable
+        uploaded_file = request.FILES.get('submission_file') or claim_upload(
+            request.user, request.POST.get('upload_token'), 'assignment_file',
+            context={'assignment_id': assignment.id}
+        )
         submission_text = request.POST.get('submission_text', '').strip()
         
         # Note: File and text submissions are now optional to allow flexible submission workflows
@@ -1125,8 +1135,8 @@ def assignment_detail(request, assignment_id):
                     messages.error(request, "There was an error submitting your assignment. Please try again.")
                     return redirect('assignments:assignment_detail', assignment_id=assignment.id)
                 
-            elif submission.can_be_edited_by_student():
-                # Update existing submission (only if it can be edited)
+            else:
+                # Update existing submission (editability was checked above)
                 submission.submission_text = submission_text
                 
                 if uploaded_file:
@@ -1173,9 +1183,6 @@ def assignment_detail(request, assignment_id):
                 submission.last_modified = timezone.now()
                 submission.status = 'not_graded'
                 submission.save()
-            else:
-                messages.error(request, "You cannot edit this submission. It has already been submitted.")
-                return redirect('assignments:assignment_detail', assignment_id=assignment.id)
         else:
             # Create new submission - use get_or_create to prevent duplicates
             try:
@@ -2302,13 +2309,78 @@ def download_file(request, file_type, file_id):
     if not file_field:
         return HttpResponseForbidden("No file available")
     
-    file_path = file_field.path
-    content_type, encoding = mimetypes.guess_type(file_path)
-    content_type = content_type or 'application/octet-stream'
-    
-    response = HttpResponse(open(file_path, 'rb'), content_type=content_type)
-    response['Content-Disposition'] = f'attachment; filename="{os.path.basename(file_path)}"'
-    return response
+    # Served through the storage backend (presigned redirect on S3) rather than a local path
+    from .downloads import file_download_response
+    return file_download_response(file_field)
+
+
+def _can_download_all_submissions(request, assignment):
+    """Same access rules as the submissions table of assignment_detail and download_file"""
+    user = request.user
+    if user.is_superuser or user.role in ['globaladmin', 'superadmin']:
+        return True
+    if user.role == 'instructor':
+        if assignment.user == user:
+            return True
+        course = assignment.course
+        if not course:
+            topic_assignment = assignment.topicassignment_set.first()
+            if topic_assignment:
+                course = get_topic_course(topic_assignment.topic)
+        return bool(course) and check_instructor_management_access(user, course)
+    if user.role == 'admin':
+        from core.branch_filters import BranchFilterManager
+        effective_branch = BranchFilterManager.get_effective_branch(user, request)
+        if assignment.user and assignment.user.branch == effective_branch:
+            return True
+        return bool(assignment.course) and assignment.course.branch == effective_branch
+    return False
+
+
+@login_required
+def download_all_submissions(request, assignment_id):
+    """
+    Stream a zip of all submission files of an assignment.
+
+    Optional filters: ?status=<submission status> and ?group=<group id>.
+    """
+    assignment = get_object_or_404(Assignment, id=assignment_id)
+    if not _can_download_all_submissions(request, assignment):
+        return HttpResponseForbidden("You don't have access to these submissions")
+
+    submissions = AssignmentSubmission.objects.filter(
+        assignment=assignment
+    ).select_related('user').order_by('user__username', '-submitted_at')
+
+    status = request.GET.get('status')
+    if status:
+        valid_statuses = dict(AssignmentSubmission._meta.get_field('status').choices)
+        if status not in valid_statuses:
+            return HttpResponseBadRequest("Invalid submission status")
+        submissions = submissions.filter(status=status)
+
+    group_id = request.GET.get('group')
+    if group_id:
+        if not group_id.isdigit():
+            return HttpResponseBadRequest("Invalid group")
+        submissions = submissions.filter(
+            user__group_memberships__group_id=int(group_id),
+            user__group_memberships__is_active=True
+        ).distinct()
+
+    AssignmentInteractionLog.log_interaction(
+        assignment=assignment,
+        user=request.user,
+        interaction_type='file_download',
+        request=request,
+        file_type='all_submissions',
+        status=status,
+        group=group_id
+    )
+
+    from .downloads import stream_submissions_zip
+    filename = f"{slugify(assignment.title) or 'assignment'}-submissions.zip"
+    return stream_submissions_zip(submissions, filename)
 
 @login_required
 def view_pdf_inline(request, submission_id):
@@ -2543,8 +2615,12 @@ def submit_assignment(request, assignment_id):
         
         try:
             with transaction.atomic():
-                # Handle file upload
-                uploaded_file = request.FILES.get('submission_file')
+                # Handle file upload, either posted or uploaded directly to storage;
+                # a direct upload is claimed once the checks below pass
+                uploaded_file = request.FILES.get('submission_file') or find_upload(
+                    request.user, request.POST.get('upload_token'), 'assignment_file',
+                    context={'assignment_id': assignment.id}
+                )
                 submission_text = request.POST.get('submission_text', '').strip()
                 
                 # Import required models for validation
@@ -2635,6 +2711,14 @@ def submit_assignment(request, assignment_id):
                         messages.error(request, f'File size exceeds the maximum allowed size ({max_size_mb:.1f}MB)')
                         return redirect('assignments:submit_assignment', assignment_id=assignment_id)
                 
+                # The checks passed; hand the direct upload out to this submission
+                if isinstance(uploaded_file, StoredUpload) and not claim_upload(
+                    request.user, uploaded_file.token, 'assignment_file',
+                    context={'assignment_id': assignment.id}
+                ):
+                    messages.error(request, 'This upload has already been submitted. Please upload the file again.')
+                    return redirect('assignments:submit_assignment', assignment_id=assignment_id)
+                
                 # Log file upload if provided
                 if uploaded_file:
                     AssignmentInteractionLog.log_interaction(
@@ -4227,6 +4311,8 @@ def assignment_detailed_report(request, assignment_id):
     # Get Interaction Logs
     interaction_logs = []
     if submission:
+        # Event logs are written in batches (core.event_ingestion); the most
+        # recent interactions may not be listed yet
         interaction_logs = AssignmentInteractionLog.objects.filter(
             assignment=assignment,
             user=student
@@ -0,0 +1,95 @@
+"""
+Cache of public branch portal landing pages.
+
+Every portal has a version stamp, and so does the site as a whole (for
+categories and global settings shown on every portal). A stamp is a
+random version plus the time it was set, which serves as the page's
+Last-Modified. Signals in branch_portal.signals replace the stamps on
+commit when a course, category or portal section changes.
+
+Anonymous visitors get the whole rendered page from the cache, keyed by
+slug, so a cached hit costs two cache reads and no database queries.
+Signed-in visitors get the page rendered for them, but the sections,
+course grid and pre-footer come from {% cache %} fragments keyed by the
+same version.
+"""
+
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+GENERATION_KEY = 'branch_portal:landing:generation'
+
+
+def _portal_key(portal_id):
+    return f'branch_portal:landing:portal:{portal_id}'
+
+
+def _page_key(slug):
+    return f'branch_portal:landing:page:{slug}'
+
+
+def cache_timeout():
+    return getattr(settings, 'BRANCH_PORTAL_CACHE_TIMEOUT', 3600)
+
+
+def _new_stamp():
+    return {'version': uuid.uuid4().hex[:12], 'modified': time.time()}
+
+
+def stamp(portal_id=None):
+    """(version, last_modified) of a portal's landing page, or of the site-wide part only"""
+    keys = [GENERATION_KEY] + ([_portal_key(portal_id)] if portal_id else [])
+    found = cache.get_many(keys)
+    stamps = []
+    for key in keys:
+        current = found.get(key)
+        if current is None:
+            # Missing or evicted: start a new version so nothing older is served
+            cache.add(key, _new_stamp(), None)
+            current = cache.get(key) or _new_stamp()
+        stamps.append(current)
+    return '.'.join(s['version'] for s in stamps), max(s['modified'] for s in stamps)
+
+
+def get_page(slug):
+    """The cached page for a slug if it is still the current version, else None"""
+    entry = cache.get(_page_key(slug))
+    if entry is None or entry['version'] != stamp(entry['portal_id'])[0]:
+        return None
+    return entry
+
+
+def store_page(slug, portal_id, version, last_modified, body):
+    entry = {
+        'portal_id': portal_id,
+        'version': version,
+        'last_modified': int(last_modified),
+        'etag': f'"{hashlib.md5(body.encode()).hexdigest()}"',
+        'body': body,
+    }
+    cache.set(_page_key(slug), entry, cache_timeout())
+    return entry
+
+
+def invalidate_portal(portal_id):
+    """Start a new version of a portal's page once the transaction commits"""
+    if portal_id:
+        transaction.on_commit(lambda: cache.set(_portal_key(portal_id), _new_stamp(), None))
+
+
+def invalidate_branch(branch_id):
+    from .models import BranchPortal
+
+    if branch_id:
+        for portal_id in BranchPortal.objects.filter(branch_id=branch_id).values_list('pk', flat=True):
+            invalidate_portal(portal_id)
+
+
+def invalidate_all():
+    """Start a new version of every portal's page once the transaction commits"""
+    transaction.on_commit(lambda: cache.set(GENERATION_KEY, _new_stamp(), None))
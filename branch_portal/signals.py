@@ -1,9 +1,17 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from django.utils.text import slugify
+from account_settings.models import GlobalAdminSettings
 from branches.models import Branch
-from .models import BranchPortal, Cart
+from categories.models import CourseCategory
+from course_reviews.models import CourseReview
+from courses.models import Course, CourseTopic
+from . import landing_cache
+from .models import (
+    BranchPortal, Cart, MainContentSection, FeatureGridSection, FeatureGridItem,
+    PreFooterSection, CustomMenuLink, SocialMediaIcon
+)
 
 User = get_user_model()
 
@@ -32,4 +40,67 @@ def create_branch_portal(sender, instance, created, **kwargs):
 def create_user_cart(sender, instance, created, **kwargs):
     """Create a Cart when a new User is created"""
     if created:
-        Cart.objects.create(user=instance) 
\ No newline at end of file
+        Cart.objects.create(user=instance) 
+
+
+# Landing page cache invalidation (see branch_portal.landing_cache)
+
+def _invalidate_course_branch(course_id):
+    landing_cache.invalidate_branch(
+        Course.objects.filter(pk=course_id).values_list('branch_id', flat=True).first()
+    )
+
+
+@receiver(pre_save, sender=Course)
+def remember_course_branch(sender, instance, **kwargs):
+    if instance.pk:
+        instance._portal_previous_branch_id = Course.objects.filter(pk=instance.pk).values_list('branch_id', flat=True).first()
+
+
+@receiver([post_save, post_delete], sender=Course)
+def invalidate_course_portal(sender, instance, **kwargs):
+    landing_cache.invalidate_branch(instance.branch_id)
+    previous = getattr(instance, '_portal_previous_branch_id', None)
+    if previous and previous != instance.branch_id:
+        landing_cache.invalidate_branch(previous)
+
+
+@receiver([post_save, post_delete], sender=CourseTopic)
+@receiver([post_save, post_delete], sender=CourseReview)
+def invalidate_course_detail_portal(sender, instance, **kwargs):
+    """Lesson counts and ratings are shown on the course cards"""
+    _invalidate_course_branch(instance.course_id)
+
+
+@receiver([post_save, post_delete], sender=Branch)
+def invalidate_branch_portal(sender, instance, **kwargs):
+    landing_cache.invalidate_branch(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=BranchPortal)
+@receiver([post_save, post_delete], sender=MainContentSection)
+@receiver([post_save, post_delete], sender=FeatureGridSection)
+@receiver([post_save, post_delete], sender=PreFooterSection)
+def invalidate_portal_section(sender, instance, **kwargs):
+    landing_cache.invalidate_portal(instance.pk if sender is BranchPortal else instance.portal_id)
+
+
+@receiver([post_save, post_delete], sender=FeatureGridItem)
+def invalidate_feature_item_portal(sender, instance, **kwargs):
+    landing_cache.invalidate_portal(
+        FeatureGridSection.objects.filter(pk=instance.feature_section_id).values_list('portal_id', flat=True).first()
+    )
+
+
+@receiver([post_save, post_delete], sender=CustomMenuLink)
+@receiver([post_save, post_delete], sender=SocialMediaIcon)
+def invalidate_pre_footer_item_portal(sender, instance, **kwargs):
+    landing_cache.invalidate_portal(
+        PreFooterSection.objects.filter(pk=instance.pre_footer_id).values_list('portal_id', flat=True).first()
+    )
+
+
+@receiver([post_save, post_delete], sender=CourseCategory)
+@receiver(post_save, sender=GlobalAdminSettings)
+def invalidate_all_portals(sender, instance, **kwargs):
+    landing_cache.invalidate_all()
@@ -1,11 +1,15 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import HttpResponseForbidden, JsonResponse
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
+from django.template.loader import render_to_string
 from django.urls import reverse
-from django.db.models import Q, Count, Sum, F, ExpressionWrapper, DecimalField
+from django.db.models import Q, Avg, Count, Sum, F, ExpressionWrapper, DecimalField, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Coalesce, Round
 from django.views.decorators.http import require_POST, require_http_methods
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
 from django.core.paginator import Paginator
 from django.views.decorators.csrf import csrf_exempt
 from django.core.files.storage import default_storage
@@ -22,6 +26,7 @@ from .models import (
     PreFooterSection, CustomMenuLink, SocialMediaIcon
 )
 from users.views import get_or_assign_branch_for_global_admin
+from . import landing_cache
 
 def marketing_landing_page(request):
     """Display the marketing landing page (without authentication)"""
@@ -42,16 +47,74 @@ def marketing_landing_page(request):
         else:
             course.discounted_price = course.price
     
+    landing_version, _ = landing_cache.stamp()
     context = {
         'featured_courses': featured_courses,
+        'landing_version': landing_version,
+        'cache_timeout': landing_cache.cache_timeout(),
     }
     
     return render(request, 'branch_portal/landing_page.html', context)
 
+def _landing_courses(branch):
+    """Visible courses of a branch with prices, lesson, student and review figures computed in SQL"""
+    from courses.models import CourseTopic, CourseEnrollment
+    from course_reviews.models import CourseReview
+
+    def per_course(queryset, aggregate):
+        return Subquery(
+            queryset.filter(course=OuterRef('pk')).order_by().values('course').annotate(value=aggregate).values('value')
+        )
+
+    published_reviews = CourseReview.objects.filter(is_published=True)
+    return Course.objects.filter(
+        branch=branch,
+        is_active=True,
+        catalog_visibility='visible'
+    ).select_related('category', 'instructor').annotate(
+        discounted_price=Cast(
+            ExpressionWrapper(
+                F('price') * (Value(100) - F('discount_percentage')) / Value(100),
+                output_field=DecimalField()
+            ),
+            DecimalField(max_digits=10, decimal_places=2)
+        ),
+        topic_count=Coalesce(per_course(CourseTopic.objects.all(), Count('pk')), 0),
+        student_count=Coalesce(per_course(CourseEnrollment.objects.all(), Count('pk')), 0),
+        review_count=Coalesce(per_course(published_reviews, Count('pk')), 0),
+        review_average=Coalesce(
+            per_course(published_reviews, Round(Avg('average_rating'), 2)),
+            Value(0),
+            output_field=DecimalField()
+        ),
+    ).order_by('-created_at')
+
+
+def _landing_response(request, entry):
+    """A cached landing page, or 304 Not Modified when the visitor's copy is current"""
+    response = HttpResponse(entry['body'])
+    response['ETag'] = entry['etag']
+    response['Last-Modified'] = http_date(entry['last_modified'])
+    response = get_conditional_response(
+        request, etag=entry['etag'], last_modified=entry['last_modified'], response=response
+    )
+    patch_vary_headers(response, ['Cookie'])
+    patch_cache_control(response, public=True, max_age=60)
+    return response
+
+
 def portal_landing(request, slug):
     """Display the branch landing page"""
-    portal = get_object_or_404(BranchPortal, slug=slug, is_active=True)
+    anonymous = not request.user.is_authenticated
+    if anonymous and request.method in ('GET', 'HEAD'):
+        entry = landing_cache.get_page(slug)
+        if entry is not None:
+            return _landing_response(request, entry)
+
+    portal = get_object_or_404(BranchPortal.objects.select_related('branch'), slug=slug, is_active=True)
     branch = portal.branch
+    # Read before querying, so a change committed while rendering leaves this copy stale
+    landing_version, last_modified = landing_cache.stamp(portal.pk)
     
     # Check if order management is enabled for this branch
     order_management_enabled = getattr(branch, 'order_management_enabled', False)
@@ -61,23 +124,8 @@ def portal_landing(request, slug):
     global_settings = GlobalAdminSettings.get_settings()
     order_management_globally_enabled = global_settings.order_management_enabled if global_settings else False
     
-    # Get branch courses - ensure we include courses with price or discount_percentage
-    courses = Course.objects.filter(
-        branch=branch,
-        is_active=True,
-        catalog_visibility='visible'
-    ).order_by('-created_at')
-    
-    # Calculate discounted prices for courses with discounts
-    for course in courses:
-        # Ensure price is a Decimal type for proper comparison
-        course.price = Decimal(str(course.price)) if course.price else Decimal('0.00')
-        
-        if course.discount_percentage > 0:
-            discount_factor = Decimal(1) - (Decimal(course.discount_percentage) / Decimal(100))
-            course.discounted_price = (course.price * discount_factor).quantize(Decimal('0.01'))
-        else:
-            course.discounted_price = course.price
+    # Querysets stay lazy: cached template fragments skip them entirely
+    courses = _landing_courses(branch)
     
     # Get categories for branch courses
     categories = CourseCategory.objects.filter(
@@ -124,9 +172,16 @@ def portal_landing(request, slug):
         'order_management_enabled': order_management_enabled and order_management_globally_enabled,
         'show_pricing': order_management_enabled and order_management_globally_enabled,
         'show_cart': order_management_enabled and order_management_globally_enabled,
+        'landing_version': landing_version,
+        'cache_timeout': landing_cache.cache_timeout(),
     }
     
-    return render(request, 'branch_portal/landing_page.html', context)
+    if not anonymous:
+        return render(request, 'branch_portal/landing_page.html', context)
+    
+    body = render_to_string('branch_portal/landing_page.html', context, request=request)
+    entry = landing_cache.store_page(slug, portal.pk, landing_version, last_modified, body)
+    return _landing_response(request, entry)
 
 @login_required
 def manage_portal(request, branch_id=None):
@@ -3,4 +3,7 @@ from django.apps import AppConfig
 class CalendarConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'calendar_app'
-    verbose_name = 'Calendar' 
\ No newline at end of file
+    verbose_name = 'Calendar'
+
+    def ready(self):
+        import calendar_app.signals
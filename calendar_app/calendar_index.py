@@ -0,0 +1,178 @@
+"""
+Calendar activity index.
+
+CalendarEntry holds one row per dated source object and audience: an
+assignment due date per course it belongs to, a conference for its course
+(or for its creator's branch when it has none), a course or topic end date,
+a quiz expiry, and a personal event for its owner. Signals in
+calendar_app.signals re-sync a source's rows on commit whenever it changes,
+and rebuild_calendar_index rebuilds the whole table.
+
+CalendarService reads a date range for a user with one scan over the
+(course|branch|user, start) indexes instead of one query per source type.
+"""
+
+import logging
+from datetime import datetime
+
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+SOURCE_MODELS = {
+    'assignment': 'assignments.Assignment',
+    'conference': 'conferences.Conference',
+    'course_deadline': 'courses.Course',
+    'topic_deadline': 'courses.Topic',
+    'quiz': 'quiz.Quiz',
+    'personal_event': 'calendar_app.CalendarEvent',
+}
+
+
+def _aware(day, time=None):
+    return timezone.make_aware(datetime.combine(day, time or datetime.min.time()))
+
+
+def _assignment_entries(assignment):
+    from assignments.models import AssignmentCourse
+
+    if not assignment.is_active or not assignment.due_date:
+        return []
+    links = list(
+        AssignmentCourse.objects.filter(assignment=assignment).select_related('course')
+    )
+    if not links:
+        return []
+    # Ordered primary first, matching Assignment.course
+    course_title = links[0].course.title
+    return [
+        dict(course_id=link.course_id, start=assignment.due_date, title=assignment.title,
+             course_title=course_title, url=f'/assignments/{assignment.id}/')
+        for link in links
+    ]
+
+
+def _conference_entries(conference):
+    if conference.status != 'published' or not conference.date or not conference.start_time:
+        return []
+    entry = dict(
+        start=_aware(conference.date, conference.start_time),
+        title=conference.title,
+        course_title=conference.course.title if conference.course_id else 'General',
+        url=f'/conferences/{conference.id}/',
+    )
+    if conference.course_id:
+        entry['course_id'] = conference.course_id
+    else:
+        branch_id = getattr(conference.created_by, 'branch_id', None) if conference.created_by_id else None
+        if not branch_id:
+            return []
+        entry['branch_id'] = branch_id
+    return [entry]
+
+
+def _course_entries(course):
+    if not course.end_date:
+        return []
+    return [dict(course_id=course.id, start=course.end_date, title=course.title,
+                 course_title=course.title, description='Course access expires',
+                 url=f'/courses/{course.id}/')]
+
+
+def _topic_entries(topic):
+    if topic.status != 'active' or not topic.end_date:
+        return []
+    courses = list(topic.courses.all().only('id', 'title'))
+    course_title = ', '.join(course.title for course in courses[:2])
+    return [
+        dict(course_id=course.id, start=_aware(topic.end_date), title=topic.title,
+             course_title=course_title, description='Topic access expires',
+             url=f'/courses/topic/{topic.id}/')
+        for course in courses
+    ]
+
+
+def _quiz_entries(quiz):
+    if not quiz.is_active or not quiz.expires_at or not quiz.course_id:
+        return []
+    return [dict(course_id=quiz.course_id, start=quiz.expires_at, title=quiz.title,
+                 course_title=quiz.course.title, url=f'/quiz/{quiz.id}/')]
+
+
+def _event_entries(event):
+    return [dict(user_id=event.created_by_id, start=event.start_date, title=event.title,
+                 description=event.description or '', course_title='Personal',
+                 url=f'/calendar/events/{event.id}/')]
+
+
+BUILDERS = {
+    'assignment': _assignment_entries,
+    'conference': _conference_entries,
+    'course_deadline': _course_entries,
+    'topic_deadline': _topic_entries,
+    'quiz': _quiz_entries,
+    'personal_event': _event_entries,
+}
+
+
+def _build(source_type, obj):
+    from .models import CalendarEntry
+
+    return [
+        CalendarEntry(source_type=source_type, source_id=obj.pk, **fields)
+        for fields in BUILDERS[source_type](obj)
+    ]
+
+
+def sync_source(source_type, source_id):
+    """Replace the entries of one source object (none when it no longer exists)"""
+    from django.apps import apps
+    from .models import CalendarEntry
+
+    model = apps.get_model(SOURCE_MODELS[source_type])
+    obj = model.objects.filter(pk=source_id).first()
+    entries = _build(source_type, obj) if obj is not None else []
+    with transaction.atomic():
+        CalendarEntry.objects.filter(source_type=source_type, source_id=source_id).delete()
+        CalendarEntry.objects.bulk_create(entries)
+
+
+def schedule_sync(source_type, source_id):
+    """Re-sync a source's entries once the current transaction commits"""
+    def _sync():
+        try:
+            sync_source(source_type, source_id)
+        except Exception as e:
+            logger.error(f"Calendar index sync failed for {source_type} {source_id}: {e}")
+
+    transaction.on_commit(_sync)
+
+
+def rebuild(source_types=None, batch_size=500):
+    """Rebuild the entries of the given source types (all by default)"""
+    from django.apps import apps
+    from .models import CalendarEntry
+
+    counts = {}
+    for source_type in source_types or SOURCE_MODELS:
+        model = apps.get_model(SOURCE_MODELS[source_type])
+        queryset = model.objects.all()
+        if source_type == 'conference':
+            queryset = queryset.select_related('course', 'created_by')
+        elif source_type == 'quiz':
+            queryset = queryset.select_related('course')
+
+        with transaction.atomic():
+            CalendarEntry.objects.filter(source_type=source_type).delete()
+            pending = []
+            created = 0
+            for obj in queryset.iterator(chunk_size=batch_size):
+                pending.extend(_build(source_type, obj))
+                if len(pending) >= batch_size:
+                    CalendarEntry.objects.bulk_create(pending)
+                    created += len(pending)
+                    pending = []
+            CalendarEntry.objects.bulk_create(pending)
+            counts[source_type] = created + len(pending)
+    return counts
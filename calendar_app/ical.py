@@ -0,0 +1,160 @@
+"""
+Per-user iCalendar feed of calendar activities.
+
+Calendar clients fetch /calendar/feed/<token>.ics without a session; the
+token signs the user id together with the user's CalendarFeedKey, so resetting
+the key revokes every URL handed out before. The rendered feed is cached per user for
+CALENDAR_ICAL_CACHE_TIMEOUT seconds together with its ETag, and requests
+carrying a matching If-None-Match get 304 Not Modified.
+"""
+
+import hashlib
+import logging
+import secrets
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.decorators import login_required
+from django.core import signing
+from django.core.cache import cache
+from django.http import Http404, HttpResponse, HttpResponseNotModified, JsonResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_POST
+
+from .models import CalendarFeedKey
+
+logger = logging.getLogger(__name__)
+
+FEED_SALT = 'calendar_app.ical_feed'
+PAST_DAYS = 30
+FUTURE_DAYS = 180
+# Activities that fall on a date rather than at a time
+ALL_DAY_TYPES = {'topic_deadline'}
+
+
+def _new_key():
+    return secrets.token_urlsafe(32)
+
+
+def feed_token(user):
+    feed_key, _ = CalendarFeedKey.objects.get_or_create(user=user, defaults={'key': _new_key()})
+    return signing.dumps([user.pk, feed_key.key], salt=FEED_SALT)
+
+
+def reset_feed_key(user):
+    """Issue a new feed key, revoking the user's previous feed URLs"""
+    CalendarFeedKey.objects.update_or_create(user=user, defaults={'key': _new_key()})
+
+
+def feed_url(request, user):
+    return request.build_absolute_uri(reverse('calendar_app:ical_feed', args=[feed_token(user)]))
+
+
+def _cache_key(user_id):
+    return f"calendar_ical:{user_id}"
+
+
+def _escape(value):
+    return (
+        str(value or '')
+        .replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+    )
+
+
+def _utc(day, time):
+    start = datetime.combine(day, time)
+    if timezone.is_naive(start):
+        start = timezone.make_aware(start)
+    return start.astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _dtstart(activity):
+    if activity['type'] in ALL_DAY_TYPES or activity.get('time') is None:
+        # A floating date, so clients show it on that day in any time zone
+        return f"DTSTART;VALUE=DATE:{activity['date']:%Y%m%d}"
+    return f"DTSTART:{_utc(activity['date'], activity['time'])}"
+
+
+def render_feed(user, site_url=''):
+    """iCalendar text of the user's activities from PAST_DAYS ago to FUTURE_DAYS ahead"""
+    from core.utils.calendar_service import CalendarService
+
+    today = timezone.localdate()
+    activities = CalendarService(user).get_user_calendar_data(
+        today - timedelta(days=PAST_DAYS), today + timedelta(days=FUTURE_DAYS)
+    )
+    stamp = timezone.now().astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//LMS//Calendar//EN',
+        'CALSCALE:GREGORIAN',
+        'X-WR-CALNAME:LMS Calendar',
+    ]
+    for activity in activities:
+        uid_source = f"{activity['type']}:{activity.get('url', '')}:{activity['date']}"
+        uid = hashlib.sha1(uid_source.encode()).hexdigest()
+        lines.extend([
+            'BEGIN:VEVENT',
+            f'UID:{uid}@lms',
+            f'DTSTAMP:{stamp}',
+            _dtstart(activity),
+            f"SUMMARY:{_escape(activity['title'])}",
+            f"DESCRIPTION:{_escape(activity.get('description', ''))}",
+            f"CATEGORIES:{_escape(activity['type'])}",
+        ])
+        if activity.get('url'):
+            lines.append(f"URL:{site_url}{activity['url']}")
+        lines.append('END:VEVENT')
+    lines.append('END:VCALENDAR')
+    return '\r\n'.join(lines) + '\r\n'
+
+
+def ical_feed(request, token):
+    """Serve the iCalendar feed of the user the token was signed for"""
+    try:
+        user_id, key = signing.loads(token, salt=FEED_SALT)
+    except (signing.BadSignature, TypeError, ValueError):
+        raise Http404('Unknown calendar feed')
+    feed_key = CalendarFeedKey.objects.filter(user_id=user_id).values_list('key', flat=True).first()
+    if feed_key is None or not constant_time_compare(feed_key, str(key)):
+        raise Http404('Unknown calendar feed')
+    user = get_user_model().objects.filter(pk=user_id, is_active=True).select_related('branch').first()
+    if user is None:
+        raise Http404('Unknown calendar feed')
+
+    cached = cache.get(_cache_key(user.pk))
+    if cached is None:
+        body = render_feed(user, site_url=request.build_absolute_uri('/').rstrip('/'))
+        cached = {'etag': f'"{hashlib.md5(body.encode()).hexdigest()}"', 'body': body}
+        cache.set(_cache_key(user.pk), cached, getattr(settings, 'CALENDAR_ICAL_CACHE_TIMEOUT', 900))
+
+    if cached['etag'] in [tag.strip() for tag in request.META.get('HTTP_IF_NONE_MATCH', '').split(',')]:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(cached['body'], content_type='text/calendar; charset=utf-8')
+        response['Content-Disposition'] = 'inline; filename="calendar.ics"'
+    response['ETag'] = cached['etag']
+    response['Cache-Control'] = 'private, max-age=300'
+    return response
+
+
+@login_required
+def ical_feed_link(request):
+    """Subscription URL of the current user's iCalendar feed"""
+    return JsonResponse({'success': True, 'url': feed_url(request, request.user)})
+
+
+@login_required
+@require_POST
+def ical_feed_reset(request):
+    """Revoke the current user's feed URL and return a new one"""
+    reset_feed_key(request.user)
+    return JsonResponse({'success': True, 'url': feed_url(request, request.user)})
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from calendar_app.calendar_index import SOURCE_MODELS, rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the calendar activity index from assignments, conferences, deadlines, quizzes and events'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--type',
+            action='append',
+            dest='types',
+            help=f"Only rebuild these source types ({', '.join(SOURCE_MODELS)})"
+        )
+
+    def handle(self, *args, **options):
+        types = options['types']
+        unknown = set(types or []) - set(SOURCE_MODELS)
+        if unknown:
+            raise CommandError(f"Unknown source type(s): {', '.join(sorted(unknown))}")
+        for source_type, count in rebuild(types).items():
+            self.stdout.write(f"{source_type}: {count} entries")
+        self.stdout.write(self.style.SUCCESS('Calendar index rebuilt'))
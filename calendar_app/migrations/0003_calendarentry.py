@@ -0,0 +1,38 @@
+# Generated by Django 4.2.24 on 2026-10-18 22:45
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('branches', '__first__'),
+        ('courses', '0009_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('calendar_app', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CalendarEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_type', models.CharField(choices=[('assignment', 'Assignment'), ('conference', 'Conference'), ('course_deadline', 'Course Deadline'), ('topic_deadline', 'Topic Deadline'), ('quiz', 'Quiz'), ('personal_event', 'Personal Event')], max_length=20)),
+                ('source_id', models.PositiveIntegerField()),
+                ('start', models.DateTimeField()),
+                ('title', models.CharField(max_length=800)),
+                ('description', models.TextField(blank=True, default='')),
+                ('course_title', models.TextField(blank=True, default='')),
+                ('url', models.CharField(max_length=255)),
+                ('branch', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='branches.branch')),
+                ('course', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='courses.course')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['start'],
+                'indexes': [models.Index(fields=['course', 'start'], name='calentry_course_start_idx'), models.Index(fields=['branch', 'start'], name='calentry_branch_start_idx'), models.Index(fields=['user', 'start'], name='calentry_user_start_idx'), models.Index(fields=['source_type', 'source_id'], name='calentry_source_idx')],
+            },
+        ),
+    ]
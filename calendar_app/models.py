@@ -54,4 +54,62 @@ class EventCategory(models.Model):
         verbose_name_plural = "Event Categories"
     
     def __str__(self):
-        return self.name 
\ No newline at end of file
+        return self.name 
+
+class CalendarEntry(models.Model):
+    """
+    Denormalized calendar activity, one row per source object and audience.
+
+    Maintained from assignments, conferences, course and topic end dates,
+    quizzes and personal events by calendar_app.calendar_index. Exactly one
+    of course, branch or user is set: the audience that sees the entry.
+    """
+    SOURCE_CHOICES = [
+        ('assignment', 'Assignment'),
+        ('conference', 'Conference'),
+        ('course_deadline', 'Course Deadline'),
+        ('topic_deadline', 'Topic Deadline'),
+        ('quiz', 'Quiz'),
+        ('personal_event', 'Personal Event'),
+    ]
+
+    source_type = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    source_id = models.PositiveIntegerField()
+    course = models.ForeignKey('courses.Course', on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    branch = models.ForeignKey('branches.Branch', on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    start = models.DateTimeField()
+    title = models.CharField(max_length=800)
+    description = models.TextField(blank=True, default='')
+    course_title = models.TextField(blank=True, default='')
+    url = models.CharField(max_length=255)
+
+    class Meta:
+        app_label = 'calendar_app'
+        ordering = ['start']
+        indexes = [
+            models.Index(fields=['course', 'start'], name='calentry_course_start_idx'),
+            models.Index(fields=['branch', 'start'], name='calentry_branch_start_idx'),
+            models.Index(fields=['user', 'start'], name='calentry_user_start_idx'),
+            models.Index(fields=['source_type', 'source_id'], name='calentry_source_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_source_type_display()}: {self.title} ({self.start:%Y-%m-%d})"
+
+
+class CalendarFeedKey(models.Model):
+    """
+    Secret signed into a user's iCalendar feed URL (calendar_app.ical).
+
+    Replacing the key revokes every feed URL handed out before.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='+')
+    key = models.CharField(max_length=64)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        app_label = 'calendar_app'
+
+    def __str__(self):
+        return f"Calendar feed key of {self.user}"
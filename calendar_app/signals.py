@@ -0,0 +1,65 @@
+"""
+Keep the calendar activity index (CalendarEntry) in step with its sources.
+"""
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from assignments.models import Assignment, AssignmentCourse
+from conferences.models import Conference
+from courses.models import Course, CourseTopic, Topic
+from quiz.models import Quiz
+
+from .calendar_index import schedule_sync
+from .models import CalendarEvent, CalendarEntry
+
+SOURCE_SENDERS = {
+    Assignment: 'assignment',
+    Conference: 'conference',
+    Course: 'course_deadline',
+    Topic: 'topic_deadline',
+    Quiz: 'quiz',
+    CalendarEvent: 'personal_event',
+}
+
+
+def sync_calendar_source(sender, instance, **kwargs):
+    """Re-sync the entries of a saved or deleted source object"""
+    schedule_sync(SOURCE_SENDERS[sender], instance.pk)
+
+
+for _sender in SOURCE_SENDERS:
+    post_save.connect(sync_calendar_source, sender=_sender, dispatch_uid=f'calendar_index_save_{_sender.__name__}')
+    post_delete.connect(sync_calendar_source, sender=_sender, dispatch_uid=f'calendar_index_delete_{_sender.__name__}')
+
+
+@receiver([post_save, post_delete], sender=AssignmentCourse)
+def sync_assignment_courses(sender, instance, **kwargs):
+    """Assignment entries exist per linked course"""
+    schedule_sync('assignment', instance.assignment_id)
+
+
+@receiver([post_save, post_delete], sender=CourseTopic)
+def sync_topic_courses(sender, instance, **kwargs):
+    """Topic entries exist per course the topic belongs to"""
+    schedule_sync('topic_deadline', instance.topic_id)
+
+
+@receiver(pre_save, sender=Course)
+def remember_course_title(sender, instance, **kwargs):
+    if instance.pk:
+        instance._calendar_previous_title = Course.objects.filter(pk=instance.pk).values_list('title', flat=True).first()
+
+
+@receiver(post_save, sender=Course)
+def refresh_course_titles(sender, instance, created, **kwargs):
+    """Entries copy course titles; re-sync the ones that show a renamed course"""
+    previous = getattr(instance, '_calendar_previous_title', None)
+    if created or previous is None or previous == instance.title:
+        return
+    CalendarEntry.objects.filter(
+        course=instance, source_type__in=['conference', 'quiz']
+    ).update(course_title=instance.title)
+    for assignment_id in AssignmentCourse.objects.filter(course=instance).values_list('assignment_id', flat=True):
+        schedule_sync('assignment', assignment_id)
+    for topic_id in CourseTopic.objects.filter(course=instance).values_list('topic_id', flat=True):
+        schedule_sync('topic_deadline', topic_id)
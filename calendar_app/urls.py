@@ -1,5 +1,6 @@
 from django.urls import path
 from . import views
+from .ical import ical_feed, ical_feed_link, ical_feed_reset
 
 app_name = 'calendar_app'
 
@@ -12,4 +13,8 @@ urlpatterns = [
     # API endpoints for dashboard calendar
     path('api/activities/', views.get_activities, name='get_activities'),
     path('api/daily/<str:date>/', views.get_daily_activities, name='get_daily_activities'),
+    # iCalendar subscription feed
+    path('api/feed-link/', ical_feed_link, name='ical_feed_link'),
+    path('api/feed-link/reset/', ical_feed_reset, name='ical_feed_reset'),
+    path('feed/<str:token>.ics', ical_feed, name='ical_feed'),
 ] 
\ No newline at end of file
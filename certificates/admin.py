@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import CertificateTemplate, CertificateElement, IssuedCertificate
+from .models import CertificateTemplate, CertificateElement, IssuedCertificate, CertificateIssueRequest
 
 class CertificateElementInline(admin.TabularInline):
     model = CertificateElement
@@ -24,3 +24,10 @@ class IssuedCertificateAdmin(admin.ModelAdmin):
     list_filter = ('is_revoked', 'issue_date')
     search_fields = ('certificate_number', 'recipient__username', 'recipient__email', 'course_name')
     date_hierarchy = 'issue_date'
+
+@admin.register(CertificateIssueRequest)
+class CertificateIssueRequestAdmin(admin.ModelAdmin):
+    list_display = ('enrollment', 'status', 'certificate', 'attempts', 'updated_at')
+    list_filter = ('status',)
+    search_fields = ('enrollment__user__username', 'enrollment__course__title', 'last_error')
+    raw_id_fields = ('enrollment', 'certificate')
@@ -0,0 +1,435 @@
+"""
+Certificate issuance queue.
+
+Course completions used to create their IssuedCertificate inline, in
+whichever request saved the enrollment, matching existing certificates by
+course title and looking the issuer up every time. A completion now only
+writes a CertificateIssueRequest (enqueue) and the worker (process_queue,
+run by the Celery task or the process_certificate_queue command):
+
+1. claims pending requests in batches with SKIP LOCKED, so concurrent
+   workers never share a row,
+2. resolves each course's template and issuer once per batch,
+3. bulk-creates the certificates; the (recipient, course) unique constraint
+   means a retried or concurrent batch cannot issue twice,
+4. renders each new certificate's PDF and registers it in storage usage.
+   Both steps can be repeated safely, so failed requests are just retried.
+"""
+
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from core.utils.pdf_processor import get_weasyprint
+from courses.models import CourseEnrollment
+
+from .models import CertificateElement, CertificateIssueRequest, IssuedCertificate
+
+logger = logging.getLogger(__name__)
+
+# Set while a worker run is queued, so a bulk completion starts one run
+DISPATCH_KEY = 'certificates:issuance:dispatched'
+DISPATCH_TIMEOUT = 60
+
+# A4 landscape page for certificate PDFs (WeasyPrint)
+PDF_PAGE_CSS = '''
+    @page {
+        size: A4 landscape;
+        margin: 0;
+    }
+
+    /* Color correction for WeasyPrint 44 - preserve exact colors */
+    * {
+        -webkit-print-color-adjust: exact !important;
+        print-color-adjust: exact !important;
+        color-adjust: exact !important;
+    }
+
+    img {
+        -webkit-print-color-adjust: exact !important;
+        print-color-adjust: exact !important;
+        color-rendering: optimizeQuality !important;
+        image-rendering: -webkit-optimize-contrast !important;
+    }
+
+    .field-placeholder {
+        position: absolute !important;
+        background: transparent !important;
+        border: none !important;
+        z-index: 100 !important;
+        display: flex !important;
+        align-items: center !important;
+        justify-content: center !important;
+        transform: translate(-50%, -50%) !important;
+        text-align: center !important;
+        padding: 0 !important;
+        width: auto !important;
+    }
+
+    /* Ensure fields appear exactly as styled in template */
+    .field-placeholder[data-element-type="name"],
+    .field-placeholder[data-element-type="course"],
+    .field-placeholder[data-element-type="grade"],
+    .field-placeholder[data-element-type="certificate_id"],
+    .field-placeholder[data-element-type="text"],
+    .field-placeholder[data-element-type="signature"] {
+        transform: translate(-50%, -50%) !important;
+    }
+'''
+
+
+def batch_size():
+    return getattr(settings, 'CERTIFICATE_ISSUE_BATCH_SIZE', 200)
+
+
+def max_attempts():
+    return getattr(settings, 'CERTIFICATE_ISSUE_MAX_ATTEMPTS', 5)
+
+
+def new_certificate_number():
+    return f"CERT-{uuid.uuid4().hex[:8].upper()}"
+
+
+def enqueue(enrollment_ids, requeue=False):
+    """
+    Queue certificates for completed enrollments and start a worker run once
+    the transaction commits. Enrollments already queued are left as they are,
+    except failed ones (and, with requeue, finished or skipped ones), which
+    are queued again.
+    """
+    enrollment_ids = {pk for pk in enrollment_ids if pk}
+    if not enrollment_ids:
+        return
+
+    queued = dict(
+        CertificateIssueRequest.objects.filter(
+            enrollment_id__in=enrollment_ids
+        ).values_list('enrollment_id', 'status')
+    )
+    new_ids = enrollment_ids - queued.keys()
+    retry_statuses = {CertificateIssueRequest.STATUS_FAILED}
+    if requeue:
+        retry_statuses |= {CertificateIssueRequest.STATUS_DONE, CertificateIssueRequest.STATUS_SKIPPED}
+    retry_ids = [pk for pk, status in queued.items() if status in retry_statuses]
+    if not (new_ids or retry_ids):
+        return
+
+    # A concurrent completion of the same enrollment already queued it
+    CertificateIssueRequest.objects.bulk_create(
+        [CertificateIssueRequest(enrollment_id=pk) for pk in new_ids],
+        ignore_conflicts=True,
+    )
+    if retry_ids:
+        CertificateIssueRequest.objects.filter(
+            enrollment_id__in=retry_ids,
+            status__in=retry_statuses,
+        ).update(
+            status=CertificateIssueRequest.STATUS_PENDING,
+            attempts=0,
+            last_error='',
+            updated_at=timezone.now(),
+        )
+    transaction.on_commit(dispatch)
+
+
+def dispatch():
+    """Queue one worker run; calls made before it starts are absorbed into it"""
+    if not cache.add(DISPATCH_KEY, True, DISPATCH_TIMEOUT):
+        return
+
+    from .tasks import process_certificate_queue
+    try:
+        process_certificate_queue.delay()
+    except Exception as e:
+        cache.delete(DISPATCH_KEY)
+        logger.warning(f"Could not queue certificate issuance, leaving it to the periodic run: {str(e)}")
+
+
+def process_queue(limit=None):
+    """
+    Work through the queue until every request has been tried once.
+
+    Returns:
+        dict of counts: issued, existing, skipped, finished, failed
+    """
+    cache.delete(DISPATCH_KEY)
+    size = limit or batch_size()
+    counts = {'issued': 0, 'existing': 0, 'skipped': 0, 'finished': 0, 'failed': 0}
+
+    # Requests that fail stay pending, so walk by id rather than re-reading the head
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            requests = list(
+                CertificateIssueRequest.objects.select_for_update(skip_locked=True)
+                .filter(status=CertificateIssueRequest.STATUS_PENDING, id__gt=last_id)
+                .order_by('id')[:size]
+            )
+            if not requests:
+                break
+            for key, value in issue_batch(requests).items():
+                counts[key] += value
+        last_id = requests[-1].id
+
+    last_id = 0
+    while True:
+        request_ids = list(
+            CertificateIssueRequest.objects.filter(
+                status=CertificateIssueRequest.STATUS_ISSUED, id__gt=last_id
+            ).order_by('id').values_list('id', flat=True)[:size]
+        )
+        if not request_ids:
+            break
+        for request_id in request_ids:
+            outcome = finish(request_id)
+            if outcome:
+                counts[outcome] += 1
+        last_id = request_ids[-1]
+
+    return counts
+
+
+def _fail(request, error, now):
+    request.attempts += 1
+    request.last_error = str(error)[:2000]
+    request.updated_at = now
+    if request.attempts >= max_attempts():
+        request.status = CertificateIssueRequest.STATUS_FAILED
+
+
+def issue_batch(requests):
+    """
+    Create the certificates for a batch of locked, pending requests.
+    Runs inside the caller's transaction.
+    """
+    now = timezone.now()
+    counts = {'issued': 0, 'existing': 0, 'skipped': 0, 'failed': 0}
+    enrollments = CourseEnrollment.objects.select_related('course__certificate_template').in_bulk(
+        [request.enrollment_id for request in requests]
+    )
+
+    eligible = []
+    for request in requests:
+        enrollment = enrollments[request.enrollment_id]
+        course = enrollment.course
+        if not enrollment.completed:
+            request.status = CertificateIssueRequest.STATUS_SKIPPED
+            request.last_error = 'Enrollment is not completed'
+        elif not (course.issue_certificate and course.certificate_template_id):
+            request.status = CertificateIssueRequest.STATUS_SKIPPED
+            request.last_error = 'Course does not issue certificates'
+        else:
+            eligible.append((request, enrollment))
+            continue
+        request.updated_at = now
+        counts['skipped'] += 1
+
+    user_ids = {enrollment.user_id for _, enrollment in eligible}
+    courses = {enrollment.course_id: enrollment.course for _, enrollment in eligible}
+
+    def existing_certificates():
+        return {
+            (recipient_id, course_id): pk
+            for recipient_id, course_id, pk in IssuedCertificate.objects.filter(
+                recipient_id__in=user_ids, course_id__in=courses
+            ).values_list('recipient_id', 'course_id', 'id')
+        }
+
+    existing = existing_certificates()
+    # Certificates issued before they were linked to a course match on title
+    legacy = {
+        (recipient_id, course_name): pk
+        for recipient_id, course_name, pk in IssuedCertificate.objects.filter(
+            course__isnull=True,
+            recipient_id__in=user_ids,
+            course_name__in={course.title for course in courses.values()},
+        ).values_list('recipient_id', 'course_name', 'id')
+    }
+
+    fallback_issuer_id = None
+    if any(course.instructor_id is None for course in courses.values()):
+        fallback_issuer_id = get_user_model().objects.filter(
+            is_superuser=True
+        ).order_by('id').values_list('id', flat=True).first()
+
+    new_certificates = []
+    for request, enrollment in eligible:
+        course = courses[enrollment.course_id]
+        certificate_id = (
+            existing.get((enrollment.user_id, course.pk))
+            or legacy.get((enrollment.user_id, course.title))
+        )
+        if certificate_id:
+            request.certificate_id = certificate_id
+            request.status = CertificateIssueRequest.STATUS_DONE
+            request.updated_at = now
+            counts['existing'] += 1
+            continue
+
+        template = course.certificate_template
+        expiry_date = None
+        if template.validity_days > 0:
+            expiry_date = now + timedelta(days=template.validity_days)
+        new_certificates.append(IssuedCertificate(
+            template=template,
+            recipient_id=enrollment.user_id,
+            issued_by_id=course.instructor_id or fallback_issuer_id or enrollment.user_id,
+            course=course,
+            course_name=course.title,
+            certificate_number=new_certificate_number(),
+            issue_date=now,
+            expiry_date=expiry_date,
+        ))
+
+    if new_certificates:
+        # Conflicts are certificates issued meanwhile (or a clashing number);
+        # the re-read below tells them apart
+        IssuedCertificate.objects.bulk_create(new_certificates, ignore_conflicts=True)
+        created = {(c.recipient_id, c.course_id) for c in new_certificates}
+        existing = existing_certificates()
+        for request, enrollment in eligible:
+            key = (enrollment.user_id, enrollment.course_id)
+            if request.status != CertificateIssueRequest.STATUS_PENDING or key not in created:
+                continue
+            if key in existing:
+                request.certificate_id = existing[key]
+                request.status = CertificateIssueRequest.STATUS_ISSUED
+                request.updated_at = now
+                counts['issued'] += 1
+            else:
+                _fail(request, 'Certificate could not be created', now)
+                counts['failed'] += 1
+
+    CertificateIssueRequest.objects.bulk_update(
+        requests, ['status', 'certificate', 'attempts', 'last_error', 'updated_at']
+    )
+    logger.info(
+        f"Certificate issuance batch: {counts['issued']} issued, {counts['existing']} already issued, "
+        f"{counts['skipped']} skipped, {counts['failed']} failed"
+    )
+    return counts
+
+
+def finish(request_id):
+    """
+    Render the PDF of an issued request's certificate and register it in
+    storage usage. Returns 'finished', 'failed', or None when another worker
+    holds the request.
+    """
+    with transaction.atomic():
+        request = (
+            CertificateIssueRequest.objects.select_for_update(skip_locked=True, of=('self',))
+            .select_related('certificate__template', 'certificate__recipient__branch')
+            .filter(pk=request_id, status=CertificateIssueRequest.STATUS_ISSUED)
+            .first()
+        )
+        if request is None:
+            return None
+
+        now = timezone.now()
+        certificate = request.certificate
+        try:
+            if certificate is not None:
+                if getattr(settings, 'CERTIFICATE_RENDER_ON_ISSUE', True) and not certificate.certificate_file:
+                    store_pdf(certificate)
+                certificate.register_storage()
+                # bulk_create sends no post_save; receivers (SharePoint sync)
+                # see the new certificate here, with its file
+                post_save.send(
+                    sender=IssuedCertificate, instance=certificate, created=True,
+                    update_fields=None, raw=False, using=CertificateIssueRequest.objects.db,
+                )
+            request.status = CertificateIssueRequest.STATUS_DONE
+            request.last_error = ''
+            request.updated_at = now
+            outcome = 'finished'
+        except Exception as e:
+            logger.error(f"Error finishing certificate request {request_id}: {str(e)}")
+            _fail(request, e, now)
+            outcome = 'failed'
+
+        request.save(update_fields=['status', 'attempts', 'last_error', 'updated_at'])
+        return outcome
+
+
+def render_pdf(certificate, base_url=None):
+    """PDF bytes of an issued certificate, or None when WeasyPrint is unavailable"""
+    HTML, CSS = get_weasyprint()
+    if HTML is None or CSS is None:
+        return None
+
+    context = {
+        'certificate': certificate,
+        'elements': CertificateElement.objects.filter(template=certificate.template),
+        'generate_pdf': True,
+    }
+    html = render_to_string('certificates/view_certificate.html', context)
+
+    # Include the PDF-specific stylesheet to avoid WeasyPrint warnings
+    stylesheets = [
+        CSS(string=PDF_PAGE_CSS),
+        CSS(filename=staticfiles_storage.path('core/css/pdf-print.css')),
+    ]
+    return HTML(string=html, base_url=base_url or settings.BASE_URL).write_pdf(
+        stylesheets=stylesheets,
+        presentational_hints=True
+    )
+
+
+def store_pdf(certificate, base_url=None, file_path=None):
+    """
+    Render a certificate's PDF, save it to storage and point certificate_file
+    at it. Returns the stored path, or None when PDFs cannot be rendered.
+    Storage usage is left to the caller (register_storage or
+    schedule_storage_registration).
+    """
+    pdf_file = render_pdf(certificate, base_url)
+    if pdf_file is None:
+        return None
+
+    if not file_path:
+        filename = f"certificate_{certificate.certificate_number}.pdf"
+        file_path = f"issued_certificates/{timezone.now().strftime('%Y/%m/%d')}/{filename}"
+    path = default_storage.save(file_path, ContentFile(pdf_file))
+
+    certificate.certificate_file.name = path
+    IssuedCertificate.objects.filter(pk=certificate.pk).update(
+        certificate_file=path, updated_at=timezone.now()
+    )
+    return path
+
+
+def register_storage(certificate_ids):
+    """Register the stored PDFs of certificates in storage usage"""
+    certificates = IssuedCertificate.objects.filter(
+        pk__in=certificate_ids
+    ).exclude(certificate_file='').select_related('recipient__branch')
+    return sum(1 for certificate in certificates if certificate.register_storage())
+
+
+def schedule_storage_registration(certificate_ids):
+    """Register certificate PDFs in storage usage from a worker once the transaction commits"""
+    certificate_ids = [pk for pk in certificate_ids if pk]
+    if not certificate_ids:
+        return
+
+    def run():
+        from .tasks import register_certificate_storage
+        try:
+            register_certificate_storage.delay(certificate_ids)
+        except Exception as e:
+            logger.warning(f"Could not queue certificate storage registration, registering inline: {str(e)}")
+            register_storage(certificate_ids)
+
+    transaction.on_commit(run)
@@ -0,0 +1,23 @@
+"""
+Management command to issue queued certificates outside Celery
+"""
+from django.core.management.base import BaseCommand
+
+from certificates.issuance import process_queue
+
+
+class Command(BaseCommand):
+    help = (
+        'Issue certificates for queued course completions, then render and register '
+        'their PDFs. Failed requests are retried up to CERTIFICATE_ISSUE_MAX_ATTEMPTS times.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Requests claimed per transaction')
+
+    def handle(self, *args, **options):
+        counts = process_queue(limit=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Issued {counts['issued']} certificates ({counts['existing']} already issued, "
+            f"{counts['skipped']} skipped); finished {counts['finished']} files, {counts['failed']} failures"
+        ))
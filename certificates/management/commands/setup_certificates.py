@@ -3,11 +3,10 @@ Management command to setup certificate generation for courses
 """
 
 from django.core.management.base import BaseCommand, CommandError
-from django.utils import timezone
+from django.db.models import Exists, OuterRef, Q
 from courses.models import Course, CourseEnrollment
+from certificates.issuance import enqueue, process_queue
 from certificates.models import CertificateTemplate, IssuedCertificate
-from users.models import CustomUser
-import uuid
 import logging
 
 logger = logging.getLogger(__name__)
@@ -115,50 +114,28 @@ class Command(BaseCommand):
         
         self.stdout.write(f"Found {courses_with_certificates.count()} courses with certificate generation enabled")
         
-        generated_count = 0
-        for course in courses_with_certificates:
-            # Find completed enrollments without certificates
-            completed_enrollments = CourseEnrollment.objects.filter(
-                course=course,
-                completed=True
-            )
-            
-            for enrollment in completed_enrollments:
-                # Check if certificate already exists
-                existing_cert = IssuedCertificate.objects.filter(
-                    recipient=enrollment.user,
-                    course_name=course.title
-                ).first()
-                
-                if not existing_cert:
-                    if not dry_run:
-                        # Generate unique certificate number
-                        certificate_number = f"CERT-{uuid.uuid4().hex[:8].upper()}"
-                        
-                        # Get course instructor or superuser as issuer
-                        issuer = course.instructor
-                        if not issuer:
-                            issuer = CustomUser.objects.filter(is_superuser=True).first()
-                        
-                        if not issuer:
-                            issuer = enrollment.user  # Fallback
-                        
-                        # Create certificate
-                        certificate = IssuedCertificate.objects.create(
-                            template=course.certificate_template,
-                            recipient=enrollment.user,
-                            issued_by=issuer,
-                            course_name=course.title,
-                            certificate_number=certificate_number,
-                        )
-                        
-                        self.stdout.write(f"  - Generated certificate {certificate.certificate_number} for {enrollment.user.username} in {course.title}")
-                    else:
-                        self.stdout.write(f"  - Would generate certificate for {enrollment.user.username} in {course.title}")
-                    
-                    generated_count += 1
+        # Completed enrollments without a certificate for their course
+        missing = CourseEnrollment.objects.filter(
+            course__in=courses_with_certificates,
+            completed=True
+        ).exclude(
+            Exists(IssuedCertificate.objects.filter(
+                Q(course=OuterRef('course')) | Q(course__isnull=True, course_name=OuterRef('course__title')),
+                recipient=OuterRef('user')
+            ))
+        ).select_related('user', 'course')
+        
+        enrollment_ids = []
+        for enrollment in missing:
+            verb = "Would queue" if dry_run else "Queued"
+            self.stdout.write(f"  - {verb} certificate for {enrollment.user.username} in {enrollment.course.title}")
+            enrollment_ids.append(enrollment.pk)
         
         if dry_run:
-            self.stdout.write(f"DRY RUN: Would generate {generated_count} certificates")
-        else:
-            self.stdout.write(f"Generated {generated_count} certificates")
+            self.stdout.write(f"DRY RUN: Would generate {len(enrollment_ids)} certificates")
+            return
+        
+        # Issue through the certificate queue, in batches
+        enqueue(enrollment_ids, requeue=True)
+        counts = process_queue()
+        self.stdout.write(f"Generated {counts['issued']} certificates ({counts['failed']} failed)")
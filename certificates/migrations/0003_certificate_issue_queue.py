@@ -0,0 +1,69 @@
+# Generated by Django 4.2.24 on 2026-10-18 23:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Link existing certificates to their course where the title matches exactly
+# one course the recipient is enrolled in. Only the earliest certificate of a
+# recipient and course is linked, so duplicates issued so far stay unlinked
+# instead of breaking the unique constraint.
+BACKFILL_SQL = """
+WITH matches AS (
+    SELECT ic.id AS certificate_id, ic.recipient_id, MIN(e.course_id) AS course_id
+    FROM certificates_issuedcertificate ic
+    JOIN courses_courseenrollment e ON e.user_id = ic.recipient_id
+    JOIN courses_course c ON c.id = e.course_id AND c.title = ic.course_name
+    GROUP BY ic.id, ic.recipient_id
+    HAVING COUNT(DISTINCT e.course_id) = 1
+),
+ranked AS (
+    SELECT m.certificate_id, m.course_id,
+           ROW_NUMBER() OVER (
+               PARTITION BY m.recipient_id, m.course_id ORDER BY ic.issue_date, ic.id
+           ) AS position
+    FROM matches m
+    JOIN certificates_issuedcertificate ic ON ic.id = m.certificate_id
+)
+UPDATE certificates_issuedcertificate ic
+SET course_id = ranked.course_id
+FROM ranked
+WHERE ranked.certificate_id = ic.id AND ranked.position = 1;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0009_search_vector'),
+        ('certificates', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issuedcertificate',
+            name='course',
+            field=models.ForeignKey(blank=True, help_text='Course the certificate was issued for; one per recipient and course', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='issued_certificates', to='courses.course'),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+        migrations.AddConstraint(
+            model_name='issuedcertificate',
+            constraint=models.UniqueConstraint(condition=models.Q(('course__isnull', False)), fields=('recipient', 'course'), name='issued_cert_recipient_course_uniq'),
+        ),
+        migrations.CreateModel(
+            name='CertificateIssueRequest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('issued', 'Issued, file pending'), ('done', 'Done'), ('skipped', 'Skipped'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('certificate', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='issue_requests', to='certificates.issuedcertificate')),
+                ('enrollment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='certificate_request', to='courses.courseenrollment')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'id'], name='cert_issue_req_status_idx')],
+            },
+        ),
+    ]
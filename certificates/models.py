@@ -143,6 +143,14 @@ class IssuedCertificate(models.Model):
     template = models.ForeignKey(CertificateTemplate, on_delete=models.CASCADE, related_name='issued_certificates')
     recipient = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='certificates')
     issued_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='issued_certificates')
+    course = models.ForeignKey(
+        'courses.Course',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='issued_certificates',
+        help_text="Course the certificate was issued for; one per recipient and course"
+    )
     course_name = models.CharField(max_length=255, null=True, blank=True)
     grade = models.CharField(max_length=50, null=True, blank=True)
     issue_date = models.DateTimeField(default=timezone.now)
@@ -154,6 +162,15 @@ class IssuedCertificate(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipient', 'course'],
+                condition=models.Q(course__isnull=False),
+                name='issued_cert_recipient_course_uniq'
+            ),
+        ]
+
     def __str__(self):
         return f"Certificate #{self.certificate_number} for {self.recipient.username}"
     
@@ -171,36 +188,46 @@ class IssuedCertificate(models.Model):
         
         super().save(*args, **kwargs)
         
-        # Register issued certificate upload with storage tracking
+        # Storage registration runs in the issuance worker once the row commits
         if self.certificate_file and (is_new or (old_certificate_file != self.certificate_file)):
+            from .issuance import schedule_storage_registration
+            schedule_storage_registration([self.pk])
+    
+    def register_storage(self):
+        """
+        Record the certificate PDF in storage usage. Safe to repeat: a file
+        already registered for the recipient is not counted twice.
+        """
+        if not self.certificate_file:
+            return None
+        
+        from core.utils.storage_manager import StorageManager
+        from django.core.files.storage import default_storage
+        
+        # Get file size
+        file_size = self.certificate_file.size if hasattr(self.certificate_file, 'size') else 0
+        
+        # If file_size is 0, try to get it from storage
+        if file_size == 0:
             try:
-                from core.utils.storage_manager import StorageManager
-                from django.core.files.storage import default_storage
-                
-                # Get file size
-                file_size = self.certificate_file.size if hasattr(self.certificate_file, 'size') else 0
-                
-                # If file_size is 0, try to get it from storage
-                if file_size == 0:
-                    try:
-                        file_size = default_storage.size(self.certificate_file.name)
-                    except Exception:
-                        file_size = 0
-                
-                if file_size > 0 and self.recipient and self.recipient.branch:
-                    StorageManager.register_file_upload(
-                        user=self.recipient,
-                        file_path=self.certificate_file.name,
-                        original_filename=f"Certificate_{self.certificate_number}.pdf",
-                        file_size_bytes=file_size,
-                        content_type='application/pdf',
-                        source_app='certificates',
-                        source_model='IssuedCertificate',
-                        source_object_id=self.id
-                    )
-                    logger.info(f"Registered issued certificate upload: {self.certificate_number} - {file_size} bytes")
-            except Exception as e:
-                logger.error(f"Error registering issued certificate upload: {str(e)}")
+                file_size = default_storage.size(self.certificate_file.name)
+            except Exception:
+                file_size = 0
+        
+        if file_size > 0 and self.recipient and self.recipient.branch:
+            usage = StorageManager.register_file_upload(
+                user=self.recipient,
+                file_path=self.certificate_file.name,
+                original_filename=f"Certificate_{self.certificate_number}.pdf",
+                file_size_bytes=file_size,
+                content_type='application/pdf',
+                source_app='certificates',
+                source_model='IssuedCertificate',
+                source_object_id=self.id
+            )
+            logger.info(f"Registered issued certificate upload: {self.certificate_number} - {file_size} bytes")
+            return usage
+        return None
     
     def delete(self, *args, **kwargs):
         """
@@ -223,3 +250,51 @@ class IssuedCertificate(models.Model):
         
         # Call the parent delete method
         super().delete(*args, **kwargs)
+
+class CertificateIssueRequest(models.Model):
+    """
+    A course completion waiting for its certificate (see certificates.issuance).
+    
+    Rows are written in the completing transaction and worked through in
+    batches: 'pending' rows get their certificate, 'issued' rows get their
+    PDF rendered and storage registered, and failures are retried until
+    CERTIFICATE_ISSUE_MAX_ATTEMPTS.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_ISSUED = 'issued'
+    STATUS_DONE = 'done'
+    STATUS_SKIPPED = 'skipped'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_ISSUED, 'Issued, file pending'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_SKIPPED, 'Skipped'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    enrollment = models.OneToOneField(
+        'courses.CourseEnrollment',
+        on_delete=models.CASCADE,
+        related_name='certificate_request'
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    certificate = models.ForeignKey(
+        IssuedCertificate,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='issue_requests'
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='cert_issue_req_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"Certificate request for enrollment {self.enrollment_id} ({self.status})"
@@ -1,85 +1,48 @@
 """
 Certificate generation signals
-Automatically generate certificates when courses are completed
+Queue certificates when courses are completed
 """
 
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.utils import timezone
 import logging
-import uuid
 
 from courses.models import CourseEnrollment
-from certificates.models import IssuedCertificate
+from certificates.issuance import enqueue
 
 logger = logging.getLogger(__name__)
 
 @receiver(post_save, sender=CourseEnrollment)
 def generate_certificate_on_completion(sender, instance, created, **kwargs):
     """
-    Generate certificate automatically when a course is completed
-    This is a backup signal in case the main completion logic doesn't trigger
+    Queue a certificate when a course is completed.
+    The issuance worker checks the course settings and existing certificates,
+    so nothing beyond the enrollment row is read here.
     """
     # Only process if this is an update (not creation) and completion status changed
     if created:
         return
-    
+
+    # Saves that name their fields and leave out completion cannot complete the course
+    update_fields = kwargs.get('update_fields')
+    if update_fields and 'completed' not in update_fields:
+        return
+
     # Check if completion status changed from False to True
     if not instance.completed:
         return
-    
+
     # Check if completion date was just set (indicating recent completion)
     if not instance.completion_date:
         return
-    
+
     # Only process if completion happened recently (within last hour)
     time_diff = timezone.now() - instance.completion_date
     if time_diff.total_seconds() > 3600:  # More than 1 hour ago
         return
-    
+
     try:
-        course = instance.course
-        user = instance.user
-        
-        # Check if certificate generation is enabled for this course
-        if not (course.issue_certificate and course.certificate_template):
-            logger.info(f"Certificate generation not enabled for course '{course.title}'")
-            return
-        
-        # Check if certificate already exists
-        existing_cert = IssuedCertificate.objects.filter(
-            recipient=user,
-            course_name=course.title
-        ).first()
-        
-        if existing_cert:
-            logger.info(f"Certificate already exists for {user.username} in course '{course.title}': {existing_cert.certificate_number}")
-            return
-        
-        # Generate unique certificate number
-        certificate_number = f"CERT-{uuid.uuid4().hex[:8].upper()}"
-        
-        # Get course instructor or superuser as issuer
-        issuer = course.instructor
-        if not issuer:
-            from django.contrib.auth import get_user_model
-            User = get_user_model()
-            issuer = User.objects.filter(is_superuser=True).first()
-        
-        if not issuer:
-            logger.warning(f"No issuer found for certificate generation for course '{course.title}'")
-            issuer = user  # Fallback to user themselves
-        
-        # Create certificate
-        certificate = IssuedCertificate.objects.create(
-            template=course.certificate_template,
-            recipient=user,
-            issued_by=issuer,
-            course_name=course.title,
-            certificate_number=certificate_number,
-        )
-        
-        logger.info(f"Auto-generated certificate {certificate.certificate_number} for {user.username} for course '{course.title}'")
-        
+        enqueue([instance.pk])
     except Exception as e:
-        logger.error(f"Error generating certificate for {instance.user.username} in course '{instance.course.title}': {str(e)}")
+        logger.error(f"Error queueing certificate for enrollment {instance.pk}: {str(e)}")
@@ -0,0 +1,43 @@
+"""
+Celery tasks for certificate issuance
+Issue queued certificates and register their files off the request thread
+"""
+
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def process_certificate_queue(self):
+    """
+    Issue certificates for queued course completions
+    Started after each completion commits, and periodically as a sweep
+    """
+    from certificates.issuance import process_queue
+
+    try:
+        counts = process_queue()
+        logger.info(f"Processed certificate queue: {counts}")
+        return counts
+
+    except Exception as e:
+        logger.error(f"Error in process_certificate_queue task: {str(e)}")
+        raise self.retry(exc=e)
+
+
+@shared_task(bind=True, max_retries=5, default_retry_delay=60)
+def register_certificate_storage(self, certificate_ids):
+    """
+    Register stored certificate PDFs in storage usage
+    Registration skips files already recorded, so retries are safe
+    """
+    from certificates.issuance import register_storage
+
+    try:
+        return register_storage(certificate_ids)
+
+    except Exception as e:
+        logger.error(f"Error in register_certificate_storage task for {certificate_ids}: {str(e)}")
+        raise self.retry(exc=e)
@@ -17,15 +17,13 @@ from PIL import Image, ImageDraw, ImageFont
 from io import BytesIO
 import base64
 from django.contrib import messages
-from django.template.loader import render_to_string
 from django.db import models
 from django.http import HttpResponseRedirect
-from django.contrib.staticfiles.storage import staticfiles_storage
 
 from .models import CertificateTemplate, CertificateElement, IssuedCertificate
+from .issuance import schedule_storage_registration, store_pdf
 from users.models import CustomUser
 from core.utils.business_filtering import get_superadmin_business_filter
-from core.utils.pdf_processor import get_weasyprint
 from role_management.utils import require_capability, require_any_capability, PermissionManager
 from .s3_direct import upload_certificate_image_direct, update_template_image_path_direct
 
@@ -256,86 +254,12 @@ def view_certificate(request, certificate_id):
                 if certificate.certificate_file:
                     return redirect(certificate.certificate_file.url)
                     
-                # Otherwise, create filename and path
-                filename = f"certificate_{certificate.certificate_number}.pdf"
-                file_path = f"issued_certificates/{timezone.now().strftime('%Y/%m/%d')}/{filename}"
-                
-                # Generate HTML for certificate
-                context = {
-                    'certificate': certificate,
-                    'elements': CertificateElement.objects.filter(template=certificate.template),
-                    'generate_pdf': True,
-                    # No need for a landscape flag as we're always using landscape
-                }
-                html = render_to_string('certificates/view_certificate.html', context)
-                
-                # Generate PDF using weasyprint with landscape orientation
-                HTML, CSS = get_weasyprint()
-                if HTML is None or CSS is None:
+                # Otherwise render and store it
+                path = store_pdf(certificate, base_url=request.build_absolute_uri('/'))
+                if path is None:
                     messages.error(request, "PDF generation is not available. Please contact your administrator.")
                     return redirect('certificates:view_certificate', certificate_id=certificate_id)
-                
-                # Create CSS for landscape orientation - always use A4 landscape
-                page_css = CSS(string='''
-                    @page { 
-                        size: A4 landscape; 
-                        margin: 0; 
-                    }
-                    
-                    /* Color correction for WeasyPrint 44 - preserve exact colors */
-                    * {
-                        -webkit-print-color-adjust: exact !important;
-                        print-color-adjust: exact !important;
-                        color-adjust: exact !important;
-                    }
-                    
-                    img {
-                        -webkit-print-color-adjust: exact !important;
-                        print-color-adjust: exact !important;
-                        color-rendering: optimizeQuality !important;
-                        image-rendering: -webkit-optimize-contrast !important;
-                    }
-                    
-                    .field-placeholder {
-                        position: absolute !important;
-                        background: transparent !important;
-                        border: none !important;
-                        z-index: 100 !important;
-                        display: flex !important;
-                        align-items: center !important;
-                        justify-content: center !important;
-                        transform: translate(-50%, -50%) !important;
-                        text-align: center !important;
-                        padding: 0 !important;
-                        width: auto !important;
-                    }
-                    
-                    /* Ensure fields appear exactly as styled in template */
-                    .field-placeholder[data-element-type="name"],
-                    .field-placeholder[data-element-type="course"],
-                    .field-placeholder[data-element-type="grade"],
-                    .field-placeholder[data-element-type="certificate_id"],
-                    .field-placeholder[data-element-type="text"],
-                    .field-placeholder[data-element-type="signature"] {
-                        transform: translate(-50%, -50%) !important;
-                    }
-                ''')
-                
-                # Include the PDF-specific stylesheet to avoid WeasyPrint warnings
-                pdf_css = CSS(filename=staticfiles_storage.path('core/css/pdf-print.css'))
-                
-                # Generate PDF with landscape orientation
-                pdf_file = HTML(string=html, base_url=request.build_absolute_uri('/')).write_pdf(
-                    stylesheets=[page_css, pdf_css],
-                    presentational_hints=True
-                )
-                
-                # Save to storage
-                path = default_storage.save(file_path, ContentFile(pdf_file))
-                
-                # Update certificate record
-                certificate.certificate_file.name = path
-                certificate.save()
+                schedule_storage_registration([certificate.pk])
                 
                 # Redirect directly to the PDF file
                 return redirect(certificate.certificate_file.url)
@@ -881,82 +805,11 @@ def regenerate_certificate_file(request, certificate_id):
             file_path = f"issued_certificates/{timezone.now().strftime('%Y/%m/%d')}/{filename}"
         
         # Directory creation is handled by storage backend
-        
-        # Generate HTML for certificate
-        context = {
-            'certificate': certificate,
-            'elements': CertificateElement.objects.filter(template=certificate.template),
-            'generate_pdf': True,
-        }
-        html = render_to_string('certificates/view_certificate.html', context)
-        
-        # Generate PDF using weasyprint with landscape orientation
-        HTML, CSS = get_weasyprint()
-        if HTML is None or CSS is None:
+        path = store_pdf(certificate, base_url=request.build_absolute_uri('/'), file_path=file_path)
+        if path is None:
             messages.error(request, "PDF generation is not available. Please contact your administrator.")
             return redirect('certificates:certificates')
-        
-        # Create CSS for landscape orientation - always use A4 landscape
-        page_css = CSS(string='''
-            @page { 
-                size: A4 landscape; 
-                margin: 0; 
-            }
-            
-            /* Color correction for WeasyPrint 44 - preserve exact colors */
-            * {
-                -webkit-print-color-adjust: exact !important;
-                print-color-adjust: exact !important;
-                color-adjust: exact !important;
-            }
-            
-            img {
-                -webkit-print-color-adjust: exact !important;
-                print-color-adjust: exact !important;
-                color-rendering: optimizeQuality !important;
-                image-rendering: -webkit-optimize-contrast !important;
-            }
-            
-            .field-placeholder {
-                position: absolute !important;
-                background: transparent !important;
-                border: none !important;
-                z-index: 100 !important;
-                display: flex !important;
-                align-items: center !important;
-                justify-content: center !important;
-                transform: translate(-50%, -50%) !important;
-                text-align: center !important;
-                padding: 0 !important;
-                width: auto !important;
-            }
-            
-            /* Ensure fields appear exactly as styled in template */
-            .field-placeholder[data-element-type="name"],
-            .field-placeholder[data-element-type="course"],
-            .field-placeholder[data-element-type="grade"],
-            .field-placeholder[data-element-type="certificate_id"],
-            .field-placeholder[data-element-type="text"],
-            .field-placeholder[data-element-type="signature"] {
-                transform: translate(-50%, -50%) !important;
-            }
-        ''')
-        
-        # Include the PDF-specific stylesheet to avoid WeasyPrint warnings
-        pdf_css = CSS(filename=staticfiles_storage.path('core/css/pdf-print.css'))
-        
-        # Generate PDF with landscape orientation
-        pdf_file = HTML(string=html, base_url=request.build_absolute_uri('/')).write_pdf(
-            stylesheets=[page_css, pdf_css],
-            presentational_hints=True
-        )
-        
-        # Save to storage
-        path = default_storage.save(file_path, ContentFile(pdf_file))
-        
-        # Update certificate record
-        certificate.certificate_file.name = path
-        certificate.save()
+        schedule_storage_registration([certificate.pk])
         
         messages.success(request, f"Certificate #{certificate.certificate_number} has been regenerated successfully.")
         
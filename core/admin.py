@@ -1,3 +1,53 @@
 from django.contrib import admin
+from django.template.response import TemplateResponse
+from django.urls import path
 
-# Register your models here.
+from core.models import RequestMetric
+from core.performance.request_metrics import ORDERINGS, worst_offenders
+
+
+@admin.register(RequestMetric)
+class RequestMetricAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'view_name', 'method', 'status_code', 'query_count',
+                    'sql_time_ms', 'wall_time_ms', 'duplicate_queries', 'over_budget')
+    list_filter = ('over_budget', 'method', 'status_code')
+    search_fields = ('view_name',)
+    date_hierarchy = 'created_at'
+    change_list_template = 'admin/core/requestmetric/change_list.html'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        urls = [
+            path(
+                'worst-offenders/',
+                self.admin_site.admin_view(self.worst_offenders_view),
+                name='core_requestmetric_worst_offenders'
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def worst_offenders_view(self, request):
+        """Views ranked by p95 wall time, queries, SQL time or repeated queries"""
+        try:
+            days = min(max(int(request.GET.get('days', 7)), 1), 90)
+        except ValueError:
+            days = 7
+        order = request.GET.get('order', 'wall')
+        if order not in ORDERINGS:
+            order = 'wall'
+
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Slowest views by p95',
+            'opts': self.model._meta,
+            'rows': worst_offenders(days=days, order=order),
+            'days': days,
+            'order': order,
+            'orderings': ORDERINGS,
+        }
+        return TemplateResponse(request, 'admin/core/requestmetric/worst_offenders.html', context)
@@ -12,4 +12,23 @@ class CoreConfig(AppConfig):
             from core.utils import cache_signals
         except ImportError:
             pass
+
+        # Stored todo feeds follow messages, submissions, deadlines and enrollments
+        from core import signals  # noqa: F401
+
+        # Buffered event logs are flushed at the end of requests and when
+        # a worker process exits. The flush must run before Django closes the
+        # request's database connection, or it would open a new one that is
+        # left behind; receivers run in connection order.
+        from django.core.signals import request_finished
+        from django.db import close_old_connections
+        from core import event_ingestion
+        request_finished.disconnect(close_old_connections)
+        request_finished.connect(event_ingestion.flush_if_due, dispatch_uid='event_ingestion_flush')
+        request_finished.connect(close_old_connections)
+        try:
+            from celery.signals import worker_process_shutdown
+            worker_process_shutdown.connect(event_ingestion.flush_at_exit, dispatch_uid='event_ingestion_shutdown')
+        except ImportError:
+            pass
         
\ No newline at end of file
@@ -0,0 +1,180 @@
+"""
+Replay a fixed script of hot-path requests and compare against a baseline.
+
+run_benchmarks logs in as a learner, an instructor and a branch admin of the
+synthetic tenant (see core.synthetic_data) and sends each step of SCRIPT
+through the Django test client a number of times, recording per step:
+
+- the HTTP status,
+- the query count and duplicate statements (with the RequestRecorder of
+  core.performance.request_metrics),
+- the median SQL and wall time.
+
+Results are written as JSON; compare() diffs a run against a saved baseline
+and reports steps whose status changed, whose query count grew beyond a
+tolerance, or whose median wall time grew by more than a ratio (ignoring
+changes below a noise floor). Query counts are deterministic for a given
+seeded tenant, so they make the sharper regression signal; timings depend on
+the machine and are best compared on the same host.
+
+Requests run against the configured database and the SCORM commit step
+writes to it, so run this against a seeded benchmark database only.
+"""
+
+import json
+import statistics
+import time
+import uuid
+
+from django.conf import settings
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from core.performance.request_metrics import RequestRecorder
+from core.synthetic_data import COURSE_CODE_PREFIX, USERNAME_SUFFIX
+
+# (name, actor, URL name, URL args from the fixture, method, body from the fixture)
+SCRIPT = (
+    ('learner_dashboard', 'learner', 'dashboard_learner', None, 'get', None),
+    ('learner_course_list', 'learner', 'courses:course_list', None, 'get', None),
+    ('learner_inbox', 'learner', 'lms_messages:messages', None, 'get', None),
+    ('learner_inbox_page', 'learner', 'lms_messages:inbox_page_api', None, 'get', None),
+    ('learner_scorm_commit', 'learner', 'scorm:update_progress', lambda f: [f['scorm_topic_id']], 'post',
+     lambda f: {
+         'session_id': str(uuid.uuid4()),
+         'seq': 1,
+         'scorm_version': '1.2',
+         'raw': {
+             'cmi.core.lesson_status': 'incomplete',
+             'cmi.core.lesson_location': 'page-4',
+             'cmi.core.session_time': '00:01:30',
+         },
+     }),
+    ('instructor_dashboard', 'instructor', 'dashboard_instructor', None, 'get', None),
+    ('instructor_course_list', 'instructor', 'courses:course_list', None, 'get', None),
+    ('instructor_gradebook', 'instructor', 'gradebook:index', None, 'get', None),
+    ('instructor_course_gradebook', 'instructor', 'gradebook:course_detail', lambda f: [f['course_id']], 'get', None),
+    ('admin_dashboard', 'admin', 'dashboard_admin', None, 'get', None),
+    ('admin_training_matrix', 'admin', 'reports:training_matrix', None, 'get', None),
+)
+
+# Wall time changes below this many milliseconds are noise
+TIME_NOISE_FLOOR_MS = 20
+
+
+def load_fixture():
+    """
+    The actors and ids the script needs, picked deterministically from the
+    synthetic tenant: the first learner enrolled in a course with a SCORM
+    topic, that course's instructor and an admin of its branch.
+    """
+    from courses.models import CourseEnrollment, CourseTopic
+    from users.models import CustomUser
+
+    scorm_topic = CourseTopic.objects.filter(
+        course__course_code__startswith=COURSE_CODE_PREFIX,
+        topic__content_type='SCORM',
+        topic__scorm__isnull=False,
+        course__instructor__isnull=False,
+    ).select_related('course').order_by('course_id', 'order').first()
+    if scorm_topic is None:
+        raise LookupError('No synthetic tenant found; run create_comprehensive_test_data --scale small first')
+    course = scorm_topic.course
+
+    learner = CustomUser.objects.filter(
+        role='learner',
+        username__endswith=USERNAME_SUFFIX,
+        id__in=CourseEnrollment.objects.filter(course=course).values('user_id'),
+    ).order_by('id').first()
+    admin = CustomUser.objects.filter(role='admin', branch_id=course.branch_id, is_active=True).order_by('id').first()
+    if learner is None or admin is None:
+        raise LookupError(f'Synthetic course {course.course_code} has no enrolled learner or branch admin')
+
+    return {
+        'actors': {'learner': learner, 'instructor': course.instructor, 'admin': admin},
+        'course_id': course.id,
+        'scorm_topic_id': scorm_topic.topic_id,
+    }
+
+
+def _run_step(client, method, url, body):
+    recorder = RequestRecorder()
+    start = time.perf_counter()
+    with recorder.installed():
+        if method == 'post':
+            response = client.post(url, data=json.dumps(body), content_type='application/json')
+        else:
+            response = client.get(url)
+    wall = time.perf_counter() - start
+    return response.status_code, recorder, wall
+
+
+def run(repeat=5, warmup=1, steps=None):
+    """Replay SCRIPT and return the results as a JSON-serialisable dict"""
+    fixture = load_fixture()
+    clients = {}
+    for role, user in fixture['actors'].items():
+        clients[role] = Client()
+        clients[role].force_login(user)
+
+    results = {}
+    setup_test_environment()
+    try:
+        for name, role, url_name, args, method, body in SCRIPT:
+            if steps and name not in steps:
+                continue
+            url = reverse(url_name, args=args(fixture) if args else None)
+            for _ in range(warmup):
+                _run_step(clients[role], method, url, body(fixture) if body else None)
+
+            samples = [
+                _run_step(clients[role], method, url, body(fixture) if body else None)
+                for _ in range(repeat)
+            ]
+            statuses = {status for status, _, _ in samples}
+            results[name] = {
+                'url': url,
+                'method': method.upper(),
+                'status': max(statuses),
+                'queries': max(recorder.query_count for _, recorder, _ in samples),
+                'duplicates': max(
+                    sum(count - 1 for _, count in recorder.duplicates()) for _, recorder, _ in samples
+                ),
+                'sql_ms': round(statistics.median(recorder.sql_time * 1000 for _, recorder, _ in samples), 2),
+                'wall_ms': round(statistics.median(wall * 1000 for _, _, wall in samples), 2),
+            }
+    finally:
+        teardown_test_environment()
+
+    return {
+        'created_at': timezone.now().isoformat(),
+        'database': settings.DATABASES['default'].get('NAME'),
+        'repeat': repeat,
+        'steps': results,
+    }
+
+
+def compare(baseline, current, query_tolerance=0, time_tolerance=0.25):
+    """
+    Regressions of current against baseline, as descriptions; empty when none.
+
+    query_tolerance is the number of extra queries allowed per step and
+    time_tolerance the allowed relative growth of the median wall time.
+    """
+    regressions = []
+    for name, before in baseline.get('steps', {}).items():
+        after = current['steps'].get(name)
+        if after is None:
+            continue
+        if after['status'] != before['status']:
+            regressions.append(f"{name}: status {before['status']} -> {after['status']}")
+        if after['queries'] > before['queries'] + query_tolerance:
+            regressions.append(f"{name}: queries {before['queries']} -> {after['queries']}")
+        if after['duplicates'] > before['duplicates'] + query_tolerance:
+            regressions.append(f"{name}: duplicate queries {before['duplicates']} -> {after['duplicates']}")
+        growth = after['wall_ms'] - before['wall_ms']
+        if growth > TIME_NOISE_FLOOR_MS and growth > before['wall_ms'] * time_tolerance:
+            regressions.append(f"{name}: wall time {before['wall_ms']:.0f}ms -> {after['wall_ms']:.0f}ms")
+    return regressions
@@ -0,0 +1,506 @@
+"""
+Two-phase uploads that send file bytes straight to storage.
+
+Posting a file through Django ties up a worker for the whole transfer and
+buffers the file on the way. Here the browser instead:
+
+1. POSTs {"kind", "filename", "content_type", "size", "context"} to
+   /api/uploads/initiate/. The kind's policy checks the type, extension,
+   size and access, the branch storage quota is checked, and a DirectUpload
+   row reserves a storage name. The response says how to send the bytes:
+
+   - "post": a presigned S3 POST; send the returned fields, then the file,
+     as multipart/form-data to url,
+   - "multipart": for files over DIRECT_UPLOAD_MULTIPART_THRESHOLD, one
+     presigned S3 UploadPart URL per part_size bytes; PUT each part and keep
+     its ETag response header (the bucket CORS rules must expose ETag),
+   - "put": PUT the raw file to a Django endpoint. This is the stand-in used
+     when media is on the local filesystem (development and tests), so it
+     does hold a worker for the transfer.
+
+2. POSTs to /api/uploads/<token>/finalize/, with {"parts": [{"part_number",
+   "etag"}]} for a multipart upload. Django completes a multipart upload,
+   reads the first bytes of the object with a ranged GET (which also gives
+   its size, without HeadObject), checks size and magic bytes, registers the
+   file with StorageManager and returns the policy's response. Rejected
+   objects are deleted. A finalize before the bytes have arrived leaves the
+   upload pending so it can be retried.
+
+Policies live with their apps and are listed in UPLOAD_POLICIES. A view that
+takes a finished upload instead of a file field looks it up with find() to
+validate it, then calls claim() once its checks pass, which hands the upload
+out once as a value for a FileField. Both match the upload's context (e.g.
+the assignment it was checked against). Uploads never finalized are removed
+by the expire_direct_uploads command.
+"""
+
+import json
+import logging
+import math
+import os
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from django.views.decorators.http import require_http_methods, require_POST
+
+from core.models import DirectUpload
+from core.utils.type_guards import safe_get_int, safe_get_string
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_POLICIES = {
+    'editor_image': 'tinymce_editor.uploads.EditorImagePolicy',
+    'editor_media': 'tinymce_editor.uploads.EditorMediaPolicy',
+    'assignment_file': 'assignments.uploads.AssignmentFilePolicy',
+}
+
+# Bytes read on finalize for magic-byte detection
+HEAD_BYTES = 2048
+
+# S3 refuses multipart parts under 5MB, except the last
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+
+class UploadRejected(Exception):
+    """An upload that may not start or whose stored object failed the checks"""
+
+
+def _setting(name, default):
+    return getattr(settings, f'DIRECT_UPLOAD_{name}', default)
+
+
+def size_display(size):
+    return f"{size / (1024 * 1024):.0f}MB"
+
+
+class UploadPolicy:
+    """
+    What an upload kind accepts, where it is stored and what finalize returns.
+
+    content_types and extensions are allowed values, lower case; empty
+    allows any.
+    """
+    content_types = ()
+    extensions = ()
+    max_size = 600 * 1024 * 1024
+    source_app = None
+    source_model = None
+
+    def prepare(self, user, filename, content_type, size, context):
+        """Check an upload before it starts and return the context to keep; raises UploadRejected"""
+        extension = os.path.splitext(filename)[1].lower()
+        if self.extensions and extension not in self.extensions:
+            raise UploadRejected(f'File extension {extension} not allowed.')
+        if self.content_types and content_type not in self.content_types:
+            raise UploadRejected('File type not allowed. Please upload a supported file type.')
+        if size > self.get_max_size(context):
+            raise UploadRejected(f'File too large. Maximum size is {size_display(self.get_max_size(context))}.')
+        return {}
+
+    def get_max_size(self, context):
+        return self.max_size
+
+    def storage_name(self, user, filename, context):
+        raise NotImplementedError
+
+    def signature_allowed(self, detected, upload):
+        """Whether the MIME type detected from the first bytes is acceptable"""
+        return not self.content_types or detected in self.content_types
+
+    def registered(self, upload):
+        """Hook run once the upload has been verified and registered"""
+
+    def response(self, upload):
+        """JSON data returned by finalize"""
+        return {'token': str(upload.token), 'filename': upload.original_filename, 'size': upload.size}
+
+
+def get_policy(kind):
+    if kind not in UPLOAD_POLICIES:
+        raise UploadRejected(f'Unknown upload kind {kind!r}.')
+    return import_string(UPLOAD_POLICIES[kind])()
+
+
+class S3Backend:
+    """Presigned POST or multipart upload to the bucket of default_storage"""
+    name = 's3'
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    @property
+    def client(self):
+        return self.storage.bucket.meta.client
+
+    def _params(self, upload):
+        from storages.utils import clean_name
+        return {
+            'Bucket': self.storage.bucket.name,
+            'Key': self.storage._normalize_name(clean_name(upload.storage_name)),
+        }
+
+    def start(self, upload, expire):
+        params = self._params(upload)
+        if upload.declared_size > _setting('MULTIPART_THRESHOLD', 100 * 1024 * 1024):
+            part_size = max(_setting('PART_SIZE', 64 * 1024 * 1024), MIN_PART_SIZE)
+            upload.multipart_upload_id = self.client.create_multipart_upload(
+                ContentType=upload.content_type, **params
+            )['UploadId']
+            return {
+                'method': 'multipart',
+                'part_size': part_size,
+                'parts': [
+                    {
+                        'part_number': number,
+                        'url': self.client.generate_presigned_url(
+                            'upload_part',
+                            Params={**params, 'UploadId': upload.multipart_upload_id, 'PartNumber': number},
+                            ExpiresIn=expire,
+                        ),
+                    }
+                    for number in range(1, math.ceil(upload.declared_size / part_size) + 1)
+                ],
+            }
+
+        post = self.client.generate_presigned_post(
+            params['Bucket'],
+            params['Key'],
+            Fields={'Content-Type': upload.content_type},
+            Conditions=[
+                {'Content-Type': upload.content_type},
+                ['content-length-range', 1, upload.declared_size],
+            ],
+            ExpiresIn=expire,
+        )
+        return {'method': 'post', 'url': post['url'], 'fields': post['fields']}
+
+    def complete(self, upload, parts):
+        if not upload.multipart_upload_id:
+            return
+        self.client.complete_multipart_upload(
+            UploadId=upload.multipart_upload_id,
+            MultipartUpload={'Parts': [
+                {'PartNumber': int(part['part_number']), 'ETag': str(part['etag'])}
+                for part in sorted(parts, key=lambda part: int(part['part_number']))
+            ]},
+            **self._params(upload),
+        )
+
+    def read_head(self, upload, length):
+        """(size, first bytes) of the object by a ranged GET; size is None when it is missing"""
+        from botocore.exceptions import ClientError
+
+        try:
+            response = self.client.get_object(Range=f'bytes=0-{length - 1}', **self._params(upload))
+        except ClientError as e:
+            code = e.response.get('Error', {}).get('Code')
+            if code in ('NoSuchKey', '404'):
+                return None, b''
+            if code == 'InvalidRange':
+                return 0, b''
+            raise
+        size = int(response['ContentRange'].rsplit('/', 1)[1])
+        return size, response['Body'].read()
+
+    def discard(self, upload):
+        if upload.multipart_upload_id and upload.size is None:
+            try:
+                self.client.abort_multipart_upload(UploadId=upload.multipart_upload_id, **self._params(upload))
+            except Exception as e:
+                logger.warning(f"Could not abort multipart upload {upload.token}: {e}")
+        self.storage.delete(upload.storage_name)
+
+
+class LocalBackend:
+    """Stand-in for filesystem storage: the browser PUTs the file to Django"""
+    name = 'local'
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def start(self, upload, expire):
+        return {'method': 'put', 'url': reverse('core:api_upload_put', args=[upload.token])}
+
+    def receive(self, upload, stream):
+        """Write a request body to storage in chunks; the name may change if taken"""
+        # A repeated PUT replaces the file of the earlier one instead of leaving it behind
+        if self.storage.exists(upload.storage_name):
+            self.storage.delete(upload.storage_name)
+        upload.storage_name = self.storage.save(upload.storage_name, File(stream, name=upload.storage_name))
+
+    def complete(self, upload, parts):
+        pass
+
+    def read_head(self, upload, length):
+        if not self.storage.exists(upload.storage_name):
+            return None, b''
+        with self.storage.open(upload.storage_name, 'rb') as handle:
+            return self.storage.size(upload.storage_name), handle.read(length)
+
+    def discard(self, upload):
+        self.storage.delete(upload.storage_name)
+
+
+BACKENDS = {'s3': S3Backend, 'local': LocalBackend}
+
+
+def get_backend(name=None):
+    """The named backend, or the one DIRECT_UPLOAD_BACKEND selects ('auto' follows default_storage)"""
+    if name is None:
+        name = _setting('BACKEND', 'auto')
+        if name == 'auto':
+            name = 's3' if hasattr(default_storage, 'bucket') else 'local'
+    return BACKENDS[name](default_storage)
+
+
+def initiate(user, kind, filename, content_type, size, context=None):
+    """
+    Reserve an upload and return (DirectUpload, instructions for the client).
+    Raises UploadRejected when the policy or the storage quota refuses it.
+    """
+    from core.utils.storage_manager import StorageManager
+
+    policy = get_policy(kind)
+    filename = os.path.basename(filename or '')
+    content_type = (content_type or 'application/octet-stream').lower()
+    if not filename:
+        raise UploadRejected('No file name given.')
+    if size <= 0:
+        raise UploadRejected('The file is empty.')
+
+    context = policy.prepare(user, filename, content_type, size, context or {})
+    can_upload, error = StorageManager.check_upload_permission(user, size)
+    if not can_upload:
+        raise UploadRejected(error)
+
+    expire = _setting('EXPIRE', 3600)
+    backend = get_backend()
+    upload = DirectUpload(
+        user=user,
+        kind=kind,
+        backend=backend.name,
+        original_filename=filename[:255],
+        content_type=content_type[:100],
+        declared_size=size,
+        context=context,
+        expires_at=timezone.now() + timedelta(seconds=expire),
+    )
+    upload.storage_name = policy.storage_name(user, filename, context)
+    instructions = backend.start(upload, expire)
+    upload.save()
+    return upload, instructions
+
+
+def _reject(upload, backend, message):
+    upload.status = DirectUpload.REJECTED
+    upload.error = message
+    upload.save(update_fields=['status', 'error'])
+    try:
+        backend.discard(upload)
+    except Exception as e:
+        logger.warning(f"Could not delete rejected upload {upload.storage_name}: {e}")
+    raise UploadRejected(message)
+
+
+def finalize(upload, parts=None):
+    """
+    Verify the stored object of a pending upload by size and magic bytes and
+    register it. Returns the policy's response data; raises UploadRejected.
+    """
+    import magic
+
+    from core.utils.storage_manager import StorageManager
+
+    policy = get_policy(upload.kind)
+    backend = get_backend(upload.backend)
+
+    try:
+        backend.complete(upload, parts or [])
+    except Exception as e:
+        logger.warning(f"Completing upload {upload.token} failed: {e}")
+        raise UploadRejected('The upload is incomplete. Please try again.')
+
+    size, head = backend.read_head(upload, HEAD_BYTES)
+    if size is None:
+        raise UploadRejected('The file has not been uploaded yet.')
+    if size == 0 or size > upload.declared_size or size > policy.get_max_size(upload.context):
+        _reject(upload, backend, 'The uploaded file does not match the declared size.')
+
+    detected = magic.from_buffer(head, mime=True)
+    if not policy.signature_allowed(detected, upload):
+        logger.warning(
+            f"Direct upload rejected: file signature mismatch. Declared: {upload.content_type}, "
+            f"Signature: {detected}, File: {upload.storage_name}"
+        )
+        _reject(upload, backend, 'File content does not match declared type.')
+
+    upload.size = size
+    upload.status = DirectUpload.COMPLETE
+    upload.completed_at = timezone.now()
+    upload.save(update_fields=['storage_name', 'size', 'status', 'completed_at', 'multipart_upload_id'])
+
+    try:
+        StorageManager.register_file_upload(
+            user=upload.user,
+            file_path=upload.storage_name,
+            original_filename=upload.original_filename,
+            file_size_bytes=size,
+            content_type=upload.content_type,
+            source_app=policy.source_app,
+            source_model=policy.source_model,
+            upload_session_id=str(upload.token),
+        )
+    except Exception as e:
+        logger.error(f"Error registering file in storage tracking: {str(e)}")
+    policy.registered(upload)
+    return policy.response(upload)
+
+
+class StoredUpload(str):
+    """
+    A finished direct upload as a FileField value: the string is the storage
+    name, so assigning it points the field at the stored object without
+    uploading again, while name, size and content_type describe the file as
+    an UploadedFile would.
+    """
+
+    def __new__(cls, upload):
+        value = super().__new__(cls, upload.storage_name)
+        value.name = upload.original_filename
+        value.size = upload.size
+        value.content_type = upload.content_type
+        value.token = upload.token
+        return value
+
+
+def _claimable(user, token, kind, context):
+    try:
+        token = uuid.UUID(str(token))
+    except ValueError:
+        return DirectUpload.objects.none()
+    uploads = DirectUpload.objects.filter(
+        token=token, user=user, kind=kind, status=DirectUpload.COMPLETE, claimed_at__isnull=True
+    )
+    # The policy checked the upload against this context when it started
+    for key, value in (context or {}).items():
+        uploads = uploads.filter(**{f'context__{key}': value})
+    return uploads
+
+
+def find(user, token, kind, context=None):
+    """The user's completed, unclaimed upload with token and context, without claiming it; None when there is none"""
+    upload = _claimable(user, token, kind, context).first()
+    return StoredUpload(upload) if upload is not None else None
+
+
+def claim(user, token, kind, context=None):
+    """The user's completed upload with token and context, handed out once; None when there is none"""
+    uploads = _claimable(user, token, kind, context)
+    upload = uploads.first()
+    if upload is None or not uploads.filter(pk=upload.pk).update(claimed_at=timezone.now()):
+        return None
+    return StoredUpload(upload)
+
+
+def expire_uploads(now=None):
+    """Delete the objects of uploads never finalized before they expired; returns the count"""
+    now = now or timezone.now()
+    expired = 0
+    for upload in DirectUpload.objects.filter(status=DirectUpload.PENDING, expires_at__lt=now).iterator():
+        try:
+            get_backend(upload.backend).discard(upload)
+        except Exception as e:
+            logger.warning(f"Could not delete expired upload {upload.storage_name}: {e}")
+        upload.status = DirectUpload.REJECTED
+        upload.error = 'Expired before it was finalized'
+        upload.save(update_fields=['status', 'error'])
+        expired += 1
+    return expired
+
+
+def _error(message, status=400):
+    return JsonResponse({'success': False, 'error': message}, status=status)
+
+
+@login_required
+@require_POST
+def initiate_upload(request):
+    """Check an upload and return where and how to send the bytes"""
+    try:
+        data = json.loads(request.body)
+    except (ValueError, UnicodeDecodeError):
+        return _error('Invalid JSON')
+    if not isinstance(data, dict):
+        return _error('Invalid JSON')
+    context = data.get('context')
+
+    try:
+        upload, instructions = initiate(
+            request.user,
+            safe_get_string(data, 'kind'),
+            safe_get_string(data, 'filename'),
+            safe_get_string(data, 'content_type'),
+            safe_get_int(data, 'size', 0),
+            context if isinstance(context, dict) else {},
+        )
+    except UploadRejected as e:
+        return _error(str(e))
+
+    return JsonResponse({
+        'success': True,
+        'token': str(upload.token),
+        'finalize_url': reverse('core:api_upload_finalize', args=[upload.token]),
+        'expires_at': upload.expires_at.isoformat(),
+        **instructions,
+    })
+
+
+@login_required
+@require_http_methods(['PUT'])
+def receive_upload(request, token):
+    """Local stand-in for the presigned S3 request: store the PUT body"""
+    upload = get_object_or_404(
+        DirectUpload, token=token, user=request.user, status=DirectUpload.PENDING, backend=LocalBackend.name
+    )
+    if upload.expires_at < timezone.now():
+        return _error('This upload has expired.', status=410)
+    length = safe_get_int(request.META, 'CONTENT_LENGTH', 0)
+    if length <= 0 or length > upload.declared_size:
+        return _error('The file does not match the declared size.')
+
+    get_backend(upload.backend).receive(upload, request)
+    upload.save(update_fields=['storage_name'])
+    return JsonResponse({'success': True})
+
+
+@login_required
+@require_POST
+def finalize_upload(request, token):
+    """Verify and register an uploaded object"""
+    try:
+        data = json.loads(request.body or b'{}')
+    except (ValueError, UnicodeDecodeError):
+        return _error('Invalid JSON')
+    parts = data.get('parts') if isinstance(data, dict) else None
+
+    with transaction.atomic():
+        upload = get_object_or_404(DirectUpload.objects.select_for_update(), token=token, user=request.user)
+        if upload.status == DirectUpload.COMPLETE:
+            return JsonResponse({'success': True, **get_policy(upload.kind).response(upload)})
+        if upload.status == DirectUpload.REJECTED:
+            return _error(upload.error or 'This upload was rejected.')
+        try:
+            result = finalize(upload, parts if isinstance(parts, list) else [])
+        except UploadRejected as e:
+            return _error(str(e))
+    return JsonResponse({'success': True, **result})
@@ -0,0 +1,398 @@
+"""
+Buffered ingestion for high-volume event log tables.
+
+Request paths record events (assignment interactions, notification activity)
+with log_event() instead of inserting a row inline. Events are queued once the
+surrounding transaction commits and written with bulk_create when the buffer
+holds EVENT_INGESTION_BATCH_SIZE events, at the end of a request once
+EVENT_INGESTION_FLUSH_INTERVAL seconds have passed since the last flush, and
+when the worker process exits.
+
+The in-process buffer is a bounded ring: if the database cannot be reached the
+oldest events are dropped first once EVENT_INGESTION_MAX_BUFFER is reached.
+With EVENT_INGESTION_REDIS_URL set, events are appended to a Redis stream
+instead, so they survive worker restarts and any worker can write them out.
+
+EVENT_INGESTION_POLICIES holds per-log sampling and retention, keyed by model
+label:
+
+    EVENT_INGESTION_POLICIES = {
+        'assignments.AssignmentInteractionLog': {
+            'sample_rate': 1.0,                # share of events kept
+            'sample_rates': {'view': 0.25},    # per event type overrides
+            'retention_days': 365,             # applied by prune_event_logs
+        },
+    }
+
+Event logs are eventually consistent: an event is only readable once a flush
+writes it, and without the Redis stream only the worker that recorded it can.
+Readers such as the detailed assignment report accept that lag rather than
+flushing, which would only cover their own worker's buffer.
+"""
+
+import atexit
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from collections import deque
+
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, IntegrityError, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+# Logs written through log_event: model label -> timestamp and event type fields
+EVENT_LOGS = {
+    'assignments.AssignmentInteractionLog': {
+        'timestamp_field': 'created_at',
+        'type_field': 'interaction_type',
+    },
+    'lms_notifications.NotificationLog': {
+        'timestamp_field': 'timestamp',
+        'type_field': 'action',
+    },
+    'core.RequestMetric': {
+        'timestamp_field': 'created_at',
+        'type_field': 'view_name',
+    },
+}
+
+
+def get_policy(label):
+    return getattr(settings, 'EVENT_INGESTION_POLICIES', {}).get(label, {})
+
+
+def _sampled(label, event_type):
+    policy = get_policy(label)
+    rate = policy.get('sample_rates', {}).get(event_type, policy.get('sample_rate', 1.0))
+    return rate >= 1 or random.random() < rate
+
+
+def _batch_size():
+    return getattr(settings, 'EVENT_INGESTION_BATCH_SIZE', 200)
+
+
+class EventBuffer:
+    """Thread-safe, bounded in-process buffer of (label, values) events"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._events = deque(maxlen=getattr(settings, 'EVENT_INGESTION_MAX_BUFFER', 10000))
+        self._dropped = 0
+        self._last_flush = time.monotonic()
+
+    def _check_pid(self):
+        # A forked worker starts with its own empty buffer; the parent's
+        # events are written by the parent.
+        if self._pid != os.getpid():
+            self._reset()
+
+    def add(self, label, values):
+        with self._lock:
+            self._check_pid()
+            if len(self._events) == self._events.maxlen:
+                self._dropped += 1
+            self._events.append((label, values))
+            return len(self._events)
+
+    def requeue(self, events):
+        """Put back events that could not be written, oldest first"""
+        with self._lock:
+            self._check_pid()
+            pending = list(self._events)
+            self._events.clear()
+            for event in list(events) + pending:
+                if len(self._events) == self._events.maxlen:
+                    self._dropped += 1
+                self._events.append(event)
+
+    def take(self):
+        with self._lock:
+            self._check_pid()
+            events = list(self._events)
+            self._events.clear()
+            self._last_flush = time.monotonic()
+            dropped, self._dropped = self._dropped, 0
+        if dropped:
+            logger.warning(f"Event buffer overflowed, dropped {dropped} oldest events")
+        return events
+
+    def is_due(self):
+        if not self._events:
+            return False
+        interval = getattr(settings, 'EVENT_INGESTION_FLUSH_INTERVAL', 5)
+        return len(self._events) >= _batch_size() or time.monotonic() - self._last_flush >= interval
+
+    def __len__(self):
+        return len(self._events)
+
+
+class RedisEventStream:
+    """Pending events kept in a Redis stream and consumed through a consumer group"""
+
+    GROUP = 'event-ingestion'
+
+    def __init__(self, url, name):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.name = name
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self._group_ready = False
+        self._last_flush = time.monotonic()
+
+    def _ensure_group(self):
+        if self._group_ready:
+            return
+        import redis
+
+        try:
+            self.client.xgroup_create(self.name, self.GROUP, id='0', mkstream=True)
+        except redis.ResponseError as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+        self._group_ready = True
+
+    def add(self, label, values):
+        self.client.xadd(
+            self.name,
+            {'model': label, 'values': json.dumps(values, cls=DjangoJSONEncoder)},
+            maxlen=getattr(settings, 'EVENT_INGESTION_STREAM_MAXLEN', 1000000),
+            approximate=True
+        )
+
+    def take(self, count):
+        """Return up to count (entry_id, label, values) entries for this consumer"""
+        self._ensure_group()
+        self._last_flush = time.monotonic()
+        entries = []
+        # Entries left pending by a worker that died mid-flush are taken over
+        # once they have been idle long enough.
+        try:
+            claimed = self.client.xautoclaim(
+                self.name, self.GROUP, self.consumer,
+                min_idle_time=getattr(settings, 'EVENT_INGESTION_CLAIM_IDLE_MS', 60000),
+                start_id='0-0',
+                count=count
+            )
+            entries.extend(claimed[1])
+        except Exception as e:
+            logger.warning(f"Could not claim idle events from {self.name}: {e}")
+        if len(entries) < count:
+            response = self.client.xreadgroup(
+                self.GROUP, self.consumer, {self.name: '>'}, count=count - len(entries)
+            )
+            for _, stream_entries in response or []:
+                entries.extend(stream_entries)
+
+        events = []
+        for entry_id, fields in entries:
+            if not fields:
+                continue
+            label = fields[b'model'].decode()
+            values = json.loads(fields[b'values'])
+            events.append((entry_id, label, values))
+        return events
+
+    def ack(self, entry_ids):
+        if entry_ids:
+            self.client.xack(self.name, self.GROUP, *entry_ids)
+            self.client.xdel(self.name, *entry_ids)
+
+    def is_due(self):
+        interval = getattr(settings, 'EVENT_INGESTION_FLUSH_INTERVAL', 5)
+        return time.monotonic() - self._last_flush >= interval
+
+
+_buffer = EventBuffer()
+_stream = None
+_stream_lock = threading.Lock()
+
+
+def get_stream():
+    """Return the Redis event stream, or None when events are buffered in process"""
+    global _stream
+    url = getattr(settings, 'EVENT_INGESTION_REDIS_URL', None)
+    if not url:
+        return None
+    if _stream is None:
+        with _stream_lock:
+            if _stream is None:
+                try:
+                    _stream = RedisEventStream(
+                        url, getattr(settings, 'EVENT_INGESTION_REDIS_STREAM', 'lms:event_logs')
+                    )
+                except ImportError:
+                    logger.warning("EVENT_INGESTION_REDIS_URL is set but redis is not installed")
+                    return None
+    return _stream
+
+
+def _serialize(model, fields):
+    """Map model field names to attnames with JSON-friendly values"""
+    values = {}
+    for name, value in fields.items():
+        field = model._meta.get_field(name)
+        if field.is_relation and field.many_to_one:
+            values[field.attname] = getattr(value, 'pk', value)
+        else:
+            values[field.attname] = value
+    return values
+
+
+def _build(model, values):
+    instance = model()
+    for attname, value in values.items():
+        field = model._meta.get_field(attname)
+        setattr(instance, attname, field.to_python(value) if isinstance(value, str) else value)
+    return instance
+
+
+def log_event(model, **fields):
+    """
+    Record one event row for model (a registered event log).
+
+    Related objects may be given as instances or primary keys. The row is
+    written later in a batch; nothing is returned. Falls back to an inline
+    insert when EVENT_INGESTION_ENABLED is off.
+    """
+    label = model._meta.label
+    config = EVENT_LOGS[label]
+
+    type_field = config.get('type_field')
+    if type_field and not _sampled(label, fields.get(type_field)):
+        return
+
+    from django.utils import timezone
+    fields.setdefault(config['timestamp_field'], timezone.now())
+    values = _serialize(model, fields)
+
+    if not getattr(settings, 'EVENT_INGESTION_ENABLED', True):
+        model.objects.create(**values)
+        return
+
+    # Events of a transaction that rolls back are never written
+    transaction.on_commit(lambda: _enqueue(label, values))
+
+
+def _enqueue(label, values):
+    stream = get_stream()
+    if stream is not None:
+        try:
+            stream.add(label, values)
+            return
+        except Exception as e:
+            logger.warning(f"Could not append event to Redis stream, buffering in process: {e}")
+    if _buffer.add(label, values) >= _batch_size():
+        flush_events()
+
+
+def _insert(model, objs):
+    with transaction.atomic():
+        model.objects.bulk_create(objs, batch_size=_batch_size())
+        # Foreign keys are only checked at commit; check them inside the
+        # savepoint so that a bad batch rolls back on its own.
+        connection.check_constraints(table_names=[model._meta.db_table])
+
+
+def _write_events(events):
+    """Insert (label, values) events in one bulk_create per model"""
+    by_model = {}
+    for label, values in events:
+        by_model.setdefault(label, []).append(values)
+
+    written = 0
+    for label, rows in by_model.items():
+        try:
+            model = apps.get_model(label)
+        except LookupError:
+            logger.error(f"Dropping {len(rows)} events for unknown model {label}")
+            continue
+        objs = [_build(model, values) for values in rows]
+        try:
+            _insert(model, objs)
+            written += len(objs)
+        except IntegrityError:
+            # A referenced row was deleted before the flush; keep the others
+            for obj in objs:
+                try:
+                    _insert(model, [obj])
+                    written += 1
+                except IntegrityError as e:
+                    logger.warning(f"Dropping {label} event that no longer fits the database: {e}")
+    return written
+
+
+def flush_events():
+    """Write all pending events of this process (and the Redis stream) to the database"""
+    written = 0
+    events = _buffer.take()
+    if events:
+        try:
+            written += _write_events(events)
+        except DatabaseError as e:
+            logger.error(f"Event flush failed, keeping {len(events)} events buffered: {e}")
+            _buffer.requeue(events)
+            return written
+
+    stream = get_stream()
+    if stream is None:
+        return written
+
+    batch_size = _batch_size()
+    for _ in range(getattr(settings, 'EVENT_INGESTION_MAX_STREAM_BATCHES', 50)):
+        try:
+            entries = stream.take(batch_size)
+        except Exception as e:
+            logger.warning(f"Could not read events from Redis stream: {e}")
+            break
+        if not entries:
+            break
+        try:
+            written += _write_events([(label, values) for _, label, values in entries])
+        except DatabaseError as e:
+            # Unacknowledged entries are claimed again by a later flush
+            logger.error(f"Event flush failed, leaving {len(entries)} events in the stream: {e}")
+            break
+        try:
+            stream.ack([entry_id for entry_id, _, _ in entries])
+        except Exception as e:
+            logger.warning(f"Could not acknowledge flushed events: {e}")
+        if len(entries) < batch_size:
+            break
+    return written
+
+
+def flush_if_due(**kwargs):
+    """request_finished receiver: flush once the size or time threshold is reached"""
+    stream = get_stream()
+    if not _buffer.is_due() and (stream is None or not stream.is_due()):
+        return
+    try:
+        flush_events()
+    except Exception as e:
+        logger.error(f"Event flush at end of request failed: {e}")
+
+
+def flush_at_exit(**kwargs):
+    """Write whatever this process still holds before it exits"""
+    if not len(_buffer):
+        return
+    try:
+        written = _write_events(_buffer.take())
+        logger.info(f"Flushed {written} buffered events at worker shutdown")
+    except Exception as e:
+        logger.error(f"Event flush at worker shutdown failed: {e}")
+
+
+atexit.register(flush_at_exit)
@@ -0,0 +1,262 @@
+"""
+Coalesced progress heartbeats for video, audio and quiz time tracking.
+
+Players post batches of events to /api/heartbeat/, as JSON or as a 'data'
+form field when sent with navigator.sendBeacon():
+
+    {"final": false, "events": [
+        {"kind": "video", "id": <topic id>, "position": 312.5, "duration": 900,
+         "watched": 10.0, "completed": false},
+        {"kind": "quiz", "id": <attempt id>, "seconds": 10, "focused": true}
+    ]}
+
+watched/seconds is the playback or active time since the previous event.
+Events are folded into an accumulator in the cache per user, kind and object:
+the latest position, duration and focus state, plus a counter of milliseconds
+not yet written. Accumulators are written to TopicProgress or QuizAttempt at
+most once per HEARTBEAT_PERSIST_INTERVAL seconds, and straight away on the
+first event for an object, when an event reports completion and when the
+batch is final (the page is being left). A watched minute therefore costs one
+write instead of one per ping.
+
+Time that is still pending when a viewer disappears without a final batch is
+written by their next heartbeat for the same object, or by flush_heartbeat().
+"""
+
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
+from django.db.models import F
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.http import require_POST
+
+from core.utils.type_guards import safe_get_bool, safe_get_float, safe_get_int
+
+logger = logging.getLogger(__name__)
+
+MEDIA_CONTENT_TYPES = {
+    'video': ('Video', 'EmbedVideo'),
+    'audio': ('Audio',),
+}
+KINDS = ('video', 'audio', 'quiz')
+
+
+def _setting(name, default):
+    return getattr(settings, f'HEARTBEAT_{name}', default)
+
+
+def _key(kind, user_id, object_id):
+    return f"heartbeat:{kind}:{user_id}:{object_id}"
+
+
+def _add_pending(key, ms):
+    if ms <= 0:
+        return
+    counter = f"{key}:ms"
+    cache.add(counter, 0, _setting('STATE_TTL', 24 * 3600))
+    try:
+        cache.incr(counter, ms)
+    except ValueError:
+        # Expired between add() and incr()
+        cache.set(counter, ms, _setting('STATE_TTL', 24 * 3600))
+
+
+def _take_pending(key, unit=1):
+    """Remove and return the pending milliseconds of key, in whole multiples of unit"""
+    counter = f"{key}:ms"
+    ms = cache.get(counter) or 0
+    ms -= ms % unit
+    if ms > 0:
+        try:
+            cache.decr(counter, ms)
+        except ValueError:
+            pass
+    return ms
+
+
+def _authorize(user, kind, object_id):
+    """Initial accumulator state for object_id, or an error message"""
+    if kind == 'quiz':
+        from quiz.models import QuizAttempt
+
+        if not QuizAttempt.objects.filter(pk=object_id, user=user, is_completed=False).exists():
+            return None, 'Quiz attempt not found or already completed'
+        return {'focused': True}, None
+
+    from courses.models import Topic
+    from courses.views import check_course_permission, get_topic_course
+
+    if hasattr(user, 'role') and user.role != 'learner':
+        return None, 'Progress tracking is only available for learners'
+    topic = Topic.objects.filter(pk=object_id).first()
+    if topic is None or topic.content_type not in MEDIA_CONTENT_TYPES[kind]:
+        return None, f'Topic is not {kind} content'
+    course = get_topic_course(topic)
+    if course is None or not check_course_permission(user, course):
+        return None, 'Permission denied'
+    return {'course_id': course.id, 'position': 0.0, 'duration': 0.0, 'completed': False}, None
+
+
+def _persist_media(user, kind, topic_id, state, ms):
+    from courses.models import TopicProgress
+
+    topic_progress, _ = TopicProgress.objects.get_or_create(
+        user=user,
+        topic_id=topic_id,
+        course_id=state['course_id']
+    )
+    position, duration = state['position'], state['duration']
+    seconds = ms / 1000
+    complete = state.pop('complete', False)
+
+    if kind == 'video':
+        progress = min(100.0, position / duration * 100) if duration > 0 else None
+        topic_progress.mark_video_progress(position, duration, progress, time_watched=seconds)
+        if complete and not topic_progress.completed:
+            topic_progress.mark_complete('auto')
+        percent = topic_progress.video_progress
+    else:
+        topic_progress.update_audio_progress(position, duration, time_listened=seconds)
+        if complete and not topic_progress.completed:
+            topic_progress.mark_complete('auto')
+        percent = topic_progress.audio_progress
+
+    state['completed'] = topic_progress.completed
+    return {'progress': percent, 'completed': topic_progress.completed}
+
+
+def _persist_quiz(user, attempt_id, state, ms, final):
+    from quiz.models import QuizAttempt
+
+    now = timezone.now()
+    updated = QuizAttempt.objects.filter(pk=attempt_id, user=user, is_completed=False).update(
+        active_time_seconds=F('active_time_seconds') + ms // 1000,
+        is_currently_active=state['focused'] and not final,
+        page_focus_time=now,
+        last_activity_ping=now,
+        last_activity=now
+    )
+    return {'completed': not updated}
+
+
+def _persist(user, kind, object_id, key, state, extra_ms=0, final=False):
+    """Write the accumulator of key to the database; returns the result fields"""
+    lock = f"{key}:lock"
+    if not cache.add(lock, 1, 30):
+        # Another request is writing this object right now
+        return {'persisted': False}
+    try:
+        ms = extra_ms + _take_pending(key, 1000 if kind == 'quiz' else 1)
+        try:
+            if kind == 'quiz':
+                result = _persist_quiz(user, object_id, state, ms, final)
+            else:
+                result = _persist_media(user, kind, object_id, state, ms)
+        except Exception:
+            _add_pending(key, ms)
+            raise
+        state['persisted_at'] = time.time()
+        result['persisted'] = True
+        return result
+    finally:
+        cache.delete(lock)
+
+
+def record_heartbeat(user, event, final=False):
+    """Fold one heartbeat event into its accumulator, writing it through when due"""
+    kind = event.get('kind')
+    object_id = safe_get_int(event, 'id', 0)
+    result = {'kind': kind, 'id': object_id}
+    if kind not in KINDS or object_id <= 0:
+        return {**result, 'success': False, 'error': 'Invalid heartbeat event'}
+
+    key = _key(kind, user.pk, object_id)
+    state = cache.get(key)
+    first = state is None
+    if first:
+        state, error = _authorize(user, kind, object_id)
+        if error:
+            return {**result, 'success': False, 'error': error}
+
+    max_seconds = _setting('MAX_EVENT_SECONDS', 300)
+    if kind == 'quiz':
+        seconds = safe_get_float(event, 'seconds', 0.0)
+        state['focused'] = safe_get_bool(event, 'focused', True)
+        due = False
+    else:
+        seconds = safe_get_float(event, 'watched', 0.0)
+        state['position'] = max(0.0, safe_get_float(event, 'position', state['position']))
+        state['duration'] = safe_get_float(event, 'duration', 0.0) or state['duration']
+        reached = state['duration'] > 0 and state['position'] / state['duration'] >= 0.95
+        if safe_get_bool(event, 'completed', False):
+            state['complete'] = True
+        due = not state['completed'] and (reached or state.get('complete', False))
+    ms = int(min(max(seconds, 0.0), max_seconds) * 1000)
+
+    interval = _setting('PERSIST_INTERVAL', 60)
+    if first or due or final or time.time() - state.get('persisted_at', 0) >= interval:
+        # The event's own time is written directly rather than through the
+        # counter, so nothing is lost when the cache is unavailable.
+        result.update(_persist(user, kind, object_id, key, state, ms, final))
+        if not result['persisted']:
+            _add_pending(key, ms)
+    else:
+        _add_pending(key, ms)
+        result['persisted'] = False
+
+    if kind == 'quiz' and result.get('completed'):
+        cache.delete_many([key, f"{key}:ms"])
+    else:
+        cache.set(key, state, _setting('STATE_TTL', 24 * 3600))
+    result['success'] = True
+    return result
+
+
+def flush_heartbeat(user, kind, object_id, final=True):
+    """Write any pending heartbeat time for one object, e.g. before a quiz is submitted"""
+    key = _key(kind, user.pk, object_id)
+    state = cache.get(key)
+    if state is None:
+        return False
+    result = _persist(user, kind, object_id, key, state, final=final)
+    cache.set(key, state, _setting('STATE_TTL', 24 * 3600))
+    return result['persisted']
+
+
+@login_required
+@require_POST
+def heartbeat(request):
+    """Accept a batch of video, audio and quiz heartbeats"""
+    try:
+        if request.content_type in ('multipart/form-data', 'application/x-www-form-urlencoded'):
+            # navigator.sendBeacon() with FormData
+            payload = json.loads(request.POST.get('data') or '{}')
+        else:
+            payload = json.loads(request.body or b'{}')
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return JsonResponse({'success': False, 'error': 'Invalid JSON format'}, status=400)
+
+    events = payload.get('events') if isinstance(payload, dict) else None
+    if not isinstance(events, list):
+        return JsonResponse({'success': False, 'error': 'events must be a list'}, status=400)
+    if len(events) > _setting('MAX_EVENTS', 50):
+        return JsonResponse({'success': False, 'error': 'Too many events'}, status=400)
+
+    final = safe_get_bool(payload, 'final', False)
+    results = []
+    for event in events:
+        if not isinstance(event, dict):
+            results.append({'success': False, 'error': 'Invalid heartbeat event'})
+            continue
+        try:
+            results.append(record_heartbeat(request.user, event, final))
+        except Exception as e:
+            logger.error(f"Error recording heartbeat {event.get('kind')}:{event.get('id')} for user {request.user.pk}: {e}")
+            results.append({'kind': event.get('kind'), 'id': event.get('id'), 'success': False, 'error': 'Heartbeat failed'})
+
+    return JsonResponse({'success': True, 'results': results})
@@ -0,0 +1,105 @@
+"""
+Management command to benchmark the calendar month view with and without the activity index
+"""
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a synthetic learner with many enrollments inside a rolled-back transaction and '
+        'compare month-view latency of the per-type queries against the calendar index'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--enrollments', type=int, default=50, help='Courses the learner is enrolled in')
+        parser.add_argument('--items', type=int, default=4, help='Assignments, quizzes and topics per course')
+        parser.add_argument('--repeat', type=int, default=20, help='Month views measured per mode')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                learner, month_start, month_end = self._seed(options['enrollments'], options['items'])
+                for label, use_index in (('per-type queries', False), ('calendar index', True)):
+                    queries, elapsed, count = self._measure(learner, month_start, month_end, use_index, options['repeat'])
+                    self.stdout.write(
+                        f"{label}: {count} activities, {queries:.1f} queries/view, {elapsed * 1000:.2f} ms/view"
+                    )
+                raise Rollback
+        except Rollback:
+            self.stdout.write('Synthetic data rolled back')
+
+    def _seed(self, enrollments, items):
+        from assignments.models import Assignment, AssignmentCourse
+        from calendar_app.calendar_index import sync_source
+        from courses.models import Course, CourseEnrollment, CourseTopic, Topic
+        from quiz.models import Quiz
+
+        User = get_user_model()
+        suffix = timezone.now().strftime('%Y%m%d%H%M%S%f')
+        instructor = User.objects.create_user(
+            username=f'bench_calendar_instructor_{suffix}',
+            email=f'bench_calendar_instructor_{suffix}@example.com',
+            password=None,
+            role='instructor'
+        )
+        learner = User.objects.create_user(
+            username=f'bench_calendar_learner_{suffix}',
+            email=f'bench_calendar_learner_{suffix}@example.com',
+            password=None,
+            role='learner'
+        )
+
+        today = timezone.localdate()
+        month_start = today.replace(day=1)
+        month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        now = timezone.now()
+
+        sources = []
+        for n in range(enrollments):
+            course = Course.objects.create(
+                title=f'Benchmark course {n}',
+                instructor=instructor,
+                end_date=now + timedelta(days=n % 28)
+            )
+            CourseEnrollment.objects.create(user=learner, course=course)
+            sources.append(('course_deadline', course.pk))
+            for i in range(items):
+                due = now + timedelta(days=(n + i) % 28, hours=i)
+                assignment = Assignment.objects.create(title=f'Assignment {n}.{i}', user=instructor, due_date=due)
+                AssignmentCourse.objects.create(assignment=assignment, course=course, is_primary=True)
+                quiz = Quiz.objects.create(title=f'Quiz {n}.{i}', description='', creator=instructor, course=course, expires_at=due)
+                topic = Topic.objects.create(title=f'Topic {n}.{i}', content_type='Text', status='active', end_date=due.date())
+                CourseTopic.objects.create(course=course, topic=topic, order=i)
+                sources.extend([('assignment', assignment.pk), ('quiz', quiz.pk), ('topic_deadline', topic.pk)])
+
+        # on_commit never fires inside the rolled-back transaction, so index directly
+        for source_type, source_id in sources:
+            sync_source(source_type, source_id)
+        return learner, month_start, month_end
+
+    def _measure(self, learner, month_start, month_end, use_index, repeat):
+        from core.utils.calendar_service import CalendarService
+
+        queries = 0
+        count = 0
+        with override_settings(CALENDAR_USE_INDEX=use_index):
+            started = time.perf_counter()
+            for _ in range(max(1, repeat)):
+                # A fresh service and user per view, as in a request
+                user = get_user_model().objects.get(pk=learner.pk)
+                with CaptureQueriesContext(connection) as context:
+                    count = len(CalendarService(user).get_user_calendar_data(month_start, month_end))
+                queries += len(context.captured_queries)
+            elapsed = time.perf_counter() - started
+        return queries / max(1, repeat), elapsed / max(1, repeat), count
@@ -0,0 +1,86 @@
+"""
+Management command to benchmark database queries per request for session engines
+"""
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+
+class Command(BaseCommand):
+    help = 'Compare DB queries per request between the database and cache-backed session engines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Number of simulated requests')
+        parser.add_argument(
+            '--write-every',
+            type=int,
+            default=20,
+            help='Modify the session on every Nth request (0 never modifies it)',
+        )
+        parser.add_argument(
+            '--engines',
+            nargs='+',
+            default=['django.contrib.sessions.backends.db', 'core.session_backends'],
+            help='Session engines to compare',
+        )
+
+    def handle(self, *args, **options):
+        requests = max(1, options['requests'])
+        write_every = max(0, options['write_every'])
+
+        self.stdout.write(
+            f"{requests} requests, session modified every {write_every or 'never'}, "
+            f"SESSION_SAVE_EVERY_REQUEST={settings.SESSION_SAVE_EVERY_REQUEST}"
+        )
+        for engine in options['engines']:
+            queries, elapsed = self._run(engine, requests, write_every)
+            self.stdout.write(
+                f"{engine}: {queries / requests:.2f} queries/request, "
+                f"{elapsed / requests * 1000:.3f} ms/request"
+            )
+
+    def _run(self, engine, requests, write_every):
+        session_store = import_module(engine).SessionStore
+        factory = RequestFactory()
+
+        # Seed a logged-in looking session outside the measurement
+        seed = session_store()
+        seed['_auth_user_id'] = '1'
+        seed['last_activity'] = 0
+        seed.create()
+        session_key = seed.session_key
+
+        counter = {'n': 0}
+
+        def view(request):
+            counter['n'] += 1
+            request.session.get('_auth_user_id')
+            if write_every and counter['n'] % write_every == 0:
+                request.session['last_activity'] = counter['n']
+            return HttpResponse()
+
+        middleware = SessionMiddleware(view)
+        middleware.SessionStore = session_store
+
+        queries = 0
+        started = time.perf_counter()
+        try:
+            for _ in range(requests):
+                request = factory.get('/')
+                request.COOKIES[settings.SESSION_COOKIE_NAME] = session_key
+                with CaptureQueriesContext(connection) as context:
+                    response = middleware(request)
+                queries += len(context.captured_queries)
+                cookie = response.cookies.get(settings.SESSION_COOKIE_NAME)
+                if cookie is not None and cookie.value:
+                    session_key = cookie.value
+        finally:
+            session_store(session_key).delete()
+        return queries, time.perf_counter() - started
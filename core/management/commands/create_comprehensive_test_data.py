@@ -1,17 +1,22 @@
-from django.core.management.base import BaseCommand
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from business.models import Business, BusinessUserAssignment, BusinessLimits
 from branches.models import Branch, BranchUserLimits, AdminBranchAssignment
 from users.models import CustomUser
+from core import synthetic_data
 import logging
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
 class Command(BaseCommand):
-    help = 'Create comprehensive test data for LMS including all user roles, businesses, and branches'
+    help = (
+        'Create comprehensive test data for LMS including all user roles, businesses, and branches; '
+        'with --scale or size options also a seeded synthetic tenant of courses, enrollments and activity'
+    )
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -24,10 +29,42 @@ class Command(BaseCommand):
             action='store_true',
             help='Show what would be done without making changes',
         )
+        parser.add_argument(
+            '--scale',
+            choices=sorted(synthetic_data.SCALES),
+            help='Also generate a synthetic tenant of this size in the test branches',
+        )
+        for size in ('learners', 'courses', 'topics-per-course', 'enrollments-per-learner', 'messages'):
+            parser.add_argument(
+                f'--{size}',
+                type=int,
+                help=f'Synthetic tenant {size.replace("-", " ")} (overrides --scale; implies --scale small)',
+            )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Random seed of the synthetic tenant; the same seed and sizes give the same data',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows per INSERT when generating the synthetic tenant',
+        )
+        parser.add_argument(
+            '--skip-derived',
+            action='store_true',
+            help='Do not rebuild the training matrix, calendar index, todo feeds and gradebook afterwards',
+        )
 
     def handle(self, *args, **options):
         dry_run = options['dry_run']
         clean = options['clean']
+        sizes = self.tenant_sizes(options)
+        
+        if sizes and not clean and not dry_run and synthetic_data.exists():
+            raise CommandError('A synthetic tenant already exists; pass --clean to replace it')
         
         if dry_run:
             self.stdout.write(
@@ -53,8 +90,14 @@ class Command(BaseCommand):
                 # Create business and branch limits
                 self.create_limits(test_business, branches, dry_run)
                 
+                if sizes:
+                    self.create_synthetic_tenant(branches, sizes, options, dry_run)
+                
                 self.display_summary()
                 
+            if sizes and not dry_run and not options['skip_derived']:
+                self.rebuild_derived()
+                
         except Exception as e:
             self.stdout.write(
                 self.style.ERROR(f'Error creating test data: {str(e)}')
@@ -66,6 +109,19 @@ class Command(BaseCommand):
         """Clean existing test data"""
         self.stdout.write('🧹 Cleaning existing test data...')
         
+        # Synthetic courses and their content are not owned by the test users
+        if dry_run:
+            if synthetic_data.exists():
+                self.stdout.write(
+                    self.style.WARNING('   Would delete the synthetic tenant')
+                )
+        else:
+            for kind, count in synthetic_data.clean().items():
+                if count:
+                    self.stdout.write(
+                        self.style.SUCCESS(f'   Deleted {count} synthetic {kind} rows')
+                    )
+        
         # Clean test users
         test_users = CustomUser.objects.filter(
             username__endswith='_test',
@@ -556,6 +612,62 @@ class Command(BaseCommand):
                 else:
                     self.stdout.write(f'   Learner already exists: {username}')
 
+    def tenant_sizes(self, options):
+        """Synthetic tenant sizes from --scale and the size options, or None"""
+        overrides = {
+            key: options[key]
+            for key in ('learners', 'courses', 'topics_per_course', 'enrollments_per_learner', 'messages')
+            if options.get(key) is not None
+        }
+        if not options.get('scale') and not overrides:
+            return None
+        sizes = dict(synthetic_data.SCALES[options.get('scale') or 'small'])
+        sizes.update(overrides)
+        return sizes
+
+    def create_synthetic_tenant(self, branches, sizes, options, dry_run):
+        """Fill the test branches with a seeded synthetic tenant"""
+        self.stdout.write(
+            '🧪 Creating synthetic tenant (seed {seed}): {sizes}'.format(
+                seed=options['seed'],
+                sizes=', '.join(f'{key}={value}' for key, value in sizes.items()),
+            )
+        )
+        
+        if dry_run:
+            self.stdout.write(
+                self.style.WARNING('   Would create the synthetic tenant')
+            )
+            return
+        
+        branches = [branch for branch in branches if branch]
+        instructors = {}
+        for user in CustomUser.objects.filter(
+            role='instructor', username__endswith='_test', branch__in=branches
+        ).order_by('username'):
+            instructors.setdefault(user.branch_id, []).append(user)
+        
+        generator = synthetic_data.TenantGenerator(
+            branches,
+            instructors,
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            log=lambda line: self.stdout.write(self.style.SUCCESS(f'   Created {line}')),
+        )
+        generator.generate(**sizes)
+
+    def rebuild_derived(self):
+        """Rebuild the tables that signals keep current, which bulk inserts bypass"""
+        self.stdout.write('🔄 Rebuilding derived data...')
+        for command, kwargs in (
+            ('sync_gradebook', {}),
+            ('rebuild_training_matrix', {}),
+            ('rebuild_calendar_index', {}),
+            ('rebuild_deadline_index', {}),
+            ('rebuild_todo_feeds', {'all': True}),
+        ):
+            call_command(command, stdout=self.stdout, **kwargs)
+
     def create_limits(self, business, branches, dry_run):
         """Create business and branch limits"""
         self.stdout.write('📊 Creating business and branch limits...')
@@ -634,6 +746,16 @@ class Command(BaseCommand):
         ).count()
         self.stdout.write(f'   Test Branches: {branch_count}')
         
+        if synthetic_data.exists():
+            from courses.models import Course, CourseEnrollment
+            synthetic_courses = Course.objects.filter(
+                course_code__startswith=synthetic_data.COURSE_CODE_PREFIX
+            )
+            self.stdout.write(f'   Synthetic Courses: {synthetic_courses.count()}')
+            self.stdout.write(
+                f'   Synthetic Enrollments: {CourseEnrollment.objects.filter(course__in=synthetic_courses).count()}'
+            )
+        
         self.stdout.write('\n🔑 Quick Test Accounts:')
         self.stdout.write('   Global Admin: globaladmin_test / test123')
         self.stdout.write('   Super Admin: superadmin1_test / test123')
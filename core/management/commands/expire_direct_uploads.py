@@ -0,0 +1,14 @@
+"""
+Management command to remove direct uploads that were never finalized
+"""
+from django.core.management.base import BaseCommand
+
+from core.direct_uploads import expire_uploads
+
+
+class Command(BaseCommand):
+    help = 'Delete the stored objects of direct uploads not finalized before they expired and mark them rejected'
+
+    def handle(self, *args, **options):
+        expired = expire_uploads()
+        self.stdout.write(self.style.SUCCESS(f'Expired {expired} direct uploads'))
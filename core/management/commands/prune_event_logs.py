@@ -0,0 +1,62 @@
+"""
+Management command to apply the retention policies of event log tables
+"""
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.event_ingestion import EVENT_LOGS
+
+
+class Command(BaseCommand):
+    help = 'Delete event log rows older than the retention_days of their EVENT_INGESTION_POLICIES entry'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Number of rows deleted per query'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many rows would be deleted'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+        policies = getattr(settings, 'EVENT_INGESTION_POLICIES', {})
+
+        for label, policy in policies.items():
+            retention_days = policy.get('retention_days')
+            if not retention_days:
+                continue
+            # Logs outside EVENT_LOGS (e.g. grade history) name their timestamp field in the policy
+            timestamp_field = policy.get('timestamp_field') or EVENT_LOGS.get(label, {}).get('timestamp_field')
+            if not timestamp_field:
+                self.stdout.write(self.style.WARNING(f'{label}: no timestamp_field, skipped'))
+                continue
+
+            model = apps.get_model(label)
+            cutoff = timezone.now() - timedelta(days=retention_days)
+            expired = model.objects.filter(**{f'{timestamp_field}__lt': cutoff})
+
+            if dry_run:
+                self.stdout.write(f'{label}: {expired.count()} rows older than {retention_days} days')
+                continue
+
+            deleted = 0
+            while True:
+                ids = list(expired.order_by().values_list('pk', flat=True)[:batch_size])
+                if not ids:
+                    break
+                model.objects.filter(pk__in=ids).delete()
+                deleted += len(ids)
+            self.stdout.write(
+                self.style.SUCCESS(f'{label}: deleted {deleted} rows older than {retention_days} days')
+            )
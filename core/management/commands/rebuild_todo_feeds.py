@@ -0,0 +1,30 @@
+"""
+Management command to rebuild stored todo feeds ahead of dashboard reads
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.todo_feed import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the stored todo lists and counts of active users; by default only '
+        'feeds that are missing or have expired'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Rebuild every active user, fresh or not')
+        parser.add_argument('--role', action='append', dest='roles', help='Only users with this role')
+        parser.add_argument('--batch-size', type=int, default=500, help='Users read per query')
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.filter(is_active=True)
+        if options['roles']:
+            users = users.filter(role__in=options['roles'])
+        if not options['all']:
+            users = users.exclude(todo_feed__valid_until__gt=timezone.now())
+
+        refreshed, todos = rebuild(users, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {refreshed} todo feeds ({todos} todos)'))
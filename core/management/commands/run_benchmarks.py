@@ -0,0 +1,71 @@
+"""
+Management command to replay the hot-path benchmark script against a seeded tenant
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay dashboards, course list, gradebook, training matrix, SCORM commit and inbox '
+        'requests through the test client, recording query counts and timings; with '
+        '--baseline, fail on regressions against a saved run'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='Write the results to this JSON file (e.g. to save a new baseline)')
+        parser.add_argument('--baseline', help='Compare against the results saved in this JSON file')
+        parser.add_argument('--repeat', type=int, default=5, help='Measured requests per step')
+        parser.add_argument('--warmup', type=int, default=1, help='Unmeasured requests per step before measuring')
+        parser.add_argument('--step', action='append', dest='steps', help='Only run this step (repeatable)')
+        parser.add_argument(
+            '--query-tolerance', type=int, default=0,
+            help='Extra queries per step allowed before it counts as a regression',
+        )
+        parser.add_argument(
+            '--time-tolerance', type=float, default=0.25,
+            help='Allowed relative growth of the median wall time, e.g. 0.25 for 25%%',
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline']) as handle:
+                    baseline = json.load(handle)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read baseline {options['baseline']}: {e}")
+
+        try:
+            results = benchmarks.run(repeat=options['repeat'], warmup=options['warmup'], steps=options['steps'])
+        except LookupError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f"{'step':<30} {'status':>6} {'queries':>8} {'dups':>6} {'sql ms':>9} {'wall ms':>9}")
+        for name, step in results['steps'].items():
+            line = (
+                f"{name:<30} {step['status']:>6} {step['queries']:>8} {step['duplicates']:>6} "
+                f"{step['sql_ms']:>9.1f} {step['wall_ms']:>9.1f}"
+            )
+            self.stdout.write(self.style.ERROR(line) if step['status'] >= 400 else line)
+
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump(results, handle, indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(f"Wrote results to {options['output']}"))
+
+        if baseline is not None:
+            regressions = benchmarks.compare(
+                baseline,
+                results,
+                query_tolerance=options['query_tolerance'],
+                time_tolerance=options['time_tolerance'],
+            )
+            if regressions:
+                for regression in regressions:
+                    self.stdout.write(self.style.ERROR(f'  {regression}'))
+                raise CommandError(f'{len(regressions)} regressions against {options["baseline"]}')
+            self.stdout.write(self.style.SUCCESS(f"No regressions against {options['baseline']}"))
@@ -0,0 +1,39 @@
+"""
+Request Metrics Middleware
+Records queries, SQL time, cache lookups and wall time per resolved URL name
+(see core.performance.request_metrics)
+"""
+
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from core.performance.request_metrics import RequestRecorder, finish_request
+
+
+class RequestMetricsMiddleware:
+    """
+    Middleware to measure each request against its per-view budget
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.ignored_prefixes = tuple(getattr(settings, 'REQUEST_METRICS_IGNORE_PATHS', ()))
+
+    def __call__(self, request):
+        if self.ignored_prefixes and request.path.startswith(self.ignored_prefixes):
+            return self.get_response(request)
+
+        recorder = RequestRecorder()
+        start = time.perf_counter()
+        with recorder.installed():
+            response = self.get_response(request)
+        wall_time = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = (match.view_name if match else None) or 'unresolved'
+        finish_request(recorder, view_name, request.method, response.status_code, wall_time)
+        return response
@@ -0,0 +1,65 @@
+# Generated by Django 4.2.24 on 2026-10-18 23:10
+
+from django.conf import settings
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TodoFeed',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='todo_feed', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('refreshed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('valid_until', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TodoItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='TodoService id, e.g. assignment_overdue_12', max_length=100)),
+                ('todo_type', models.CharField(max_length=40)),
+                ('priority', models.CharField(max_length=10)),
+                ('priority_rank', models.PositiveSmallIntegerField(default=4)),
+                ('sort_date', models.DateTimeField()),
+                ('title', models.CharField(max_length=500)),
+                ('description', models.TextField(blank=True)),
+                ('due_text', models.CharField(blank=True, max_length=100)),
+                ('icon', models.CharField(blank=True, max_length=50)),
+                ('url', models.CharField(blank=True, max_length=500)),
+                ('metadata', models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='todo_items', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'priority_rank', 'sort_date', 'id'], name='todo_item_user_order_idx'), models.Index(fields=['user', 'todo_type', 'priority_rank', 'sort_date', 'id'], name='todo_item_user_type_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='todoitem',
+            constraint=models.UniqueConstraint(fields=('user', 'key'), name='todo_item_user_key_uniq'),
+        ),
+        migrations.CreateModel(
+            name='TodoCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('todo_type', models.CharField(max_length=40)),
+                ('priority', models.CharField(max_length=10)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='todocount',
+            constraint=models.UniqueConstraint(fields=('user', 'todo_type', 'priority'), name='todo_count_user_type_uniq'),
+        ),
+    ]
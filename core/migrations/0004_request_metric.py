@@ -0,0 +1,35 @@
+# Generated by Django 4.2.24 on 2026-10-19 00:20
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_todo_feed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('view_name', models.CharField(max_length=200)),
+                ('method', models.CharField(max_length=10)),
+                ('status_code', models.PositiveSmallIntegerField()),
+                ('query_count', models.PositiveIntegerField(default=0)),
+                ('sql_time_ms', models.FloatField(default=0)),
+                ('wall_time_ms', models.FloatField(default=0)),
+                ('duplicate_queries', models.PositiveIntegerField(default=0, help_text='Executions beyond the first of statements repeated past the duplicate threshold')),
+                ('top_duplicate', models.TextField(blank=True, help_text='Fingerprint of the most repeated statement')),
+                ('cache_hits', models.PositiveIntegerField(default=0)),
+                ('cache_misses', models.PositiveIntegerField(default=0)),
+                ('over_budget', models.BooleanField(default=False)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at'], name='request_metric_created_idx'), models.Index(fields=['view_name', 'created_at'], name='request_metric_view_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.24 on 2026-10-19 01:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0004_request_metric'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DirectUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('kind', models.CharField(help_text='Upload policy, a key of core.direct_uploads.UPLOAD_POLICIES', max_length=30)),
+                ('backend', models.CharField(help_text="'s3' or 'local'", max_length=10)),
+                ('storage_name', models.CharField(help_text='Name of the object in default_storage', max_length=500)),
+                ('original_filename', models.CharField(max_length=255)),
+                ('content_type', models.CharField(max_length=100)),
+                ('declared_size', models.BigIntegerField()),
+                ('size', models.BigIntegerField(blank=True, help_text='Size of the stored object, once verified', null=True)),
+                ('multipart_upload_id', models.CharField(blank=True, max_length=255)),
+                ('context', models.JSONField(blank=True, default=dict, help_text='Policy data, e.g. the assignment id')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('complete', 'Complete'), ('rejected', 'Rejected')], default='pending', max_length=10)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('expires_at', models.DateTimeField()),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('claimed_at', models.DateTimeField(blank=True, help_text='When the file was attached to the object it was uploaded for', null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='direct_uploads', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'expires_at'], name='direct_upload_status_idx')],
+            },
+        ),
+    ]
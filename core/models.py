@@ -1,11 +1,13 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator
 from django.utils import timezone
 from django.db.models import Sum
 from datetime import datetime, timedelta
 import logging
+import uuid
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -409,3 +411,156 @@ class StorageQuotaWarning(models.Model):
         
         logger.info(f"Created storage warning for {branch.name}: {warning_type} - {usage_percentage:.1f}%")
         return warning
+
+
+class TodoFeed(models.Model):
+    """
+    Freshness of a user's stored todo list.
+
+    The list is rebuilt on the next read once valid_until has passed; event
+    handlers in core.todo_feed move it to now when a source changes.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='todo_feed')
+    refreshed_at = models.DateTimeField(default=timezone.now)
+    valid_until = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Todo feed of {self.user_id} (valid until {self.valid_until})"
+
+
+class TodoItem(models.Model):
+    """One stored todo of a user, in the order the dashboard lists them"""
+    PRIORITY_RANKS = {'critical': 0, 'high': 1, 'medium': 2, 'low': 3}
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='todo_items')
+    key = models.CharField(max_length=100, help_text="TodoService id, e.g. assignment_overdue_12")
+    todo_type = models.CharField(max_length=40)
+    priority = models.CharField(max_length=10)
+    priority_rank = models.PositiveSmallIntegerField(default=4)
+    sort_date = models.DateTimeField()
+    title = models.CharField(max_length=500)
+    description = models.TextField(blank=True)
+    due_text = models.CharField(max_length=100, blank=True)
+    icon = models.CharField(max_length=50, blank=True)
+    url = models.CharField(max_length=500, blank=True)
+    metadata = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='todo_item_user_key_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'priority_rank', 'sort_date', 'id'], name='todo_item_user_order_idx'),
+            models.Index(fields=['user', 'todo_type', 'priority_rank', 'sort_date', 'id'], name='todo_item_user_type_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.key}"
+
+    def as_todo(self):
+        """The dict format TodoService has always returned"""
+        return {
+            'id': self.key,
+            'title': self.title,
+            'description': self.description,
+            'due_date': self.due_text,
+            'sort_date': self.sort_date,
+            'type': self.todo_type,
+            'priority': self.priority,
+            'icon': self.icon,
+            'url': self.url,
+            'metadata': self.metadata,
+        }
+
+
+class TodoCount(models.Model):
+    """Number of a user's stored todos per type and priority"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    todo_type = models.CharField(max_length=40)
+    priority = models.CharField(max_length=10)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'todo_type', 'priority'], name='todo_count_user_type_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.todo_type}/{self.priority} = {self.count}"
+
+
+class RequestMetric(models.Model):
+    """
+    Queries, SQL time, cache lookups and wall time of one request, by URL name
+    (see core.performance.request_metrics). Written in batches through
+    core.event_ingestion.
+    """
+    created_at = models.DateTimeField(default=timezone.now)
+    view_name = models.CharField(max_length=200)
+    method = models.CharField(max_length=10)
+    status_code = models.PositiveSmallIntegerField()
+    query_count = models.PositiveIntegerField(default=0)
+    sql_time_ms = models.FloatField(default=0)
+    wall_time_ms = models.FloatField(default=0)
+    duplicate_queries = models.PositiveIntegerField(
+        default=0,
+        help_text="Executions beyond the first of statements repeated past the duplicate threshold"
+    )
+    top_duplicate = models.TextField(blank=True, help_text="Fingerprint of the most repeated statement")
+    cache_hits = models.PositiveIntegerField(default=0)
+    cache_misses = models.PositiveIntegerField(default=0)
+    over_budget = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at'], name='request_metric_created_idx'),
+            models.Index(fields=['view_name', 'created_at'], name='request_metric_view_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.method} {self.view_name}: {self.query_count} queries, {self.wall_time_ms:.0f}ms"
+
+
+class DirectUpload(models.Model):
+    """
+    A file sent by the browser straight to storage (see core.direct_uploads):
+    reserved when the upload starts, checked and registered on finalize.
+    """
+    PENDING = 'pending'
+    COMPLETE = 'complete'
+    REJECTED = 'rejected'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (COMPLETE, 'Complete'),
+        (REJECTED, 'Rejected'),
+    ]
+
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='direct_uploads')
+    kind = models.CharField(max_length=30, help_text="Upload policy, a key of core.direct_uploads.UPLOAD_POLICIES")
+    backend = models.CharField(max_length=10, help_text="'s3' or 'local'")
+    storage_name = models.CharField(max_length=500, help_text="Name of the object in default_storage")
+    original_filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100)
+    declared_size = models.BigIntegerField()
+    size = models.BigIntegerField(null=True, blank=True, help_text="Size of the stored object, once verified")
+    multipart_upload_id = models.CharField(max_length=255, blank=True)
+    context = models.JSONField(default=dict, blank=True, help_text="Policy data, e.g. the assignment id")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField()
+    completed_at = models.DateTimeField(null=True, blank=True)
+    claimed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When the file was attached to the object it was uploaded for"
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'expires_at'], name='direct_upload_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.original_filename} ({self.kind}, {self.status})"
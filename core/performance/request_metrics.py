@@ -0,0 +1,212 @@
+"""
+Per-request query, cache and latency metrics with per-view budgets.
+
+RequestMetricsMiddleware runs each request under a RequestRecorder, which is
+installed as a database execute wrapper on every connection and records, for
+the resolved URL name:
+
+- the number of queries and the total SQL time,
+- duplicate queries: statements whose fingerprint (the SQL with IN lists and
+  literals collapsed) runs REQUEST_METRICS_DUPLICATE_THRESHOLD times or more,
+  the usual sign of an N+1 loop,
+- cache hits and misses (counted by core.utils.cache_backends),
+- wall time.
+
+Each request becomes a RequestMetric row written through core.event_ingestion,
+so rows are buffered in process and inserted in batches; the
+'core.RequestMetric' entry of EVENT_INGESTION_POLICIES sets the sample rate
+(per view name) and retention. worst_offenders() summarises them by p95 for
+the admin page.
+
+REQUEST_METRICS_BUDGETS sets limits per URL name, with 'default' applying to
+every other view:
+
+    REQUEST_METRICS_BUDGETS = {
+        'default': {'queries': 100, 'duplicates': 10},
+        'reports:overview': {'queries': 300, 'wall_ms': 5000},
+    }
+
+Keys are queries, sql_ms, wall_ms and duplicates. A request over budget is
+logged, or raises RequestBudgetExceeded when REQUEST_METRICS_BUDGET_ACTION is
+'raise' (the test settings), so a test client request fails on a regression.
+"""
+
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Aggregate, Avg, Count, FloatField, Max, Q, Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('request_metrics_recorder', default=None)
+
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*%s\s*,?)+\)', re.IGNORECASE)
+_NUMBER = re.compile(r'\b\d+\b')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_SPACE = re.compile(r'\s+')
+
+BUDGET_KEYS = ('queries', 'sql_ms', 'wall_ms', 'duplicates')
+
+
+class RequestBudgetExceeded(AssertionError):
+    """Raised for a request over its budget when REQUEST_METRICS_BUDGET_ACTION is 'raise'"""
+
+
+def fingerprint(sql):
+    """SQL with parameter lists and literals collapsed, so N+1 repeats compare equal"""
+    sql = _IN_LIST.sub('IN (...)', sql)
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def duplicate_threshold():
+    return getattr(settings, 'REQUEST_METRICS_DUPLICATE_THRESHOLD', 5)
+
+
+class RequestRecorder:
+    """Database execute wrapper that tallies the queries of one request"""
+
+    def __init__(self):
+        self.query_count = 0
+        self.sql_time = 0.0
+        self.fingerprints = Counter()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - start
+            self.query_count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    @contextmanager
+    def installed(self):
+        """Record queries on every connection, and cache lookups, within the block"""
+        token = _current.set(self)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(self))
+                yield self
+        finally:
+            _current.reset(token)
+
+    def duplicates(self, threshold=None):
+        """(fingerprint, count) of statements repeated at least threshold times, most first"""
+        threshold = threshold or duplicate_threshold()
+        return [(sql, count) for sql, count in self.fingerprints.most_common() if count >= threshold]
+
+
+def record_cache_lookup(hits=0, misses=0):
+    """Count cache hits and misses against the current request, if any"""
+    recorder = _current.get()
+    if recorder is not None:
+        recorder.cache_hits += hits
+        recorder.cache_misses += misses
+
+
+def get_budget(view_name):
+    budgets = getattr(settings, 'REQUEST_METRICS_BUDGETS', {})
+    return budgets.get(view_name, budgets.get('default', {}))
+
+
+def over_budget(view_name, sample):
+    """Descriptions of the limits a sample exceeds, empty when within budget"""
+    budget = get_budget(view_name)
+    return [
+        f"{key} {sample[key]:.0f} > {budget[key]}"
+        for key in BUDGET_KEYS
+        if budget.get(key) is not None and sample[key] > budget[key]
+    ]
+
+
+def finish_request(recorder, view_name, method, status_code, wall_time):
+    """Check a finished request against its budget and queue its RequestMetric row"""
+    duplicates = recorder.duplicates()
+    sample = {
+        'queries': recorder.query_count,
+        'sql_ms': recorder.sql_time * 1000,
+        'wall_ms': wall_time * 1000,
+        # Executions beyond the first of each repeated statement
+        'duplicates': sum(count - 1 for _, count in duplicates),
+    }
+    violations = over_budget(view_name, sample)
+
+    from core.event_ingestion import log_event
+    from core.models import RequestMetric
+    log_event(
+        RequestMetric,
+        view_name=view_name[:200],
+        method=method[:10],
+        status_code=status_code,
+        query_count=sample['queries'],
+        sql_time_ms=sample['sql_ms'],
+        wall_time_ms=sample['wall_ms'],
+        duplicate_queries=sample['duplicates'],
+        top_duplicate=duplicates[0][0][:2000] if duplicates else '',
+        cache_hits=recorder.cache_hits,
+        cache_misses=recorder.cache_misses,
+        over_budget=bool(violations),
+    )
+
+    if violations:
+        message = f"Request budget exceeded for {view_name}: {', '.join(violations)}"
+        if duplicates:
+            message += f" (most repeated, {duplicates[0][1]}x: {duplicates[0][0][:300]})"
+        if getattr(settings, 'REQUEST_METRICS_BUDGET_ACTION', 'log') == 'raise':
+            raise RequestBudgetExceeded(message)
+        logger.warning(message)
+    return violations
+
+
+class Percentile(Aggregate):
+    """PostgreSQL percentile_cont over a numeric column"""
+    function = 'PERCENTILE_CONT'
+    name = 'Percentile'
+    output_field = FloatField()
+    template = '%(function)s(%(fraction)s) WITHIN GROUP (ORDER BY %(expressions)s)'
+
+    def __init__(self, expression, fraction, **extra):
+        super().__init__(expression, fraction=float(fraction), **extra)
+
+
+ORDERINGS = {
+    'wall': 'p95_wall_ms',
+    'queries': 'p95_queries',
+    'sql': 'p95_sql_ms',
+    'duplicates': 'p95_duplicates',
+}
+
+
+def worst_offenders(days=7, order='wall', limit=50):
+    """Views of the last days ranked by the p95 of a metric (see ORDERINGS)"""
+    from core.models import RequestMetric
+
+    return list(
+        RequestMetric.objects.filter(
+            created_at__gte=timezone.now() - timedelta(days=days)
+        ).values('view_name').annotate(
+            requests=Count('id'),
+            p95_wall_ms=Percentile('wall_time_ms', 0.95),
+            p95_queries=Percentile('query_count', 0.95),
+            max_queries=Max('query_count'),
+            p95_sql_ms=Percentile('sql_time_ms', 0.95),
+            p95_duplicates=Percentile('duplicate_queries', 0.95),
+            avg_wall_ms=Avg('wall_time_ms'),
+            cache_hits=Sum('cache_hits'),
+            cache_misses=Sum('cache_misses'),
+            over_budget=Count('id', filter=Q(over_budget=True)),
+        ).order_by(f'-{ORDERINGS.get(order, ORDERINGS["wall"])}')[:limit]
+    )
@@ -40,14 +40,14 @@ class MediaS3Storage(S3Boto3Storage):
         # This avoids extra S3 calls
         return name
     
-    def url(self, name):
+    def url(self, name, parameters=None, expire=None, http_method=None):
         """
         Enhanced URL generation for video streaming
         Ensures proper URL format for video files
         """
         try:
             # Get the base URL from parent class
-            url = super().url(name)
+            url = super().url(name, parameters=parameters, expire=expire, http_method=http_method)
             
             # For video files, ensure proper URL format
             if name and any(name.lower().endswith(ext) for ext in ['.mp4', '.webm', '.ogg', '.avi', '.mov', '.m4v']):
@@ -79,6 +79,27 @@ class MediaS3Storage(S3Boto3Storage):
             else:
                 raise e
 
+    def presigned_url(self, name, expire=None, parameters=None):
+        """
+        Short-lived signed GET URL for name.
+
+        url() returns plain custom-domain URLs when AWS_S3_CUSTOM_DOMAIN is set;
+        this always signs against the bucket so private objects can be handed
+        to the browser directly. parameters are extra GetObject parameters such
+        as ResponseContentDisposition.
+        """
+        from storages.utils import clean_name
+
+        params = dict(parameters or {})
+        params['Bucket'] = self.bucket.name
+        params['Key'] = self._normalize_name(clean_name(name))
+        return self.bucket.meta.client.generate_presigned_url(
+            'get_object',
+            Params=params,
+            ExpiresIn=expire or self.querystring_expire
+        )
+
+
 class StaticS3Storage(S3Boto3Storage):
     """
     Custom S3 storage for static files
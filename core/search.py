@@ -0,0 +1,268 @@
+"""
+Ranked global search over stored full-text vectors.
+
+Courses, topics, users, discussions and messages carry a search_vector
+column that PostgreSQL triggers keep current (see the *_search_vector
+migrations). Courses embed their category and instructor names, and
+renaming either re-derives the affected course vectors. Each vector has a
+GIN index, and the main title-like columns have gin_trgm_ops indexes.
+
+search() matches every query word as a prefix against the stored vector
+and ranks with ts_rank, so a query never computes to_tsvector per row.
+When nothing matches it falls back to trigram similarity / ILIKE on the
+indexed columns, which catches typos and partial words. Results are
+limited to what the user may see and paginated in the database.
+"""
+
+import logging
+import re
+
+from django.contrib.auth.decorators import login_required
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+from django.http import JsonResponse
+from django.urls import NoReverseMatch, reverse
+from django.views.decorators.http import require_GET
+
+from core.utils.type_guards import safe_get_int
+
+logger = logging.getLogger(__name__)
+
+KINDS = ('courses', 'topics', 'users', 'discussions', 'messages')
+USER_SEARCH_ROLES = ('globaladmin', 'superadmin', 'admin', 'instructor')
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Text search configuration used by each kind's trigger
+SEARCH_CONFIGS = {
+    'courses': 'english',
+    'topics': 'english',
+    'users': 'simple',
+    'discussions': 'english',
+    'messages': 'english',
+}
+
+# Trigram-indexed columns used for the fuzzy fallback
+TRIGRAM_FIELDS = {
+    'courses': ('title',),
+    'topics': ('title',),
+    'users': ('username', 'first_name', 'last_name', 'email'),
+    'discussions': ('title',),
+    'messages': ('subject',),
+}
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def build_search_query(text, config):
+    """Prefix tsquery matching every word of text, or None when text has no words"""
+    words = _WORD_RE.findall(text or '')[:10]
+    if not words:
+        return None
+    raw = ' & '.join(f"{word}:*" for word in words)
+    return SearchQuery(raw, search_type='raw', config=config)
+
+
+def _course_scope(user):
+    """Q limiting courses to those the global search may show to user"""
+    from courses.visibility import get_user_course_index
+
+    role = getattr(user, 'role', None)
+    if role == 'globaladmin' or user.is_superuser:
+        return Q()
+    if role == 'superadmin':
+        from core.utils.business_filtering import filter_courses_by_business
+        return Q(id__in=filter_courses_by_business(user).values('id'))
+    if role == 'admin':
+        return Q(branch=user.branch)
+    index = get_user_course_index(user)
+    if role == 'instructor':
+        return Q(id__in=index.course_ids('instructing')) | Q(branch=user.branch)
+    return Q(id__in=index.course_ids('enrolled')) | Q(is_public=True)
+
+
+def _courses(user, category=None):
+    from courses.models import Course
+
+    queryset = Course.objects.select_related('category', 'instructor', 'branch').filter(_course_scope(user))
+    if category is not None:
+        queryset = queryset.filter(category=category)
+    return queryset
+
+
+def _topics(user, category=None):
+    from courses.models import Course, Topic
+
+    courses = Course.objects.filter(_course_scope(user))
+    if category is not None:
+        courses = courses.filter(category=category)
+    queryset = Topic.objects.filter(coursetopic__course__in=courses.values('id'))
+    if getattr(user, 'role', None) == 'learner':
+        queryset = queryset.filter(status='active')
+    return queryset
+
+
+def _users(user, category=None):
+    from users.models import CustomUser
+
+    role = getattr(user, 'role', None)
+    queryset = CustomUser.objects.select_related('branch')
+    if role == 'admin':
+        # Admin users cannot see superadmin or globaladmin users
+        return queryset.filter(branch=user.branch).exclude(role__in=['superadmin', 'globaladmin'])
+    if role == 'instructor':
+        # Instructors can only see learner users
+        return queryset.filter(branch=user.branch, role='learner')
+    if role == 'superadmin':
+        # Super admin users cannot see globaladmin users
+        return queryset.exclude(role='globaladmin')
+    return queryset
+
+
+def _discussions(user, category=None):
+    from courses.models import Course
+    from discussions.models import Discussion
+
+    queryset = Discussion.objects.select_related('course', 'created_by').filter(status='published')
+    role = getattr(user, 'role', None)
+    if role == 'globaladmin' or user.is_superuser:
+        return queryset
+    course_ids = Course.objects.filter(_course_scope(user)).values('id')
+    return queryset.filter(
+        Q(created_by=user) |
+        Q(course_id__in=course_ids) |
+        Q(topics__coursetopic__course_id__in=course_ids)
+    )
+
+
+def _messages(user, category=None):
+    from lms_messages.models import Message
+
+    return Message.objects.select_related('sender').filter(
+        Q(sender=user) | Q(recipients=user)
+    )
+
+
+SCOPES = {
+    'courses': _courses,
+    'topics': _topics,
+    'users': _users,
+    'discussions': _discussions,
+    'messages': _messages,
+}
+
+
+def can_search(user, kind):
+    if kind not in SCOPES or not getattr(user, 'is_authenticated', False):
+        return False
+    if kind == 'users':
+        return getattr(user, 'role', None) in USER_SEARCH_ROLES
+    return True
+
+
+def _ranked(queryset, kind, text):
+    search_query = build_search_query(text, SEARCH_CONFIGS[kind])
+    if search_query is None:
+        return queryset.none()
+    return queryset.filter(search_vector=search_query).annotate(
+        rank=SearchRank(F('search_vector'), search_query)
+    ).order_by('-rank', '-pk')
+
+
+def _fuzzy(queryset, kind, text):
+    fields = TRIGRAM_FIELDS[kind]
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{f'{field}__icontains': text}) | Q(**{f'{field}__trigram_similar': text})
+    similarities = [TrigramSimilarity(field, text) for field in fields]
+    similarity = similarities[0] if len(similarities) == 1 else Greatest(*similarities)
+    return queryset.filter(condition).annotate(rank=similarity).order_by('-rank', '-pk')
+
+
+def _paginate(queryset, page, per_page):
+    paginator = Paginator(queryset, per_page)
+    try:
+        return paginator.page(page)
+    except PageNotAnInteger:
+        return paginator.page(1)
+    except EmptyPage:
+        return paginator.page(paginator.num_pages)
+
+
+def search(user, text, kind='courses', page=1, per_page=DEFAULT_PAGE_SIZE, category=None):
+    """
+    Ranked, paginated search of one kind of object visible to user.
+
+    Returns a django.core.paginator.Page whose objects carry a rank
+    annotation, or None when user may not search kind. category narrows
+    courses and topics to a CourseCategory.
+    """
+    if not can_search(user, kind):
+        return None
+    text = (text or '').strip()
+    per_page = max(1, min(int(per_page or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+    queryset = SCOPES[kind](user, category)
+    if kind in ('topics', 'discussions', 'messages'):
+        # These scopes join through to-many relations
+        queryset = queryset.distinct()
+    if not text:
+        return _paginate(queryset.none(), page, per_page)
+
+    result = _paginate(_ranked(queryset, kind, text), page, per_page)
+    if result.paginator.count == 0:
+        result = _paginate(_fuzzy(queryset, kind, text), page, per_page)
+    return result
+
+
+def _url(name, *args):
+    try:
+        return reverse(name, args=args)
+    except NoReverseMatch:
+        return None
+
+
+def _serialize(kind, obj):
+    """Compact JSON row for a search hit"""
+    if kind == 'courses':
+        return {'id': obj.id, 'title': obj.title, 'url': _url('courses:course_details', obj.id)}
+    if kind == 'topics':
+        return {'id': obj.id, 'title': obj.title, 'url': _url('courses:topic_view', obj.id)}
+    if kind == 'users':
+        return {'id': obj.id, 'username': obj.username, 'name': obj.get_full_name(), 'email': obj.email}
+    if kind == 'discussions':
+        return {'id': obj.id, 'title': obj.title, 'url': _url('discussions:discussion_detail', obj.id)}
+    return {'id': obj.id, 'subject': obj.subject, 'url': _url('lms_messages:message_detail', obj.id)}
+
+
+@login_required
+@require_GET
+def search_api(request):
+    """Ranked search of one kind: ?q=<text>&kind=<kind>&page=<n>&per_page=<n>"""
+    kind = request.GET.get('kind', 'courses')
+    if kind not in KINDS:
+        return JsonResponse({'success': False, 'error': f"kind must be one of {', '.join(KINDS)}"}, status=400)
+    page = search(
+        request.user,
+        request.GET.get('q', ''),
+        kind=kind,
+        page=request.GET.get('page', 1),
+        per_page=safe_get_int(request.GET, 'per_page', DEFAULT_PAGE_SIZE),
+    )
+    if page is None:
+        return JsonResponse({'success': False, 'error': 'Permission denied'}, status=403)
+
+    results = []
+    for obj in page.object_list:
+        row = _serialize(kind, obj)
+        row['rank'] = round(float(getattr(obj, 'rank', 0) or 0), 4)
+        results.append(row)
+    return JsonResponse({
+        'success': True,
+        'kind': kind,
+        'results': results,
+        'page': page.number,
+        'num_pages': page.paginator.num_pages,
+        'count': page.paginator.count,
+    })
@@ -6,6 +6,9 @@ from django.db.models import Q, Count, Prefetch
 from datetime import timedelta, datetime, time as dt_time
 import logging
 
+from core import todo_feed
+from courses.visibility import get_user_course_index
+
 logger = logging.getLogger(__name__)
 
 # Import models at module level to prevent scoping issues
@@ -27,21 +30,36 @@ class TodoService:
         self.next_month = self.today + timedelta(days=30)
         
     def get_todos(self, limit=10, offset=0):
-        """Main method to get todos based on user role"""
+        """Main method to get todos based on user role, read from the stored feed"""
         try:
-            if self.user.role == 'learner':
-                return self._get_learner_todos(limit, offset)
-            elif self.user.role == 'instructor':
-                return self._get_instructor_todos(limit, offset)
-            elif self.user.role in ['admin', 'superadmin']:
-                return self._get_admin_todos(limit, offset)
-            elif self.user.role == 'globaladmin':
-                return self._get_global_admin_todos(limit, offset)
-            else:
-                return []
+            todo_feed.ensure_fresh(self.user)
+            items, _ = todo_feed.page(self.user, limit=limit, offset=offset)
+            return [item.as_todo() for item in items]
         except Exception as e:
             logger.error(f"Error generating todos for user {self.user.id}: {str(e)}")
             return []
+
+    def get_page(self, limit=10, cursor=None, todo_type=None):
+        """One keyset page of todos; returns (todos, next_cursor)"""
+        todo_feed.ensure_fresh(self.user)
+        items, next_cursor = todo_feed.page(self.user, limit=limit, cursor=cursor, todo_type=todo_type)
+        return [item.as_todo() for item in items], next_cursor
+
+    def build_todos(self):
+        """All todos of the user computed from their sources, in list order"""
+        if self.user.role == 'learner':
+            return self._get_learner_todos(limit=None)
+        elif self.user.role == 'instructor':
+            return self._get_instructor_todos(limit=None)
+        elif self.user.role in ['admin', 'superadmin']:
+            return self._get_admin_todos(limit=None)
+        elif self.user.role == 'globaladmin':
+            return self._get_global_admin_todos(limit=None)
+        return []
+
+    @staticmethod
+    def _slice(todos, limit, offset):
+        return todos[offset:] if limit is None else todos[offset:offset + limit]
     
     def _get_learner_todos(self, limit=10, offset=0):
         """Generate todos for learners - comprehensive time-sensitive reminder list"""
@@ -66,7 +84,7 @@ class TodoService:
         enrolled_courses = LocalCourseEnrollment.objects.filter(
             user=self.user
         ).select_related('course')
-        enrolled_course_ids = list(enrolled_courses.values_list('course_id', flat=True))
+        enrolled_course_ids = list(get_user_course_index(self.user).enrolled)
         
         # 0. URGENT PRIORITY: Unread messages
         unread_messages = Message.objects.filter(
@@ -232,7 +250,7 @@ class TodoService:
         ).exclude(
             submissions__user=self.user,
             submissions__status__in=['submitted', 'graded']
-        ).distinct().select_related('course').order_by('due_date')[:10]
+        ).distinct().prefetch_related('courses').order_by('due_date')[:10]
         
         for assignment in urgent_assignments:
             due_text = self._format_due_date(assignment.due_date)
@@ -267,7 +285,7 @@ class TodoService:
         ).exclude(
             submissions__user=self.user,
             submissions__status__in=['submitted', 'graded']
-        ).distinct().select_related('course').order_by('due_date')[:20]
+        ).distinct().prefetch_related('courses').order_by('due_date')[:20]
         
         for assignment in upcoming_assignments:
             due_text = self._format_due_date(assignment.due_date)
@@ -595,7 +613,7 @@ class TodoService:
         ))
         
         # Apply pagination
-        return todos[offset:offset + limit]
+        return self._slice(todos, limit, offset)
     
     def _get_instructor_todos(self, limit=10, offset=0):
         """Generate todos for instructors"""
@@ -646,12 +664,10 @@ class TodoService:
         # Get instructor's courses
         if self.user.role == 'instructor' and self.user.branch:
             accessible_courses = Course.objects.filter(
-                Q(instructor=self.user) | 
-                Q(accessible_groups__memberships__user=self.user,
-                  accessible_groups__memberships__is_active=True),
+                id__in=get_user_course_index(self.user).course_ids('instructing', 'group'),
                 branch=self.user.branch,
                 is_active=True
-            ).distinct()
+            )
         else:
             return []
         
@@ -697,21 +713,27 @@ class TodoService:
         from conferences.models import Conference
         upcoming_conferences = Conference.objects.filter(
             course__in=accessible_course_ids,
-            date__gte=self.now,
+            date__gte=self.today,
             date__lte=self.next_week,
             status='published'
-        ).select_related('course').order_by('date')[:5]
+        ).select_related('course').order_by('date', 'start_time')[:5]
         
         for conference in upcoming_conferences:
-            due_text = self._format_due_date(conference.date)
-            priority = 'high' if conference.date.date() <= self.tomorrow else 'medium'
+            # Conference.date is a DateField; combine it with start_time for sorting
+            conf_datetime = timezone.make_aware(
+                datetime.combine(conference.date, conference.start_time or dt_time.min),
+                timezone.get_current_timezone()
+            )
+            due_text = self._format_due_date(conf_datetime)
+            priority = 'high' if conference.date <= self.tomorrow else 'medium'
+            meeting_time = conference.start_time.strftime("%I:%M %p") if conference.start_time else ""
             
             todos.append({
                 'id': f'conference_host_{conference.id}',
                 'title': f'Host: {conference.title}',
-                'description': f'{conference.course.title if conference.course else "General"} - {conference.date.strftime("%I:%M %p")}',
+                'description': f'{conference.course.title if conference.course else "General"} - {meeting_time}',
                 'due_date': due_text,
-                'sort_date': conference.date,
+                'sort_date': conf_datetime,
                 'type': 'conference',
                 'priority': priority,
                 'icon': 'video',
@@ -719,7 +741,7 @@ class TodoService:
                 'metadata': {
                     'conference_id': conference.id,
                     'course_id': conference.course.id if conference.course else None,
-                    'meeting_time': conference.date.strftime("%I:%M %p")
+                    'meeting_time': meeting_time
                 }
             })
         
@@ -748,7 +770,7 @@ class TodoService:
         priority_order = {'high': 1, 'medium': 2, 'low': 3}
         todos.sort(key=lambda x: (priority_order.get(x['priority'], 4), x['sort_date']))
         
-        return todos[offset:offset + limit]
+        return self._slice(todos, limit, offset)
     
     def _get_admin_todos(self, limit=10, offset=0):
         """Generate todos for admins/superadmins"""
@@ -853,7 +875,7 @@ class TodoService:
         priority_order = {'high': 1, 'medium': 2, 'low': 3}
         todos.sort(key=lambda x: (priority_order.get(x['priority'], 4), x['sort_date']))
         
-        return todos[offset:offset + limit]
+        return self._slice(todos, limit, offset)
     
     def _get_global_admin_todos(self, limit=10, offset=0):
         """Generate todos for global admins"""
@@ -904,7 +926,7 @@ class TodoService:
         priority_order = {'high': 1, 'medium': 2, 'low': 3}
         todos.sort(key=lambda x: (priority_order.get(x['priority'], 4), x['sort_date']))
         
-        return todos[offset:offset + limit]
+        return self._slice(todos, limit, offset)
     
     def _format_due_date(self, due_date):
         """Format due date for display"""
@@ -923,24 +945,19 @@ class TodoService:
             return due_date.strftime('%b %d')
     
     def get_todo_counts_by_type(self):
-        """Get todo counts grouped by type"""
-        todos = self.get_todos(limit=100)  # Get more for accurate counts
-        
-        counts = {}
-        for todo in todos:
-            todo_type = todo['type']
-            priority = todo['priority']
-            
-            if todo_type not in counts:
-                counts[todo_type] = {'total': 0, 'high': 0, 'medium': 0, 'low': 0, 'critical': 0}
-            
-            counts[todo_type]['total'] += 1
-            counts[todo_type][priority] += 1
-        
-        return counts
+        """Get todo counts grouped by type, from the maintained TodoCount rows"""
+        todo_feed.ensure_fresh(self.user)
+        return todo_feed.counts(self.user)
+
+    def get_total_count(self, todo_type=None):
+        """Number of stored todos, optionally of one type"""
+        counts = self.get_todo_counts_by_type()
+        if todo_type:
+            return counts.get(todo_type, {}).get('total', 0)
+        return sum(type_counts['total'] for type_counts in counts.values())
     
     def get_todos_by_type(self, todo_type, limit=10, offset=0):
         """Get todos filtered by type"""
-        all_todos = self.get_todos(limit=100)  # Get more for filtering
-        filtered_todos = [todo for todo in all_todos if todo['type'] == todo_type]
-        return filtered_todos[offset:offset + limit]
+        todo_feed.ensure_fresh(self.user)
+        items, _ = todo_feed.page(self.user, limit=limit, todo_type=todo_type, offset=offset)
+        return [item.as_todo() for item in items]
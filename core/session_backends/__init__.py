@@ -1,7 +1,7 @@
 # Session backends
-from .robust import RobustSessionStore
+from .cached_db import CachedDatabaseSessionStore
 
 # Django expects SessionStore for session engine
-SessionStore = RobustSessionStore
+SessionStore = CachedDatabaseSessionStore
 
-__all__ = ['RobustSessionStore', 'SessionStore']
+__all__ = ['CachedDatabaseSessionStore', 'SessionStore']
@@ -0,0 +1,143 @@
+"""
+Cache-backed session store with database durability
+
+Sessions are read through the SESSION_CACHE_ALIAS cache (Redis) and only fall
+back to django_session on a cache miss. The database row is written when the
+session data changes, or when the stored expiry has fallen more than
+SESSION_DB_REFRESH_INTERVAL seconds behind the sliding expiry, so the rows
+managed by preserve_sessions stay authoritative across deployments and cache
+flushes without an UPDATE on every request.
+
+While the cache runs on its per-process fallback (FallbackRedisCache with
+Redis down) sessions bypass it and go straight to the database: a logout in
+one worker could not evict the session from the other workers' local caches.
+"""
+import logging
+
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore as DatabaseSessionStore
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'core.session_backends.cached_db'
+
+
+class CachedDatabaseSessionStore(DatabaseSessionStore):
+    """
+    Read-through cache session store that defers database writes until the
+    session data actually changes
+    """
+
+    cache_key_prefix = KEY_PREFIX
+
+    def __init__(self, session_key=None):
+        self._cache = caches[getattr(settings, 'SESSION_CACHE_ALIAS', 'default')]
+        super().__init__(session_key)
+        # Serialized data and expiry last known to be in the database
+        self._stored_payload = None
+        self._stored_expire_date = None
+
+    @property
+    def cache_key(self):
+        return self.cache_key_prefix + self._get_or_create_session_key()
+
+    def _payload(self, data):
+        return self.serializer().dumps(data)
+
+    def _cache_shared(self):
+        """Whether every worker sees the same cache (not a local fallback)"""
+        try:
+            return not getattr(self._cache, 'in_fallback', False)
+        except Exception as e:
+            logger.warning(f"Session cache availability check failed: {e}")
+            return False
+
+    def _cache_get(self, key):
+        if not self._cache_shared():
+            return None
+        try:
+            return self._cache.get(key)
+        except Exception as e:
+            logger.warning(f"Session cache read failed: {e}")
+            return None
+
+    def _cache_set(self, data, expiry_age):
+        if not self._cache_shared():
+            return
+        try:
+            self._cache.set(
+                self.cache_key,
+                {'data': data, 'expire_date': self._stored_expire_date},
+                expiry_age,
+            )
+        except Exception as e:
+            logger.warning(f"Session cache write failed: {e}")
+
+    def load(self):
+        entry = self._cache_get(self.cache_key) if self._session_key else None
+        if isinstance(entry, dict) and 'data' in entry:
+            data = entry['data']
+            self._stored_expire_date = entry.get('expire_date')
+        else:
+            session = self._get_session_from_db()
+            if not session:
+                return {}
+            data = self.decode(session.session_data)
+            self._stored_expire_date = session.expire_date
+            self._cache_set(data, self.get_expiry_age(expiry=session.expire_date))
+
+        self._stored_payload = self._payload(data)
+        return data
+
+    def exists(self, session_key):
+        if self._cache_get(self.cache_key_prefix + session_key) is not None:
+            return True
+        return super().exists(session_key)
+
+    def _needs_db_write(self, data, expire_date):
+        """Whether the database row is behind the session being saved"""
+        if self._stored_payload is None or self._stored_expire_date is None:
+            return True
+        if self._payload(data) != self._stored_payload:
+            return True
+        refresh_interval = getattr(settings, 'SESSION_DB_REFRESH_INTERVAL', 300)
+        return (expire_date - self._stored_expire_date).total_seconds() >= refresh_interval
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+
+        data = self._get_session(no_load=must_create)
+        expire_date = self.get_expiry_date()
+
+        if must_create or self._needs_db_write(data, expire_date):
+            super().save(must_create=must_create)
+            self._stored_payload = self._payload(data)
+            self._stored_expire_date = expire_date
+
+        self._cache_set(data, self.get_expiry_age())
+
+    def delete(self, session_key=None):
+        super().delete(session_key)
+        if session_key is None:
+            if self.session_key is None:
+                return
+            session_key = self.session_key
+        if not self._cache_shared():
+            return
+        try:
+            self._cache.delete(self.cache_key_prefix + session_key)
+        except Exception as e:
+            logger.warning(f"Session cache delete failed: {e}")
+
+    def flush(self):
+        """Remove the current session data from the database and regenerate the key"""
+        self.clear()
+        self.delete(self.session_key)
+        self._session_key = None
+        self._stored_payload = None
+        self._stored_expire_date = None
+
+
+SessionStore = CachedDatabaseSessionStore
@@ -6,7 +6,7 @@ Handles session persistence and prevents auto-logout after deployment
 import logging
 from django.contrib.sessions.models import Session
 from django.contrib.auth import get_user_model
-from django.core.cache import cache
+from django.core.cache import caches
 from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
@@ -109,9 +109,10 @@ def check_session_health():
     Check the health of session storage and Redis connection
     """
     try:
-        # Test Redis connection
-        cache.set('session_health_check', 'ok', 10)
-        redis_ok = cache.get('session_health_check') == 'ok'
+        # Test the Redis connection used by the session engine
+        session_cache = caches[getattr(settings, 'SESSION_CACHE_ALIAS', 'default')]
+        session_cache.set('session_health_check', 'ok', 10)
+        redis_ok = session_cache.get('session_health_check') == 'ok'
         
         # Test database session storage
         active_sessions = get_active_session_count()
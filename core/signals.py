@@ -0,0 +1,104 @@
+"""
+Keep stored todo feeds (core.todo_feed) in step with their sources.
+
+Changes that concern a few users refresh their feeds on commit; deadline
+changes that reach every learner of a course only mark those feeds stale.
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from assignments.models import Assignment, AssignmentCourse, AssignmentSubmission
+from conferences.models import Conference, ConferenceTimeSlot
+from courses.models import CourseEnrollment, CourseTopic, Section, Topic
+from lms_messages.models import Message, MessageReadStatus
+from quiz.models import Quiz, QuizAttempt
+
+from .todo_feed import invalidate_courses, schedule_invalidate, schedule_refresh
+
+
+@receiver(m2m_changed, sender=Message.recipients.through)
+def refresh_message_recipients(sender, instance, action, reverse, pk_set, **kwargs):
+    """A new message is an unread todo for each recipient"""
+    if action not in ('post_add', 'post_remove') or not pk_set:
+        return
+    schedule_refresh([instance.pk] if reverse else pk_set)
+
+
+@receiver(pre_delete, sender=Message)
+def refresh_deleted_message_recipients(sender, instance, **kwargs):
+    schedule_refresh(instance.recipients.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=MessageReadStatus)
+def refresh_message_reader(sender, instance, **kwargs):
+    schedule_refresh([instance.user_id])
+
+
+@receiver([post_save, post_delete], sender=AssignmentSubmission)
+def refresh_submission_users(sender, instance, **kwargs):
+    """The learner's own todos, and the grading todos of the course instructors"""
+    instructor_ids = AssignmentCourse.objects.filter(
+        assignment_id=instance.assignment_id
+    ).values_list('course__instructor_id', flat=True)
+    schedule_refresh([instance.user_id, *instructor_ids])
+
+
+@receiver(post_save, sender=QuizAttempt)
+def refresh_quiz_attempt_user(sender, instance, **kwargs):
+    if instance.is_completed:
+        schedule_refresh([instance.user_id])
+
+
+@receiver(post_save, sender=CourseEnrollment)
+def refresh_enrolled_user(sender, instance, created, **kwargs):
+    if created:
+        schedule_refresh([instance.user_id])
+    else:
+        # Progress and access updates are frequent; rebuild on the next read
+        schedule_invalidate([instance.user_id])
+
+
+@receiver(post_delete, sender=CourseEnrollment)
+def refresh_unenrolled_user(sender, instance, **kwargs):
+    schedule_refresh([instance.user_id])
+
+
+@receiver(post_save, sender=Assignment)
+def invalidate_assignment_courses(sender, instance, **kwargs):
+    invalidate_courses(
+        AssignmentCourse.objects.filter(assignment=instance).values_list('course_id', flat=True)
+    )
+
+
+@receiver([post_save, post_delete], sender=AssignmentCourse)
+def invalidate_assignment_course(sender, instance, **kwargs):
+    invalidate_courses([instance.course_id])
+
+
+@receiver([post_save, post_delete], sender=Topic)
+def invalidate_topic_courses(sender, instance, **kwargs):
+    course_ids = list(CourseTopic.objects.filter(topic_id=instance.pk).values_list('course_id', flat=True))
+    if instance.section_id:
+        course_ids.extend(Section.objects.filter(pk=instance.section_id).values_list('course_id', flat=True))
+    invalidate_courses(course_ids)
+
+
+@receiver([post_save, post_delete], sender=CourseTopic)
+def invalidate_course_topic(sender, instance, **kwargs):
+    invalidate_courses([instance.course_id])
+
+
+@receiver([post_save, post_delete], sender=Quiz)
+def invalidate_quiz_course(sender, instance, **kwargs):
+    invalidate_courses([instance.course_id])
+
+
+@receiver([post_save, post_delete], sender=Conference)
+def invalidate_conference_course(sender, instance, **kwargs):
+    invalidate_courses([instance.course_id])
+
+
+@receiver([post_save, post_delete], sender=ConferenceTimeSlot)
+def invalidate_time_slot_course(sender, instance, **kwargs):
+    course_id = Conference.objects.filter(pk=instance.conference_id).values_list('course_id', flat=True).first()
+    invalidate_courses([course_id])
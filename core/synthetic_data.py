@@ -0,0 +1,406 @@
+"""
+Seeded, bulk-inserted synthetic tenants for load testing and benchmarks.
+
+create_comprehensive_test_data builds the fixed test business, its 16
+branches and their admins and instructors; with --scale (or any size
+option) it then calls generate() to fill those branches with learners,
+courses, topics, enrollments, topic progress, quiz attempts, assignment
+submissions, SCORM attempts and messages.
+
+Everything is written with bulk_create in batches and every random choice
+comes from one random.Random(seed), so the same seed and sizes give the same
+tenant on any database. bulk_create sends no signals, so the derived tables
+(training matrix cells, calendar index, todo feeds, gradebook rows) are
+rebuilt by the command afterwards rather than row by row.
+
+Synthetic rows are marked so clean() can remove them: usernames end in
+'_synth_test' (and so are also covered by the test user cleanup), course
+codes start with 'SYN-' and other titles with 'Synthetic '.
+"""
+
+import logging
+import random
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+COURSE_CODE_PREFIX = 'SYN-'
+TITLE_PREFIX = 'Synthetic '
+USERNAME_SUFFIX = '_synth_test'
+PASSWORD = 'test123'
+
+SCALES = {
+    'small': {
+        'learners': 200, 'courses': 20, 'topics_per_course': 6,
+        'enrollments_per_learner': 3, 'messages': 500,
+    },
+    'medium': {
+        'learners': 2000, 'courses': 100, 'topics_per_course': 8,
+        'enrollments_per_learner': 4, 'messages': 5000,
+    },
+    'large': {
+        'learners': 10000, 'courses': 500, 'topics_per_course': 10,
+        'enrollments_per_learner': 5, 'messages': 20000,
+    },
+}
+
+# Repeating pattern of topic types within a course
+TOPIC_PATTERN = ('Text', 'Quiz', 'Assignment', 'SCORM', 'Video', 'Text', 'Quiz', 'Assignment')
+
+# Share of enrollments that have any activity, and of those the share that completed
+ACTIVE_SHARE = 0.7
+COMPLETED_SHARE = 0.3
+RECIPIENTS_PER_MESSAGE = (1, 5)
+
+
+def exists():
+    from courses.models import Course
+    return Course.objects.filter(course_code__startswith=COURSE_CODE_PREFIX).exists()
+
+
+def clean():
+    """Delete synthetic content; synthetic users go with the test user cleanup"""
+    from assignments.models import Assignment
+    from courses.models import Course, Topic
+    from lms_messages.models import Message
+    from quiz.models import Quiz
+    from scorm.models import ScormPackage
+    from users.models import CustomUser
+
+    courses = Course.objects.filter(course_code__startswith=COURSE_CODE_PREFIX)
+    deleted = {
+        'topics': Topic.objects.filter(coursetopic__course__in=courses).distinct().delete()[0],
+        'quizzes': Quiz.objects.filter(title__startswith=TITLE_PREFIX).delete()[0],
+        'assignments': Assignment.objects.filter(title__startswith=TITLE_PREFIX).delete()[0],
+        'scorm_packages': ScormPackage.objects.filter(title__startswith=TITLE_PREFIX).delete()[0],
+        'courses': courses.delete()[0],
+        'messages': Message.objects.filter(subject__startswith=TITLE_PREFIX).delete()[0],
+        'users': CustomUser.objects.filter(username__endswith=USERNAME_SUFFIX).delete()[0],
+    }
+    return deleted
+
+
+class TenantGenerator:
+    """
+    Fills existing branches with a synthetic tenant of the given sizes.
+
+    instructors maps branch id to the instructors of that branch; courses of a
+    branch are spread over them.
+    """
+
+    def __init__(self, branches, instructors, seed=42, batch_size=1000, log=None):
+        self.branches = list(branches)
+        self.instructors = instructors
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.log = log or logger.info
+        self.now = timezone.now()
+        self.counts = {}
+
+    def _insert(self, model, objs, label, **kwargs):
+        created = model.objects.bulk_create(objs, batch_size=self.batch_size, **kwargs)
+        self.counts[label] = self.counts.get(label, 0) + len(objs)
+        self.log(f'{label}: {len(objs)}')
+        return created
+
+    def _uuid(self):
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def _ago(self, max_days):
+        return self.now - timedelta(minutes=self.rng.randint(0, max_days * 24 * 60))
+
+    def generate(self, learners, courses, topics_per_course, enrollments_per_learner, messages):
+        """Create the tenant and return row counts per kind"""
+        users = self.create_learners(learners)
+        course_list = self.create_courses(courses)
+        course_topics = self.create_topics(course_list, topics_per_course)
+        enrollments = self.create_enrollments(users, course_list, enrollments_per_learner)
+        self.create_activity(enrollments, course_topics)
+        self.create_messages(users, messages)
+        return self.counts
+
+    def create_learners(self, count):
+        from lms_notifications.models import NotificationSettings
+        from users.models import CustomUser
+
+        # One hash for every learner; hashing 10k passwords would dominate the run
+        password = make_password(PASSWORD)
+        users = self._insert(CustomUser, [
+            CustomUser(
+                username=f'learner{n}{USERNAME_SUFFIX}',
+                email=f'learner{n}.synth@testlms.com',
+                first_name=f'Learner{n}',
+                last_name='Synthetic',
+                password=password,
+                role='learner',
+                is_active=True,
+                branch=self.branches[n % len(self.branches)],
+            )
+            for n in range(1, count + 1)
+        ], 'learners')
+        # The post_save handler that creates these does not run for bulk inserts
+        self._insert(
+            NotificationSettings,
+            [NotificationSettings(user=user) for user in users],
+            'notification settings',
+            ignore_conflicts=True,
+        )
+        return users
+
+    def create_courses(self, count):
+        from courses.models import Course
+
+        courses = []
+        for n in range(1, count + 1):
+            branch = self.branches[n % len(self.branches)]
+            instructors = self.instructors.get(branch.id) or [None]
+            courses.append(Course(
+                title=f'{TITLE_PREFIX}Course {n}',
+                short_description=f'Synthetic course {n} for load testing',
+                course_code=f'{COURSE_CODE_PREFIX}{n:05d}',
+                branch=branch,
+                instructor=instructors[n % len(instructors)],
+                is_active=True,
+                catalog_visibility='visible',
+            ))
+        return self._insert(Course, courses, 'courses')
+
+    def create_topics(self, courses, per_course):
+        """Topics with their quizzes, assignments and SCORM packages; returns {course_id: [topic]}"""
+        from assignments.models import Assignment, AssignmentCourse
+        from courses.models import CourseTopic, Topic
+        from quiz.models import Quiz
+        from scorm.models import ScormPackage
+
+        plan = [
+            (course, order, TOPIC_PATTERN[order % len(TOPIC_PATTERN)])
+            for course in courses for order in range(per_course)
+        ]
+
+        quizzes = self._insert(Quiz, [
+            Quiz(
+                title=f'{TITLE_PREFIX}Quiz {course.course_code}-{order}',
+                description='Synthetic quiz',
+                creator=course.instructor,
+                course=course,
+                passing_score=70,
+            )
+            for course, order, kind in plan if kind == 'Quiz' and course.instructor
+        ], 'quizzes')
+        assignments = self._insert(Assignment, [
+            Assignment(
+                title=f'{TITLE_PREFIX}Assignment {course.course_code}-{order}',
+                description='Synthetic assignment',
+                user=course.instructor,
+                due_date=self.now + timedelta(days=self.rng.randint(-30, 60)),
+                max_score=100,
+            )
+            for course, order, kind in plan if kind == 'Assignment'
+        ], 'assignments')
+        packages = self._insert(ScormPackage, [
+            ScormPackage(
+                title=f'{TITLE_PREFIX}SCORM {course.course_code}-{order}',
+                version='1.2',
+                launch_url='index.html',
+                processing_status='ready',
+                created_by=course.instructor,
+            )
+            for course, order, kind in plan if kind == 'SCORM'
+        ], 'scorm packages')
+
+        # Hand the generated rows out in plan order
+        quizzes, assignments, packages = iter(quizzes), iter(assignments), iter(packages)
+        topics = []
+        for course, order, kind in plan:
+            quiz = next(quizzes) if kind == 'Quiz' and course.instructor else None
+            if kind == 'Quiz' and quiz is None:
+                kind = 'Text'
+            topics.append(Topic(
+                title=f'{TITLE_PREFIX}{kind} {course.course_code}-{order}',
+                description='Synthetic topic',
+                content_type=kind,
+                status='active',
+                order=order,
+                quiz=quiz,
+                assignment=next(assignments) if kind == 'Assignment' else None,
+                scorm=next(packages) if kind == 'SCORM' else None,
+                web_url='https://example.com/video.mp4' if kind == 'Video' else None,
+            ))
+        topics = self._insert(Topic, topics, 'topics')
+
+        course_topics = {}
+        links = []
+        assignment_links = []
+        for (course, order, kind), topic in zip(plan, topics):
+            course_topics.setdefault(course.id, []).append(topic)
+            links.append(CourseTopic(course=course, topic=topic, order=order))
+            if topic.assignment_id:
+                assignment_links.append(
+                    AssignmentCourse(assignment_id=topic.assignment_id, course=course, is_primary=True)
+                )
+        self._insert(CourseTopic, links, 'course topics')
+        self._insert(AssignmentCourse, assignment_links, 'assignment courses')
+        return course_topics
+
+    def create_enrollments(self, users, courses, per_learner):
+        """Enroll learners mostly in the courses of their own branch"""
+        from courses.models import CourseEnrollment
+
+        by_branch = {}
+        for course in courses:
+            by_branch.setdefault(course.branch_id, []).append(course)
+
+        enrollments = []
+        for user in users:
+            local = by_branch.get(user.branch_id, [])
+            count = min(per_learner, len(courses))
+            chosen = self.rng.sample(local, min(count, len(local)))
+            # Top up from the whole catalog when the branch has too few courses
+            while len(chosen) < count:
+                course = self.rng.choice(courses)
+                if course not in chosen:
+                    chosen.append(course)
+            for course in chosen:
+                completed = self.rng.random() < ACTIVE_SHARE * COMPLETED_SHARE
+                enrollments.append(CourseEnrollment(
+                    user=user,
+                    course=course,
+                    completed=completed,
+                    completion_date=self._ago(90) if completed else None,
+                ))
+
+        # Instructors see their own courses as enrolled, as Course.save() arranges
+        enrollments.extend(
+            CourseEnrollment(user_id=course.instructor_id, course=course)
+            for course in courses if course.instructor_id
+        )
+        return self._insert(CourseEnrollment, enrollments, 'enrollments', ignore_conflicts=True)
+
+    def create_activity(self, enrollments, course_topics):
+        """Topic progress, quiz attempts, submissions and SCORM attempts of learner enrollments"""
+        from assignments.models import AssignmentSubmission
+        from courses.models import TopicProgress
+        from quiz.models import QuizAttempt
+        from scorm.models import ScormAttempt, ScormEnrollment
+
+        progress, attempts, submissions, scorm_enrollments, scorm_attempts = [], [], [], [], []
+        for enrollment in enrollments:
+            if enrollment.user_id == enrollment.course.instructor_id:
+                continue
+            if not enrollment.completed and self.rng.random() >= ACTIVE_SHARE:
+                continue
+            topics = course_topics.get(enrollment.course_id, [])
+            # Completed enrollments finished every topic, others a prefix of them
+            reached = len(topics) if enrollment.completed else self.rng.randint(1, max(len(topics), 1))
+
+            for topic in topics[:reached]:
+                done = enrollment.completed or topic is not topics[reached - 1]
+                score = Decimal(self.rng.randint(40, 100))
+                progress.append(TopicProgress(
+                    user_id=enrollment.user_id,
+                    topic=topic,
+                    course_id=enrollment.course_id,
+                    completed=done,
+                    completed_at=self._ago(60) if done else None,
+                    attempts=1,
+                    last_score=score if topic.content_type in ('Quiz', 'SCORM') else None,
+                    best_score=score if topic.content_type in ('Quiz', 'SCORM') else None,
+                    total_time_spent=self.rng.randint(60, 3600),
+                ))
+
+                if topic.content_type == 'Quiz':
+                    attempts.append(QuizAttempt(
+                        quiz_id=topic.quiz_id,
+                        user_id=enrollment.user_id,
+                        score=score,
+                        is_completed=done,
+                        end_time=self._ago(60) if done else None,
+                        active_time_seconds=self.rng.randint(60, 1800),
+                    ))
+                elif topic.content_type == 'Assignment':
+                    graded = done and self.rng.random() < 0.6
+                    submissions.append(AssignmentSubmission(
+                        assignment_id=topic.assignment_id,
+                        user_id=enrollment.user_id,
+                        submission_text='Synthetic submission',
+                        status='graded' if graded else 'submitted',
+                        grade=score if graded else None,
+                        graded_by_id=enrollment.course.instructor_id if graded else None,
+                        graded_at=self._ago(30) if graded else None,
+                    ))
+                elif topic.content_type == 'SCORM':
+                    scorm_enrollments.append(ScormEnrollment(
+                        user_id=enrollment.user_id,
+                        topic=topic,
+                        package_id=topic.scorm_id,
+                        total_attempts=1,
+                        best_score=score if done else None,
+                        enrollment_status='completed' if done else 'in_progress',
+                    ))
+
+        self._insert(TopicProgress, progress, 'topic progress', ignore_conflicts=True)
+        self._insert(QuizAttempt, attempts, 'quiz attempts')
+        self._insert(AssignmentSubmission, submissions, 'submissions', ignore_conflicts=True)
+
+        for scorm_enrollment in self._insert(ScormEnrollment, scorm_enrollments, 'scorm enrollments'):
+            done = scorm_enrollment.enrollment_status == 'completed'
+            scorm_attempts.append(ScormAttempt(
+                enrollment=scorm_enrollment,
+                user_id=scorm_enrollment.user_id,
+                topic_id=scorm_enrollment.topic_id,
+                package_id=scorm_enrollment.package_id,
+                attempt_number=1,
+                session_id=self._uuid(),
+                completed=done,
+                completed_at=self._ago(60) if done else None,
+                last_commit_at=self._ago(60),
+                score_raw=scorm_enrollment.best_score,
+                completion_status='completed' if done else 'incomplete',
+                lesson_location='page-3',
+                commit_count=self.rng.randint(1, 40),
+            ))
+        self._insert(ScormAttempt, scorm_attempts, 'scorm attempts')
+
+    def create_messages(self, users, count):
+        """Messages from branch instructors to learners of the branch, with read statuses"""
+        from lms_messages.models import Message, MessageReadStatus
+
+        by_branch = {}
+        for user in users:
+            by_branch.setdefault(user.branch_id, []).append(user)
+        branches = [branch for branch in self.branches if by_branch.get(branch.id) and self.instructors.get(branch.id)]
+        if not branches or not count:
+            return
+
+        plan = []
+        for n in range(1, count + 1):
+            branch = self.rng.choice(branches)
+            learners = by_branch[branch.id]
+            recipients = self.rng.sample(learners, min(self.rng.randint(*RECIPIENTS_PER_MESSAGE), len(learners)))
+            plan.append((
+                Message(
+                    sender=self.rng.choice(self.instructors[branch.id]),
+                    subject=f'{TITLE_PREFIX}message {n}',
+                    content='<p>Synthetic message body</p>',
+                    branch=branch,
+                ),
+                recipients,
+            ))
+
+        messages = self._insert(Message, [message for message, _ in plan], 'messages')
+        Recipient = Message.recipients.through
+        recipient_rows, statuses = [], []
+        for message, (_, recipients) in zip(messages, plan):
+            for user in recipients:
+                recipient_rows.append(Recipient(message_id=message.id, customuser_id=user.id))
+                is_read = self.rng.random() < 0.5
+                statuses.append(MessageReadStatus(
+                    message=message, user=user, is_read=is_read, read_at=self.now if is_read else None,
+                ))
+        self._insert(Recipient, recipient_rows, 'message recipients')
+        self._insert(MessageReadStatus, statuses, 'message read statuses')
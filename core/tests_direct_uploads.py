@@ -0,0 +1,160 @@
+"""
+Tests for the two-phase direct upload protocol through the local stand-in backend.
+"""
+
+import base64
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from branches.models import Branch
+from tinymce_editor.uploads import IMAGE_MAX_SIZE
+
+from .direct_uploads import UploadRejected, claim, expire_uploads, finalize, get_backend, initiate
+from .models import BranchStorageLimit, DirectUpload
+
+User = get_user_model()
+
+# A 1x1 PNG
+PNG = base64.b64decode(
+    'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=='
+)
+
+
+@override_settings(DIRECT_UPLOAD_BACKEND='local')
+class DirectUploadTestCase(TestCase):
+    """Uploads are checked on initiate and finalize and handed out once."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        media_override = override_settings(MEDIA_ROOT=self.media_root)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+
+        self.branch = Branch.objects.create(name='Upload branch')
+        self.user = User.objects.create_user(
+            username='upload_instructor',
+            email='upload_instructor@example.com',
+            password='testpass123',
+            role='instructor',
+            branch=self.branch
+        )
+
+    def start(self, content=PNG, filename='photo.png', content_type='image/png', size=None):
+        upload, _ = initiate(self.user, 'editor_image', filename, content_type, size or len(content))
+        return upload
+
+    def put(self, upload, content=PNG):
+        self.client.login(username='upload_instructor', password='testpass123')
+        response = self.client.put(
+            reverse('core:api_upload_put', args=[upload.token]), data=content,
+            content_type='application/octet-stream'
+        )
+        self.assertEqual(response.status_code, 200)
+        upload.refresh_from_db()
+        return upload
+
+    def test_initiate_rejects_type(self):
+        with self.assertRaises(UploadRejected):
+            self.start(filename='notes.txt', content_type='text/plain')
+
+    def test_initiate_rejects_size(self):
+        with self.assertRaises(UploadRejected):
+            self.start(size=IMAGE_MAX_SIZE + 1)
+
+    def test_initiate_rejects_over_quota(self):
+        BranchStorageLimit.objects.update_or_create(branch=self.branch, defaults={'storage_limit_bytes': 10})
+
+        with self.assertRaises(UploadRejected):
+            self.start()
+        self.assertFalse(DirectUpload.objects.exists())
+
+    def test_finalize_registers_matching_file(self):
+        upload = self.put(self.start())
+
+        finalize(upload)
+
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, DirectUpload.COMPLETE)
+        self.assertEqual(upload.size, len(PNG))
+
+    def test_finalize_rejects_size_mismatch(self):
+        upload = self.start()
+        # More bytes than declared, as a misbehaving client could send to S3
+        get_backend('local').receive(upload, BytesIO(PNG + PNG))
+        upload.save(update_fields=['storage_name'])
+
+        with self.assertRaises(UploadRejected):
+            finalize(upload)
+
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, DirectUpload.REJECTED)
+        self.assertFalse(default_storage.exists(upload.storage_name))
+
+    def test_finalize_rejects_signature_mismatch(self):
+        content = b'#!/bin/sh\necho "not an image"\n'
+        upload = self.put(self.start(content=content), content)
+
+        with self.assertRaises(UploadRejected):
+            finalize(upload)
+
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, DirectUpload.REJECTED)
+        self.assertFalse(default_storage.exists(upload.storage_name))
+
+    def test_finalize_refuses_other_users_token(self):
+        upload = self.put(self.start())
+        User.objects.create_user(
+            username='upload_other',
+            email='upload_other@example.com',
+            password='testpass123',
+            role='instructor',
+            branch=self.branch
+        )
+        self.client.login(username='upload_other', password='testpass123')
+
+        response = self.client.post(reverse('core:api_upload_finalize', args=[upload.token]))
+
+        self.assertEqual(response.status_code, 404)
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, DirectUpload.PENDING)
+
+    def test_repeated_put_replaces_file(self):
+        upload = self.start()
+        first_name = self.put(upload).storage_name
+
+        second_name = self.put(upload).storage_name
+
+        self.assertEqual(first_name, second_name)
+        directory, _ = second_name.rsplit('/', 1)
+        self.assertEqual(len(default_storage.listdir(directory)[1]), 1)
+
+    def test_claim_succeeds_once(self):
+        upload = self.put(self.start())
+        finalize(upload)
+
+        self.assertIsNone(claim(self.user, upload.token, 'editor_image', context={'assignment_id': 1}))
+        stored = claim(self.user, upload.token, 'editor_image')
+        self.assertEqual(stored, upload.storage_name)
+        self.assertIsNone(claim(self.user, upload.token, 'editor_image'))
+
+    def test_expire_uploads(self):
+        expired = self.put(self.start())
+        DirectUpload.objects.filter(pk=expired.pk).update(expires_at=timezone.now() - timedelta(minutes=1))
+        current = self.start()
+
+        self.assertEqual(expire_uploads(), 1)
+
+        expired.refresh_from_db()
+        current.refresh_from_db()
+        self.assertEqual(expired.status, DirectUpload.REJECTED)
+        self.assertFalse(default_storage.exists(expired.storage_name))
+        self.assertEqual(current.status, DirectUpload.PENDING)
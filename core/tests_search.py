@@ -0,0 +1,75 @@
+"""
+Visibility tests for the ranked global search.
+"""
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from branches.models import Branch
+from courses.models import Course
+from discussions.models import Discussion
+
+from .search import search
+
+User = get_user_model()
+
+
+class DiscussionSearchScopeTestCase(TestCase):
+    """Branch admins only find discussions of the courses they may see."""
+
+    def setUp(self):
+        self.home_branch = Branch.objects.create(name='Search home branch')
+        self.other_branch = Branch.objects.create(name='Search other branch')
+        self.admin = User.objects.create_user(
+            username='search_admin',
+            email='search_admin@example.com',
+            password='testpass123',
+            role='admin',
+            branch=self.home_branch
+        )
+        self.other_instructor = User.objects.create_user(
+            username='search_other_instructor',
+            email='search_other_instructor@example.com',
+            password='testpass123',
+            role='instructor',
+            branch=self.other_branch
+        )
+        self.home_course = Course.objects.create(
+            title='Home course', instructor=self.admin, branch=self.home_branch
+        )
+        self.other_course = Course.objects.create(
+            title='Other course', instructor=self.other_instructor, branch=self.other_branch
+        )
+
+    def create_discussion(self, title, course, created_by):
+        return Discussion.objects.create(
+            title=title,
+            content='Thread content',
+            created_by=created_by,
+            course=course,
+            status='published'
+        )
+
+    def found_ids(self, user, text):
+        return {discussion.id for discussion in search(user, text, kind='discussions').object_list}
+
+    def test_admin_does_not_find_other_branch_discussions(self):
+        other = self.create_discussion('Quarterly harvest planning', self.other_course, self.other_instructor)
+
+        self.assertNotIn(other.id, self.found_ids(self.admin, 'harvest'))
+
+    def test_admin_finds_own_branch_discussions(self):
+        home = self.create_discussion('Quarterly harvest review', self.home_course, self.other_instructor)
+
+        self.assertIn(home.id, self.found_ids(self.admin, 'harvest'))
+
+    def test_globaladmin_finds_every_discussion(self):
+        other = self.create_discussion('Quarterly harvest planning', self.other_course, self.other_instructor)
+        globaladmin = User.objects.create_user(
+            username='search_globaladmin',
+            email='search_globaladmin@example.com',
+            password='testpass123',
+            role='globaladmin'
+        )
+
+        self.assertIn(other.id, self.found_ids(globaladmin, 'harvest'))
@@ -0,0 +1,240 @@
+"""
+Stored per-user todo list.
+
+TodoService builds a user's todos from their messages, submissions,
+deadlines and enrollments. refresh_user() writes that list to TodoItem
+(upserted by todo id, so ids and keyset cursors stay stable) and the
+per-type/per-priority totals to TodoCount, and records in TodoFeed how long
+it stays valid: until the next local midnight, when the "Today"/"Tomorrow"
+texts and priorities move, or until the next upcoming deadline, whichever
+comes first. Staff lists are also capped at TODO_FEED_STAFF_TTL seconds
+since they summarise a whole branch or business.
+
+Handlers in core.signals call schedule_refresh() for the users a change
+concerns, or invalidate_courses() for deadline changes that reach every
+learner of a course. Reads rebuild a feed only when it is missing or stale,
+so the dashboard widget and its counters otherwise read one page of rows.
+"""
+
+import logging
+from collections import Counter
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Above this many users a change only marks their feeds stale
+EAGER_REFRESH_LIMIT = 5
+
+# Todo types whose sort_date is a real upcoming deadline
+DEADLINE_TYPES = {'assignment', 'conference', 'quiz', 'discussion', 'scorm'}
+
+# UTC, and free of characters that need escaping in a query string
+CURSOR_DATE_FORMAT = '%Y%m%dT%H%M%S%f'
+
+STORED_FIELDS = ['todo_type', 'priority', 'priority_rank', 'sort_date', 'title',
+                 'description', 'due_text', 'icon', 'url', 'metadata']
+
+
+def _aware(value):
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, time.min)
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def _valid_until(user, todos, now):
+    tomorrow = timezone.localdate(now) + timedelta(days=1)
+    valid_until = timezone.make_aware(datetime.combine(tomorrow, time.min))
+    if user.role != 'learner':
+        ttl = getattr(settings, 'TODO_FEED_STAFF_TTL', 300)
+        valid_until = min(valid_until, now + timedelta(seconds=ttl))
+    for todo in todos:
+        if todo['type'] in DEADLINE_TYPES and now < todo['sort_date'] < valid_until:
+            valid_until = todo['sort_date']
+    return valid_until
+
+
+def refresh_user(user):
+    """Rebuild a user's stored todos and counts; returns the number of todos"""
+    from core.models import TodoCount, TodoFeed, TodoItem
+    from core.services.todo_service import TodoService
+
+    service = TodoService(user)
+    todos = service.build_todos()
+    for todo in todos:
+        todo['sort_date'] = _aware(todo['sort_date'])
+
+    items = {}
+    for todo in todos:
+        # Keep the first of any duplicate ids, as the list shows them
+        items.setdefault(todo['id'], TodoItem(
+            user=user,
+            key=todo['id'][:100],
+            todo_type=todo['type'],
+            priority=todo['priority'],
+            priority_rank=TodoItem.PRIORITY_RANKS.get(todo['priority'], 4),
+            sort_date=todo['sort_date'],
+            title=todo['title'][:500],
+            description=todo.get('description') or '',
+            due_text=str(todo.get('due_date') or '')[:100],
+            icon=todo.get('icon') or '',
+            url=(todo.get('url') or '')[:500],
+            metadata=todo.get('metadata') or {},
+        ))
+    counts = Counter((item.todo_type, item.priority) for item in items.values())
+
+    with transaction.atomic():
+        TodoItem.objects.filter(user=user).exclude(key__in=list(items)).delete()
+        TodoItem.objects.bulk_create(
+            list(items.values()),
+            update_conflicts=True,
+            unique_fields=['user', 'key'],
+            update_fields=STORED_FIELDS,
+        )
+        TodoCount.objects.filter(user=user).delete()
+        TodoCount.objects.bulk_create([
+            TodoCount(user=user, todo_type=todo_type, priority=priority, count=count)
+            for (todo_type, priority), count in counts.items()
+        ])
+        TodoFeed.objects.update_or_create(user=user, defaults={
+            'refreshed_at': service.now,
+            'valid_until': _valid_until(user, todos, service.now),
+        })
+    return len(items)
+
+
+def ensure_fresh(user):
+    """Rebuild the user's feed if it is missing or has expired"""
+    from core.models import TodoFeed
+
+    if not TodoFeed.objects.filter(user=user, valid_until__gt=timezone.now()).exists():
+        refresh_user(user)
+
+
+def invalidate(user_ids):
+    """Mark feeds stale so their next read rebuilds them"""
+    from core.models import TodoFeed
+
+    return TodoFeed.objects.filter(user_id__in=user_ids).update(valid_until=timezone.now())
+
+
+def _refresh_users(user_ids):
+    from django.contrib.auth import get_user_model
+
+    user_ids = {user_id for user_id in user_ids if user_id}
+    if len(user_ids) > EAGER_REFRESH_LIMIT:
+        invalidate(user_ids)
+        return
+    for user in get_user_model().objects.filter(pk__in=user_ids, is_active=True).select_related('branch'):
+        refresh_user(user)
+
+
+def schedule_refresh(user_ids):
+    """Refresh the given users' feeds once the current transaction commits"""
+    user_ids = list(user_ids)
+
+    def _refresh():
+        try:
+            _refresh_users(user_ids)
+        except Exception as e:
+            logger.error(f"Todo feed refresh failed for users {user_ids}: {e}")
+
+    transaction.on_commit(_refresh)
+
+
+def schedule_invalidate(user_ids):
+    """Mark the given users' feeds stale once the current transaction commits"""
+    user_ids = list(user_ids)
+    transaction.on_commit(lambda: invalidate(user_ids))
+
+
+def invalidate_courses(course_ids):
+    """Mark the feeds of everyone enrolled in the courses stale on commit"""
+    from core.models import TodoFeed
+    from courses.models import CourseEnrollment
+
+    course_ids = [course_id for course_id in course_ids if course_id]
+    if not course_ids:
+        return
+
+    def _invalidate():
+        try:
+            TodoFeed.objects.filter(
+                user_id__in=CourseEnrollment.objects.filter(course_id__in=course_ids).values('user_id')
+            ).update(valid_until=timezone.now())
+        except Exception as e:
+            logger.error(f"Todo feed invalidation failed for courses {course_ids}: {e}")
+
+    transaction.on_commit(_invalidate)
+
+
+def _cursor_filter(cursor):
+    rank, sort_date, pk = cursor.split('_')
+    rank, pk = int(rank), int(pk)
+    sort_date = datetime.strptime(sort_date, CURSOR_DATE_FORMAT).replace(tzinfo=dt_timezone.utc)
+    return (
+        Q(priority_rank__gt=rank)
+        | Q(priority_rank=rank, sort_date__gt=sort_date)
+        | Q(priority_rank=rank, sort_date=sort_date, id__gt=pk)
+    )
+
+
+def make_cursor(item):
+    sort_date = item.sort_date.astimezone(dt_timezone.utc).strftime(CURSOR_DATE_FORMAT)
+    return f"{item.priority_rank}_{sort_date}_{item.pk}"
+
+
+def page(user, limit=10, cursor=None, todo_type=None, offset=0):
+    """
+    One page of the user's stored todos in (priority, sort_date) order.
+
+    Returns (items, next_cursor); next_cursor is None on the last page. A
+    cursor from a previous page takes precedence over offset.
+    """
+    from core.models import TodoItem
+
+    items = TodoItem.objects.filter(user=user)
+    if todo_type:
+        items = items.filter(todo_type=todo_type)
+    items = items.order_by('priority_rank', 'sort_date', 'id')
+    if cursor:
+        try:
+            items = items.filter(_cursor_filter(cursor))
+        except ValueError:
+            logger.warning(f"Ignoring malformed todo cursor {cursor!r}")
+        offset = 0
+    rows = list(items[offset:offset + limit + 1])
+    next_cursor = make_cursor(rows[limit - 1]) if len(rows) > limit and limit > 0 else None
+    return rows[:limit], next_cursor
+
+
+def counts(user):
+    """{type: {'total': n, 'critical': n, 'high': n, 'medium': n, 'low': n}} from TodoCount"""
+    from core.models import TodoCount
+
+    result = {}
+    for todo_type, priority, count in TodoCount.objects.filter(user=user).values_list(
+        'todo_type', 'priority', 'count'
+    ):
+        type_counts = result.setdefault(todo_type, {'total': 0, 'high': 0, 'medium': 0, 'low': 0, 'critical': 0})
+        type_counts['total'] += count
+        type_counts[priority] = type_counts.get(priority, 0) + count
+    return result
+
+
+def rebuild(users, batch_size=500):
+    """Refresh the feeds of a user queryset; returns (users, todos)"""
+    refreshed = todos = 0
+    for user in users.select_related('branch').iterator(chunk_size=batch_size):
+        try:
+            todos += refresh_user(user)
+            refreshed += 1
+        except Exception as e:
+            logger.error(f"Todo feed rebuild failed for user {user.pk}: {e}")
+    return refreshed, todos
@@ -9,6 +9,9 @@ from . import views
 from .views import api_calendar_activities, api_daily_activities, api_calendar_summary, log_client_error
 # Import timezone API functions
 from .timezone_api import set_user_timezone, get_user_timezone, get_timezone_list
+from .heartbeat import heartbeat
+from .search import search_api
+from .direct_uploads import initiate_upload, receive_upload, finalize_upload
 
 app_name = 'core'
 
@@ -41,6 +44,16 @@ urlpatterns = [
         path('log-client-error/', log_client_error, name='api_log_client_error'),
         # Device time sync API endpoint
         path('sync-device-time/', views.sync_device_time, name='api_sync_device_time'),
+        # Coalesced video, audio and quiz progress heartbeats
+        path('heartbeat/', heartbeat, name='api_heartbeat'),
+        # Ranked global search over stored search vectors
+        path('search/', search_api, name='api_search'),
+        # Direct-to-storage uploads: initiate, local stand-in PUT, finalize
+        path('uploads/', include([
+            path('initiate/', initiate_upload, name='api_upload_initiate'),
+            path('<uuid:token>/local/', receive_upload, name='api_upload_put'),
+            path('<uuid:token>/finalize/', finalize_upload, name='api_upload_finalize'),
+        ])),
     ])),
     
     # Remote login endpoint
@@ -11,8 +11,13 @@ except ImportError:
 from django.core.cache.backends.locmem import LocMemCache
 from django.core.cache import InvalidCacheBackendError
 
+from core.performance.request_metrics import record_cache_lookup
+
 logger = logging.getLogger(__name__)
 
+# Distinguishes a miss from a cached None
+_MISSING = object()
+
 class FallbackRedisCache(RedisCache):
     """
     Redis cache backend with fallback to local memory cache.
@@ -65,6 +70,11 @@ class FallbackRedisCache(RedisCache):
         
         return self._redis_available
     
+    @property
+    def in_fallback(self):
+        """Whether operations currently go to this process's local fallback cache"""
+        return not self._is_redis_available()
+
     def _safe_redis_operation(self, operation, *args, **kwargs):
         """Safely execute Redis operations with fallback"""
         if not self._is_redis_available():
@@ -107,7 +117,12 @@ class FallbackRedisCache(RedisCache):
     
     def get(self, key, default=None, version=None):
         """Get value from cache with fallback"""
-        return self._safe_redis_operation(super().get, key, default, version)
+        value = self._safe_redis_operation(super().get, key, _MISSING, version)
+        if value is _MISSING:
+            record_cache_lookup(misses=1)
+            return default
+        record_cache_lookup(hits=1)
+        return value
     
     def set(self, key, value, timeout=None, version=None):
         """Set value in cache with fallback"""
@@ -123,7 +138,10 @@ class FallbackRedisCache(RedisCache):
     
     def get_many(self, keys, version=None):
         """Get multiple values from cache with fallback"""
-        return self._safe_redis_operation(super().get_many, keys, version)
+        keys = list(keys)
+        found = self._safe_redis_operation(super().get_many, keys, version) or {}
+        record_cache_lookup(hits=len(found), misses=len(keys) - len(found))
+        return found
     
     def set_many(self, data, timeout=None, version=None):
         """Set multiple values in cache with fallback"""
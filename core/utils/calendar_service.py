@@ -1,11 +1,30 @@
+from django.conf import settings
 from django.utils import timezone
-from django.db.models import Q
+from django.db.models import Count, F, Q
 from datetime import datetime, timedelta
 from collections import defaultdict
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Indexed entry types each role sees through its courses
+ROLE_ENTRY_TYPES = {
+    'learner': ('assignment', 'conference', 'course_deadline', 'topic_deadline', 'quiz'),
+    'instructor': ('assignment', 'conference', 'course_deadline'),
+    'admin': ('assignment', 'conference', 'course_deadline'),
+    'superadmin': ('assignment', 'conference', 'course_deadline'),
+    'globaladmin': ('assignment', 'conference', 'course_deadline'),
+}
+
+# Title prefix, priority, status and icon of indexed entries by type
+ENTRY_PRESENTATION = {
+    'conference': ('Conference: ', None, 'scheduled', 'video'),
+    'course_deadline': ('Course Ends: ', 'high', 'deadline', 'clock'),
+    'topic_deadline': ('Topic Ends: ', 'medium', 'deadline', 'bookmark'),
+    'quiz': ('Quiz: ', 'medium', 'available', 'question-circle'),
+    'personal_event': ('', 'low', 'scheduled', 'calendar'),
+}
+
 class CalendarService:
     """
     Comprehensive calendar service that aggregates all user activities
@@ -131,18 +150,12 @@ class CalendarService:
         start_datetime = timezone.make_aware(datetime.combine(start_date, datetime.min.time()))
         end_datetime = timezone.make_aware(datetime.combine(end_date, datetime.max.time()))
         
-        activities = []
-        
-        # Get all activity types based on user role
-        if self.user.role == 'learner':
-            activities.extend(self._get_learner_activities(start_datetime, end_datetime))
-        elif self.user.role == 'instructor':
-            activities.extend(self._get_instructor_activities(start_datetime, end_datetime))
-        elif self.user.role in ['admin', 'superadmin', 'globaladmin']:
-            activities.extend(self._get_admin_activities(start_datetime, end_datetime))
-        
-        # Add personal calendar events for all users
-        activities.extend(self._get_personal_calendar_events(start_datetime, end_datetime))
+        # The calendar index serves the range in one scan; CALENDAR_USE_INDEX=False
+        # falls back to the per-type queries (e.g. before rebuild_calendar_index has run)
+        if getattr(settings, 'CALENDAR_USE_INDEX', True):
+            activities = self._get_indexed_activities(start_datetime, end_datetime)
+        else:
+            activities = self._get_live_activities(start_datetime, end_datetime)
         
         # Final Session validation: double-check all activities before returning
         validated_activities = []
@@ -187,6 +200,158 @@ class CalendarService:
         
         return dict(summary)
     
+    def _get_live_activities(self, start_datetime, end_datetime):
+        """Build activities from the source tables, one query per activity type"""
+        activities = []
+        
+        # Get all activity types based on user role
+        if self.user.role == 'learner':
+            activities.extend(self._get_learner_activities(start_datetime, end_datetime))
+        elif self.user.role == 'instructor':
+            activities.extend(self._get_instructor_activities(start_datetime, end_datetime))
+        elif self.user.role in ['admin', 'superadmin', 'globaladmin']:
+            activities.extend(self._get_admin_activities(start_datetime, end_datetime))
+        
+        # Add personal calendar events for all users
+        activities.extend(self._get_personal_calendar_events(start_datetime, end_datetime))
+        return activities
+    
+    def _audience_course_ids(self):
+        """Subquery of the course ids whose calendar entries the user sees"""
+        from courses.models import Course, CourseEnrollment
+        
+        if self.user.role == 'learner':
+            enrolled = CourseEnrollment.objects.filter(
+                user=self.user,
+                completed=False,
+                course__is_active=True
+            )
+            if self.user.branch:
+                enrolled = enrolled.filter(course__branch=self.user.branch)
+            return enrolled.values('course_id')
+        
+        if self.user.role == 'instructor':
+            from courses.visibility import get_user_course_index
+            courses = Course.objects.filter(
+                id__in=get_user_course_index(self.user).course_ids('instructing', 'group'),
+                is_active=True
+            )
+            if self.user.branch:
+                courses = courses.filter(branch=self.user.branch)
+            return courses.values('id')
+        
+        if self.user.role in ['admin', 'superadmin', 'globaladmin']:
+            from core.branch_filters import get_user_courses
+            return get_user_courses(self.user).values('id')
+        
+        return None
+    
+    def _get_indexed_activities(self, start_datetime, end_datetime):
+        """Read activities from the calendar index with one range query"""
+        from calendar_app.models import CalendarEntry
+        
+        scope = Q(user=self.user)
+        entry_types = ROLE_ENTRY_TYPES.get(self.user.role)
+        course_ids = self._audience_course_ids()
+        if entry_types and course_ids is not None:
+            scope |= Q(course_id__in=course_ids, source_type__in=entry_types)
+        if entry_types and self.user.branch_id:
+            # General conferences created in the user's branch
+            scope |= Q(branch_id=self.user.branch_id, source_type='conference')
+        
+        entries = []
+        seen = set()
+        for entry in CalendarEntry.objects.filter(
+            scope,
+            start__gte=start_datetime,
+            start__lte=end_datetime
+        ).order_by('start', 'id'):
+            # Assignments and topics have one entry per course
+            key = (entry.source_type, entry.source_id)
+            if key not in seen:
+                seen.add(key)
+                entries.append(entry)
+        
+        if self.user.role == 'learner':
+            entries = self._exclude_finished_entries(entries)
+        
+        activities = [self._entry_activity(entry) for entry in entries]
+        
+        if self.user.role == 'instructor' and course_ids is not None:
+            activities.extend(self._get_grading_activities(start_datetime, end_datetime, course_ids))
+        return activities
+    
+    def _exclude_finished_entries(self, entries):
+        """Drop submitted assignments, completed topics and used-up quizzes for a learner"""
+        ids = defaultdict(list)
+        for entry in entries:
+            ids[entry.source_type].append(entry.source_id)
+        
+        finished = set()
+        try:
+            if ids['assignment']:
+                from assignments.models import AssignmentSubmission
+                finished.update(('assignment', pk) for pk in AssignmentSubmission.objects.filter(
+                    user=self.user,
+                    assignment_id__in=ids['assignment'],
+                    status__in=['submitted', 'graded']
+                ).values_list('assignment_id', flat=True))
+            if ids['topic_deadline']:
+                from courses.models import TopicProgress
+                finished.update(('topic_deadline', pk) for pk in TopicProgress.objects.filter(
+                    user=self.user,
+                    topic_id__in=ids['topic_deadline'],
+                    completed=True
+                ).values_list('topic_id', flat=True))
+            if ids['quiz']:
+                from quiz.models import Quiz
+                finished.update(('quiz', pk) for pk in Quiz.objects.filter(
+                    id__in=ids['quiz'],
+                    attempts_allowed__gt=0
+                ).annotate(
+                    completed_attempts=Count('attempts', filter=Q(attempts__user=self.user, attempts__is_completed=True))
+                ).filter(completed_attempts__gte=F('attempts_allowed')).values_list('id', flat=True))
+        except Exception as e:
+            logger.error(f"Error filtering finished calendar entries: {e}")
+        
+        return [entry for entry in entries if (entry.source_type, entry.source_id) not in finished]
+    
+    def _entry_activity(self, entry):
+        """Activity dict for an indexed calendar entry"""
+        start = timezone.localtime(entry.start)
+        now = timezone.now()
+        description = entry.description or (f"Course: {entry.course_title}" if entry.course_title else '')
+        
+        if entry.source_type == 'assignment':
+            is_learner = self.user.role == 'learner'
+            if entry.start < now:
+                priority = 'high'
+            elif entry.start < now + timedelta(hours=24):
+                priority = 'medium'
+            else:
+                priority = 'low'
+            title = f"{'Submit' if is_learner else 'Assignment Due'}: {entry.title}"
+            status = 'pending' if is_learner else 'due'
+            icon = 'assignment'
+        else:
+            prefix, priority, status, icon = ENTRY_PRESENTATION[entry.source_type]
+            title = f"{prefix}{entry.title}"
+            if entry.source_type == 'conference':
+                priority = 'high' if start.date() == timezone.localdate() else 'medium'
+        
+        return {
+            'type': entry.source_type,
+            'title': title,
+            'description': description,
+            'date': start.date(),
+            'time': start.time(),
+            'priority': priority,
+            'status': status,
+            'url': entry.url,
+            'course': entry.course_title,
+            'icon': icon
+        }
+    
     def _get_learner_activities(self, start_datetime, end_datetime):
         """Get activities specific to learners - only their enrolled courses"""
         activities = []
@@ -228,12 +393,11 @@ class CalendarService:
         
         # Get courses where user is instructor with branch validation
         from courses.models import Course
+        from courses.visibility import get_user_course_index
         instructor_courses = Course.objects.filter(
-            Q(instructor=self.user) | 
-            Q(accessible_groups__memberships__user=self.user,
-              accessible_groups__memberships__is_active=True),
+            id__in=get_user_course_index(self.user).course_ids('instructing', 'group'),
             is_active=True
-        ).distinct()
+        )
         
         # Additional branch validation for Session
         if self.user.branch:
@@ -511,9 +675,9 @@ class CalendarService:
                     attempts = QuizAttempt.objects.filter(
                         quiz=quiz,
                         user=self.user,
-                        completed=True
+                        is_completed=True
                     )
-                    if attempts.exists() and quiz.max_attempts and attempts.count() >= quiz.max_attempts:
+                    if quiz.attempts_allowed and quiz.attempts_allowed > 0 and attempts.count() >= quiz.attempts_allowed:
                         continue  # User has used all attempts
                 
                 activities.append({
@@ -543,11 +707,12 @@ class CalendarService:
             
             # Get assignments that have ungraded submissions
             assignments_with_ungraded = Assignment.objects.filter(
-                course__in=course_ids,
-                is_active=True
+                courses__in=course_ids,
+                is_active=True,
+                due_date__lte=end_datetime
             ).annotate(
-                ungraded_count=Count('submissions', filter=Q(submissions__status='submitted'))
-            ).filter(ungraded_count__gt=0)
+                ungraded_count=Count('submissions', filter=Q(submissions__status='submitted'), distinct=True)
+            ).filter(ungraded_count__gt=0).distinct()
             
             for assignment in assignments_with_ungraded:
                 # Validate user permission to access this assignment for grading
@@ -130,6 +130,14 @@ class EnrollmentService:
                 )
                 results['created'] = len(created_enrollments)
                 results['enrollments'] = created_enrollments
+
+                # bulk_create skips post_save, so refresh the enrolled users' course index here
+                from courses.visibility import invalidate_course_index
+                invalidate_course_index([user.id for user in users_to_enroll])
+                from reports.training_matrix import schedule_refresh
+                schedule_refresh(course_id=course.id, user_ids=[user.id for user in users_to_enroll])
+                from core.todo_feed import schedule_invalidate
+                schedule_invalidate([user.id for user in users_to_enroll])
                 
                 logger.info(f"Bulk enrolled {len(created_enrollments)} users in {course.title}")
             
@@ -14,6 +14,5 @@ class CoursesConfig(AppConfig):
         
         # Import signals to register them
         from . import signals
-        from . import signals_certificates
         
         # TinyMCE integration complete
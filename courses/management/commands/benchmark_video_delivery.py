@@ -0,0 +1,134 @@
+"""
+Management command to load test course video delivery modes against a running server
+"""
+import statistics
+import threading
+import time
+from urllib.parse import urlencode, urlsplit, urlunsplit
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.media_delivery import DELIVERY_MODES
+
+
+class Command(BaseCommand):
+    help = (
+        'Simulate concurrent viewers of a course video for each delivery mode and report '
+        'how many viewers the server sustains. Point --url at the public entry point '
+        '(nginx for accel mode) and pass the session cookie of a superuser so that '
+        '?delivery= can select the mode.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', required=True, help='Full stream_video URL of a course video')
+        parser.add_argument('--sessionid', required=True, help='Session cookie value of a superuser')
+        parser.add_argument('--modes', nargs='+', default=['proxy', 'redirect'], choices=DELIVERY_MODES)
+        parser.add_argument('--viewers', nargs='+', type=int, default=[5, 10, 20, 40, 80],
+                            help='Concurrency levels to test, in order')
+        parser.add_argument('--duration', type=int, default=30, help='Seconds per concurrency level')
+        parser.add_argument('--bitrate', type=float, default=2.5, help='Simulated video bitrate in Mbit/s')
+        parser.add_argument('--segment', type=float, default=4.0,
+                            help='Seconds of video fetched per Range request')
+        parser.add_argument('--follow', action='store_true',
+                            help='Also download from redirect targets (S3/CDN) to pace viewers realistically')
+        parser.add_argument('--max-p95', type=float, default=2.0,
+                            help='p95 server response time (s) above which a level counts as saturated')
+
+    def handle(self, *args, **options):
+        segment_bytes = int(options['bitrate'] * 1_000_000 / 8 * options['segment'])
+        if segment_bytes <= 0:
+            raise CommandError('--bitrate and --segment must be positive')
+
+        summary = {}
+        for mode in options['modes']:
+            self.stdout.write(self.style.MIGRATE_HEADING(f'Mode: {mode}'))
+            sustained = 0
+            for viewers in options['viewers']:
+                stats = self._run_level(mode, viewers, segment_bytes, options)
+                ok = (
+                    stats['requests']
+                    and stats['p95'] <= options['max_p95']
+                    and stats['error_rate'] < 0.01
+                )
+                self.stdout.write(
+                    f"  {viewers:4d} viewers: {stats['requests']:6d} requests, "
+                    f"p50 {stats['p50']:.3f}s, p95 {stats['p95']:.3f}s, "
+                    f"errors {stats['error_rate']:.1%}, stalls {stats['stall_rate']:.1%}"
+                    f"{'' if ok else '  <- saturated'}"
+                )
+                if not ok:
+                    break
+                sustained = viewers
+            summary[mode] = sustained
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Concurrent viewers sustained'))
+        for mode, viewers in summary.items():
+            self.stdout.write(f'  {mode}: {viewers}')
+
+    def _mode_url(self, url, mode):
+        parts = urlsplit(url)
+        query = f"{parts.query}&" if parts.query else ''
+        return urlunsplit(parts._replace(query=query + urlencode({'delivery': mode})))
+
+    def _run_level(self, mode, viewers, segment_bytes, options):
+        url = self._mode_url(options['url'], mode)
+        cookies = {settings.SESSION_COOKIE_NAME: options['sessionid']}
+        deadline = time.monotonic() + options['duration']
+        lock = threading.Lock()
+        latencies = []
+        counters = {'errors': 0, 'stalls': 0}
+
+        def viewer():
+            session = requests.Session()
+            session.cookies.update(cookies)
+            offset = 0
+            while time.monotonic() < deadline:
+                started = time.monotonic()
+                headers = {'Range': f'bytes={offset}-{offset + segment_bytes - 1}'}
+                error = False
+                try:
+                    response = session.get(url, headers=headers, allow_redirects=False, stream=True, timeout=60)
+                    for _ in response.iter_content(64 * 1024):
+                        pass
+                    server_time = time.monotonic() - started
+                    if response.is_redirect and options['follow']:
+                        target = session.get(response.headers['Location'], headers=headers, stream=True, timeout=60)
+                        for _ in target.iter_content(64 * 1024):
+                            pass
+                        response = target
+                    error = response.status_code >= 400
+                    total = response.headers.get('Content-Range', '').rpartition('/')[2]
+                    offset += segment_bytes
+                    if total.isdigit() and offset >= int(total):
+                        offset = 0
+                except requests.RequestException:
+                    server_time = time.monotonic() - started
+                    error = True
+
+                elapsed = time.monotonic() - started
+                with lock:
+                    latencies.append(server_time)
+                    counters['errors'] += error
+                    counters['stalls'] += elapsed > options['segment']
+                # Play the segment before fetching the next one
+                time.sleep(max(0.0, options['segment'] - elapsed))
+
+        threads = [threading.Thread(target=viewer, daemon=True) for _ in range(viewers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        requests_made = len(latencies)
+        if not requests_made:
+            return {'requests': 0, 'p50': 0.0, 'p95': 0.0, 'error_rate': 1.0, 'stall_rate': 1.0}
+        ordered = sorted(latencies)
+        return {
+            'requests': requests_made,
+            'p50': statistics.median(ordered),
+            'p95': ordered[min(requests_made - 1, int(requests_made * 0.95))],
+            'error_rate': counters['errors'] / requests_made,
+            'stall_rate': counters['stalls'] / requests_made,
+        }
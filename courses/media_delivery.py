@@ -0,0 +1,141 @@
+"""
+Delivery modes for course videos.
+
+stream_video authorises the request in Django and then hands the bytes off
+according to VIDEO_DELIVERY_MODE:
+
+- 'proxy' (default): Django streams the file from storage itself.
+- 'redirect': 302 to a short-lived presigned S3 URL.
+- 'cdn': 302 to a CloudFront signed URL (VIDEO_CDN_DOMAIN, VIDEO_CDN_KEY_ID
+  and VIDEO_CDN_PRIVATE_KEY, a PEM private key of the CloudFront key group).
+- 'accel': X-Accel-Redirect to an internal nginx location, so nginx sends the
+  file and answers Range requests. For local storage the header points at
+  VIDEO_ACCEL_LOCATION + path:
+
+      location /protected-media/ { internal; alias /var/www/media/; }
+
+  For S3 it carries a presigned URL under VIDEO_ACCEL_S3_LOCATION:
+
+      location ~ ^/protected-s3/(?<s3_host>[^/]+)/(?<s3_uri>.*)$ {
+          internal;
+          resolver 169.254.169.253;
+          proxy_pass https://$s3_host/$s3_uri$is_args$args;
+      }
+
+Signed URLs live for VIDEO_URL_EXPIRE seconds, which must cover a whole
+viewing session because players keep issuing Range requests against them.
+Whenever a mode cannot produce a URL the proxy path is used.
+"""
+
+import logging
+from datetime import timedelta
+from functools import lru_cache
+from urllib.parse import quote, urlsplit
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import HttpResponse, HttpResponseRedirect
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DELIVERY_MODES = ('proxy', 'redirect', 'cdn', 'accel')
+
+
+def get_delivery_mode():
+    mode = getattr(settings, 'VIDEO_DELIVERY_MODE', 'proxy')
+    if mode not in DELIVERY_MODES:
+        logger.warning(f"Unknown VIDEO_DELIVERY_MODE {mode!r}, using proxy")
+        return 'proxy'
+    return mode
+
+
+def _expire():
+    return getattr(settings, 'VIDEO_URL_EXPIRE', 4 * 3600)
+
+
+def presigned_video_url(path, content_type):
+    """Presigned S3 URL for path, or None when the storage can't sign URLs"""
+    if not hasattr(default_storage, 'presigned_url'):
+        return None
+    return default_storage.presigned_url(
+        path,
+        expire=_expire(),
+        parameters={'ResponseContentType': content_type}
+    )
+
+
+@lru_cache(maxsize=1)
+def _load_cdn_key(pem):
+    from cryptography.hazmat.primitives import serialization
+    return serialization.load_pem_private_key(pem.encode(), password=None)
+
+
+def cdn_signed_url(path):
+    """CloudFront signed URL for path, or None when no CDN is configured"""
+    domain = getattr(settings, 'VIDEO_CDN_DOMAIN', None)
+    key_id = getattr(settings, 'VIDEO_CDN_KEY_ID', None)
+    pem = getattr(settings, 'VIDEO_CDN_PRIVATE_KEY', None)
+    if not (domain and key_id and pem):
+        return None
+
+    from botocore.signers import CloudFrontSigner
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import padding
+
+    key = _load_cdn_key(pem)
+    signer = CloudFrontSigner(
+        key_id,
+        lambda message: key.sign(message, padding.PKCS1v15(), hashes.SHA1())
+    )
+    prefix = getattr(settings, 'VIDEO_CDN_PATH_PREFIX', getattr(settings, 'AWS_MEDIA_LOCATION', ''))
+    key_path = f"{prefix.strip('/')}/{path}" if prefix else path
+    return signer.generate_presigned_url(
+        f"https://{domain}/{quote(key_path)}",
+        date_less_than=timezone.now() + timedelta(seconds=_expire())
+    )
+
+
+def accel_redirect_target(path, content_type):
+    """Internal nginx URI for path"""
+    url = presigned_video_url(path, content_type)
+    if url:
+        parts = urlsplit(url)
+        location = getattr(settings, 'VIDEO_ACCEL_S3_LOCATION', '/protected-s3/')
+        return f"{location}{parts.netloc}{parts.path}?{parts.query}"
+    location = getattr(settings, 'VIDEO_ACCEL_LOCATION', '/protected-media/')
+    return f"{location}{quote(path)}"
+
+
+def _redirect(url):
+    response = HttpResponseRedirect(url)
+    # Players resolve the redirect again on reload; the signed URL itself
+    # outlives this by far.
+    response['Cache-Control'] = 'private, max-age=60'
+    return response
+
+
+def video_delivery_response(path, content_type, mode=None):
+    """
+    Response handing the video off to S3, the CDN or nginx, or None when the
+    request should be proxied through Django.
+    """
+    mode = mode or get_delivery_mode()
+    if mode == 'proxy':
+        return None
+    try:
+        if mode == 'redirect':
+            url = presigned_video_url(path, content_type)
+            return _redirect(url) if url else None
+        if mode == 'cdn':
+            url = cdn_signed_url(path)
+            return _redirect(url) if url else None
+        if mode == 'accel':
+            response = HttpResponse(content_type=content_type)
+            response['X-Accel-Redirect'] = accel_redirect_target(path, content_type)
+            response['X-Accel-Buffering'] = 'no'
+            response['Cache-Control'] = 'private, max-age=3600'
+            return response
+    except Exception as e:
+        logger.warning(f"Video delivery mode {mode} failed for {path}, proxying instead: {e}")
+    return None
@@ -0,0 +1,123 @@
+# Generated by Django 4.2.24 on 2026-10-18 22:04
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+COURSE_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION courses_course_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('pg_catalog.english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('pg_catalog.english', regexp_replace(coalesce(NEW.description, ''), '<[^>]*>', ' ', 'g')), 'B') ||
+        setweight(to_tsvector('pg_catalog.english', coalesce(
+            (SELECT name FROM categories_coursecategory WHERE id = NEW.category_id), '')), 'C') ||
+        setweight(to_tsvector('pg_catalog.simple', coalesce(
+            (SELECT concat_ws(' ', first_name, last_name) FROM users_customuser WHERE id = NEW.instructor_id), '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS courses_course_search_vector_trigger ON courses_course;
+CREATE TRIGGER courses_course_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description, category_id, instructor_id, search_vector
+    ON courses_course FOR EACH ROW EXECUTE PROCEDURE courses_course_search_vector_update();
+
+-- Category and instructor renames re-derive the vectors of the courses that embed them
+CREATE OR REPLACE FUNCTION courses_course_search_vector_refresh_category() RETURNS trigger AS $$
+BEGIN
+    UPDATE courses_course SET search_vector = NULL WHERE category_id = NEW.id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS courses_course_search_vector_category_trigger ON categories_coursecategory;
+CREATE TRIGGER courses_course_search_vector_category_trigger
+    AFTER UPDATE OF name ON categories_coursecategory FOR EACH ROW
+    WHEN (OLD.name IS DISTINCT FROM NEW.name)
+    EXECUTE PROCEDURE courses_course_search_vector_refresh_category();
+
+CREATE OR REPLACE FUNCTION courses_course_search_vector_refresh_instructor() RETURNS trigger AS $$
+BEGIN
+    UPDATE courses_course SET search_vector = NULL WHERE instructor_id = NEW.id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS courses_course_search_vector_instructor_trigger ON users_customuser;
+CREATE TRIGGER courses_course_search_vector_instructor_trigger
+    AFTER UPDATE OF first_name, last_name ON users_customuser FOR EACH ROW
+    WHEN (OLD.first_name IS DISTINCT FROM NEW.first_name OR OLD.last_name IS DISTINCT FROM NEW.last_name)
+    EXECUTE PROCEDURE courses_course_search_vector_refresh_instructor();
+
+CREATE OR REPLACE FUNCTION courses_topic_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('pg_catalog.english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('pg_catalog.english', regexp_replace(coalesce(NEW.description, ''), '<[^>]*>', ' ', 'g')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS courses_topic_search_vector_trigger ON courses_topic;
+CREATE TRIGGER courses_topic_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description, search_vector
+    ON courses_topic FOR EACH ROW EXECUTE PROCEDURE courses_topic_search_vector_update();
+
+-- Backfill existing rows through the triggers
+UPDATE courses_course SET search_vector = NULL;
+UPDATE courses_topic SET search_vector = NULL;
+"""
+
+DROP_COURSE_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS courses_topic_search_vector_trigger ON courses_topic;
+DROP FUNCTION IF EXISTS courses_topic_search_vector_update();
+DROP TRIGGER IF EXISTS courses_course_search_vector_instructor_trigger ON users_customuser;
+DROP FUNCTION IF EXISTS courses_course_search_vector_refresh_instructor();
+DROP TRIGGER IF EXISTS courses_course_search_vector_category_trigger ON categories_coursecategory;
+DROP FUNCTION IF EXISTS courses_course_search_vector_refresh_category();
+DROP TRIGGER IF EXISTS courses_course_search_vector_trigger ON courses_course;
+DROP FUNCTION IF EXISTS courses_course_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0001_initial'),
+        ('users', '0004_search_vector'),
+        ('courses', '0008_auto_20251111_0047'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='course',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='topic',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='course_search_vector_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass('title', name='gin_trgm_ops'), name='course_title_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='topic',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='topic_search_vector_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='topic',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass('title', name='gin_trgm_ops'), name='topic_title_trgm'),
+        ),
+        migrations.RunSQL(COURSE_TRIGGER_SQL, DROP_COURSE_TRIGGER_SQL),
+    ]
@@ -2,6 +2,8 @@ import os
 import shutil
 import logging
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
@@ -28,6 +30,7 @@ from django.db.models import QuerySet
 
 if TYPE_CHECKING:
     from django.core.files.storage import Storage
+    from .sequence import SequentialAccessMap
 
 logger = logging.getLogger(__name__)
 
@@ -719,6 +722,16 @@ class Course(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Maintained by a database trigger from title, description, category and
+    # instructor names (see core.search)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='course_search_vector_gin'),
+            GinIndex(OpClass('title', name='gin_trgm_ops'), name='course_title_trgm'),
+        ]
+
     def save(self, *args, **kwargs):
         """Custom save method for course"""
         # Store the initial is_active state before any changes
@@ -993,22 +1006,25 @@ class Course(models.Model):
         """Check if user is enrolled in the course"""
         return self.enrolled_users.filter(id=user.id).exists()
 
+    def get_sequential_access_map(self, user: CustomUser) -> 'SequentialAccessMap':
+        """Get the sequential access map for user, built once per course instance"""
+        from .sequence import SequentialAccessMap
+
+        maps = self.__dict__.setdefault('_sequential_access_maps', {})
+        if user.pk not in maps:
+            maps[user.pk] = SequentialAccessMap(self, user)
+        return maps[user.pk]
+
     def get_next_available_topic(self, user: CustomUser) -> Optional['Topic']:
         """Get next available topic for user based on sequence settings"""
+        access_map = self.get_sequential_access_map(user)
         if not self.enforce_sequence:
-            return self.topics.filter(is_active=True).first()
-        
-        completed_topics = TopicProgress.objects.filter(
-            user=user,
-            topic__course=self,
-            completed=True
-        ).values_list('topic_id', flat=True)
-        
-        return self.topics.filter(
-            is_active=True
-        ).exclude(
-            id__in=completed_topics
-        ).order_by('order').first()
+            topic_id = access_map.topic_ids[0] if access_map.topic_ids else None
+        else:
+            topic_id = access_map.next_available_topic_id
+        if topic_id is None:
+            return None
+        return Topic.objects.filter(pk=topic_id).first()
 
     def can_access_topic(self, user: CustomUser, topic: 'Topic') -> bool:
         """Check if user can access specific topic based on sequence"""
@@ -1017,63 +1033,11 @@ class Course(models.Model):
         if not self.enforce_sequence or not self.sequential_progression:
             return True
         
-        # Build ordered list of topics respecting section order and Topic.order
-        # This matches the ordering used in topic_views.py and course_details
-        # Get all topics for this course (excluding drafts and restricted for learners)
-        if user.role == 'learner':
-            all_topics = Topic.objects.filter(
-                coursetopic__course=self
-            ).exclude(
-                status='draft'
-            ).exclude(
-                restrict_to_learners=True,
-                restricted_learners=user
-            ).order_by('order', 'coursetopic__order', 'created_at')
-        else:
-            all_topics = Topic.objects.filter(
-                coursetopic__course=self
-            ).order_by('order', 'coursetopic__order', 'created_at')
-        
-        # Build section-aware ordered list: section topics first (by section order), then standalone topics
-        sections = Section.objects.filter(course=self).order_by('order')
-        all_topics_ordered = []
-        
-        # Add topics from each section in order
-        for section in sections:
-            section_topics = all_topics.filter(section=section)
-            all_topics_ordered.extend(list(section_topics))
-        
-        # Add standalone topics (without section) at the end
-        standalone_topics = all_topics.filter(section__isnull=True)
-        all_topics_ordered.extend(list(standalone_topics))
-        
-        # Find the current topic's position in the ordered list
-        try:
-            current_index = all_topics_ordered.index(topic)
-        except ValueError:
-            # Topic not found in ordered list, deny access
-            return False
-        
-        # Get all topics that come before this one in the ordered list
-        # Include ALL topic types in sequential progression (Quiz, SCORM, Text, Assignment, Video, etc.)
-        # All topics will block access until completed
-        previous_topics = all_topics_ordered[:current_index]
-        previous_topic_ids = [prev_topic.id for prev_topic in previous_topics]
-        
-        # If no previous topics need to be completed, allow access
-        if not previous_topic_ids:
-            return True
-        
-        # Check how many of those topics have been completed
-        completed_count = TopicProgress.objects.filter(
-            user=user,
-            topic_id__in=previous_topic_ids,
-            course=self,
-            completed=True
-        ).count()
-        
-        # User can access if all previous topics (including quizzes) are completed
-        return completed_count == len(previous_topic_ids)
+        # The access map follows the section-aware topic order used in topic_views.py and
+        # course_details (drafts and restricted topics excluded for learners). A topic is
+        # accessible when every topic before it (of ANY type) has been completed; topics
+        # outside the ordered list are denied.
+        return self.get_sequential_access_map(user).can_access(topic)
 
     def get_group_permissions(self, group: 'groups.models.BranchGroup') -> Dict[str, bool]:
         """Get permissions for a specific group"""
@@ -1701,8 +1665,15 @@ class Topic(models.Model):
         help_text="Learners who are restricted from viewing this topic"
     )
 
+    # Maintained by a database trigger from title and description (see core.search)
+    search_vector = SearchVectorField(null=True, editable=False)
+
     class Meta:
         ordering = ['order', 'created_at']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='topic_search_vector_gin'),
+            GinIndex(OpClass('title', name='gin_trgm_ops'), name='topic_title_trgm'),
+        ]
         
     def __str__(self):
         return f"{self.title} ({self.get_content_type_display()})"
@@ -2399,10 +2370,13 @@ class TopicProgress(models.Model):
         # Check if course is now complete
         self._check_course_completion()
         
-    def mark_video_progress(self, current_time, duration, progress):
+    def mark_video_progress(self, current_time, duration, progress, time_watched=None):
         """
         Mark video progress and automatically complete if threshold reached
         This provides a consistent way to handle video progress for all topics
+
+        time_watched overrides the viewing time derived from the change in
+        position, for callers that measured playback time themselves.
         """
         from django.utils import timezone
         
@@ -2414,20 +2388,21 @@ class TopicProgress(models.Model):
         self.init_progress_data()
         
         # Calculate time watched since last update
-        time_watched = 0
-        last_position = self.progress_data.get('last_position', 0)
+        if time_watched is None:
+            time_watched = 0
+            last_position = self.progress_data.get('last_position', 0)
+            
+            # If current_time is greater than last_position, user is progressing
+            if current_time > last_position:
+                time_watched = current_time - last_position
         
-        # If current_time is greater than last_position, user is progressing
-        if current_time > last_position:
-            time_watched = current_time - last_position
+        # Add to total viewing time (protect against unrealistic values)
+        if time_watched > 0 and time_watched < 3600:  # Limit to 1 hour max per update
+            total_time = self.progress_data.get('total_viewing_time', 0) + time_watched
+            self.progress_data['total_viewing_time'] = total_time
             
-            # Add to total viewing time (protect against unrealistic values)
-            if time_watched > 0 and time_watched < 3600:  # Limit to 1 hour max per update
-                total_time = self.progress_data.get('total_viewing_time', 0) + time_watched
-                self.progress_data['total_viewing_time'] = total_time
-                
-                # Update the total_time_spent field (used for reporting)
-                self.total_time_spent += int(time_watched)
+            # Update the total_time_spent field (used for reporting)
+            self.total_time_spent += int(time_watched)
         
         # Track viewing sessions
         viewing_sessions = self.progress_data.get('viewing_sessions', [])
@@ -2596,49 +2571,15 @@ class TopicProgress(models.Model):
                     enrollment.completion_date = timezone.now()
                     enrollment.save()
                 
-                # Auto-generate certificate if enabled for this course
-                if course.issue_certificate and course.certificate_template:
+                # Queue the certificate if enabled for this course; the issuance
+                # worker skips enrollments that already have one
+                if course.issue_certificate and course.certificate_template_id:
                     try:
-                        from certificates.models import IssuedCertificate
-                        import uuid
-                        
-                        # Check if certificate already exists for this user and course
-                        existing_cert = IssuedCertificate.objects.filter(
-                            recipient=self.user,
-                            course_name=course.title
-                        ).first()
-                        
-                        if not existing_cert:
-                            # Generate unique certificate number
-                            certificate_number = f"CERT-{uuid.uuid4().hex[:8].upper()}"
-                            
-                            # Get course instructor or superuser as issuer
-                            issuer = course.instructor
-                            if not issuer:
-                                from django.contrib.auth import get_user_model
-                                User = get_user_model()
-                                issuer = User.objects.filter(is_superuser=True).first()
-                            
-                            if not issuer:
-                                logger.warning(f"No issuer found for certificate generation for course '{course.title}'")
-                                issuer = self.user  # Fallback to user themselves
-                            
-                            # Create certificate
-                            certificate = IssuedCertificate.objects.create(
-                                template=course.certificate_template,
-                                recipient=self.user,
-                                issued_by=issuer,
-                                course_name=course.title,
-                                certificate_number=certificate_number,
-                                # Optional: can also add grade if available
-                            )
-                            
-                            logger.info(f"Auto-generated certificate {certificate.certificate_number} for {self.user.username} for course '{course.title}'")
-                        else:
-                            logger.info(f"Certificate already exists for {self.user.username} for course '{course.title}': {existing_cert.certificate_number}")
+                        from certificates.issuance import enqueue
+                        enqueue([enrollment.pk])
                     except Exception as e:
-                        logger.error(f"Error generating certificate for {self.user.username} in course '{course.title}': {str(e)}")
-                elif course.issue_certificate and not course.certificate_template:
+                        logger.error(f"Error queueing certificate for {self.user.username} in course '{course.title}': {str(e)}")
+                elif course.issue_certificate and not course.certificate_template_id:
                     logger.warning(f"Certificate generation enabled for course '{course.title}' but no certificate template is set")
             else:
                 logger.warning(f"User {self.user.username} completed all topics in course '{course.title}' but no enrollment record found")
@@ -2659,12 +2600,15 @@ class TopicProgress(models.Model):
             return 'In Progress'
         return 'Not Started'
 
-    def update_audio_progress(self, current_time, duration):
+    def update_audio_progress(self, current_time, duration, time_listened=None):
         """Update audio progress and handle completion"""
         if duration > 0:
-            # Calculate time listened since last update
-            time_listened = 0
-            if self.last_audio_position is not None:
+            if time_listened is not None:
+                # Playback time measured by the caller
+                if 0 < time_listened < 3600:
+                    self.total_time_spent += int(time_listened)
+            elif self.last_audio_position is not None:
+                # Calculate time listened since last update
                 # Only count forward progress to prevent rewinding from inflating time
                 if current_time > self.last_audio_position:
                     time_listened = current_time - self.last_audio_position
@@ -0,0 +1,179 @@
+"""
+Batched per-(user, course) progress lookups for course templates.
+
+A course outline asks the same questions for every topic (progress record,
+completion, quiz attempts). CourseProgressMap answers them from a few bulk
+queries made once per view, and never writes: missing progress records are
+reported as None rather than created while rendering.
+
+Views build one with the topics they render and pass it to the course_filters
+progress filters in place of the user, e.g. {{ topic|get_topic_progress:progress_map }}.
+"""
+
+from functools import cached_property
+
+PROGRESS_MAPS_ATTR = '_course_progress_maps'
+
+
+class CourseProgressMap:
+    """Read-only progress data for one user across the topics of one course"""
+
+    def __init__(self, user, course, topics=None):
+        from .models import Topic
+
+        self.user = user
+        self.course = course
+
+        if topics is None:
+            topics = Topic.objects.filter(
+                coursetopic__course=course
+            ).order_by('order', 'coursetopic__order', 'created_at')
+        self.topics = list(topics)
+        self.topic_ids = {topic.pk for topic in self.topics}
+
+        self._progress = {}
+        self._completed_in_course = set()
+        self._attempted_quiz_ids = set()
+        self._passed_quiz_ids = set()
+
+        if user is not None and getattr(user, 'is_authenticated', False) and self.topics:
+            self._load_progress()
+            self._load_quiz_attempts()
+
+    @classmethod
+    def for_user(cls, user, course):
+        """Return the map for user and course, building it once per user object"""
+        if user is None or not getattr(user, 'is_authenticated', False):
+            return cls(user, course)
+        maps = getattr(user, PROGRESS_MAPS_ATTR, None)
+        if maps is None:
+            maps = {}
+            setattr(user, PROGRESS_MAPS_ATTR, maps)
+        if course.pk not in maps:
+            maps[course.pk] = cls(user, course)
+        return maps[course.pk]
+
+    def _load_progress(self):
+        from .models import TopicProgress
+
+        # Same preference as the single-topic lookup: completed records first,
+        # then records with a course context.
+        records = TopicProgress.objects.filter(
+            user=self.user,
+            topic_id__in=self.topic_ids
+        ).order_by('-completed', '-course__id')
+        for record in records:
+            self._progress.setdefault(record.topic_id, record)
+            if record.completed and record.course_id == self.course.pk:
+                self._completed_in_course.add(record.topic_id)
+
+    def _load_quiz_attempts(self):
+        from quiz.models import QuizAttempt
+
+        quiz_ids = {topic.quiz_id for topic in self.topics if topic.quiz_id}
+        if not quiz_ids:
+            return
+        attempts = QuizAttempt.objects.filter(
+            user=self.user,
+            quiz_id__in=quiz_ids,
+            is_completed=True
+        ).values_list(
+            'quiz_id', 'score', 'quiz__passing_score', 'quiz__is_vak_test', 'quiz__is_initial_assessment'
+        )
+        for quiz_id, score, passing_score, is_vak_test, is_initial_assessment in attempts:
+            self._attempted_quiz_ids.add(quiz_id)
+            passed = passing_score is not None and score is not None and score >= passing_score
+            if passed or is_vak_test or is_initial_assessment:
+                self._passed_quiz_ids.add(quiz_id)
+
+    def covers(self, topic):
+        return topic is not None and topic.pk in self.topic_ids
+
+    def topic_progress(self, topic):
+        return self._progress.get(topic.pk)
+
+    def is_completed(self, topic):
+        progress = self._progress.get(topic.pk)
+        return bool(progress and progress.completed)
+
+    def has_completed_quiz_attempt(self, topic):
+        return bool(topic.quiz_id) and topic.quiz_id in self._attempted_quiz_ids
+
+    def is_topic_completed(self, topic):
+        """Completed in this course, or a passing (or assessment) quiz attempt exists"""
+        if topic.pk in self._completed_in_course:
+            return True
+        return topic.content_type == 'Quiz' and topic.quiz_id in self._passed_quiz_ids
+
+    @property
+    def total_topics(self):
+        return len(self.topics)
+
+    @property
+    def completed_topics(self):
+        return sum(1 for topic in self.topics if self.is_completed(topic))
+
+    @property
+    def percentage(self):
+        if not self.topics:
+            return 0
+        return int((self.completed_topics / self.total_topics) * 100)
+
+    def next_incomplete_topic(self):
+        for topic in self.topics:
+            if not self.is_completed(topic):
+                return topic
+        return None
+
+    def uncompleted_count(self, topics):
+        return sum(1 for topic in topics if not self.is_completed(topic))
+
+    @cached_property
+    def enrollment(self):
+        from .models import CourseEnrollment
+
+        if not getattr(self.user, 'is_authenticated', False):
+            return None
+        return CourseEnrollment.objects.filter(user=self.user, course=self.course).first()
+
+    def summary(self):
+        """Progress dict used by the get_progress filter"""
+        total_topics = self.total_topics
+        progress = {
+            'status': 'not_started',
+            'progress': 0,
+            'percentage': 0,
+            'score': None,
+            'last_accessed': None,
+            'completed_topics': 0,
+            'total_topics': total_topics,
+        }
+        if not self.enrollment:
+            return progress
+
+        completed = [topic for topic in self.topics if self.is_completed(topic)]
+        if not completed:
+            return progress
+
+        percentage = round((len(completed) / total_topics) * 100)
+        progress['completed_topics'] = len(completed)
+        progress['progress'] = percentage
+        progress['percentage'] = percentage
+
+        if len(completed) == total_topics:
+            progress['status'] = 'completed'
+            quiz_records = [
+                self._progress[topic.pk] for topic in completed
+                if topic.content_type == 'Quiz' and self._progress[topic.pk].completed_at
+            ]
+            if quiz_records:
+                final_score = max(quiz_records, key=lambda record: record.completed_at)
+                if isinstance(final_score.progress_data, dict) and 'score' in final_score.progress_data:
+                    progress['score'] = round(final_score.progress_data['score'])
+        else:
+            progress['status'] = 'in_progress'
+
+        accessed = [record.last_accessed for record in self._progress.values() if record.last_accessed]
+        if accessed:
+            progress['last_accessed'] = max(accessed)
+        return progress
@@ -0,0 +1,150 @@
+"""
+Ordered-topic index and sequential-access maps for courses.
+
+The section-aware topic order of a course (topics of each section by section
+order, then standalone topics) is cached per course and invalidated when
+topics, sections or their order change. SequentialAccessMap combines it with
+a user's completed topics to answer "can this user open this topic" for the
+whole course in one pass.
+"""
+
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+def topic_order_cache_key(course_id):
+    return f"course_topic_order_{course_id}"
+
+
+def get_topic_order(course):
+    """
+    Return the section-aware topic order of course as a list of
+    (topic_id, status, restrict_to_learners) tuples.
+    """
+    key = topic_order_cache_key(course.pk)
+    try:
+        order = cache.get(key)
+    except Exception as e:
+        logger.warning(f"Topic order cache read failed for course {course.pk}: {e}")
+        order = None
+    if order is not None:
+        return order
+
+    order = build_topic_order(course)
+    try:
+        cache.set(key, order, getattr(settings, 'COURSE_TOPIC_ORDER_CACHE_TIMEOUT', 3600))
+    except Exception as e:
+        logger.warning(f"Topic order cache write failed for course {course.pk}: {e}")
+    return order
+
+
+def build_topic_order(course):
+    """Build the topic order of course with one query for sections and one for topics"""
+    from .models import Section, Topic
+
+    section_ranks = {
+        section_id: rank
+        for rank, section_id in enumerate(
+            Section.objects.filter(course=course).order_by('order').values_list('id', flat=True)
+        )
+    }
+    standalone_rank = len(section_ranks)
+
+    rows = Topic.objects.filter(
+        coursetopic__course=course
+    ).order_by('order', 'coursetopic__order', 'created_at').values_list(
+        'id', 'section_id', 'status', 'restrict_to_learners'
+    )
+
+    seen = set()
+    ranked = []
+    for topic_id, section_id, status, restrict_to_learners in rows:
+        if topic_id in seen:
+            continue
+        seen.add(topic_id)
+        if section_id is None:
+            rank = standalone_rank
+        elif section_id in section_ranks:
+            rank = section_ranks[section_id]
+        else:
+            # Topics in a section of another course are not part of this course's sequence
+            continue
+        ranked.append((rank, (topic_id, status, restrict_to_learners)))
+
+    # Stable sort keeps the per-topic ordering within each section
+    ranked.sort(key=lambda item: item[0])
+    return [entry for _, entry in ranked]
+
+
+def invalidate_topic_order(course_id):
+    """Drop the cached topic order of a course once the current transaction commits"""
+    def _delete():
+        try:
+            cache.delete(topic_order_cache_key(course_id))
+        except Exception as e:
+            logger.warning(f"Topic order cache delete failed for course {course_id}: {e}")
+
+    transaction.on_commit(_delete)
+
+
+class SequentialAccessMap:
+    """Which topics of a course a user can open under sequential progression"""
+
+    def __init__(self, course, user):
+        from .models import TopicProgress
+
+        self.course = course
+        self.user = user
+
+        order = get_topic_order(course)
+        if getattr(user, 'role', None) == 'learner':
+            restricted_ids = [topic_id for topic_id, _, restrict in order if restrict]
+            if restricted_ids:
+                hidden = set(user.restricted_topics.filter(
+                    id__in=restricted_ids
+                ).values_list('id', flat=True))
+            else:
+                hidden = set()
+            order = [
+                entry for entry in order
+                if entry[1] != 'draft' and entry[0] not in hidden
+            ]
+        self.topic_ids = [topic_id for topic_id, _, _ in order]
+
+        self.completed_ids = set()
+        if self.topic_ids and getattr(user, 'is_authenticated', False):
+            self.completed_ids = set(TopicProgress.objects.filter(
+                user=user,
+                course=course,
+                completed=True,
+                topic_id__in=self.topic_ids
+            ).values_list('topic_id', flat=True))
+
+        # Every topic up to and including the first incomplete one is accessible
+        self.next_available_topic_id = None
+        self.accessible = []
+        blocked = False
+        for topic_id in self.topic_ids:
+            self.accessible.append(not blocked)
+            if not blocked and topic_id not in self.completed_ids:
+                self.next_available_topic_id = topic_id
+                blocked = True
+        self.positions = {topic_id: index for index, topic_id in enumerate(self.topic_ids)}
+
+    def can_access(self, topic):
+        index = self.positions.get(getattr(topic, 'pk', topic))
+        if index is None:
+            return False
+        return self.accessible[index]
+
+    def sort_topics(self, topics):
+        """Return topics in course order, dropping those outside the sequence"""
+        return sorted(
+            (topic for topic in topics if topic.pk in self.positions),
+            key=lambda topic: self.positions[topic.pk]
+        )
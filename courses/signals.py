@@ -4,13 +4,15 @@ Automatically clean up related data when courses or topics are deleted.
 Also handles enrollment notifications.
 """
 
-from django.db.models.signals import pre_delete, post_delete, post_save
+from django.db.models.signals import pre_delete, post_delete, post_save, pre_save, m2m_changed
 from django.dispatch import receiver
 from django.db import transaction, DatabaseError, IntegrityError
 from django.utils import timezone
 import logging
 
-from .models import Course, Topic, CourseEnrollment
+from .models import Course, Topic, CourseEnrollment, Section
+from .sequence import invalidate_topic_order
+from .visibility import invalidate_course_index
 
 # Import TopicProgress and CourseTopic dynamically  
 try:
@@ -142,6 +144,92 @@ def post_topic_deletion(sender, instance, **kwargs):
     except Exception as e:
         logger.error(f"Error during post-deletion cleanup for topic {instance.id}: {str(e)}")
 
+@receiver(post_save, sender=Topic)
+def invalidate_topic_order_on_topic_change(sender, instance, **kwargs):
+    """Topic order, section, status and restrictions feed the cached course topic order"""
+    if CourseTopic is None:
+        return
+    course_ids = CourseTopic.objects.filter(topic_id=instance.pk).values_list('course_id', flat=True)
+    for course_id in set(course_ids):
+        invalidate_topic_order(course_id)
+
+@receiver(post_save, sender=Section)
+@receiver(post_delete, sender=Section)
+def invalidate_topic_order_on_section_change(sender, instance, **kwargs):
+    """Section order decides the order of section topics in the course sequence"""
+    invalidate_topic_order(instance.course_id)
+
+if CourseTopic is not None:
+    @receiver(post_save, sender=CourseTopic)
+    @receiver(post_delete, sender=CourseTopic)
+    def invalidate_topic_order_on_course_topic_change(sender, instance, **kwargs):
+        """Topics joining or leaving a course change its topic order"""
+        invalidate_topic_order(instance.course_id)
+
+@receiver(post_save, sender=CourseEnrollment)
+@receiver(post_delete, sender=CourseEnrollment)
+def invalidate_course_index_on_enrollment(sender, instance, **kwargs):
+    """Enrollments feed the enrolled set of the user's course index"""
+    invalidate_course_index([instance.user_id])
+
+@receiver(pre_save, sender=Course)
+def remember_previous_course_instructor(sender, instance, **kwargs):
+    if instance.pk:
+        instance._previous_instructor_id = Course.objects.filter(
+            pk=instance.pk
+        ).values_list('instructor_id', flat=True).first()
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def invalidate_course_index_on_instructor_change(sender, instance, created=False, **kwargs):
+    """The primary instructor (old and new) has the course in the instructing set"""
+    previous_instructor_id = getattr(instance, '_previous_instructor_id', None)
+    if created or kwargs.get('signal') is post_delete or previous_instructor_id != instance.instructor_id:
+        invalidate_course_index([previous_instructor_id, instance.instructor_id])
+
+@receiver(post_save, sender='groups.GroupMembership')
+@receiver(post_delete, sender='groups.GroupMembership')
+def invalidate_course_index_on_membership(sender, instance, **kwargs):
+    """Memberships decide which group courses reach the user"""
+    invalidate_course_index([instance.user_id])
+
+@receiver(post_save, sender='groups.GroupMemberRole')
+@receiver(pre_delete, sender='groups.GroupMemberRole')
+def invalidate_course_index_on_member_role(sender, instance, **kwargs):
+    """Role names decide group instructor scope; deleting a role clears it from memberships"""
+    from groups.models import GroupMembership
+
+    invalidate_course_index(
+        GroupMembership.objects.filter(custom_role=instance).values_list('user_id', flat=True)
+    )
+
+def _invalidate_course_index_for_groups(group_ids):
+    from groups.models import GroupMembership
+
+    invalidate_course_index(
+        GroupMembership.objects.filter(group_id__in=group_ids).values_list('user_id', flat=True)
+    )
+
+@receiver(post_save, sender='groups.CourseGroupAccess')
+@receiver(post_delete, sender='groups.CourseGroupAccess')
+def invalidate_course_index_on_group_access(sender, instance, **kwargs):
+    """Granting or revoking group access changes the group set of every member"""
+    _invalidate_course_index_for_groups([instance.group_id])
+
+@receiver(m2m_changed, sender=Course.accessible_groups.through)
+def invalidate_course_index_on_accessible_groups(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if reverse:
+        # instance is a BranchGroup
+        group_ids = [instance.pk]
+    elif action == 'pre_clear':
+        group_ids = list(instance.accessible_groups.values_list('id', flat=True))
+    else:
+        group_ids = list(pk_set or [])
+    if group_ids:
+        _invalidate_course_index_for_groups(group_ids)
+
 def cleanup_orphaned_data():
     """
     Clean up any existing orphaned data.
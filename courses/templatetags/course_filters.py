@@ -1,6 +1,6 @@
 from django import template
 from django.template.defaultfilters import stringfilter
-from courses.models import TopicProgress, CourseEnrollment, Topic, CourseTopic
+from courses.models import TopicProgress, CourseEnrollment, CourseTopic
 import json
 from django.utils.safestring import mark_safe
 import markdown
@@ -8,12 +8,36 @@ from django.utils import timezone
 from datetime import timedelta
 from dateutil.relativedelta import relativedelta
 from quiz.models import Quiz, QuizAttempt
+from courses.progress_map import CourseProgressMap
 import logging
 
 logger = logging.getLogger(__name__)
 
 register = template.Library()
 
+
+def _progress_user(user_or_map):
+    """Split a filter argument into (user, progress map or None)"""
+    if isinstance(user_or_map, CourseProgressMap):
+        return user_or_map.user, user_or_map
+    return user_or_map, None
+
+
+def _topic_progress_map(topic, user_or_map):
+    """Return (user, progress map) when the map covers topic, else (user, None)"""
+    user, progress_map = _progress_user(user_or_map)
+    if progress_map is not None and not progress_map.covers(topic):
+        progress_map = None
+    return user, progress_map
+
+
+def _course_progress_map(course, user_or_map):
+    """Return the progress map for course, building it once per request user"""
+    user, progress_map = _progress_user(user_or_map)
+    if progress_map is not None and progress_map.course.pk == course.pk:
+        return progress_map
+    return CourseProgressMap.for_user(user, course)
+
 @register.filter
 def add_class(field, class_name):
     """
@@ -360,58 +384,16 @@ def group_can_modify(user, course):
 def get_progress(course, user):
     """
     Gets progress data for a specific user and course
-    Usage: {{ course|get_progress:user }}
+    Usage: {{ course|get_progress:user }} or {{ course|get_progress:progress_map }}
     """
-    progress = {
-        'status': 'not_started',
-        'progress': 0,
-        'percentage': 0,
-        'score': None,
-        'last_accessed': None,
-        'completed_topics': 0,
-        'total_topics': course.topics.count()
-    }
-    
-    # Get enrollment progress
-    enrollment = CourseEnrollment.objects.filter(user=user, course=course).first()
-    if enrollment:
-        # Get topic progress
-        topic_progress = TopicProgress.objects.filter(
-            user=user,
-            topic__coursetopic__course=course
-        )
-        completed_topics = topic_progress.filter(completed=True).count()
-        total_topics = course.topics.count()
-        
-        if completed_topics > 0:
-            progress['completed_topics'] = completed_topics
-            calculated_progress = round((completed_topics / total_topics) * 100)
-            progress['progress'] = calculated_progress
-            progress['percentage'] = calculated_progress
-            
-            if completed_topics == total_topics:
-                progress['status'] = 'completed'
-                # Get final score if available
-                final_score = topic_progress.filter(
-                    topic__content_type='Quiz',
-                    completed=True
-                ).order_by('-completed_at').first()
-                
-                if final_score and 'score' in final_score.progress_data:
-                    progress['score'] = round(final_score.progress_data['score'])
-            else:
-                progress['status'] = 'in_progress'
-                
-            # Get last accessed time
-            last_progress = topic_progress.order_by('-last_accessed').first()
-            if last_progress:
-                progress['last_accessed'] = last_progress.last_accessed
-                
-    return progress
+    return _course_progress_map(course, user).summary()
 
 @register.filter
 def get_user_progress(topic, user):
     """Get progress for a specific user on a topic"""
+    user, progress_map = _topic_progress_map(topic, user)
+    if progress_map is not None:
+        return progress_map.topic_progress(topic)
     try:
         return topic.user_progress.filter(user=user).first()
     except:
@@ -425,49 +407,42 @@ def endswith(value, arg):
 
 @register.filter
 def get_topic_progress(topic, user):
-    """Get topic progress for a user"""
+    """
+    Get topic progress for a user, or None if the user has no progress yet.
+    Usage: {{ topic|get_topic_progress:progress_map }}
+
+    Progress records are created by the views and signals that track
+    progress, never while rendering.
+    """
+    user, progress_map = _topic_progress_map(topic, user)
     if not user or not user.is_authenticated:
         return None
-    
+    if progress_map is not None:
+        return progress_map.topic_progress(topic)
+
     # Prefer completed progress first, then progress with course context, then any progress
-    progress = TopicProgress.objects.filter(topic=topic, user=user).order_by(
+    return TopicProgress.objects.filter(topic=topic, user=user).order_by(
         '-completed',  # Completed progress first
         '-course__id'  # Progress with course context preferred
     ).first()
-    
-    # Initialize progress if it doesn't exist - ONLY for learners
-    # Instructors, admins, etc. should not have progress auto-created
-    if not progress:
-        if hasattr(user, 'role') and user.role == 'learner':
-            try:
-                progress = TopicProgress.objects.create(topic=topic, user=user, completed=False)
-                progress.init_progress_data()
-            except Exception as e:
-                logger.error(f"Error creating topic progress: {str(e)}")
-                return None
-        else:
-            # For non-learners, just return None if no progress exists
-            return None
-    
-    # Note: Quiz completion logic is handled in quiz/signals.py via the 
-    # update_topic_progress_on_quiz_completion signal. We don't modify 
-    # the database in template filters as it's inefficient and against best practices.
-    
-    return progress
 
 @register.filter
 def has_completed_quiz_attempt(topic, user):
     """Check if user has completed a quiz attempt for this topic (especially for initial assessments)"""
+    user, progress_map = _topic_progress_map(topic, user)
     if not user or not user.is_authenticated:
         return False
     
-    if topic.content_type != 'Quiz' or not topic.quiz:
+    if topic.content_type != 'Quiz' or not topic.quiz_id:
         return False
+
+    if progress_map is not None:
+        return progress_map.has_completed_quiz_attempt(topic)
     
     try:
         # Check if there's a completed quiz attempt
         completed_attempt = QuizAttempt.objects.filter(
-            quiz=topic.quiz,
+            quiz_id=topic.quiz_id,
             user=user,
             is_completed=True
         ).exists()
@@ -487,6 +462,9 @@ def subtract(value, arg):
 @register.filter
 def uncompleted_count(topics, user):
     """Count uncompleted topics for a user"""
+    _, progress_map = _progress_user(user)
+    if progress_map is not None:
+        return progress_map.uncompleted_count(topics)
     count = 0
     for topic in topics:
         progress = topic.get_user_progress(user)
@@ -590,48 +568,24 @@ def user_course_progress(course, user):
     Calculate the percentage of course completion for a user
     Usage: {{ course|user_course_progress:request.user }}
     """
-    total_topics = course.topics.count()
-    if total_topics == 0:
-        return 0
-    
-    completed_topics = TopicProgress.objects.filter(
-        user=user,
-        topic__coursetopic__course=course,
-        completed=True
-    ).count()
-    
-    progress = int((completed_topics / total_topics) * 100)
-    return progress
+    return _course_progress_map(course, user).percentage
 
 @register.filter
 def next_incomplete_topic(course, user):
     """Return the next topic that needs to be completed (including ALL topic types)"""
-    if not user.is_authenticated:
+    progress_user, _ = _progress_user(user)
+    if not progress_user or not progress_user.is_authenticated:
         return None
-        
-    topics = Topic.objects.filter(coursetopic__course=course).order_by('order', 'coursetopic__order', 'created_at')
-    
-    for topic in topics:
-        # Include ALL topics - no skipping
-        # Get progress for this topic
-        progress, created = TopicProgress.objects.get_or_create(
-            topic=topic,
-            user=user,
-            defaults={'completed': False}
-        )
-        
-        # If not completed, this is our next topic
-        if not progress.completed:
-            return topic
-            
-    # All topics completed
-    return None
+    return _course_progress_map(course, user).next_incomplete_topic()
 
 @register.filter
 def is_completed(topic, user):
     """Check if a topic is completed by the user - Preserve quiz functionality"""
-    if not user.is_authenticated:
+    user, progress_map = _topic_progress_map(topic, user)
+    if not user or not user.is_authenticated:
         return False
+    if progress_map is not None:
+        return progress_map.is_completed(topic)
         
     try:
         progress = TopicProgress.objects.filter(topic=topic, user=user).first()
@@ -643,8 +597,11 @@ def is_completed(topic, user):
 @register.filter
 def has_completed_topic(user, topic):
     """Check if a user has completed the topic (reverse parameter order of is_completed)"""
-    if not user.is_authenticated:
+    user, progress_map = _topic_progress_map(topic, user)
+    if not user or not user.is_authenticated:
         return False
+    if progress_map is not None:
+        return progress_map.is_completed(topic)
         
     try:
         progress = TopicProgress.objects.filter(topic=topic, user=user).first()
@@ -655,8 +612,11 @@ def has_completed_topic(user, topic):
 @register.filter
 def is_complete_for_user(topic, user):
     """Check if a topic is completed for a user"""
+    user, progress_map = _topic_progress_map(topic, user)
     if not user or not user.is_authenticated:
         return False
+    if progress_map is not None:
+        return progress_map.is_completed(topic)
     return TopicProgress.objects.filter(
         user=user,
         topic=topic,
@@ -0,0 +1,208 @@
+"""
+Query-count regression tests for the course outline progress filters.
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.template import Context, Template
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import Course, CourseEnrollment, CourseTopic, Section, Topic, TopicProgress
+from .progress_map import CourseProgressMap
+
+User = get_user_model()
+
+OUTLINE_TEMPLATE = Template(
+    "{% load course_filters %}"
+    "{% for topic in topics %}"
+    "{% with progress=topic|get_topic_progress:progress_map %}{{ progress.completed }}{% endwith %}"
+    ":{{ topic|is_completed:progress_map }}"
+    ":{{ topic|has_completed_quiz_attempt:progress_map }};"
+    "{% endfor %}"
+    "{{ course|user_course_progress:progress_map }}"
+    "|{{ course|next_incomplete_topic:progress_map }}"
+    "|{{ topics|uncompleted_count:progress_map }}"
+)
+
+
+class CourseOutlineQueryCountTestCase(TestCase):
+    """The outline must not issue per-topic queries or write while rendering."""
+
+    def setUp(self):
+        # Cached course topic orders must not leak between tests reusing course ids
+        cache.clear()
+        self.instructor = User.objects.create_user(
+            username='outline_instructor',
+            email='outline_instructor@example.com',
+            password='testpass123',
+            role='instructor'
+        )
+        self.learner = User.objects.create_user(
+            username='outline_learner',
+            email='outline_learner@example.com',
+            password='testpass123',
+            role='learner'
+        )
+
+    def create_course(self, title, topic_count, completed=0):
+        course = Course.objects.create(title=title, instructor=self.instructor)
+        for index in range(topic_count):
+            topic = Topic.objects.create(
+                title=f'{title} topic {index}',
+                content_type='Text',
+                text_content='Content',
+                status='active',
+                order=index
+            )
+            CourseTopic.objects.create(course=course, topic=topic, order=index)
+            if index < completed:
+                TopicProgress.objects.create(
+                    user=self.learner, topic=topic, course=course, completed=True
+                )
+        CourseEnrollment.objects.get_or_create(user=self.learner, course=course)
+        return course
+
+    def render_outline(self, course):
+        progress_map = CourseProgressMap(self.learner, course)
+        return OUTLINE_TEMPLATE.render(Context({
+            'course': course,
+            'topics': progress_map.topics,
+            'progress_map': progress_map,
+        }))
+
+    def test_filters_render_without_queries(self):
+        course = self.create_course('Outline', topic_count=6, completed=2)
+        progress_map = CourseProgressMap(self.learner, course)
+
+        with CaptureQueriesContext(connection) as context:
+            output = OUTLINE_TEMPLATE.render(Context({
+                'course': course,
+                'topics': progress_map.topics,
+                'progress_map': progress_map,
+            }))
+
+        self.assertEqual(len(context.captured_queries), 0, context.captured_queries)
+        self.assertTrue(output.startswith('True:True:False;True:True:False;:False:False;'))
+        self.assertTrue(output.endswith('33|Outline topic 2 (Text)|4'))
+
+    def test_filters_do_not_create_progress(self):
+        course = self.create_course('No writes', topic_count=5)
+
+        self.render_outline(course)
+
+        self.assertFalse(TopicProgress.objects.filter(user=self.learner).exists())
+
+    def test_query_count_independent_of_topic_count(self):
+        small = self.create_course('Small', topic_count=3, completed=1)
+        large = self.create_course('Large', topic_count=30, completed=10)
+
+        with CaptureQueriesContext(connection) as small_context:
+            self.render_outline(small)
+        with CaptureQueriesContext(connection) as large_context:
+            self.render_outline(large)
+
+        self.assertEqual(len(small_context.captured_queries), len(large_context.captured_queries))
+
+    def test_course_details_query_count_independent_of_topic_count(self):
+        small = self.create_course('Small details', topic_count=3, completed=1)
+        large = self.create_course('Large details', topic_count=30, completed=10)
+        self.client.force_login(self.learner)
+
+        counts = []
+        for course in (small, large):
+            url = reverse('courses:course_details', args=[course.id])
+            # The first request initializes missing progress records
+            self.client.get(url)
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            writes = [
+                query['sql'] for query in context.captured_queries
+                if 'topicprogress' in query['sql'].lower()
+                and query['sql'].lstrip().upper().startswith(('INSERT', 'UPDATE'))
+            ]
+            self.assertEqual(writes, [])
+            counts.append(len(context.captured_queries))
+
+        self.assertEqual(counts[0], counts[1])
+
+
+class SequentialAccessMapTestCase(TestCase):
+    """can_access_topic reads a cached, section-aware topic order."""
+
+    def setUp(self):
+        # Cached course topic orders must not leak between tests reusing course ids
+        cache.clear()
+        self.instructor = User.objects.create_user(
+            username='sequence_instructor',
+            email='sequence_instructor@example.com',
+            password='testpass123',
+            role='instructor'
+        )
+        self.learner = User.objects.create_user(
+            username='sequence_learner',
+            email='sequence_learner@example.com',
+            password='testpass123',
+            role='learner'
+        )
+        self.course = Course.objects.create(
+            title='Sequence',
+            instructor=self.instructor,
+            enforce_sequence=True,
+            sequential_progression=True
+        )
+        self.first_section = Section.objects.create(course=self.course, name='First', order=1)
+        self.second_section = Section.objects.create(course=self.course, name='Second', order=2)
+        # Created in reverse so that section order, not creation order, decides the sequence
+        self.standalone = self.create_topic('Standalone', None, order=1)
+        self.second = self.create_topic('Second', self.second_section, order=1)
+        self.first = self.create_topic('First', self.first_section, order=1)
+        self.draft = self.create_topic('Draft', self.first_section, order=2, status='draft')
+
+    def create_topic(self, title, section, order, status='active'):
+        topic = Topic.objects.create(
+            title=title,
+            content_type='Text',
+            text_content='Content',
+            status=status,
+            section=section,
+            order=order
+        )
+        CourseTopic.objects.create(course=self.course, topic=topic, order=order)
+        return topic
+
+    def fresh_course(self):
+        return Course.objects.get(pk=self.course.pk)
+
+    def test_access_follows_section_order(self):
+        course = self.fresh_course()
+        self.assertTrue(course.can_access_topic(self.learner, self.first))
+        self.assertFalse(course.can_access_topic(self.learner, self.second))
+        self.assertFalse(course.can_access_topic(self.learner, self.standalone))
+        self.assertFalse(course.can_access_topic(self.learner, self.draft))
+
+        TopicProgress.objects.create(user=self.learner, topic=self.first, course=self.course, completed=True)
+        course = self.fresh_course()
+        self.assertTrue(course.can_access_topic(self.learner, self.second))
+        self.assertFalse(course.can_access_topic(self.learner, self.standalone))
+        self.assertEqual(course.get_next_available_topic(self.learner), self.second)
+
+    def test_checks_share_one_map_per_request(self):
+        course = self.fresh_course()
+        course.can_access_topic(self.learner, self.first)
+        with CaptureQueriesContext(connection) as context:
+            for topic in (self.first, self.second, self.standalone, self.draft):
+                course.can_access_topic(self.learner, topic)
+        self.assertEqual(len(context.captured_queries), 0)
+
+    def test_section_reorder_invalidates_topic_order(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.second_section.order = 0
+            self.second_section.save()
+
+        course = self.fresh_course()
+        self.assertTrue(course.can_access_topic(self.learner, self.second))
+        self.assertFalse(course.can_access_topic(self.learner, self.first))
@@ -9,6 +9,7 @@ from django.db import OperationalError, DatabaseError, InterfaceError
 
 from .models import Topic, Course, Section
 from .views import get_topic_course, check_course_permission
+from .progress_map import CourseProgressMap
 from core.utils.db_retry import retry_db_operation, safe_db_query
 
 # Import TopicProgress and CourseTopic dynamically
@@ -125,68 +126,13 @@ def topic_view(request, topic_id):
                             # Find the next available topic the learner can access using the same ordering
                             next_available_topic = None
                             try:
-                                # Build the same ordered list used for display (will be built later in the function)
-                                # But we need sections here, so get them now
-                                from courses.models import Section
-                                sections = Section.objects.filter(course=course).order_by('order')
-                                
-                                # Get all topics for this course that the user can access
-                                if request.user.is_authenticated and request.user.role == 'learner':
-                                    all_course_topics = Topic.objects.select_related(
-                                        'quiz', 
-                                        'assignment', 
-                                        'discussion', 
-                                        'conference', 
-                                        'scorm', 
-                                        'section'
-                                    ).filter(
-                                        coursetopic__course=course
-                                    ).exclude(
-                                        status='draft'
-                                    ).exclude(
-                                        restrict_to_learners=True,
-                                        restricted_learners=request.user
-                                    ).order_by('order', 'coursetopic__order', 'created_at')
-                                else:
-                                    all_course_topics = Topic.objects.select_related(
-                                        'quiz', 
-                                        'assignment', 
-                                        'discussion', 
-                                        'conference', 
-                                        'scorm', 
-                                        'section'
-                                    ).filter(
-                                        coursetopic__course=course
-                                    ).order_by('order', 'coursetopic__order', 'created_at')
-                                
-                                # Build the same ordered list used for display
-                                all_topics_ordered = []
-                                
-                                # Add topics from each section in order
-                                for section in sections:
-                                    section_topics_list = all_course_topics.filter(section=section).order_by('order', 'coursetopic__order', 'created_at')
-                                    all_topics_ordered.extend(list(section_topics_list))
-                                
-                                # Add standalone topics (without section) at the end
-                                standalone_topics_list = all_course_topics.filter(section__isnull=True).order_by('order', 'coursetopic__order', 'created_at')
-                                all_topics_ordered.extend(list(standalone_topics_list))
-                                
-                                # Find the first INCOMPLETE topic the learner can access
-                                # This prevents redirecting to completed topics
-                                for topic_item in all_topics_ordered:
-                                    if course.can_access_topic(request.user, topic_item):
-                                        # Check if this topic is incomplete
-                                        # Quiz topics are checked the same way as other topics - just TopicProgress.completed
-                                        topic_progress = TopicProgress.objects.filter(
-                                            user=request.user,
-                                            topic=topic_item,
-                                            course=course
-                                        ).first()
-                                        
-                                        # Only select if incomplete (no progress or progress not completed)
-                                        if not topic_progress or not topic_progress.completed:
-                                            next_available_topic = topic_item
-                                            break
+                                # The first incomplete topic in course order is the one the
+                                # learner can open next; completed topics are never selected
+                                access_map = course.get_sequential_access_map(request.user)
+                                if access_map.next_available_topic_id is not None:
+                                    next_available_topic = Topic.objects.filter(
+                                        pk=access_map.next_available_topic_id
+                                    ).first()
                             except Exception as e:
                                 logger.error(f"Error finding next available topic: {str(e)}")
                             
@@ -365,17 +311,9 @@ def topic_view(request, topic_id):
             completed_topics_count = len(all_progress)
         
         # Find previous and next topics for navigation
-        # Build a section-aware ordered list: section topics first (by section order), then standalone topics
-        all_topics_list = []
-        
-        # Add topics from each section in order
-        for section in sections:
-            section_topics_list = all_course_topics.filter(section=section).order_by('order', 'coursetopic__order', 'created_at')
-            all_topics_list.extend(list(section_topics_list))
-        
-        # Add standalone topics (without section) at the end
-        standalone_topics_list = all_course_topics.filter(section__isnull=True).order_by('order', 'coursetopic__order', 'created_at')
-        all_topics_list.extend(list(standalone_topics_list))
+        # Section-aware order from the cached course topic index: section topics first
+        # (by section order), then standalone topics
+        all_topics_list = course.get_sequential_access_map(request.user).sort_topics(all_course_topics)
         
         previous_topic = None
         next_topic = None
@@ -548,6 +486,7 @@ def topic_view(request, topic_id):
             ],
             'topics_without_section': topics_without_section,
             'all_progress': all_progress,
+            'progress_map': CourseProgressMap(request.user, course, topics=all_course_topics),
             'total_topics_count': total_topics_count,
             'completed_topics_count': completed_topics_count,
             'can_access_interactive_content': can_access_interactive_content,
@@ -77,6 +77,8 @@ try:
 except ImportError:
     CourseTopic = None
 from .forms import CourseForm, TopicForm
+from .progress_map import CourseProgressMap
+from .visibility import get_user_course_index, get_visible_course_ids
 from categories.models import CourseCategory
 from categories.context_processors import get_user_accessible_categories
 from quiz.models import Quiz
@@ -434,97 +436,38 @@ def course_list(request):
         except Exception:
             pass
 
-    # Get unique course IDs first - Updated to use new role-based permission system
-    if request.user.role == 'learner':
-        # For learners, show only ACTIVE courses they are enrolled in
-        course_ids = CourseEnrollment.objects.filter(
-            user=request.user,
-            course__is_active=True
-        ).values_list('course_id', flat=True).distinct()
-        
-        # Add group-assigned courses for learners
-        group_course_ids = Course.objects.filter(
-            is_active=True,
-            accessible_groups__memberships__user=request.user,
-            accessible_groups__memberships__is_active=True,
-            accessible_groups__memberships__user__role='learner'
-        ).values_list('id', flat=True).distinct()
-        
-        # Combine enrolled and group-assigned courses
-        all_learner_courses = set(course_ids) | set(group_course_ids)
-        course_ids = list(all_learner_courses)
-        
-        # Log for debugging
-        logger.info(f"Learner {request.user.username} (ID: {request.user.id}) can see {len(course_ids)} courses")
-        logger.info(f"Course IDs for learner: {course_ids}")
-    elif request.user.role == 'instructor' and has_manage_courses:
+    # Get unique course IDs first from the per-user course index
+    if request.user.role == 'instructor' and has_manage_courses:
         # Instructors with manage_courses capability can see all courses, including drafts
-        course_ids = Course.objects.all().values_list('id', flat=True).distinct()
-    elif request.user.role == 'instructor':
-        # Instructors see courses they are assigned to (primary), enrolled in (invited), or have group access to
-        course_ids = Course.objects.filter(
-            Q(instructor=request.user) |  # Primary instructor
-            Q(enrolled_users=request.user, enrolled_users__role='instructor') |  # Enrolled as instructor
-            Q(accessible_groups__memberships__user=request.user,
-              accessible_groups__memberships__is_active=True,
-              accessible_groups__memberships__user__role='instructor')  # Group access as instructor
-        ).values_list('id', flat=True).distinct()
-        
-        # Ensure primary instructors are enrolled in their own courses
-        instructor_courses = Course.objects.filter(instructor=request.user)
-        for course in instructor_courses:
-            from core.utils.enrollment import EnrollmentService
-            EnrollmentService.create_or_get_enrollment(
-                user=request.user,
-                course=course,
-                source='auto_instructor'
-            )
-            
-        # Log for debugging
-        logger.info(f"Instructor {request.user.username} (ID: {request.user.id}) has access to {len(list(course_ids))} courses")
-        logger.info(f"Course IDs found: {list(course_ids)}")
-    elif request.user.role == 'admin':
-        # Admins can see ALL courses in their branch (regardless of visibility) plus any they have direct access to
-        # Use effective branch to support branch switching
-        from core.branch_filters import BranchFilterManager
-        effective_branch = BranchFilterManager.get_effective_branch(request.user, request)
-        logger.info(f"Admin {request.user.username} (ID: {request.user.id}) effective branch: {effective_branch}")
-        
-        if effective_branch:
-            course_ids = Course.objects.filter(
-                is_active=True
-            ).filter(
-                Q(branch=effective_branch) |  # All courses in their effective branch
-                Q(instructor__branch=effective_branch) |  # Courses by instructors in their branch (even if course.branch is null)
-                Q(accessible_groups__memberships__user=request.user,
-                  accessible_groups__memberships__is_active=True) |
-                # Add direct enrollment check
-                Q(enrolled_users=request.user)
-            ).values_list('id', flat=True).distinct()
-        else:
-            # No branch assigned, only show courses with direct access
-            course_ids = Course.objects.filter(
-                is_active=True
-            ).filter(
-                Q(accessible_groups__memberships__user=request.user,
-                  accessible_groups__memberships__is_active=True) |
-                Q(enrolled_users=request.user)
-            ).values_list('id', flat=True).distinct()
-        
-        # Log for debugging
-        logger.info(f"Admin {request.user.username} can see {len(list(course_ids))} courses in branch {effective_branch}")
-    elif request.user.role == 'globaladmin' or request.user.is_superuser:
-        # Global Admin sees all courses
-        course_ids = Course.objects.filter(
-            is_active=True
-        ).values_list('id', flat=True).distinct()
-    elif request.user.role == 'superadmin':
-        # Super Admin sees courses within their assigned businesses only
-        from core.utils.business_filtering import filter_courses_by_business
-        business_courses = filter_courses_by_business(request.user).filter(is_active=True)
-        course_ids = business_courses.values_list('id', flat=True).distinct()
+        course_ids = Course.objects.all().values_list('id', flat=True)
     else:
-        course_ids = Course.objects.none().values_list('id', flat=True).distinct()
+        effective_branch = None
+        if request.user.role == 'admin':
+            # Admins see ALL courses in their effective branch (supports branch switching)
+            # plus any they have direct access to
+            from core.branch_filters import BranchFilterManager
+            effective_branch = BranchFilterManager.get_effective_branch(request.user, request)
+            logger.info(f"Admin {request.user.username} (ID: {request.user.id}) effective branch: {effective_branch}")
+
+        course_ids = get_visible_course_ids(request.user, effective_branch=effective_branch)
+        if course_ids is None:
+            # Global Admin sees all active courses
+            course_ids = Course.objects.filter(is_active=True).values_list('id', flat=True)
+
+        if request.user.role == 'instructor':
+            # Ensure primary instructors are enrolled in their own courses
+            index = get_user_course_index(request.user)
+            missing_enrollments = index.instructing - index.enrolled
+            if missing_enrollments:
+                from core.utils.enrollment import EnrollmentService
+                for course in Course.objects.filter(id__in=missing_enrollments):
+                    EnrollmentService.create_or_get_enrollment(
+                        user=request.user,
+                        course=course,
+                        source='auto_instructor'
+                    )
+
+        logger.info(f"User {request.user.username} (ID: {request.user.id}, role: {request.user.role}) can see {len(course_ids)} courses")
 
     # Now get the full course objects with all needed relations
     # Use the distinct IDs to ensure uniqueness
@@ -1122,77 +1065,40 @@ def course_details(request, course_id):
                 if abs(progress - enrollment_progress) > 5:  # Reduced tolerance for logging
                     logger.warning(f"Progress calculation discrepancy: calculated={progress}, enrollment={enrollment_progress} for user {request.user.username}")
     
+    # Batched progress lookups for the Resume button and the course outline,
+    # built after the progress records above have been initialized
+    progress_map = CourseProgressMap(request.user, course, topics=topics)
+
     # Find the next incomplete topic for Resume button (after progress records are initialized)
     # This includes ALL topic types: Video, Document, Text, Audio, Web, Quiz, Assignment, 
     # EmbedVideo, Conference, Discussion, SCORM - including initial assessment quizzes
     next_incomplete_topic = None
     if request.user.is_authenticated and is_enrolled:
         try:
-            # Get all topic IDs in order
+            # Get all topics in order
             # Note: The 'topics' queryset is already filtered based on user role:
             # - For learners: excludes draft topics and restricted topics
             # - For instructors/admins: includes all topics
-            all_topics_ordered = []
-            
-            # First add topics from sections in order
-            for section in sections:
-                section_topics = topics.filter(section=section).order_by('order', 'coursetopic__order', 'created_at')
-                all_topics_ordered.extend(list(section_topics))
-            
-            # Then add standalone topics
-            if hasattr(topics_without_section, 'exists'):
-                standalone_topics = topics_without_section.order_by('order', 'coursetopic__order', 'created_at')
-                all_topics_ordered.extend(list(standalone_topics))
-            elif topics_without_section:
-                all_topics_ordered.extend(list(topics_without_section))
+            # Section topics first (by section order), then standalone topics, from the
+            # cached course topic index
+            all_topics_ordered = course.get_sequential_access_map(request.user).sort_topics(
+                progress_map.topics
+            )
             
             # Find the first incomplete topic after the last completed topic
             # IMPORTANT: Resume from the first incomplete topic AFTER the last completed topic
             # This prevents newly added topics from interrupting the user's progress sequence
             # ALL topic types are included: Video, Document, Text, Audio, Web, Quiz (including initial), 
             # Assignment, EmbedVideo, Conference, Discussion, SCORM
+            # A topic counts as completed when its TopicProgress for this course is completed,
+            # or for quiz topics when there is a passing (or VAK / initial assessment) attempt,
+            # which covers TopicProgress not having been updated yet
             last_completed_index = -1
             
-            # Helper function to check if a topic is completed
-            def is_topic_completed(topic):
-                # Check TopicProgress first
-                topic_progress = TopicProgress.objects.filter(
-                    user=request.user,
-                    topic=topic,
-                    course=course,
-                    completed=True
-                ).exists()
-                
-                if topic_progress:
-                    return True
-                
-                # For quiz topics, also check if there's a passing QuizAttempt
-                # This handles cases where TopicProgress might not be updated yet
-                if topic.content_type == 'Quiz' and topic.quiz:
-                    try:
-                        from quiz.models import QuizAttempt
-                        # Check for passing quiz attempt or VAK/Initial Assessment completion
-                        quiz_completed = QuizAttempt.objects.filter(
-                            quiz=topic.quiz,
-                            user=request.user,
-                            is_completed=True
-                        ).filter(
-                            Q(passed=True) | 
-                            Q(quiz__is_vak_test=True) | 
-                            Q(quiz__is_initial_assessment=True)
-                        ).exists()
-                        
-                        if quiz_completed:
-                            return True
-                    except Exception as e:
-                        logger.error(f"Error checking quiz completion for topic {topic.id}: {str(e)}")
-                
-                return False
-            
             # First pass: find the index of the last completed topic
             # Include ALL topics - no skipping
             for index, topic in enumerate(all_topics_ordered):
-                if is_topic_completed(topic):
+                if progress_map.is_topic_completed(topic):
                     last_completed_index = index
             
             # Second pass: find the first incomplete topic after the last completed one
@@ -1202,7 +1108,7 @@ def course_details(request, course_id):
             for index in range(start_index, len(all_topics_ordered)):
                 topic = all_topics_ordered[index]
                 
-                if not is_topic_completed(topic):
+                if not progress_map.is_topic_completed(topic):
                     next_incomplete_topic = topic
                     break
         except Exception as e:
@@ -1281,6 +1187,7 @@ def course_details(request, course_id):
         'first_topic': first_topic,
         'next_incomplete_topic': next_incomplete_topic,
         'progress': progress,
+        'progress_map': progress_map,
         'can_edit': can_edit,
         'can_delete': can_delete,
         'has_group_access': course.accessible_groups.filter(
@@ -1543,6 +1450,7 @@ def course_view(request, course_id):
         'back_url': get_course_context(request, request.user, course)['back_url'],
         'breadcrumbs': breadcrumbs,
         'progress': progress,
+        'progress_map': CourseProgressMap(request.user, course, topics=topics),
         'is_enrolled': is_enrolled,
         'user': request.user,
         'total_topics_count': total_topics_count,
@@ -6268,6 +6176,14 @@ def stream_video(request, path):
             logger.warning(f"Suspicious video path access: {path}")
             return HttpResponseForbidden('Invalid video path')
         
+        # Authorise against the course that owns the video before handing it off
+        if not request.user.is_authenticated:
+            return HttpResponseForbidden('Authentication required')
+        video_course = Course.objects.filter(course_video=path).first()
+        if video_course is None or not check_course_permission(request.user, video_course):
+            logger.warning(f"Video access denied: {path} for {user_info}")
+            return HttpResponseForbidden('Access denied to video file')
+        
         # For S3 storage, we need to handle this differently
         from django.core.files.storage import default_storage
         import mimetypes
@@ -6312,7 +6228,17 @@ def stream_video(request, path):
             else:
                 content_type = 'video/mp4'  # Default fallback
         
-        # For authenticated video streaming, we'll proxy through Django
+        # Hand the bytes off to S3, the CDN or nginx when VIDEO_DELIVERY_MODE allows it.
+        # Superusers can force a mode with ?delivery= (used by benchmark_video_delivery).
+        from .media_delivery import DELIVERY_MODES, video_delivery_response
+        requested_mode = request.GET.get('delivery') if request.user.is_superuser else None
+        if requested_mode not in DELIVERY_MODES:
+            requested_mode = None
+        delivery_response = video_delivery_response(path, content_type, mode=requested_mode)
+        if delivery_response is not None:
+            return delivery_response
+        
+        # Otherwise proxy through Django
         # This ensures authentication is maintained while allowing video playback
         try:
             # Stream the video content directly through Django
@@ -7058,8 +6984,8 @@ def generate_certificate(request, course_id):
         
         # Check if certificate already exists for this user and course
         existing_cert = IssuedCertificate.objects.filter(
-            recipient=user,
-            course_name=course.title
+            Q(course=course) | Q(course__isnull=True, course_name=course.title),
+            recipient=user
         ).first()
         
         if existing_cert:
@@ -7082,6 +7008,7 @@ def generate_certificate(request, course_id):
             template=course.certificate_template,
             recipient=user,
             issued_by=issuer,
+            course=course,
             course_name=course.title,
             certificate_number=certificate_number
         )
@@ -0,0 +1,198 @@
+"""
+Per-user course index.
+
+Which courses a user is related to (enrolled, reachable through an active
+group membership, or instructing) is derived from several tables. The index
+keeps those course id sets per user in the cache, versioned per user so that
+enrollment, group membership, group access and instructor changes invalidate
+only the users they affect. Callers combine the sets with their own role and
+scope rules instead of re-running multi-join DISTINCT queries.
+"""
+
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+COURSE_INDEX_ATTR = '_course_index'
+
+
+def course_index_version_key(user_id):
+    return f"course_index_version_{user_id}"
+
+
+def course_index_cache_key(user_id, version):
+    return f"course_index_{user_id}_{version}"
+
+
+def invalidate_course_index(user_ids):
+    """Bump the course index version of users once the current transaction commits"""
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return
+
+    def _bump():
+        version = time.time_ns()
+        try:
+            cache.set_many({course_index_version_key(user_id): version for user_id in user_ids}, None)
+        except Exception as e:
+            logger.warning(f"Course index invalidation failed for users {sorted(user_ids)}: {e}")
+
+    transaction.on_commit(_bump)
+
+
+class UserCourseIndex:
+    """Course id sets for one user"""
+
+    KINDS = ('enrolled', 'group', 'group_instructor', 'instructing')
+
+    def __init__(self, enrolled=(), group=(), group_instructor=(), instructing=()):
+        self.enrolled = frozenset(enrolled)
+        # Courses reachable through an active group membership
+        self.group = frozenset(group)
+        # The subset reached through a membership whose custom role is an instructor role
+        self.group_instructor = frozenset(group_instructor)
+        # Courses where the user is the primary instructor
+        self.instructing = frozenset(instructing)
+
+    @classmethod
+    def build(cls, user):
+        from courses.models import Course, CourseEnrollment
+        from groups.models import CourseGroupAccess, GroupMembership
+
+        enrolled = CourseEnrollment.objects.filter(user=user).values_list('course_id', flat=True)
+        instructing = Course.objects.filter(instructor=user).values_list('id', flat=True)
+
+        group_ids = set()
+        instructor_group_ids = set()
+        memberships = GroupMembership.objects.filter(
+            user=user,
+            is_active=True
+        ).values_list('group_id', 'custom_role__name')
+        for group_id, role_name in memberships:
+            group_ids.add(group_id)
+            if role_name and 'instructor' in role_name.lower():
+                instructor_group_ids.add(group_id)
+
+        group = set()
+        group_instructor = set()
+        if group_ids:
+            for course_id, group_id in CourseGroupAccess.objects.filter(
+                group_id__in=group_ids
+            ).values_list('course_id', 'group_id'):
+                group.add(course_id)
+                if group_id in instructor_group_ids:
+                    group_instructor.add(course_id)
+
+        return cls(enrolled, group, group_instructor, instructing)
+
+    def to_dict(self):
+        return {kind: sorted(getattr(self, kind)) for kind in self.KINDS}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{kind: data.get(kind, ()) for kind in cls.KINDS})
+
+    def course_ids(self, *kinds):
+        """Union of the given sets (all of them when no kind is given)"""
+        result = set()
+        for kind in kinds or self.KINDS:
+            result |= getattr(self, kind)
+        return result
+
+
+def get_user_course_index(user, use_cache=True):
+    """Return the course index for user, memoised on the user object for the request"""
+    if use_cache:
+        index = getattr(user, COURSE_INDEX_ATTR, None)
+        if index is not None:
+            return index
+
+    index = None
+    cache_key = None
+    version_key = course_index_version_key(user.pk)
+    if use_cache:
+        try:
+            version = cache.get(version_key)
+            if version is None:
+                version = time.time_ns()
+                if not cache.add(version_key, version, None):
+                    version = cache.get(version_key) or version
+            cache_key = course_index_cache_key(user.pk, version)
+            data = cache.get(cache_key)
+            if data is not None:
+                index = UserCourseIndex.from_dict(data)
+        except Exception as e:
+            logger.warning(f"Course index cache read failed for user {user.pk}: {e}")
+
+    if index is None:
+        index = UserCourseIndex.build(user)
+        if cache_key:
+            try:
+                cache.set(
+                    cache_key,
+                    index.to_dict(),
+                    getattr(settings, 'COURSE_INDEX_CACHE_TIMEOUT', 3600)
+                )
+            except Exception as e:
+                logger.warning(f"Course index cache write failed for user {user.pk}: {e}")
+
+    try:
+        setattr(user, COURSE_INDEX_ATTR, index)
+    except AttributeError:
+        pass
+    return index
+
+
+def get_instructor_course_ids(user):
+    """Courses an instructor teaches, was invited to (enrolled in) or reaches through a group"""
+    return get_user_course_index(user).course_ids('instructing', 'enrolled', 'group')
+
+
+def get_visible_course_ids(user, effective_branch=None):
+    """
+    Ids of the courses a user sees in the course catalog.
+
+    Returns None for users who see every active course. effective_branch is
+    the admin's (possibly switched) branch.
+    """
+    from courses.models import Course
+
+    role = getattr(user, 'role', None)
+    if role == 'globaladmin' or user.is_superuser:
+        return None
+
+    if role == 'learner':
+        index = get_user_course_index(user)
+        return set(Course.objects.filter(
+            id__in=index.course_ids('enrolled', 'group'),
+            is_active=True
+        ).values_list('id', flat=True))
+
+    if role == 'instructor':
+        return get_instructor_course_ids(user)
+
+    if role == 'admin':
+        index = get_user_course_index(user)
+        scope = Course.objects.filter(is_active=True)
+        direct = index.course_ids('enrolled', 'group')
+        if effective_branch:
+            scope = scope.filter(
+                Q(branch=effective_branch) |
+                Q(instructor__branch=effective_branch) |
+                Q(id__in=direct)
+            )
+        else:
+            scope = scope.filter(id__in=direct)
+        return set(scope.values_list('id', flat=True))
+
+    if role == 'superadmin':
+        from core.utils.business_filtering import filter_courses_by_business
+        return set(filter_courses_by_business(user).filter(is_active=True).values_list('id', flat=True))
+
+    return set()
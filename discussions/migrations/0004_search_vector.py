@@ -0,0 +1,57 @@
+# Generated by Django 4.2.24 on 2026-10-18 22:04
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+DISCUSSION_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION discussions_discussion_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('pg_catalog.english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('pg_catalog.english', coalesce(NEW.description, '')), 'B') ||
+        setweight(to_tsvector('pg_catalog.english', regexp_replace(coalesce(NEW.content, ''), '<[^>]*>', ' ', 'g')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS discussions_discussion_search_vector_trigger ON discussions_discussion;
+CREATE TRIGGER discussions_discussion_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description, content, search_vector
+    ON discussions_discussion FOR EACH ROW EXECUTE PROCEDURE discussions_discussion_search_vector_update();
+
+-- Backfill existing rows through the trigger
+UPDATE discussions_discussion SET search_vector = NULL;
+"""
+
+DROP_DISCUSSION_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS discussions_discussion_search_vector_trigger ON discussions_discussion;
+DROP FUNCTION IF EXISTS discussions_discussion_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('discussions', '0003_auto_20251111_0047'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='discussion',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='discussion',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='discussion_search_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='discussion',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass('title', name='gin_trgm_ops'), name='discussion_title_trgm'),
+        ),
+        migrations.RunSQL(DISCUSSION_TRIGGER_SQL, DROP_DISCUSSION_TRIGGER_SQL),
+    ]
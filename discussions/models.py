@@ -1,4 +1,6 @@
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.conf import settings
 
 class Discussion(models.Model):
@@ -65,6 +67,9 @@ class Discussion(models.Model):
         help_text="The course this discussion belongs to (if any)"
     )
     
+    # Maintained by a database trigger from title, description and content (see core.search)
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     def get_course_info(self):
         """
         Get course information for this discussion.
@@ -181,6 +186,10 @@ class Discussion(models.Model):
     
     class Meta:
         ordering = ['-updated_at']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='discussion_search_gin'),
+            GinIndex(OpClass('title', name='gin_trgm_ops'), name='discussion_title_trgm'),
+        ]
 
 class Comment(models.Model):
     discussion = models.ForeignKey(Discussion, on_delete=models.CASCADE, related_name='comments')
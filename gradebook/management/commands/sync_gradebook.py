@@ -1,8 +1,25 @@
-from django.core.management.base import BaseCommand
-from gradebook.models import Grade
-from assignments.models import AssignmentSubmission
-from courses.models import Course, Topic
-from django.db import transaction
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from courses.models import Course
+from gradebook.sync import sync_grades
+
+
+def parse_since(value):
+    """An ISO date or datetime; dates mean midnight in TIME_ZONE"""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f"Invalid --since value '{value}', expected YYYY-MM-DD or an ISO datetime")
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
 
 class Command(BaseCommand):
     help = 'Sync assignment submissions with grades to create missing Grade records in the gradebook'
@@ -13,98 +30,44 @@ class Command(BaseCommand):
             type=int,
             help='Limit sync to a specific course ID',
         )
+        parser.add_argument(
+            '--since',
+            help='Only submissions graded at or after this date/datetime (graded_at); all by default',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=None,
+            help='Grade rows written per transaction',
+        )
 
     def handle(self, *args, **options):
         course_id = options.get('course')
+        since = parse_since(options['since']) if options.get('since') else None
         self.stdout.write(self.style.HTTP_INFO('Starting gradebook sync...'))
-        
-        # Get all assignment submissions with grades
-        query = AssignmentSubmission.objects.filter(grade__isnull=False)
-        
+
         if course_id:
-            # Get all assignment topics for the course
-            try:
-                course = Course.objects.get(pk=course_id)
-                topics = Topic.objects.filter(courses=course, content_type='Assignment')
-                assignments = [t.assignment for t in topics if t.assignment]
-                
-                # Filter submissions for these assignments
-                query = query.filter(assignment__in=assignments)
-                self.stdout.write(self.style.HTTP_INFO(f"Syncing grades for course ID {course_id} only"))
-            except Course.DoesNotExist:
+            if not Course.objects.filter(pk=course_id).exists():
                 self.stdout.write(self.style.ERROR(f"Course with ID {course_id} not found"))
                 return
-        
-        submissions = query.select_related('assignment', 'user')
-        
-        created_count = 0
-        updated_count = 0
-        errors = []
-        
-        with transaction.atomic():
-            for submission in submissions:
-                try:
-                    # Make sure the assignment has a course
-                    if not hasattr(submission.assignment, 'course') or not submission.assignment.course:
-                        # Try to find course through topics
-                        topics = Topic.objects.filter(assignment=submission.assignment)
-                        if topics.exists():
-                            topic = topics.first()
-                            course_topic = topic.coursetopic_set.first()
-                            course = course_topic.course if course_topic else None
-                            
-                            if course:
-                                # Update assignment course
-                                submission.assignment.course = course
-                                submission.assignment.save(update_fields=['course'])
-                                self.stdout.write(self.style.SUCCESS(
-                                    f"Updated assignment {submission.assignment.id} to link to course {course.id}"
-                                ))
-                            else:
-                                errors.append(f"Could not find course for assignment {submission.assignment.id}")
-                                continue
-                        else:
-                            errors.append(f"Could not find topic for assignment {submission.assignment.id}")
-                            continue
-                    
-                    # Get or create the grade record
-                    grade, created = Grade.objects.update_or_create(
-                        student=submission.user,
-                        course=submission.assignment.course,
-                        assignment=submission.assignment,
-                        defaults={
-                            'score': submission.grade,
-                            'feedback': '',  # Add any feedback if necessary
-                        }
-                    )
-                    
-                    if created:
-                        self.stdout.write(self.style.SUCCESS(
-                            f"Created grade record: Student {submission.user.id}, "
-                            f"Assignment {submission.assignment.id}, Score {submission.grade}"
-                        ))
-                        created_count += 1
-                    else:
-                        # Update existing grade if it doesn't match submission
-                        if grade.score != submission.grade:
-                            grade.score = submission.grade
-                            grade.save()
-                            self.stdout.write(self.style.SUCCESS(
-                                f"Updated grade record: Student {submission.user.id}, "
-                                f"Assignment {submission.assignment.id}, Score {submission.grade}"
-                            ))
-                            updated_count += 1
-                
-                except Exception as e:
-                    errors.append(f"Error processing submission {submission.id}: {str(e)}")
-        
+            self.stdout.write(self.style.HTTP_INFO(f"Syncing grades for course ID {course_id} only"))
+        if since:
+            self.stdout.write(self.style.HTTP_INFO(f"Syncing submissions graded since {since.isoformat()}"))
+
+        counts = sync_grades(course_id=course_id, since=since, size=options.get('chunk_size'))
+
         self.stdout.write(self.style.SUCCESS(f"\nGrade sync complete:"))
-        self.stdout.write(self.style.SUCCESS(f"- Created {created_count} new grade records"))
-        self.stdout.write(self.style.SUCCESS(f"- Updated {updated_count} existing grade records"))
-        
-        if errors:
-            self.stdout.write(self.style.WARNING(f"- Encountered {len(errors)} errors:"))
-            for error in errors:
-                self.stdout.write(self.style.WARNING(f"  - {error}"))
+        self.stdout.write(self.style.SUCCESS(f"- Inserted {counts['inserted']} new grade records"))
+        self.stdout.write(self.style.SUCCESS(f"- Updated {counts['updated']} existing grade records"))
+        self.stdout.write(self.style.SUCCESS(f"- Left {counts['unchanged']} grade records unchanged"))
+        if counts['excused']:
+            self.stdout.write(self.style.SUCCESS(f"- Skipped {counts['excused']} excused grade records"))
+        if counts['linked']:
+            self.stdout.write(self.style.SUCCESS(f"- Linked {counts['linked']} assignments to the course of their topic"))
+
+        if counts['orphaned']:
+            self.stdout.write(self.style.WARNING(
+                f"- {counts['orphaned']} graded assignments have no course or topic and were not synced"
+            ))
         else:
-            self.stdout.write(self.style.SUCCESS("- No errors encountered")) 
\ No newline at end of file
+            self.stdout.write(self.style.SUCCESS("- No errors encountered"))
@@ -0,0 +1,351 @@
+"""
+Score sources for the gradebook template tags.
+
+The per-cell tags in gradebook_tags (activity scores, statuses, feedback and
+participation) read their data through a score source. GradebookPrefetch loads
+everything for one rendered page of students x activities in a handful of bulk
+queries; QueryScoreSource keeps the original per-cell queries for templates
+that render the tags without a prefetch.
+
+In strict mode (GRADEBOOK_STRICT_PREFETCH, or GradebookPrefetch(strict=True))
+a tag that reaches the database while rendering raises GradebookQueryError.
+"""
+
+import logging
+from contextlib import contextmanager, nullcontext
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Sum
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_KEY = 'gradebook_prefetch'
+
+
+class GradebookQueryError(RuntimeError):
+    """Raised in strict mode when a gradebook tag queries the database"""
+
+
+def get_score_source(context):
+    """Return the score source for a template context"""
+    prefetch = context.get(CONTEXT_KEY) if context is not None else None
+    if isinstance(prefetch, GradebookPrefetch):
+        return prefetch
+    return QueryScoreSource(strict=getattr(settings, 'GRADEBOOK_STRICT_PREFETCH', False))
+
+
+class BaseScoreSource:
+    """Shared strict-mode handling for score sources"""
+
+    def __init__(self, strict=False):
+        self.strict = strict
+
+    def guard(self):
+        """Context manager that rejects database access while a tag runs in strict mode"""
+        if not self.strict:
+            return nullcontext()
+        return self._deny_queries()
+
+    @contextmanager
+    def _deny_queries(self):
+        # The tags swallow most exceptions, so violations are recorded and
+        # re-raised once the tag has returned.
+        violations = []
+
+        def blocker(execute, sql, params, many, context):
+            violations.append(sql)
+            raise GradebookQueryError(f"Gradebook tag queried the database: {sql}")
+
+        with connection.execute_wrapper(blocker):
+            yield
+        if violations:
+            raise GradebookQueryError(
+                f"Gradebook tag issued {len(violations)} queries while rendering: {violations[0]}"
+            )
+
+
+class QueryScoreSource(BaseScoreSource):
+    """Score source that queries the database for every lookup"""
+
+    def rubric(self, obj):
+        return obj.rubric
+
+    def latest_submission(self, assignment, user_id):
+        from assignments.models import AssignmentSubmission
+        return AssignmentSubmission.objects.filter(
+            assignment=assignment,
+            user_id=user_id
+        ).order_by('-submitted_at').first()
+
+    def submission_feedback(self, submission):
+        """Return (has_overall_feedback, has_rubric_feedback, has_question_feedback)"""
+        from assignments.models import AssignmentFeedback, TextQuestionIterationFeedback
+        from lms_rubrics.models import RubricEvaluation
+        return (
+            AssignmentFeedback.objects.filter(submission=submission).exists(),
+            RubricEvaluation.objects.filter(submission=submission).exists(),
+            TextQuestionIterationFeedback.objects.filter(iteration__submission=submission).exists(),
+        )
+
+    def latest_completed_attempt(self, quiz, user_id):
+        from quiz.models import QuizAttempt
+        return QuizAttempt.objects.filter(
+            quiz=quiz,
+            user_id=user_id,
+            is_completed=True
+        ).order_by('-end_time').first()
+
+    def quiz_total_points(self, quiz):
+        return quiz.total_points
+
+    def quiz_rubric_points(self, attempt):
+        from quiz.models import QuizRubricEvaluation
+        return list(QuizRubricEvaluation.objects.filter(
+            quiz_attempt=attempt
+        ).values_list('points', flat=True))
+
+    def discussion_evaluations(self, discussion, student_id):
+        from lms_rubrics.models import RubricEvaluation
+        return list(RubricEvaluation.objects.filter(
+            discussion=discussion,
+            student_id=student_id
+        ).select_related('criterion'))
+
+    def attendance(self, conference, user_id):
+        from conferences.models import ConferenceAttendance
+        return ConferenceAttendance.objects.filter(
+            conference=conference,
+            user_id=user_id
+        ).first()
+
+    def conference_evaluations(self, conference, attendance):
+        from conferences.models import ConferenceRubricEvaluation
+        return list(ConferenceRubricEvaluation.objects.filter(
+            conference=conference,
+            attendance=attendance
+        ).select_related('criterion'))
+
+    def topic_progress(self, topic, user_id):
+        from courses.models import TopicProgress
+        return TopicProgress.objects.filter(
+            user_id=user_id,
+            topic=topic
+        ).first()
+
+    def comment_count(self, discussion, user_id):
+        from discussions.models import Comment
+        return Comment.objects.filter(
+            discussion=discussion,
+            created_by_id=user_id
+        ).count()
+
+
+class GradebookPrefetch(BaseScoreSource):
+    """
+    Bulk-loaded score data for one rendered page of the gradebook.
+
+    Build it once per view with the students and activities being rendered and
+    put it in the template context under CONTEXT_KEY. Lookups outside the
+    prefetched students and activities return empty results.
+    """
+
+    def __init__(self, students, activities, strict=None):
+        if strict is None:
+            strict = getattr(settings, 'GRADEBOOK_STRICT_PREFETCH', False)
+        super().__init__(strict=strict)
+
+        self.student_ids = [getattr(student, 'pk', student) for student in students]
+
+        objects_by_type = {}
+        for activity in activities:
+            objects_by_type.setdefault(activity['type'], []).append(activity['object'])
+
+        self._rubrics = {}
+        self._submissions = {}
+        self._feedback = {}
+        self._attempts = {}
+        self._quiz_total_points = {}
+        self._quiz_rubric_points = {}
+        self._discussion_evaluations = {}
+        self._attendances = {}
+        self._conference_evaluations = {}
+        self._topic_progress = {}
+        self._comment_counts = {}
+
+        if not self.student_ids:
+            return
+
+        self._load_rubrics(activities)
+        self._load_assignments(objects_by_type.get('assignment', []))
+        self._load_quizzes(
+            objects_by_type.get('quiz', []) + objects_by_type.get('initial_assessment', [])
+        )
+        self._load_discussions(objects_by_type.get('discussion', []))
+        self._load_conferences(objects_by_type.get('conference', []))
+        self._load_scorm(objects_by_type.get('scorm', []))
+
+    def _load_rubrics(self, activities):
+        from lms_rubrics.models import Rubric
+
+        missing = set()
+        for activity in activities:
+            obj = activity['object']
+            rubric_id = getattr(obj, 'rubric_id', None)
+            if rubric_id is None:
+                continue
+            descriptor = type(obj).rubric
+            if descriptor.is_cached(obj):
+                self._rubrics[rubric_id] = obj.rubric
+            else:
+                missing.add(rubric_id)
+        if missing:
+            self._rubrics.update(Rubric.objects.in_bulk(missing))
+
+    def _load_assignments(self, assignments):
+        if not assignments:
+            return
+        from assignments.models import (
+            AssignmentFeedback, AssignmentSubmission, TextQuestionIterationFeedback,
+        )
+        from lms_rubrics.models import RubricEvaluation
+
+        submissions = AssignmentSubmission.objects.filter(
+            assignment_id__in=[a.pk for a in assignments],
+            user_id__in=self.student_ids
+        ).order_by('-submitted_at')
+        for submission in submissions:
+            self._submissions.setdefault((submission.assignment_id, submission.user_id), submission)
+
+        submission_ids = [s.pk for s in self._submissions.values()]
+        if not submission_ids:
+            return
+        with_feedback = set(AssignmentFeedback.objects.filter(
+            submission_id__in=submission_ids
+        ).values_list('submission_id', flat=True))
+        with_rubric = set(RubricEvaluation.objects.filter(
+            submission_id__in=submission_ids
+        ).values_list('submission_id', flat=True))
+        with_question = set(TextQuestionIterationFeedback.objects.filter(
+            iteration__submission_id__in=submission_ids
+        ).values_list('iteration__submission_id', flat=True))
+        for submission_id in submission_ids:
+            self._feedback[submission_id] = (
+                submission_id in with_feedback,
+                submission_id in with_rubric,
+                submission_id in with_question,
+            )
+
+    def _load_quizzes(self, quizzes):
+        if not quizzes:
+            return
+        from quiz.models import Question, QuizAttempt, QuizRubricEvaluation
+
+        quiz_ids = [q.pk for q in quizzes]
+        totals = Question.objects.filter(
+            quiz_id__in=quiz_ids
+        ).values('quiz_id').annotate(total=Sum('points')).order_by()
+        self._quiz_total_points = {row['quiz_id']: row['total'] or 0 for row in totals}
+
+        attempts = QuizAttempt.objects.filter(
+            quiz_id__in=quiz_ids,
+            user_id__in=self.student_ids,
+            is_completed=True
+        ).order_by('-end_time')
+        for attempt in attempts:
+            self._attempts.setdefault((attempt.quiz_id, attempt.user_id), attempt)
+
+        if any(q.rubric_id for q in quizzes):
+            rows = QuizRubricEvaluation.objects.filter(
+                quiz_attempt__quiz_id__in=[q.pk for q in quizzes if q.rubric_id],
+                quiz_attempt__user_id__in=self.student_ids
+            ).values_list('quiz_attempt_id', 'points')
+            for attempt_id, points in rows:
+                self._quiz_rubric_points.setdefault(attempt_id, []).append(points)
+
+    def _load_discussions(self, discussions):
+        discussion_ids = [d.pk for d in discussions]
+        if not discussion_ids:
+            return
+        from discussions.models import Comment
+        from lms_rubrics.models import RubricEvaluation
+
+        evaluations = RubricEvaluation.objects.filter(
+            discussion_id__in=[d.pk for d in discussions if d.rubric_id],
+            student_id__in=self.student_ids
+        ).select_related('criterion')
+        for evaluation in evaluations:
+            key = (evaluation.discussion_id, evaluation.student_id)
+            self._discussion_evaluations.setdefault(key, []).append(evaluation)
+
+        counts = Comment.objects.filter(
+            discussion_id__in=discussion_ids,
+            created_by_id__in=self.student_ids
+        ).values('discussion_id', 'created_by_id').annotate(n=Count('id')).order_by()
+        for row in counts:
+            self._comment_counts[(row['discussion_id'], row['created_by_id'])] = row['n']
+
+    def _load_conferences(self, conferences):
+        if not conferences:
+            return
+        from conferences.models import ConferenceAttendance, ConferenceRubricEvaluation
+
+        attendances = ConferenceAttendance.objects.filter(
+            conference_id__in=[c.pk for c in conferences],
+            user_id__in=self.student_ids
+        )
+        for attendance in attendances:
+            self._attendances[(attendance.conference_id, attendance.user_id)] = attendance
+
+        if self._attendances:
+            evaluations = ConferenceRubricEvaluation.objects.filter(
+                attendance_id__in=[a.pk for a in self._attendances.values()]
+            ).select_related('criterion')
+            for evaluation in evaluations:
+                self._conference_evaluations.setdefault(evaluation.attendance_id, []).append(evaluation)
+
+    def _load_scorm(self, topics):
+        if not topics:
+            return
+        from courses.models import TopicProgress
+
+        progress_rows = TopicProgress.objects.filter(
+            topic_id__in=[t.pk for t in topics],
+            user_id__in=self.student_ids
+        ).order_by('id')
+        for progress in progress_rows:
+            self._topic_progress.setdefault((progress.topic_id, progress.user_id), progress)
+
+    def rubric(self, obj):
+        rubric_id = getattr(obj, 'rubric_id', None)
+        return self._rubrics.get(rubric_id) if rubric_id is not None else None
+
+    def latest_submission(self, assignment, user_id):
+        return self._submissions.get((assignment.pk, user_id))
+
+    def submission_feedback(self, submission):
+        return self._feedback.get(submission.pk, (False, False, False))
+
+    def latest_completed_attempt(self, quiz, user_id):
+        return self._attempts.get((quiz.pk, user_id))
+
+    def quiz_total_points(self, quiz):
+        return self._quiz_total_points.get(quiz.pk, 0)
+
+    def quiz_rubric_points(self, attempt):
+        return self._quiz_rubric_points.get(attempt.pk, [])
+
+    def discussion_evaluations(self, discussion, student_id):
+        return self._discussion_evaluations.get((discussion.pk, student_id), [])
+
+    def attendance(self, conference, user_id):
+        return self._attendances.get((conference.pk, user_id))
+
+    def conference_evaluations(self, conference, attendance):
+        return self._conference_evaluations.get(attendance.pk, [])
+
+    def topic_progress(self, topic, user_id):
+        return self._topic_progress.get((topic.pk, user_id))
+
+    def comment_count(self, discussion, user_id):
+        return self._comment_counts.get((discussion.pk, user_id), 0)
@@ -0,0 +1,162 @@
+"""
+Set-based sync of graded assignment submissions into gradebook Grade rows.
+
+The AssignmentSubmission post_save handler keeps grades current as they are
+given; this sync is the safety net run by the sync_gradebook command and the
+nightly task. Instead of visiting submissions one by one inside a single
+transaction, it:
+
+1. links assignments that have no AssignmentCourse row to the course of
+   their topic, in one bulk insert,
+2. reads each course's graded submissions together with the current Grade
+   (score, submission, excused) in one annotated query,
+3. writes only the rows that differ with bulk_create(update_conflicts=True)
+   on (student, assignment), in chunks of GRADEBOOK_SYNC_CHUNK_SIZE, one
+   transaction per chunk.
+
+Excused grades are left alone, as Grade.clean() forbids a score on them.
+"""
+
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Subquery
+
+from assignments.models import Assignment, AssignmentCourse, AssignmentSubmission
+from courses.models import CourseTopic
+
+from .models import Grade
+
+logger = logging.getLogger(__name__)
+
+
+def chunk_size():
+    return getattr(settings, 'GRADEBOOK_SYNC_CHUNK_SIZE', 1000)
+
+
+def _graded_submissions(since=None):
+    submissions = AssignmentSubmission.objects.filter(
+        grade__isnull=False, user__isnull=False, assignment__isnull=False
+    )
+    if since is not None:
+        submissions = submissions.filter(graded_at__gte=since)
+    return submissions
+
+
+def link_orphan_assignments(since=None):
+    """
+    Give graded assignments without an AssignmentCourse row the course of
+    their topic. Returns (linked, still_orphaned) assignment counts.
+    """
+    orphans = Assignment.objects.filter(
+        Exists(_graded_submissions(since).filter(assignment=OuterRef('pk'))),
+    ).exclude(
+        Exists(AssignmentCourse.objects.filter(assignment=OuterRef('pk')))
+    ).values_list('pk', flat=True)
+    orphan_ids = set(orphans)
+    if not orphan_ids:
+        return 0, 0
+
+    # First course of the first topic, as the per-submission sync picked it
+    links = {}
+    for assignment_id, course_id in CourseTopic.objects.filter(
+        topic__assignment_id__in=orphan_ids
+    ).order_by('topic_id', 'pk').values_list('topic__assignment_id', 'course_id'):
+        links.setdefault(assignment_id, course_id)
+
+    AssignmentCourse.objects.bulk_create(
+        [
+            AssignmentCourse(assignment_id=assignment_id, course_id=course_id, is_primary=True)
+            for assignment_id, course_id in links.items()
+        ],
+        ignore_conflicts=True,
+    )
+    return len(links), len(orphan_ids) - len(links)
+
+
+def course_grade_rows(course_id, since=None):
+    """
+    Graded submissions of one course's assignments, with the matching Grade
+    row's id, score, submission and excused flag (None when missing).
+    """
+    current = Grade.objects.filter(student=OuterRef('user_id'), assignment=OuterRef('assignment_id'))
+    return _graded_submissions(since).filter(
+        assignment__assignmentcourse__course_id=course_id
+    ).annotate(
+        grade_pk=Subquery(current.values('pk')[:1]),
+        grade_score=Subquery(current.values('score')[:1]),
+        grade_submission_id=Subquery(current.values('submission_id')[:1]),
+        grade_excused=Subquery(current.values('excused')[:1]),
+    ).values_list(
+        'pk', 'user_id', 'assignment_id', 'grade',
+        'grade_pk', 'grade_score', 'grade_submission_id', 'grade_excused',
+    ).order_by('pk')
+
+
+def _apply(rows):
+    with transaction.atomic():
+        Grade.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['student', 'assignment'],
+            update_fields=['score', 'submission', 'updated_at'],
+        )
+
+
+def sync_grades(course_id=None, since=None, size=None):
+    """
+    Bring Grade rows in line with graded submissions, for one course or all,
+    optionally only submissions graded since a datetime.
+
+    Returns:
+        dict of counts: inserted, updated, unchanged, excused, linked, orphaned
+    """
+    size = size or chunk_size()
+    counts = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'excused': 0, 'linked': 0, 'orphaned': 0}
+
+    counts['linked'], counts['orphaned'] = link_orphan_assignments(since)
+
+    if course_id is not None:
+        course_ids = [course_id]
+    else:
+        course_ids = list(
+            AssignmentCourse.objects.filter(
+                Exists(_graded_submissions(since).filter(assignment=OuterRef('assignment_id')))
+            ).values_list('course_id', flat=True).distinct().order_by('course_id')
+        )
+
+    # An assignment shared by several courses has one Grade per student
+    seen = set()
+    pending = []
+    for current_course_id in course_ids:
+        for (submission_id, user_id, assignment_id, score,
+             grade_pk, grade_score, grade_submission_id, grade_excused) in course_grade_rows(current_course_id, since):
+            key = (user_id, assignment_id)
+            if key in seen:
+                continue
+            seen.add(key)
+
+            if grade_excused:
+                counts['excused'] += 1
+                continue
+            if grade_pk is not None and grade_score == score and grade_submission_id == submission_id:
+                counts['unchanged'] += 1
+                continue
+
+            counts['updated' if grade_pk is not None else 'inserted'] += 1
+            pending.append(Grade(
+                student_id=user_id,
+                assignment_id=assignment_id,
+                submission_id=submission_id,
+                score=score,
+            ))
+            if len(pending) >= size:
+                _apply(pending)
+                pending = []
+
+    if pending:
+        _apply(pending)
+
+    logger.info(f"Gradebook sync: {counts}")
+    return counts
@@ -1,19 +1,26 @@
+from datetime import timedelta
+
 from celery import shared_task
 from django.core.management import call_command
+from django.utils import timezone
 import logging
 
 logger = logging.getLogger(__name__)
 
 @shared_task
-def sync_gradebook():
+def sync_gradebook(since_hours=None):
     """
     Celery task to sync assignment grades to the gradebook.
     This ensures that all graded assignments have corresponding
-    Grade records in the gradebook.
+    Grade records in the gradebook. With since_hours, only submissions
+    graded in that many past hours are synced.
     """
     try:
         logger.info("Starting scheduled gradebook sync...")
-        call_command('sync_gradebook')
+        options = {}
+        if since_hours:
+            options['since'] = (timezone.now() - timedelta(hours=since_hours)).isoformat()
+        call_command('sync_gradebook', **options)
         logger.info("Scheduled gradebook sync completed successfully")
         return True
     except Exception as e:
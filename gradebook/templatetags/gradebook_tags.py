@@ -1,5 +1,6 @@
 from django import template
 from core.utils.type_guards import safe_get_float, safe_get_int
+from gradebook.prefetch import get_score_source
 
 register = template.Library()
 
@@ -123,12 +124,18 @@ def get_item(dictionary, key):
         return None
 
 
-@register.simple_tag
-def get_activity_score(activity, student_id, grades, quiz_attempts):
+@register.simple_tag(takes_context=True)
+def get_activity_score(context, activity, student_id, grades, quiz_attempts):
     """
     Get the score data for a specific activity and student
     Usage: {% get_activity_score activity student.id grades quiz_attempts as score_data %}
     """
+    source = get_score_source(context)
+    with source.guard():
+        return _activity_score(source, activity, student_id, grades, quiz_attempts)
+
+
+def _activity_score(source, activity, student_id, grades, quiz_attempts):
     try:
         from decimal import Decimal
         student_id = int(student_id)
@@ -166,11 +173,7 @@ def get_activity_score(activity, student_id, grades, quiz_attempts):
                         }
             
             # If no Grade record found, check for AssignmentSubmission directly
-            from assignments.models import AssignmentSubmission
-            submission = AssignmentSubmission.objects.filter(
-                assignment=activity['object'],
-                user_id=student_id
-            ).order_by('-submitted_at').first()
+            submission = source.latest_submission(activity['object'], student_id)
             
             if submission:
                 # Check if submission is late by comparing with assignment due date
@@ -213,23 +216,18 @@ def get_activity_score(activity, student_id, grades, quiz_attempts):
                 score_source = 'auto'  # Default to auto calculation
                 max_score = activity['max_score']
                 
-                if quiz.rubric:
+                if quiz.rubric_id:
                     try:
-                        # Import here to avoid circular imports
-                        from quiz.models import QuizRubricEvaluation
-                        
                         # Check if there's a rubric evaluation for this attempt
-                        rubric_evaluations = QuizRubricEvaluation.objects.filter(
-                            quiz_attempt=latest_attempt
-                        )
+                        rubric_points = source.quiz_rubric_points(latest_attempt)
                         
-                        if rubric_evaluations.exists():
+                        if rubric_points:
                             # Calculate total rubric score (convert float to Decimal for consistency)
-                            rubric_total = sum(Decimal(str(evaluation.points)) for evaluation in rubric_evaluations)
+                            rubric_total = sum(Decimal(str(points)) for points in rubric_points)
                             final_score = rubric_total
                             score_source = 'rubric'
                             # Use rubric total_points as max_score when rubric evaluation exists
-                            max_score = quiz.rubric.total_points
+                            max_score = source.rubric(quiz).total_points
                     except Exception as e:
                         # If there's any error getting rubric evaluation, fall back to auto score
                         pass
@@ -253,23 +251,18 @@ def get_activity_score(activity, student_id, grades, quiz_attempts):
         elif activity['type'] == 'discussion':
             # Check for discussion rubric evaluations
             discussion = activity['object']
-            max_score = discussion.rubric.total_points if discussion.rubric else 0
+            rubric = source.rubric(discussion)
+            max_score = rubric.total_points if rubric else 0
             
-            if discussion.rubric:
+            if rubric:
                 try:
-                    # Import here to avoid circular imports
-                    from lms_rubrics.models import RubricEvaluation
-                    
                     # Get all rubric evaluations for this discussion and student
-                    evaluations = RubricEvaluation.objects.filter(
-                        discussion=discussion,
-                        student_id=student_id
-                    ).select_related('criterion')
+                    evaluations = source.discussion_evaluations(discussion, student_id)
                     
-                    if evaluations.exists():
+                    if evaluations:
                         # Calculate total score from rubric evaluations
                         total_score = sum(evaluation.points for evaluation in evaluations)
-                        latest_evaluation = evaluations.order_by('-created_at').first()
+                        latest_evaluation = max(evaluations, key=lambda evaluation: evaluation.created_at)
                         
                         return {
                             'score': total_score,
@@ -293,30 +286,22 @@ def get_activity_score(activity, student_id, grades, quiz_attempts):
         elif activity['type'] == 'conference':
             # Check for conference rubric evaluations
             conference = activity['object']
-            max_score = conference.rubric.total_points if conference.rubric else 0
+            rubric = source.rubric(conference)
+            max_score = rubric.total_points if rubric else 0
             
-            if conference.rubric:
+            if rubric:
                 try:
-                    # Import here to avoid circular imports
-                    from conferences.models import ConferenceRubricEvaluation, ConferenceAttendance
-                    
                     # Get the attendance record for this student and conference
-                    attendance = ConferenceAttendance.objects.filter(
-                        conference=conference,
-                        user_id=student_id
-                    ).first()
+                    attendance = source.attendance(conference, student_id)
                     
                     if attendance:
                         # Get all rubric evaluations for this attendance
-                        evaluations = ConferenceRubricEvaluation.objects.filter(
-                            conference=conference,
-                            attendance=attendance
-                        ).select_related('criterion')
+                        evaluations = source.conference_evaluations(conference, attendance)
                         
-                        if evaluations.exists():
+                        if evaluations:
                             # Calculate total score from rubric evaluations
                             total_score = sum(evaluation.points for evaluation in evaluations)
-                            latest_evaluation = evaluations.order_by('-created_at').first()
+                            latest_evaluation = max(evaluations, key=lambda evaluation: evaluation.created_at)
                             
                             return {
                                 'score': total_score,
@@ -340,15 +325,11 @@ def get_activity_score(activity, student_id, grades, quiz_attempts):
         
         elif activity['type'] == 'scorm':
             # Get SCORM score from TopicProgress
-            from courses.models import TopicProgress
             from core.utils.scoring import ScoreCalculationService
             
             topic = activity['object']
             try:
-                progress = TopicProgress.objects.filter(
-                    user_id=student_id,
-                    topic=topic
-                ).first()
+                progress = source.topic_progress(topic, student_id)
                 
                 if progress:
                     progress_data = progress.progress_data or {}
@@ -426,13 +407,19 @@ def get_activity_score(activity, student_id, grades, quiz_attempts):
     except (ValueError, AttributeError, TypeError):
         return {'score': None, 'max_score': 0, 'type': 'unknown'}
 
-@register.simple_tag
-def calculate_student_total(student_id, activities, grades, quiz_attempts):
+@register.simple_tag(takes_context=True)
+def calculate_student_total(context, student_id, activities, grades, quiz_attempts):
     """
     Calculate total score for a student across all activities
     Usage: {% calculate_student_total student.id activities grades quiz_attempts as total_data %}
     Uses only the latest submission/attempt for each activity
     """
+    source = get_score_source(context)
+    with source.guard():
+        return _student_total(source, student_id, activities, grades, quiz_attempts)
+
+
+def _student_total(source, student_id, activities, grades, quiz_attempts):
     try:
         from decimal import Decimal
         student_id = int(student_id)
@@ -476,31 +463,27 @@ def calculate_student_total(student_id, activities, grades, quiz_attempts):
                             final_score = Decimal(str(latest_attempt.score))
                             quiz_max_score = activity_max_score
                             
-                            if quiz.rubric:
+                            if quiz.rubric_id:
                                 try:
-                                    # Import here to avoid circular imports
-                                    from quiz.models import QuizRubricEvaluation
-                                    
                                     # Check if there's a rubric evaluation for this attempt
-                                    rubric_evaluations = QuizRubricEvaluation.objects.filter(
-                                        quiz_attempt=latest_attempt
-                                    )
+                                    rubric_points = source.quiz_rubric_points(latest_attempt)
                                     
-                                    if rubric_evaluations.exists():
+                                    if rubric_points:
                                         # Calculate total rubric score (convert float to Decimal for consistency)
-                                        rubric_total = sum(Decimal(str(evaluation.points)) for evaluation in rubric_evaluations)
+                                        rubric_total = sum(Decimal(str(points)) for points in rubric_points)
                                         final_score = rubric_total
                                         # Use rubric total_points as max_score when rubric evaluation exists
-                                        quiz_max_score = Decimal(str(quiz.rubric.total_points))
+                                        quiz_max_score = Decimal(str(source.rubric(quiz).total_points))
                                 except Exception:
                                     # If there's any error getting rubric evaluation, fall back to auto score
                                     pass
                             else:
                                 # For non-rubric quizzes, latest_attempt.score is a percentage
                                 # Convert percentage to points based on quiz total_points
-                                if quiz.total_points and quiz.total_points > 0:
-                                    final_score = (Decimal(str(latest_attempt.score)) * Decimal(str(quiz.total_points))) / Decimal('100')
-                                    quiz_max_score = Decimal(str(quiz.total_points))
+                                quiz_total_points = source.quiz_total_points(quiz)
+                                if quiz_total_points and quiz_total_points > 0:
+                                    final_score = (Decimal(str(latest_attempt.score)) * Decimal(str(quiz_total_points))) / Decimal('100')
+                                    quiz_max_score = Decimal(str(quiz_total_points))
                                 else:
                                     # Fallback: treat as percentage-based scoring
                                     final_score = Decimal(str(latest_attempt.score))
@@ -516,18 +499,12 @@ def calculate_student_total(student_id, activities, grades, quiz_attempts):
                     # Look for discussion rubric evaluations
                     discussion = activity['object']
                     
-                    if discussion.rubric:
+                    if discussion.rubric_id:
                         try:
-                            # Import here to avoid circular imports
-                            from lms_rubrics.models import RubricEvaluation
-                            
                             # Get all rubric evaluations for this discussion and student
-                            evaluations = RubricEvaluation.objects.filter(
-                                discussion=discussion,
-                                student_id=student_id
-                            )
+                            evaluations = source.discussion_evaluations(discussion, student_id)
                             
-                            if evaluations.exists():
+                            if evaluations:
                                 # Calculate total score from rubric evaluations
                                 total_score = sum(Decimal(str(evaluation.points)) for evaluation in evaluations)
                                 total_earned += total_score
@@ -542,25 +519,16 @@ def calculate_student_total(student_id, activities, grades, quiz_attempts):
                     # Look for conference rubric evaluations
                     conference = activity['object']
                     
-                    if conference.rubric:
+                    if conference.rubric_id:
                         try:
-                            # Import here to avoid circular imports
-                            from conferences.models import ConferenceRubricEvaluation, ConferenceAttendance
-                            
                             # Get the attendance record for this student and conference
-                            attendance = ConferenceAttendance.objects.filter(
-                                conference=conference,
-                                user_id=student_id
-                            ).first()
+                            attendance = source.attendance(conference, student_id)
                             
                             if attendance:
                                 # Get all rubric evaluations for this attendance
-                                evaluations = ConferenceRubricEvaluation.objects.filter(
-                                    conference=conference,
-                                    attendance=attendance
-                                )
+                                evaluations = source.conference_evaluations(conference, attendance)
                                 
-                                if evaluations.exists():
+                                if evaluations:
                                     # Calculate total score from rubric evaluations
                                     total_score = sum(Decimal(str(evaluation.points)) for evaluation in evaluations)
                                     total_earned += total_score
@@ -573,16 +541,12 @@ def calculate_student_total(student_id, activities, grades, quiz_attempts):
                 
                 elif activity['type'] == 'scorm':
                     # Handle SCORM topics
-                    from courses.models import TopicProgress
                     from core.utils.scoring import ScoreCalculationService
                     
                     topic = activity['object']
                     
                     try:
-                        progress = TopicProgress.objects.filter(
-                            user_id=student_id,
-                            topic=topic
-                        ).first()
+                        progress = source.topic_progress(topic, student_id)
                         
                         # Only count SCORM in total if it has a meaningful score (quiz-based)
                         has_meaningful_score = (progress and progress.last_score is not None and 
@@ -693,27 +657,25 @@ def should_hide_course(student_id, course_id, student_courses_with_activities, u
         return False 
 
 
-@register.simple_tag
-def get_activity_status(activity, user_id):
+@register.simple_tag(takes_context=True)
+def get_activity_status(context, activity, user_id):
     """
     Helper function to determine the status of an activity for a given user.
     Returns one of: not_started, in_progress, submitted, completed, graded, returned, missing, participated, attended, absent, registered
     """
+    source = get_score_source(context)
+    with source.guard():
+        return _activity_status(source, activity, user_id)
+
+
+def _activity_status(source, activity, user_id):
     try:
-        from assignments.models import AssignmentSubmission
-        from quiz.models import QuizAttempt
-        from discussions.models import Comment
-        from conferences.models import ConferenceAttendance
-        
         user_id = int(user_id)
         activity_type = activity.get('type')
         activity_obj = activity.get('object')
         
         if activity_type == 'assignment':
-            submission = AssignmentSubmission.objects.filter(
-                assignment=activity_obj,
-                user_id=user_id
-            ).first()
+            submission = source.latest_submission(activity_obj, user_id)
             
             if submission:
                 if submission.status == 'returned':
@@ -731,11 +693,7 @@ def get_activity_status(activity, user_id):
                 return "not_started"
                 
         elif activity_type == 'quiz':
-            attempt = QuizAttempt.objects.filter(
-                quiz=activity_obj,
-                user_id=user_id,
-                is_completed=True
-            ).order_by('-end_time').first()
+            attempt = source.latest_completed_attempt(activity_obj, user_id)
             
             if attempt:
                 return "completed"
@@ -745,20 +703,12 @@ def get_activity_status(activity, user_id):
         elif activity_type == 'conference':
             # Check for conference attendance
             try:
-                from conferences.models import ConferenceRubricEvaluation
-                
-                attendance = ConferenceAttendance.objects.filter(
-                    conference=activity_obj,
-                    user_id=user_id
-                ).first()
+                attendance = source.attendance(activity_obj, user_id)
                 
                 if attendance:
                     # Check if there are rubric evaluations for this attendance
-                    if activity_obj.rubric:
-                        evaluations = ConferenceRubricEvaluation.objects.filter(
-                            conference=activity_obj,
-                            attendance=attendance
-                        ).exists()
+                    if activity_obj.rubric_id:
+                        evaluations = bool(source.conference_evaluations(activity_obj, attendance))
                         
                         if evaluations:
                             return "graded"
@@ -777,45 +727,29 @@ def get_activity_status(activity, user_id):
     except Exception:
         return "not_started"
 
-@register.simple_tag
-def has_feedback_available(activity, student_id):
+@register.simple_tag(takes_context=True)
+def has_feedback_available(context, activity, student_id):
     """
     Check if feedback is available for an activity and student
     Usage: {% has_feedback_available activity student.id as has_feedback %}
     """
+    source = get_score_source(context)
+    with source.guard():
+        return _has_feedback_available(source, activity, student_id)
+
+
+def _has_feedback_available(source, activity, student_id):
     try:
         student_id = int(student_id)
         
         if activity['type'] == 'assignment':
-            from assignments.models import AssignmentSubmission, AssignmentFeedback
-            
-            submission = AssignmentSubmission.objects.filter(
-                assignment=activity['object'],
-                user_id=student_id
-            ).order_by('-submitted_at').first()
+            submission = source.latest_submission(activity['object'], student_id)
             
             if submission:
-                # Check for overall feedback
-                has_overall_feedback = AssignmentFeedback.objects.filter(
-                    submission=submission
-                ).exists()
-                
-                # Check for rubric evaluations
-                has_rubric_feedback = False
-                if activity['object'].rubric:
-                    from lms_rubrics.models import RubricEvaluation
-                    has_rubric_feedback = RubricEvaluation.objects.filter(
-                        assignment_submission=submission
-                    ).exists()
-                
-                # Check for question-specific iteration feedback
-                has_question_feedback = False
-                from assignments.models import TextQuestionAnswerIteration, TextQuestionIterationFeedback
-                question_iterations = TextQuestionAnswerIteration.objects.filter(submission=submission)
-                for iteration in question_iterations:
-                    if TextQuestionIterationFeedback.objects.filter(iteration=iteration).exists():
-                        has_question_feedback = True
-                        break
+                # Overall feedback, rubric evaluations and question-specific iteration feedback
+                has_overall_feedback, has_rubric_feedback, has_question_feedback = source.submission_feedback(submission)
+                if not activity['object'].rubric_id:
+                    has_rubric_feedback = False
                 
                 # Check if graded (has a grade)
                 has_grade = submission.grade is not None
@@ -825,22 +759,16 @@ def has_feedback_available(activity, student_id):
             return False
             
         elif activity['type'] == 'quiz':
-            from quiz.models import QuizAttempt
-            
-            attempt = QuizAttempt.objects.filter(
-                quiz=activity['object'],
-                user_id=student_id,
-                is_completed=True
-            ).order_by('-end_time').first()
+            attempt = source.latest_completed_attempt(activity['object'], student_id)
             
             if attempt:
                 # Check for overall feedback text
-                has_text_feedback = bool(attempt.feedback)
+                has_text_feedback = bool(getattr(attempt, 'feedback', None))
                 
                 # Check for rubric evaluations
                 has_rubric_feedback = False
-                if activity['object'].rubric:
-                    has_rubric_feedback = attempt.rubric_evaluations.exists()
+                if activity['object'].rubric_id:
+                    has_rubric_feedback = bool(source.quiz_rubric_points(attempt))
                 
                 # Check if scored
                 has_score = attempt.score is not None
@@ -853,24 +781,14 @@ def has_feedback_available(activity, student_id):
             # Check for conference rubric evaluations
             conference = activity['object']
             
-            if conference.rubric:
+            if conference.rubric_id:
                 try:
-                    from conferences.models import ConferenceRubricEvaluation, ConferenceAttendance
-                    
                     # Get the attendance record for this student and conference
-                    attendance = ConferenceAttendance.objects.filter(
-                        conference=conference,
-                        user_id=student_id
-                    ).first()
+                    attendance = source.attendance(conference, student_id)
                     
                     if attendance:
                         # Check for rubric evaluations
-                        has_rubric_evaluations = ConferenceRubricEvaluation.objects.filter(
-                            conference=conference,
-                            attendance=attendance
-                        ).exists()
-                        
-                        return has_rubric_evaluations
+                        return bool(source.conference_evaluations(conference, attendance))
                 except Exception:
                     pass
             
@@ -881,38 +799,36 @@ def has_feedback_available(activity, student_id):
     
     return False
 
-@register.simple_tag
-def get_conference_score(conference, student_id):
+@register.simple_tag(takes_context=True)
+def get_conference_score(context, conference, student_id):
     """
     Get conference score for a specific student and conference
     Usage: {% get_conference_score conference student.id as score_data %}
     """
+    source = get_score_source(context)
+    with source.guard():
+        return _conference_score(source, conference, student_id)
+
+
+def _conference_score(source, conference, student_id):
     try:
         student_id = int(student_id)
-        max_score = conference.rubric.total_points if conference.rubric else 0
+        rubric = source.rubric(conference)
+        max_score = rubric.total_points if rubric else 0
         
-        if conference.rubric:
+        if rubric:
             try:
-                # Import here to avoid circular imports
-                from conferences.models import ConferenceRubricEvaluation, ConferenceAttendance
-                
                 # Get the attendance record for this student and conference
-                attendance = ConferenceAttendance.objects.filter(
-                    conference=conference,
-                    user_id=student_id
-                ).first()
+                attendance = source.attendance(conference, student_id)
                 
                 if attendance:
                     # Get all rubric evaluations for this attendance
-                    evaluations = ConferenceRubricEvaluation.objects.filter(
-                        conference=conference,
-                        attendance=attendance
-                    ).select_related('criterion')
+                    evaluations = source.conference_evaluations(conference, attendance)
                     
-                    if evaluations.exists():
+                    if evaluations:
                         # Calculate total score from rubric evaluations
                         total_score = sum(evaluation.points for evaluation in evaluations)
-                        latest_evaluation = evaluations.order_by('-created_at').first()
+                        latest_evaluation = max(evaluations, key=lambda evaluation: evaluation.created_at)
                         
                         return {
                             'score': total_score,
@@ -942,8 +858,8 @@ def get_conference_score(conference, student_id):
             'object': conference
         }
 
-@register.simple_tag
-def has_student_participation(activity, student_id):
+@register.simple_tag(takes_context=True)
+def has_student_participation(context, activity, student_id):
     """
     Check if a student has participated in an activity (discussion or conference).
     
@@ -954,6 +870,12 @@ def has_student_participation(activity, student_id):
     Returns:
         Boolean indicating if student has participated
     """
+    source = get_score_source(context)
+    with source.guard():
+        return _has_student_participation(source, activity, student_id)
+
+
+def _has_student_participation(source, activity, student_id):
     try:
         student_id = int(student_id)
         activity_type = activity.get('type')
@@ -961,27 +883,19 @@ def has_student_participation(activity, student_id):
         
         if activity_type == 'discussion':
             # Check if student has made any comments on the discussion
-            from discussions.models import Comment
-            return Comment.objects.filter(
-                discussion=activity_obj,
-                created_by_id=student_id
-            ).exists()
+            return source.comment_count(activity_obj, student_id) > 0
             
         elif activity_type == 'conference':
             # Check if student has any attendance record for the conference
-            from conferences.models import ConferenceAttendance
-            return ConferenceAttendance.objects.filter(
-                conference=activity_obj,
-                user_id=student_id
-            ).exists()
+            return source.attendance(activity_obj, student_id) is not None
             
         return False  # For other activity types, assume participation check not needed
         
     except (ValueError, AttributeError, TypeError):
         return False
 
-@register.simple_tag
-def get_participation_status(activity, student_id):
+@register.simple_tag(takes_context=True)
+def get_participation_status(context, activity, student_id):
     """
     Get detailed participation status for a student in an activity.
     
@@ -992,6 +906,12 @@ def get_participation_status(activity, student_id):
     Returns:
         String indicating participation status
     """
+    source = get_score_source(context)
+    with source.guard():
+        return _participation_status(source, activity, student_id)
+
+
+def _participation_status(source, activity, student_id):
     try:
         student_id = int(student_id)
         activity_type = activity.get('type')
@@ -999,25 +919,16 @@ def get_participation_status(activity, student_id):
         
         if activity_type == 'discussion':
             # Check comments made by the student
-            from discussions.models import Comment
-            comments = Comment.objects.filter(
-                discussion=activity_obj,
-                created_by_id=student_id
-            )
+            comment_count = source.comment_count(activity_obj, student_id)
             
-            if comments.exists():
-                comment_count = comments.count()
+            if comment_count:
                 return f"{comment_count} comment{'s' if comment_count != 1 else ''}"
             else:
                 return "No interaction"
                 
         elif activity_type == 'conference':
             # Check attendance for the conference
-            from conferences.models import ConferenceAttendance
-            attendance = ConferenceAttendance.objects.filter(
-                conference=activity_obj,
-                user_id=student_id
-            ).first()
+            attendance = source.attendance(activity_obj, student_id)
             
             if attendance:
                 if attendance.attendance_status == 'present':
@@ -22,6 +22,7 @@ from lms_rubrics.forms import RubricOverallFeedbackForm
 from core.rbac_validators import ConditionalAccessValidator
 from core.utils.type_guards import safe_get_string, safe_get_int
 from .validators import validate_gradebook_request_data, GradebookValidationError
+from .prefetch import GradebookPrefetch
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.core.cache import cache
 import json
@@ -3351,6 +3352,8 @@ def course_gradebook_detail(request, course_id):
         'current_page': page,
         # Pre-calculated score data
         'student_scores': enhanced_student_scores,
+        # Bulk-loaded data for the per-cell gradebook tags
+        'gradebook_prefetch': GradebookPrefetch(students, display_activities),
         # Outcome mastery data
         'outcome_evaluations': outcome_evaluations,
         'outcome_summary': outcome_summary,
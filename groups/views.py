@@ -7,6 +7,7 @@ from django.db import transaction
 from .models import BranchGroup, GroupMembership, GroupMemberRole, CourseGroupAccess, CourseGroup
 from .forms import BranchGroupForm, GroupMembershipForm, CourseGroupAccessForm
 from courses.models import Course, CourseEnrollment
+from courses.visibility import invalidate_course_index
 from users.models import CustomUser
 from django.core.exceptions import ValidationError
 from django.utils import timezone
@@ -1162,6 +1163,8 @@ def role_edit(request, role_id):
                 
                 # Clear existing memberships for this role
                 existing_memberships = GroupMembership.objects.filter(custom_role=role)
+                # update() sends no signals; the role may have granted instructor scope
+                invalidate_course_index(existing_memberships.values_list('user_id', flat=True))
                 existing_memberships.update(custom_role=None)
                 
                 # Process user group
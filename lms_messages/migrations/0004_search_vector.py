@@ -0,0 +1,56 @@
+# Generated by Django 4.2.24 on 2026-10-18 22:04
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+MESSAGE_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION lms_messages_message_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('pg_catalog.english', coalesce(NEW.subject, '')), 'A') ||
+        setweight(to_tsvector('pg_catalog.english', regexp_replace(coalesce(NEW.content, ''), '<[^>]*>', ' ', 'g')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS lms_messages_message_search_vector_trigger ON lms_messages_message;
+CREATE TRIGGER lms_messages_message_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF subject, content, search_vector
+    ON lms_messages_message FOR EACH ROW EXECUTE PROCEDURE lms_messages_message_search_vector_update();
+
+-- Backfill existing rows through the trigger
+UPDATE lms_messages_message SET search_vector = NULL;
+"""
+
+DROP_MESSAGE_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS lms_messages_message_search_vector_trigger ON lms_messages_message;
+DROP FUNCTION IF EXISTS lms_messages_message_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_messages', '0003_remove_is_read_field'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='message',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='message_search_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass('subject', name='gin_trgm_ops'), name='message_subject_trgm'),
+        ),
+        migrations.RunSQL(MESSAGE_TRIGGER_SQL, DROP_MESSAGE_TRIGGER_SQL),
+    ]
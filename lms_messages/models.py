@@ -1,4 +1,6 @@
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.conf import settings
 from django.utils import timezone
 from core.utils.fields import TinyMCEField
@@ -71,10 +73,14 @@ class Message(models.Model):
         related_name='course_messages',
         help_text="The course this message is related to (if applicable)"
     )
+    # Maintained by a database trigger from subject and content (see core.search)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         ordering = ['-created_at']
         indexes = [
+            GinIndex(fields=['search_vector'], name='message_search_gin'),
+            GinIndex(OpClass('subject', name='gin_trgm_ops'), name='message_subject_trgm'),
             models.Index(fields=['sender', '-created_at']),
             models.Index(fields=['external_id']),
             models.Index(fields=['branch']),
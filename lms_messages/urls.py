@@ -13,4 +13,5 @@ urlpatterns = [
     path('<int:message_id>/mark-read/', views.mark_as_read, name='mark_as_read'),
     path('mark-all-read/', views.mark_all_as_read, name='mark_all_as_read'),
     path('api/count/', views.message_count_api, name='message_count_api'),
+    path('api/inbox/', views.inbox_page_api, name='inbox_page_api'),
 ] 
\ No newline at end of file
@@ -0,0 +1,199 @@
+"""
+Inbox listing helpers for lms_messages.
+
+The inbox is paginated with a keyset cursor over (created_at, id) so that
+page N costs the same as page 1, and read state is derived through a LEFT
+JOIN on MessageReadStatus. A missing read-status row means "unread", so
+listing the inbox never writes to the database.
+"""
+
+import base64
+import logging
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.db.models import (
+    BooleanField, Count, F, FilteredRelation, IntegerField, OuterRef, Prefetch,
+    Q, Subquery, Value,
+)
+from django.db.models.functions import Coalesce
+from django.utils.dateparse import parse_datetime
+
+from .models import Message
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+INBOX_PAGE_SIZE = 25
+INBOX_MAX_PAGE_SIZE = 100
+INBOX_RECIPIENT_PREVIEW = 3
+
+
+def encode_inbox_cursor(message):
+    """Encode the keyset position of a message as an opaque URL-safe cursor"""
+    raw = f"{message.created_at.isoformat()}|{message.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_inbox_cursor(cursor):
+    """
+    Decode a cursor produced by encode_inbox_cursor.
+
+    Returns:
+        (created_at, id) tuple, or None if the cursor is missing or invalid
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at_raw, pk_raw = base64.urlsafe_b64decode(padded.encode()).decode().split('|', 1)
+        created_at = parse_datetime(created_at_raw)
+        if created_at is None:
+            return None
+        return created_at, int(pk_raw)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        logger.debug(f"Ignoring invalid inbox cursor: {cursor!r}")
+        return None
+
+
+def _parse_date(value):
+    """Parse a YYYY-MM-DD string, returning None for empty or invalid input"""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+
+def get_inbox_queryset(user, box='all', from_date=None, to_date=None):
+    """
+    Build the inbox queryset for a user without any per-row queries.
+
+    Args:
+        user: The user whose messages are listed
+        box: 'all', 'inbox' (received) or 'sent'
+        from_date: Optional YYYY-MM-DD lower bound on created_at
+        to_date: Optional YYYY-MM-DD upper bound on created_at
+
+    Returns:
+        QuerySet of Message ordered by (-created_at, -id) and annotated with
+        is_read_by_user, reply_count and recipient_count
+    """
+    # Received messages are resolved through the M2M table as a subquery so the
+    # sender/recipient union does not need DISTINCT.
+    received_ids = Message.recipients.through.objects.filter(
+        customuser_id=user.pk
+    ).values('message_id')
+
+    if box == 'sent':
+        visibility = Q(sender=user)
+    elif box == 'inbox':
+        visibility = Q(pk__in=received_ids) & ~Q(sender=user)
+    else:
+        visibility = Q(sender=user) | Q(pk__in=received_ids)
+
+    queryset = Message.objects.filter(visibility)
+
+    parsed_from_date = _parse_date(from_date)
+    if parsed_from_date:
+        queryset = queryset.filter(created_at__date__gte=parsed_from_date)
+    parsed_to_date = _parse_date(to_date)
+    if parsed_to_date:
+        queryset = queryset.filter(created_at__date__lte=parsed_to_date)
+
+    reply_count = Message.objects.filter(
+        parent_message=OuterRef('pk')
+    ).order_by().values('parent_message').annotate(c=Count('pk')).values('c')
+
+    recipient_count = Message.recipients.through.objects.filter(
+        message_id=OuterRef('pk')
+    ).order_by().values('message_id').annotate(c=Count('pk')).values('c')
+
+    return queryset.annotate(
+        # LEFT OUTER JOIN restricted to this user's read-status row
+        user_read_status=FilteredRelation(
+            'read_statuses',
+            condition=Q(read_statuses__user=user),
+        ),
+    ).annotate(
+        is_read_by_user=Coalesce(
+            F('user_read_status__is_read'), Value(False), output_field=BooleanField()
+        ),
+        reply_count=Coalesce(Subquery(reply_count, output_field=IntegerField()), Value(0)),
+        recipient_count=Coalesce(Subquery(recipient_count, output_field=IntegerField()), Value(0)),
+    ).select_related(
+        'sender', 'sent_to_group', 'related_course'
+    ).order_by('-created_at', '-id')
+
+
+def get_inbox_page(user, cursor=None, page_size=INBOX_PAGE_SIZE, box='all',
+                   from_date=None, to_date=None):
+    """
+    Fetch one keyset-paginated page of the user's messages.
+
+    Only the messages on the page are loaded. The latest reply of each thread
+    (``message.latest_reply``) and the named recipients of small sent messages
+    (``message.preview_recipients``) are loaded with one query each.
+
+    Returns:
+        dict with 'messages' (list), 'next_cursor' (str or None) and 'has_more'
+    """
+    try:
+        page_size = max(1, min(int(page_size), INBOX_MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        page_size = INBOX_PAGE_SIZE
+
+    queryset = get_inbox_queryset(user, box=box, from_date=from_date, to_date=to_date)
+
+    position = decode_inbox_cursor(cursor)
+    if position:
+        created_at, pk = position
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+        )
+
+    # Fetch one extra row to know whether another page exists
+    page = list(
+        queryset.prefetch_related(
+            Prefetch(
+                'replies',
+                queryset=Message.objects.select_related('sender').only(
+                    'id', 'parent_message_id', 'content', 'created_at',
+                    'sender__id', 'sender__username', 'sender__first_name', 'sender__last_name',
+                ).order_by('-created_at', '-id')[:1],
+                to_attr='thread_replies',
+            ),
+        )[:page_size + 1]
+    )
+
+    has_more = len(page) > page_size
+    page = page[:page_size]
+
+    # Sent messages list their recipients by name when there are only a few;
+    # load those names in one query instead of one per card.
+    named_ids = [
+        m.pk for m in page
+        if m.sender_id == user.pk and 0 < m.recipient_count <= INBOX_RECIPIENT_PREVIEW
+    ]
+    recipients_by_message = {}
+    if named_ids:
+        rows = Message.recipients.through.objects.filter(
+            message_id__in=named_ids
+        ).select_related('customuser').only(
+            'message_id', 'customuser__id', 'customuser__username',
+            'customuser__first_name', 'customuser__last_name',
+        )
+        for row in rows:
+            recipients_by_message.setdefault(row.message_id, []).append(row.customuser)
+
+    for message in page:
+        message.latest_reply = message.thread_replies[0] if message.thread_replies else None
+        message.preview_recipients = recipients_by_message.get(message.pk, [])
+
+    return {
+        'messages': page,
+        'next_cursor': encode_inbox_cursor(page[-1]) if has_more and page else None,
+        'has_more': has_more,
+    }
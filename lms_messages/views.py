@@ -7,14 +7,16 @@ import requests
 import json
 import os
 from .models import Message, MessageAttachment, MessageReadStatus
+from .utils import get_inbox_page, INBOX_PAGE_SIZE
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST
 from users.models import CustomUser, Branch
 from django.utils.decorators import method_decorator
 from django.urls import reverse
+from django.template.loader import render_to_string
 from django.utils import timezone
-from django.db.models import Q, Count, Exists, OuterRef, Prefetch
+from django.db.models import Q
 from django.forms import Form
 from django.contrib import messages
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
@@ -187,67 +189,94 @@ def messages_view(request):
     from_date = request.GET.get('from_date')
     to_date = request.GET.get('to_date')
     
-    # Get messages where user is sender or recipient
-    user_messages = Message.objects.filter(
-        Q(sender=request.user) | Q(recipients=request.user)
-    ).distinct()
-    
-    # Apply date filtering if parameters are provided
-    if from_date:
-        try:
-            # Parse date and apply filter
-            from datetime import datetime
-            parsed_from_date = datetime.strptime(from_date, '%Y-%m-%d').date()
-            user_messages = user_messages.filter(created_at__date__gte=parsed_from_date)
-        except ValueError:
-            # Invalid date format, ignore filter
-            pass
-    
-    if to_date:
-        try:
-            # Parse date and apply filter
-            from datetime import datetime
-            parsed_to_date = datetime.strptime(to_date, '%Y-%m-%d').date()
-            user_messages = user_messages.filter(created_at__date__lte=parsed_to_date)
-        except ValueError:
-            # Invalid date format, ignore filter
-            pass
-    
-    # Apply ordering after filtering
-    user_messages = user_messages.order_by('-created_at')
-    
-    # Add read status for the user
-    user_messages = user_messages.annotate(
-        is_read_by_user=Exists(
-            MessageReadStatus.objects.filter(
-                message=OuterRef('pk'),
-                user=request.user,
-                is_read=True
-            )
-        )
+    # Only the first keyset page is rendered; further pages are loaded by
+    # inbox_page_api. Read state comes from a LEFT JOIN, so no read-status
+    # rows are created just by listing messages.
+    page = get_inbox_page(
+        request.user,
+        from_date=from_date,
+        to_date=to_date,
     )
     
-    # Create read status for messages that don't have it yet
-    for message in user_messages:
-        # Only create read status for received messages
-        if message.sender != request.user:
-            MessageReadStatus.objects.get_or_create(
-                message=message,
-                user=request.user,
-                defaults={'is_read': False}
-            )
-    
     breadcrumbs = [
         {'url': reverse('users:role_based_redirect'), 'label': 'Dashboard', 'icon': 'fa-home'},
         {'label': 'Messages', 'icon': 'fa-envelope'}
     ]
     return render(request, 'lms_messages/messages.html', {
         'breadcrumbs': breadcrumbs,
-        'messages_list': user_messages,
+        'messages_list': page['messages'],
+        'next_cursor': page['next_cursor'],
+        'has_more': page['has_more'],
         'from_date': from_date,
         'to_date': to_date
     })
 
+@login_required
+@require_http_methods(["GET"])
+def inbox_page_api(request):
+    """
+    Keyset-paginated inbox API used for infinite scroll.
+    
+    Query parameters:
+        cursor: Opaque cursor returned as next_cursor by the previous page
+        page_size: Number of messages per page (capped)
+        box: 'all' (default), 'inbox' or 'sent'
+        from_date / to_date: Optional YYYY-MM-DD date bounds
+        format: 'html' to include the rendered message cards
+    """
+    box = request.GET.get('box', 'all')
+    if box not in ('all', 'inbox', 'sent'):
+        box = 'all'
+    
+    page = get_inbox_page(
+        request.user,
+        cursor=request.GET.get('cursor'),
+        page_size=request.GET.get('page_size', INBOX_PAGE_SIZE),
+        box=box,
+        from_date=request.GET.get('from_date'),
+        to_date=request.GET.get('to_date'),
+    )
+    
+    data = {
+        'next_cursor': page['next_cursor'],
+        'has_more': page['has_more'],
+    }
+    
+    if request.GET.get('format') == 'html' or request.headers.get('HX-Request'):
+        data['html'] = ''.join(
+            render_to_string(
+                'lms_messages/_message_card.html',
+                {'message': message, 'user': request.user},
+                request=request,
+            )
+            for message in page['messages']
+        )
+    else:
+        data['messages'] = [
+            {
+                'id': message.id,
+                'subject': message.subject,
+                'created_at': message.created_at.isoformat(),
+                'sender': {
+                    'id': message.sender_id,
+                    'name': message.sender.get_full_name() or message.sender.username,
+                },
+                'is_sent': message.sender_id == request.user.id,
+                'is_read': message.is_read_by_user or message.sender_id == request.user.id,
+                'is_group': message.sent_to_group_id is not None,
+                'is_course': message.is_course_message,
+                'recipient_count': message.recipient_count,
+                'reply_count': message.reply_count,
+                'latest_reply_at': (
+                    message.latest_reply.created_at.isoformat() if message.latest_reply else None
+                ),
+                'url': reverse('lms_messages:message_detail', args=[message.id]),
+            }
+            for message in page['messages']
+        ]
+    
+    return JsonResponse(data)
+
 @login_required
 def message_detail(request, message_id):
     """View for displaying a single message."""
@@ -7,7 +7,7 @@ from django.utils import timezone
 from .models import (
     NotificationType, NotificationSettings, NotificationTypeSettings,
     BranchNotificationSettings, Notification, BulkNotification, 
-    NotificationTemplate, NotificationLog
+    NotificationTemplate, NotificationLog, NotificationJobRun
 )
 
 
@@ -277,4 +277,16 @@ class NotificationLogAdmin(admin.ModelAdmin):
         return False  # Don't allow editing of logs
 
 
+@admin.register(NotificationJobRun)
+class NotificationJobRunAdmin(admin.ModelAdmin):
+    list_display = ['job_name', 'status', 'started_at', 'duration_ms', 'candidate_count', 'created_count', 'skipped_count', 'email_sent_count', 'email_failed_count']
+    list_filter = ['job_name', 'status', 'started_at']
+    readonly_fields = [field.name for field in NotificationJobRun._meta.fields]
+    date_hierarchy = 'started_at'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
 
@@ -8,3 +8,4 @@ class LmsNotificationsConfig(AppConfig):
 
     def ready(self):
         import lms_notifications.signals
+        import lms_notifications.deadline_signals
@@ -19,6 +19,8 @@ class OutlookOAuth2Backend(BaseEmailBackend):
         self.access_token = None
         self.token_expires = None
         self.connection = None
+        # Shared HTTP session so batched sends reuse TCP/TLS connections to Graph
+        self.session = None
         
     def open(self):
         """
@@ -26,6 +28,8 @@ class OutlookOAuth2Backend(BaseEmailBackend):
         Required by Django's email backend interface.
         """
         try:
+            if self.session is None:
+                self.session = requests.Session()
             # Test token acquisition to verify connection
             access_token = self.get_access_token()
             self.connection = access_token is not None
@@ -40,6 +44,9 @@ class OutlookOAuth2Backend(BaseEmailBackend):
         """
         Close the connection to the email service.
         """
+        if self.session is not None:
+            self.session.close()
+            self.session = None
         self.connection = None
         self.access_token = None
         self.token_expires = None
@@ -67,7 +74,7 @@ class OutlookOAuth2Backend(BaseEmailBackend):
                 'scope': 'https://graph.microsoft.com/.default'
             }
             
-            response = requests.post(token_url, data=data)
+            response = (self.session or requests).post(token_url, data=data)
             response.raise_for_status()
             
             token_data = response.json()
@@ -135,8 +142,13 @@ class OutlookOAuth2Backend(BaseEmailBackend):
                     
         return sent_count
     
-    def send_single_message(self, message, access_token):
-        """Send a single email message via Microsoft Graph API"""
+    def send_single_message(self, message, access_token, session=None):
+        """
+        Send a single email message via Microsoft Graph API.
+
+        Concurrent callers pass their own requests session; a Session is not
+        safe to share between threads.
+        """
         try:
             # Determine content type and body
             # Check for HTML alternatives first (EmailMultiAlternatives)
@@ -215,7 +227,7 @@ class OutlookOAuth2Backend(BaseEmailBackend):
             
             for endpoint in endpoints_to_try:
                 try:
-                    response = requests.post(endpoint, headers=headers, json=email_data)
+                    response = (session or self.session or requests).post(endpoint, headers=headers, json=email_data)
                     
                     if response.status_code == 202:  # Accepted
                         logger.info(f"Email sent successfully to {', '.join(message.to)} via {endpoint}")
@@ -0,0 +1,42 @@
+"""
+Keep the deadline index (DeadlineEntry) in step with its entities.
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from assignments.models import Assignment, AssignmentCourse
+from certificates.models import IssuedCertificate
+from courses.models import Course, CourseTopic, Topic
+from quiz.models import Quiz
+
+from .deadlines import schedule_sync
+
+ENTITY_SENDERS = {
+    Assignment: 'assignment',
+    Quiz: 'quiz',
+    Topic: 'topic',
+    Course: 'course',
+    IssuedCertificate: 'certificate',
+}
+
+
+def sync_deadline_entity(sender, instance, **kwargs):
+    """Re-sync the deadlines of a saved or deleted entity"""
+    schedule_sync(ENTITY_SENDERS[sender], instance.pk)
+
+
+for _sender in ENTITY_SENDERS:
+    post_save.connect(sync_deadline_entity, sender=_sender, dispatch_uid=f'deadline_index_save_{_sender.__name__}')
+    post_delete.connect(sync_deadline_entity, sender=_sender, dispatch_uid=f'deadline_index_delete_{_sender.__name__}')
+
+
+@receiver([post_save, post_delete], sender=AssignmentCourse)
+def sync_assignment_courses(sender, instance, **kwargs):
+    """Assignment deadlines exist per linked course"""
+    schedule_sync('assignment', instance.assignment_id)
+
+
+@receiver([post_save, post_delete], sender=CourseTopic)
+def sync_topic_courses(sender, instance, **kwargs):
+    """Topic deadlines exist per course the topic belongs to"""
+    schedule_sync('topic', instance.topic_id)
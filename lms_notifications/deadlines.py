@@ -0,0 +1,546 @@
+"""
+Deadline index and scanner.
+
+DeadlineEntry holds one row per dated entity and audience: an assignment due
+date per course it belongs to, a quiz expiry for its course, a topic end date
+per course it belongs to, a course end date, and a certificate expiry for its
+recipient. deadline_signals re-syncs an entity's rows on commit whenever it
+changes, and rebuild_deadline_index rebuilds the whole table.
+
+scan() emits three kinds of events to the notification models:
+
+- due_soon: the deadline is one of the entity type's DEADLINE_REMINDER_LEADS
+  away (certificates also use each recipient's reminder intervals),
+- overdue: an assignment, quiz or topic deadline passed and the learner has
+  not completed it,
+- expired: a course's access or a certificate ran out.
+
+Each entity type keeps a high-water mark in DeadlineScanState. A scan covers
+the window from the mark to now with one range query per event and lead over
+the (entity_type, due_at) partial index of open rows, resolves the audience
+and drops completed learners in a few set-based queries, and sends through
+send_keyed_notifications, whose idempotency keys make an interrupted window
+safe to scan again. Afterwards the rows behind the window are closed and the
+mark moves to now, so processed windows are never scanned again.
+
+A deadline created or moved since the mark when it was already closer than a
+lead (a quiz added hours before it closes, a certificate issued weeks before
+it expires) gets that reminder late, on the next scan; when it is also inside
+a shorter lead, only the shortest one applies.
+"""
+
+import logging
+from contextlib import nullcontext
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .fanout import send_keyed_notifications
+from .jobs import _display_names, _get_notification_type, record_job_run
+from .models import DeadlineEntry, DeadlineScanState, NotificationJobRun
+
+logger = logging.getLogger(__name__)
+
+DUE_SOON = 'due_soon'
+OVERDUE = 'overdue'
+EXPIRED = 'expired'
+
+SOURCE_MODELS = {
+    'assignment': 'assignments.Assignment',
+    'quiz': 'quiz.Quiz',
+    'topic': 'courses.Topic',
+    'course': 'courses.Course',
+    'certificate': 'certificates.IssuedCertificate',
+}
+
+ENTITY_EVENTS = {
+    'assignment': (DUE_SOON, OVERDUE),
+    'quiz': (DUE_SOON, OVERDUE),
+    'topic': (DUE_SOON, OVERDUE),
+    'course': (DUE_SOON, EXPIRED),
+    'certificate': (DUE_SOON, EXPIRED),
+}
+
+# Days before the deadline to remind; assignments match run_deadline_reminders' 24-48 hours
+DEFAULT_REMINDER_LEADS = {
+    'assignment': [2],
+    'quiz': [1],
+    'topic': [2],
+    'course': [7],
+    'certificate': [30, 7, 1],
+}
+
+# Seconds before its first scan that a new entity type's window starts
+DEFAULT_INITIAL_LOOKBACK = 24 * 60 * 60
+DEFAULT_SCAN_LOCK_TIMEOUT = 30 * 60
+
+# (entity type, event) -> notification type, headline, title, short message, body, action text, priority
+MESSAGES = {
+    ('assignment', DUE_SOON): (
+        'deadline_reminder', 'Assignment Deadline Reminder', 'Deadline Reminder: {title}',
+        "Reminder: '{title}' is due in {remaining}",
+        'This is a reminder that the following assignment is due soon. Please make sure to '
+        'complete and submit it before the deadline.',
+        'View Assignment', 'high',
+    ),
+    ('quiz', DUE_SOON): (
+        'quiz_reminder', 'Quiz Closing Soon', 'Quiz Reminder: {title}',
+        "Reminder: '{title}' closes in {remaining}",
+        'This is a reminder that the following quiz closes soon and you have not completed it yet.',
+        'Take Quiz', 'high',
+    ),
+    ('topic', DUE_SOON): (
+        'deadline_reminder', 'Topic Deadline Reminder', 'Deadline Reminder: {title}',
+        "Reminder: '{title}' closes in {remaining}",
+        'This is a reminder that the following topic closes soon and you have not completed it yet.',
+        'View Topic', 'normal',
+    ),
+    ('course', DUE_SOON): (
+        'deadline_reminder', 'Course Access Ending', 'Course Ending Soon: {title}',
+        "Your access to '{title}' ends in {remaining}",
+        'This is a reminder that your access to the following course ends soon. Please complete '
+        'any remaining work before then.',
+        'View Course', 'normal',
+    ),
+    ('certificate', DUE_SOON): (
+        'certificate_expiry_reminder', 'Certificate Expiry Reminder', 'Your {title} Certificate is Expiring Soon',
+        "Your {title} certificate expires in {remaining}",
+        'This is a friendly reminder that your certificate is expiring soon. Please take action to '
+        'renew it before it expires to maintain your credentials.',
+        'View Certificate', 'high',
+    ),
+    ('assignment', OVERDUE): (
+        'deadline_overdue', 'Assignment Overdue', 'Overdue: {title}',
+        "'{title}' was due {due} and has not been submitted",
+        'The deadline of the following assignment has passed and we have not received your submission.',
+        'View Assignment', 'high',
+    ),
+    ('quiz', OVERDUE): (
+        'deadline_overdue', 'Quiz Closed', 'Missed: {title}',
+        "'{title}' closed {due} without a completed attempt",
+        'The following quiz has closed and you did not complete it.',
+        'View Quiz', 'normal',
+    ),
+    ('topic', OVERDUE): (
+        'deadline_overdue', 'Topic Overdue', 'Overdue: {title}',
+        "'{title}' closed {due} and is not complete",
+        'The following topic has closed and you have not completed it.',
+        'View Topic', 'normal',
+    ),
+    ('course', EXPIRED): (
+        'deadline_expired', 'Course Access Ended', 'Course Ended: {title}',
+        "Your access to '{title}' ended {due}",
+        'Your access to the following course has ended.',
+        'View Course', 'normal',
+    ),
+    ('certificate', EXPIRED): (
+        'deadline_expired', 'Certificate Expired', 'Your {title} Certificate has Expired',
+        "Your {title} certificate expired {due}",
+        'Your certificate has expired. Please contact your administrator about renewing it.',
+        'View Certificate', 'high',
+    ),
+}
+
+
+def _setting(name, default):
+    return getattr(settings, f'DEADLINE_{name}', default)
+
+
+def _end_of_day(day):
+    # Topics stay open through their end date
+    return timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+
+
+def _assignment_entries(assignment):
+    from assignments.models import AssignmentCourse
+
+    if not assignment.is_active or not assignment.due_date:
+        return []
+    return [
+        dict(course_id=course_id, due_at=assignment.due_date, title=assignment.title,
+             url=f'/assignments/{assignment.id}/')
+        for course_id in AssignmentCourse.objects.filter(assignment=assignment).values_list('course_id', flat=True)
+    ]
+
+
+def _quiz_entries(quiz):
+    if not quiz.is_active or not quiz.expires_at or not quiz.course_id:
+        return []
+    return [dict(course_id=quiz.course_id, due_at=quiz.expires_at, title=quiz.title, url=f'/quiz/{quiz.id}/')]
+
+
+def _topic_entries(topic):
+    if topic.status != 'active' or not topic.end_date:
+        return []
+    return [
+        dict(course_id=course_id, due_at=_end_of_day(topic.end_date), title=topic.title,
+             url=f'/courses/topic/{topic.id}/')
+        for course_id in topic.courses.values_list('id', flat=True)
+    ]
+
+
+def _course_entries(course):
+    if not course.end_date:
+        return []
+    return [dict(course_id=course.id, due_at=course.end_date, title=course.title, url=f'/courses/{course.id}/')]
+
+
+def _certificate_entries(certificate):
+    if certificate.is_revoked or not certificate.expiry_date:
+        return []
+    return [dict(user_id=certificate.recipient_id, due_at=certificate.expiry_date,
+                 title=certificate.course_name or certificate.template.name,
+                 url=f'/certificates/view/{certificate.id}/')]
+
+
+BUILDERS = {
+    'assignment': _assignment_entries,
+    'quiz': _quiz_entries,
+    'topic': _topic_entries,
+    'course': _course_entries,
+    'certificate': _certificate_entries,
+}
+
+
+def _synced_times(entries):
+    """synced_at of existing rows, so unchanged deadlines keep it across a re-sync"""
+    return {
+        (entity_id, course_id, user_id, due_at): synced_at
+        for entity_id, course_id, user_id, due_at, synced_at in entries.values_list(
+            'entity_id', 'course_id', 'user_id', 'due_at', 'synced_at'
+        )
+    }
+
+
+def _build(entity_type, obj, scanned_until, synced):
+    now = timezone.now()
+    entries = []
+    for fields in BUILDERS[entity_type](obj):
+        key = (obj.pk, fields.get('course_id'), fields.get('user_id'), fields['due_at'])
+        entries.append(DeadlineEntry(
+            entity_type=entity_type,
+            entity_id=obj.pk,
+            # Deadlines already behind the high-water mark would never be scanned again
+            closed=scanned_until is not None and fields['due_at'] <= scanned_until,
+            synced_at=synced.get(key, now),
+            **fields
+        ))
+    return entries
+
+
+def _scanned_until(entity_type):
+    return DeadlineScanState.objects.filter(entity_type=entity_type).values_list('scanned_until', flat=True).first()
+
+
+def sync_entity(entity_type, entity_id):
+    """Replace the deadlines of one entity (none when it no longer exists)"""
+    from django.apps import apps
+
+    model = apps.get_model(SOURCE_MODELS[entity_type])
+    obj = model.objects.filter(pk=entity_id).first()
+    existing = DeadlineEntry.objects.filter(entity_type=entity_type, entity_id=entity_id)
+    entries = _build(entity_type, obj, _scanned_until(entity_type), _synced_times(existing)) if obj is not None else []
+    with transaction.atomic():
+        existing.delete()
+        DeadlineEntry.objects.bulk_create(entries)
+
+
+def schedule_sync(entity_type, entity_id):
+    """Re-sync an entity's deadlines once the current transaction commits"""
+    def _sync():
+        try:
+            sync_entity(entity_type, entity_id)
+        except Exception as e:
+            logger.error(f"Deadline index sync failed for {entity_type} {entity_id}: {e}")
+
+    transaction.on_commit(_sync)
+
+
+def rebuild(entity_types=None, batch_size=500):
+    """Rebuild the deadlines of the given entity types (all by default)"""
+    from django.apps import apps
+
+    counts = {}
+    for entity_type in entity_types or SOURCE_MODELS:
+        model = apps.get_model(SOURCE_MODELS[entity_type])
+        queryset = model.objects.all()
+        if entity_type == 'certificate':
+            queryset = queryset.filter(expiry_date__isnull=False).select_related('template')
+        scanned_until = _scanned_until(entity_type)
+
+        with transaction.atomic():
+            existing = DeadlineEntry.objects.filter(entity_type=entity_type)
+            synced = _synced_times(existing)
+            existing.delete()
+            pending = []
+            created = 0
+            for obj in queryset.iterator(chunk_size=batch_size):
+                pending.extend(_build(entity_type, obj, scanned_until, synced))
+                if len(pending) >= batch_size:
+                    DeadlineEntry.objects.bulk_create(pending)
+                    created += len(pending)
+                    pending = []
+            DeadlineEntry.objects.bulk_create(pending)
+            counts[entity_type] = created + len(pending)
+    return counts
+
+
+def _reminder_leads(entity_type):
+    leads = _setting('REMINDER_LEADS', DEFAULT_REMINDER_LEADS).get(entity_type, [])
+    if entity_type == 'certificate':
+        from .models import NotificationSettings
+
+        # Recipients may choose their own intervals; scan every distinct one
+        leads = set(leads)
+        for intervals, days in NotificationSettings.objects.values_list(
+            'certificate_expiry_reminder_intervals', 'certificate_expiry_reminder_days'
+        ).distinct():
+            leads.update(_intervals(intervals, days))
+    return sorted({int(days) for days in leads if int(days) > 0}, reverse=True)
+
+
+def _intervals(intervals, days):
+    """A user's certificate reminder days, as check_certificate_expiry read them"""
+    if isinstance(intervals, list) and intervals:
+        return [value for value in intervals if isinstance(value, int)]
+    return [days] if days and days > 0 else []
+
+
+def _candidates(entity_type, event, entries, lead, now):
+    """(entry, user ID) pairs still owed the event, in a few set-based queries"""
+    from django.contrib.auth import get_user_model
+
+    ids = {entry.entity_id for entry in entries}
+
+    if entity_type == 'certificate':
+        active = set(
+            get_user_model().objects.filter(pk__in={entry.user_id for entry in entries}, is_active=True)
+            .values_list('pk', flat=True)
+        )
+        pairs = [(entry, entry.user_id) for entry in entries if entry.user_id in active]
+        if event == DUE_SOON:
+            from .models import NotificationSettings
+
+            defaults = _setting('REMINDER_LEADS', DEFAULT_REMINDER_LEADS).get('certificate', [])
+            chosen = {
+                user_id: _intervals(intervals, days)
+                for user_id, intervals, days in NotificationSettings.objects.filter(user_id__in=active)
+                .values_list('user_id', 'certificate_expiry_reminder_intervals', 'certificate_expiry_reminder_days')
+            }
+            pairs = [
+                (entry, user_id) for entry, user_id in pairs
+                if lead in chosen.get(user_id, defaults)
+                and _lead_applies(entry.due_at, lead, chosen.get(user_id, defaults), now)
+            ]
+        return pairs
+
+    from courses.models import CourseEnrollment
+
+    enrollments = CourseEnrollment.objects.filter(
+        course_id__in={entry.course_id for entry in entries}, user__is_active=True
+    )
+    if entity_type == 'course':
+        enrollments = enrollments.filter(completed=False)
+    learners = {}
+    for course_id, user_id in enrollments.values_list('course_id', 'user_id'):
+        learners.setdefault(course_id, []).append(user_id)
+
+    done = set()
+    if entity_type == 'assignment':
+        from assignments.models import AssignmentSubmission
+        done = set(
+            AssignmentSubmission.objects.filter(assignment_id__in=ids, status__in=['submitted', 'graded'])
+            .values_list('assignment_id', 'user_id')
+        )
+    elif entity_type == 'quiz':
+        from quiz.models import QuizAttempt
+        done = set(QuizAttempt.objects.filter(quiz_id__in=ids, is_completed=True).values_list('quiz_id', 'user_id'))
+    elif entity_type == 'topic':
+        from courses.models import TopicProgress
+        done = set(TopicProgress.objects.filter(topic_id__in=ids, completed=True).values_list('topic_id', 'user_id'))
+
+    # An entity in several of a learner's courses is announced once
+    seen = set()
+    pairs = []
+    for entry in entries:
+        for user_id in learners.get(entry.course_id, ()):
+            key = (entry.entity_id, user_id)
+            if key in done or key in seen:
+                continue
+            seen.add(key)
+            pairs.append((entry, user_id))
+    return pairs
+
+
+def _remaining(delta):
+    hours = int(delta.total_seconds() // 3600)
+    if hours < 48:
+        return f"{hours} hour{'s' if hours != 1 else ''}"
+    return f"{delta.days} days"
+
+
+def _rows(entity_type, event, pairs, lead, now):
+    from courses.models import Course
+
+    _, headline, title_format, short_format, body, action_text, priority = MESSAGES[(entity_type, event)]
+    course_titles = dict(
+        Course.objects.filter(pk__in={entry.course_id for entry, _ in pairs if entry.course_id})
+        .values_list('id', 'title')
+    )
+    names = _display_names({user_id for _, user_id in pairs})
+
+    for entry, user_id in pairs:
+        due = entry.due_at.strftime('%B %d, %Y at %I:%M %p')
+        values = {'title': entry.title, 'remaining': _remaining(entry.due_at - now), 'due': f"on {due}"}
+        if entity_type == 'assignment' and event == DUE_SOON:
+            # Shared with run_deadline_reminders so the two never both send
+            key = f"deadline_reminder:{entry.entity_id}:{user_id}:{entry.due_at.isoformat()}"
+        else:
+            key = f"deadline:{event}:{entity_type}:{entry.entity_id}:{user_id}:{entry.due_at.isoformat()}"
+            if event == DUE_SOON:
+                key += f":{lead}"
+        course_line = (
+            f"<li><strong>Course:</strong> {course_titles[entry.course_id]}</li>"
+            if entry.course_id in course_titles else ''
+        )
+        message = f"""
+                <h2>{headline}</h2>
+                <p>Dear {names.get(user_id, '')},</p>
+                <p>{body}</p>
+                <ul>
+                    <li><strong>{entry.get_entity_type_display()}:</strong> {entry.title}</li>
+                    {course_line}
+                    <li><strong>{'Due' if event != EXPIRED else 'Expiry'} Date:</strong> {due}</li>
+                </ul>
+                <p>Best regards,<br>The LMS Team</p>
+                """
+        row = {
+            'idempotency_key': key,
+            'recipient_id': user_id,
+            'title': title_format.format(**values)[:255],
+            'message': message,
+            'short_message': short_format.format(**values)[:500],
+            'priority': priority,
+            'action_url': entry.url,
+            'action_text': action_text,
+            'related_course_id': entry.course_id,
+        }
+        if entity_type == 'assignment':
+            row['related_assignment_id'] = entry.entity_id
+        yield row
+
+
+def _windows(entity_type, since, now):
+    """(event, lead in days, filter) of each range a scan covers"""
+    for event in ENTITY_EVENTS[entity_type]:
+        if event == DUE_SOON:
+            for lead in _reminder_leads(entity_type):
+                # Reminders whose moment passed since the mark, plus deadlines created or
+                # moved since the mark that were already inside the lead
+                yield event, lead, Q(due_at__gt=now, due_at__lte=now + timedelta(days=lead)) & (
+                    Q(due_at__gt=since + timedelta(days=lead)) | Q(synced_at__gt=since)
+                )
+        else:
+            yield event, None, Q(due_at__gt=since, due_at__lte=now)
+
+
+def _lead_applies(due_at, lead, leads, now):
+    """
+    Whether the reminder at lead is the one to send for a deadline due_at:
+    a deadline found late, inside a shorter lead too, only gets the shorter one.
+    """
+    return not any(shorter < lead and due_at - now <= timedelta(days=shorter) for shorter in leads)
+
+
+def _lock_scan(entity_type, now):
+    """
+    Take the scan lease of an entity type (its DeadlineScanState row, created
+    on first use); False while another scan holds it. The lease runs out
+    after DEADLINE_SCAN_LOCK_TIMEOUT seconds in case its scan died.
+    """
+    DeadlineScanState.objects.get_or_create(
+        entity_type=entity_type,
+        defaults={'scanned_until': now - timedelta(seconds=_setting('INITIAL_LOOKBACK', DEFAULT_INITIAL_LOOKBACK))},
+    )
+    clock = timezone.now()
+    return bool(
+        DeadlineScanState.objects.filter(entity_type=entity_type)
+        .filter(Q(locked_until__isnull=True) | Q(locked_until__lte=clock))
+        .update(locked_until=clock + timedelta(seconds=_setting('SCAN_LOCK_TIMEOUT', DEFAULT_SCAN_LOCK_TIMEOUT)))
+    )
+
+
+def _unlock_scan(entity_type):
+    DeadlineScanState.objects.filter(entity_type=entity_type).update(locked_until=None)
+
+
+def scan_entity_type(entity_type, now=None, dry_run=False):
+    """
+    Emit the deadline events of one entity type between its high-water mark
+    and now, then advance the mark. Returns {event: candidates} with dry_run,
+    which sends nothing and leaves the mark where it is.
+
+    Scans of one entity type are serialized (the hourly task and
+    check_certificate_expiry may overlap); a scan that finds another one
+    running returns {} without scanning.
+    """
+    now = now or timezone.now()
+    if dry_run:
+        return _scan_window(entity_type, now, dry_run=True)
+    if not _lock_scan(entity_type, now):
+        logger.info(f"Deadline scan of {entity_type} skipped: another scan is running")
+        return {}
+    try:
+        return _scan_window(entity_type, now)
+    finally:
+        _unlock_scan(entity_type)
+
+
+def _scan_window(entity_type, now, dry_run=False):
+    since = _scanned_until(entity_type)
+    if since is None:
+        since = now - timedelta(seconds=_setting('INITIAL_LOOKBACK', DEFAULT_INITIAL_LOOKBACK))
+    if since >= now:
+        return {}
+
+    found = {}
+    context = nullcontext(NotificationJobRun()) if dry_run else record_job_run(f'deadline_scan:{entity_type}')
+    with context as run:
+        open_entries = DeadlineEntry.objects.filter(entity_type=entity_type, closed=False)
+        for event, lead, window in _windows(entity_type, since, now):
+            entries = list(open_entries.filter(window))
+            if event == DUE_SOON and entity_type != 'certificate':
+                leads = _reminder_leads(entity_type)
+                entries = [entry for entry in entries if _lead_applies(entry.due_at, lead, leads, now)]
+            pairs = _candidates(entity_type, event, entries, lead, now) if entries else []
+            found[event] = found.get(event, 0) + len(pairs)
+            run.candidate_count += len(pairs)
+            if dry_run or not pairs:
+                continue
+
+            notification_type = _get_notification_type(MESSAGES[(entity_type, event)][0])
+            if notification_type is None:
+                continue
+            counts = send_keyed_notifications(notification_type, _rows(entity_type, event, pairs, lead, now))
+            run.created_count += counts['created']
+            run.skipped_count += counts['skipped']
+            run.email_sent_count += counts['email_sent']
+            run.email_failed_count += counts['email_failed']
+
+        if not dry_run:
+            with transaction.atomic():
+                open_entries.filter(due_at__lte=now).update(closed=True)
+                DeadlineScanState.objects.filter(entity_type=entity_type).update(scanned_until=now)
+    return found
+
+
+def scan(entity_types=None, now=None, dry_run=False):
+    """Scan every entity type (or the given ones); returns {entity_type: {event: candidates}}"""
+    now = now or timezone.now()
+    return {
+        entity_type: scan_entity_type(entity_type, now=now, dry_run=dry_run)
+        for entity_type in entity_types or ENTITY_EVENTS
+    }
@@ -0,0 +1,497 @@
+"""
+Bulk notification fan-out engine.
+
+BulkNotification.send_notifications used to build a set of full user objects,
+create one Notification per recipient and send one email per recipient with
+two get_or_create preference lookups each. The fan-out engine instead:
+
+1. streams recipient IDs with a values query,
+2. preloads email preferences for a whole chunk of recipients,
+3. writes Notification rows with bulk_create, one chunk at a time,
+4. hands emails to EmailDeliveryQueue, which reuses a single connection
+   (and OAuth2 token / per-thread HTTP sessions), sends concurrently where the backend
+   allows it and records progress in sent_count / failed_count.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import (
+    BulkNotification, Notification, NotificationLog, NotificationSettings,
+    NotificationTypeSettings, get_notification_email_config,
+)
+
+logger = logging.getLogger(__name__)
+
+# Number of recipients processed per bulk_create / preference lookup
+FANOUT_CHUNK_SIZE = getattr(settings, 'NOTIFICATION_FANOUT_CHUNK_SIZE', 1000)
+
+# Concurrent sends for backends that support per-message HTTP delivery
+EMAIL_DELIVERY_WORKERS = getattr(settings, 'NOTIFICATION_EMAIL_WORKERS', 8)
+
+
+def _chunked(iterable, size):
+    """Yield lists of at most `size` items from an iterable"""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def load_email_preferences(user_ids, notification_type):
+    """
+    Resolve which users want email for a notification type, in two queries.
+
+    Missing NotificationSettings / NotificationTypeSettings rows fall back to
+    the same defaults send_email would create, but nothing is written here.
+
+    Returns:
+        set of user IDs that should receive an email
+    """
+    globally_disabled = set(
+        NotificationSettings.objects.filter(
+            user_id__in=user_ids,
+            email_notifications_enabled=False
+        ).values_list('user_id', flat=True)
+    )
+
+    type_overrides = dict(
+        NotificationTypeSettings.objects.filter(
+            user_id__in=user_ids,
+            notification_type=notification_type
+        ).values_list('user_id', 'email_enabled')
+    )
+
+    default_enabled = notification_type.default_email_enabled
+    return {
+        user_id for user_id in user_ids
+        if user_id not in globally_disabled
+        and type_overrides.get(user_id, default_enabled)
+    }
+
+
+class EmailDeliveryQueue:
+    """
+    Batched email delivery for notifications.
+
+    One connection is opened for the lifetime of the queue. For the Outlook
+    OAuth2 backend the access token is reused and messages are posted to
+    Graph concurrently, each worker thread over its own HTTP session; other
+    backends (SMTP) send sequentially
+    over the single open connection.
+
+    Usage:
+        with EmailDeliveryQueue(bulk_notification=bulk) as queue:
+            queue.add(notification)
+        # queue.sent_count / queue.failed_count
+    """
+
+    def __init__(self, bulk_notification=None, batch_size=None, max_workers=None):
+        self.bulk_notification = bulk_notification
+        self.batch_size = batch_size or FANOUT_CHUNK_SIZE
+        self.max_workers = max_workers or EMAIL_DELIVERY_WORKERS
+        self.sent_count = 0
+        self.failed_count = 0
+        self._pending = []
+        self._connection = None
+        self._from_email = None
+        self._reply_to = None
+        self._config_error = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def open(self):
+        """Resolve the email configuration and open a shared connection"""
+        try:
+            email_backend, self._from_email, self._reply_to = get_notification_email_config()
+            self._connection = email_backend or get_connection()
+            self._connection.open()
+        except Exception as e:
+            # Every email in this run fails the same way; record it per notification
+            self._config_error = str(e)
+            self._connection = None
+            logger.error(f"Email delivery queue could not open a connection: {self._config_error}")
+
+    def add(self, notification):
+        """Queue a notification for email delivery"""
+        self._pending.append(notification)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Send all pending emails and persist their outcome"""
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+
+        if self._connection is None:
+            results = [(notification, self._config_error or 'Email connection unavailable')
+                       for notification in batch]
+        else:
+            results = self._deliver(batch)
+
+        self._record(results)
+
+    def discard(self):
+        """Drop the emails not sent yet; returns how many were dropped"""
+        dropped, self._pending = len(self._pending), []
+        return dropped
+
+    def close(self):
+        """Flush remaining emails and close the shared connection"""
+        try:
+            self.flush()
+        finally:
+            if self._connection is not None:
+                try:
+                    self._connection.close()
+                except Exception as e:
+                    logger.warning(f"Error closing email connection: {str(e)}")
+                self._connection = None
+
+    def _deliver(self, batch):
+        """
+        Send a batch of notifications.
+
+        Returns:
+            list of (notification, error) tuples; error is None on success
+        """
+        messages = []
+        results = []
+        for notification in batch:
+            try:
+                messages.append((notification, notification.build_email_message(
+                    from_email=self._from_email,
+                    connection=self._connection,
+                    reply_to_email=self._reply_to,
+                )))
+            except Exception as e:
+                results.append((notification, f"Error rendering email: {str(e)}"))
+
+        send_single = getattr(self._connection, 'send_single_message', None)
+
+        if send_single is not None:
+            # HTTP based backend: reuse one token and send concurrently
+            access_token = self._connection.get_access_token()
+            if not access_token:
+                return results + [(notification, 'Failed to obtain OAuth2 access token')
+                                  for notification, _ in messages]
+
+            # requests sessions are not thread-safe; keep one per worker thread
+            local = threading.local()
+            sessions = []
+
+            def send(item):
+                notification, email = item
+                try:
+                    if not hasattr(local, 'session'):
+                        local.session = requests.Session()
+                        sessions.append(local.session)
+                    if send_single(email, access_token, session=local.session):
+                        return notification, None
+                    return notification, 'Email delivery failed'
+                except Exception as e:
+                    return notification, str(e)
+
+            try:
+                with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                    results.extend(executor.map(send, messages))
+            finally:
+                for session in sessions:
+                    session.close()
+        else:
+            # Connection-oriented backend (SMTP): send over the open connection
+            for notification, email in messages:
+                try:
+                    if self._connection.send_messages([email]):
+                        results.append((notification, None))
+                    else:
+                        results.append((notification, 'Email delivery failed'))
+                except Exception as e:
+                    results.append((notification, str(e)))
+
+        return results
+
+    def _record(self, results):
+        """Persist delivery outcomes with set-based updates"""
+        now = timezone.now()
+        sent_ids = [notification.pk for notification, error in results if error is None]
+        failed = [(notification, error) for notification, error in results if error is not None]
+
+        if sent_ids:
+            Notification.objects.filter(pk__in=sent_ids).update(
+                email_sent=True, email_sent_at=now
+            )
+
+        # Failures usually share one error (e.g. configuration); group the updates.
+        # email_sent is reset in case the notification was claimed before sending.
+        failed_by_error = {}
+        for notification, error in failed:
+            failed_by_error.setdefault(error, []).append(notification.pk)
+        for error, ids in failed_by_error.items():
+            Notification.objects.filter(pk__in=ids).update(email_sent=False, email_error=error)
+
+        self.sent_count += len(sent_ids)
+        self.failed_count += len(failed)
+
+        if self.bulk_notification is not None:
+            BulkNotification.objects.filter(pk=self.bulk_notification.pk).update(
+                sent_count=F('sent_count') + len(sent_ids),
+                failed_count=F('failed_count') + len(failed),
+            )
+
+
+class BulkNotificationFanout:
+    """
+    Fan a BulkNotification out to its recipients in chunks.
+
+    Each recipient counts as sent once their in-app notification exists and
+    any email they opted into has been delivered; recipients whose email
+    delivery fails are counted in failed_count. A fan-out that raises leaves
+    the notification 'failed'.
+    """
+
+    def __init__(self, bulk_notification, chunk_size=None):
+        self.bulk = bulk_notification
+        self.chunk_size = chunk_size or FANOUT_CHUNK_SIZE
+        # Recipients of the current chunk already counted without email
+        self._counted = 0
+
+    def run(self):
+        try:
+            return self._run()
+        except Exception:
+            BulkNotification.objects.filter(pk=self.bulk.pk).update(status='failed', completed_at=timezone.now())
+            raise
+
+    def _run(self):
+        bulk = self.bulk
+        recipient_ids = bulk.get_recipient_ids()
+
+        bulk.status = 'sending'
+        bulk.started_at = timezone.now()
+        bulk.total_recipients = recipient_ids.count()
+        bulk.sent_count = 0
+        bulk.failed_count = 0
+        bulk.save(update_fields=['status', 'started_at', 'total_recipients', 'sent_count', 'failed_count'])
+
+        notification_type = bulk.notification_type
+
+        with EmailDeliveryQueue(bulk_notification=bulk) as queue:
+            for chunk in _chunked(recipient_ids.iterator(chunk_size=self.chunk_size), self.chunk_size):
+                self._counted = 0
+                recorded = queue.sent_count + queue.failed_count
+                try:
+                    self._process_chunk(chunk, notification_type, queue)
+                except Exception as e:
+                    # Only recipients not already counted as sent or failed have failed
+                    queue.discard()
+                    failed = len(chunk) - self._counted - (queue.sent_count + queue.failed_count - recorded)
+                    logger.error(
+                        f"Bulk notification {bulk.pk}: failed to process chunk of {len(chunk)} recipients "
+                        f"({failed} not delivered): {str(e)}"
+                    )
+                    BulkNotification.objects.filter(pk=bulk.pk).update(
+                        failed_count=F('failed_count') + failed
+                    )
+
+        bulk.refresh_from_db(fields=['sent_count', 'failed_count'])
+        bulk.status = 'completed' if bulk.failed_count == 0 else 'failed'
+        bulk.completed_at = timezone.now()
+        bulk.save(update_fields=['status', 'completed_at'])
+
+        logger.info(
+            f"Bulk notification {bulk.pk} fan-out finished: "
+            f"{bulk.total_recipients} recipients, {bulk.sent_count} sent, {bulk.failed_count} failed"
+        )
+        return bulk
+
+    def _process_chunk(self, user_ids, notification_type, queue):
+        bulk = self.bulk
+        email_user_ids = load_email_preferences(user_ids, notification_type)
+
+        with transaction.atomic():
+            notifications = Notification.objects.bulk_create([
+                Notification(
+                    notification_type=notification_type,
+                    recipient_id=user_id,
+                    sender=bulk.sender,
+                    title=bulk.title,
+                    message=bulk.message,
+                    short_message=bulk.short_message,
+                    priority=bulk.priority,
+                    action_url=bulk.action_url,
+                    action_text=bulk.action_text,
+                )
+                for user_id in user_ids
+            ])
+
+        # Recipients without email get their in-app notification only
+        web_only = len(user_ids) - len(email_user_ids)
+        if web_only:
+            BulkNotification.objects.filter(pk=bulk.pk).update(
+                sent_count=F('sent_count') + web_only
+            )
+            self._counted = web_only
+
+        if not email_user_ids:
+            return
+
+        # Rendering needs recipient and type; fetch them once for the chunk
+        email_notifications = Notification.objects.filter(
+            pk__in=[n.pk for n in notifications if n.recipient_id in email_user_ids]
+        ).select_related('recipient', 'sender', 'notification_type')
+        for notification in email_notifications:
+            queue.add(notification)
+        queue.flush()
+
+
+def _claim_for_email(notification_ids):
+    """
+    Mark unsent notifications as emailed before sending them.
+
+    Returns the IDs this caller claimed; rows another run has claimed (or is
+    claiming) are left out, so overlapping runs never email a row twice.
+    """
+    with transaction.atomic():
+        claimed = list(
+            Notification.objects.filter(pk__in=notification_ids, email_sent=False)
+            .select_for_update(skip_locked=True)
+            .values_list('pk', flat=True)
+        )
+        Notification.objects.filter(pk__in=claimed).update(email_sent=True)
+    return set(claimed)
+
+
+def send_keyed_notifications(notification_type, rows, chunk_size=None):
+    """
+    Create notifications in bulk with idempotency keys and email them.
+
+    Rows whose idempotency_key already exists are skipped, so a job can be
+    re-run safely, and emails are claimed before sending, so overlapping runs
+    send each one once. Role restrictions on the notification type are applied
+    the same way send_notification applies them.
+
+    Args:
+        notification_type: NotificationType instance
+        rows: iterable of dicts of Notification field values; each must contain
+            'idempotency_key' and 'recipient_id'
+        chunk_size: rows per bulk_create (defaults to FANOUT_CHUNK_SIZE)
+
+    Returns:
+        dict with 'created', 'skipped', 'email_sent' and 'email_failed' counts
+    """
+    from users.models import CustomUser
+
+    chunk_size = chunk_size or FANOUT_CHUNK_SIZE
+    counts = {'created': 0, 'skipped': 0, 'email_sent': 0, 'email_failed': 0}
+
+    with EmailDeliveryQueue() as queue:
+        for chunk in _chunked(rows, chunk_size):
+            keys = [row['idempotency_key'] for row in chunk]
+            existing = set(
+                Notification.objects.filter(idempotency_key__in=keys)
+                .values_list('idempotency_key', flat=True)
+            )
+            fresh = [row for row in chunk if row['idempotency_key'] not in existing]
+
+            if fresh and notification_type.available_to_roles:
+                allowed = set(
+                    CustomUser.objects.filter(
+                        pk__in={row['recipient_id'] for row in fresh},
+                        role__in=notification_type.available_to_roles
+                    ).values_list('pk', flat=True)
+                )
+                fresh = [row for row in fresh if row['recipient_id'] in allowed]
+
+            counts['skipped'] += len(chunk) - len(fresh)
+            if not fresh:
+                continue
+
+            fresh_keys = [row['idempotency_key'] for row in fresh]
+            # ignore_conflicts keeps overlapping runs from failing on the unique key
+            Notification.objects.bulk_create(
+                [Notification(notification_type=notification_type, **row) for row in fresh],
+                ignore_conflicts=True,
+            )
+            created = list(
+                Notification.objects.filter(
+                    idempotency_key__in=fresh_keys,
+                    email_sent=False,
+                ).select_related('recipient', 'sender', 'notification_type')
+            )
+            counts['created'] += len(created)
+
+            email_user_ids = load_email_preferences(
+                [notification.recipient_id for notification in created], notification_type
+            )
+            claimed = _claim_for_email([
+                notification.pk for notification in created if notification.recipient_id in email_user_ids
+            ])
+            for notification in created:
+                if notification.pk in claimed:
+                    queue.add(notification)
+            queue.flush()
+
+    counts['email_sent'] = queue.sent_count
+    counts['email_failed'] = queue.failed_count
+    return counts
+
+
+def queue_bulk_notification(bulk_notification, user):
+    """
+    Start sending a bulk notification and log it.
+
+    With NOTIFICATION_FANOUT_ASYNC enabled the fan-out runs on the Celery
+    'notifications' queue once the current transaction commits; otherwise it
+    runs inline (the fan-out itself is chunked and batched either way).
+
+    The notification is first moved to 'queued' with one conditional update,
+    so a double submit queues it once.
+
+    Returns:
+        False if the notification was no longer a draft or scheduled
+    """
+    claimed = BulkNotification.objects.filter(
+        pk=bulk_notification.pk, status__in=['draft', 'scheduled']
+    ).update(status='queued')
+    if not claimed:
+        return False
+    bulk_notification.status = 'queued'
+
+    if getattr(settings, 'NOTIFICATION_FANOUT_ASYNC', False):
+        from .tasks import send_bulk_notification
+        transaction.on_commit(lambda: send_bulk_notification.delay(bulk_notification.pk))
+        # The fan-out has not counted the recipients yet
+        total_recipients = bulk_notification.get_recipient_ids().count()
+    else:
+        bulk_notification.send_notifications()
+        total_recipients = bulk_notification.total_recipients
+
+    NotificationLog.log_action(
+        'bulk_sent',
+        user,
+        bulk_notification=bulk_notification,
+        details={'total_recipients': total_recipients}
+    )
+    return True
@@ -0,0 +1,357 @@
+"""
+Set-based scheduled notification jobs.
+
+Each job runs one anti-join query that yields exactly the (recipient, subject)
+pairs that still need a notification, turns them into rows keyed by an
+idempotency key and hands them to send_keyed_notifications, which bulk-creates
+the notifications and feeds the batched email path. Every run is recorded in
+NotificationJobRun with its runtime and row counts.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Exists, F, OuterRef, Q, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from .fanout import send_keyed_notifications
+from .models import Notification, NotificationJobRun, NotificationType
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+
+@contextmanager
+def record_job_run(job_name):
+    """
+    Record a NotificationJobRun around a job body.
+
+    The yielded run object's count fields may be updated by the job; they are
+    saved together with the runtime when the block exits.
+    """
+    run = NotificationJobRun.objects.create(job_name=job_name)
+    started = time.monotonic()
+    try:
+        yield run
+        run.status = 'succeeded'
+    except Exception as e:
+        run.status = 'failed'
+        run.error = str(e)
+        raise
+    finally:
+        run.finished_at = timezone.now()
+        run.duration_ms = int((time.monotonic() - started) * 1000)
+        run.save()
+        logger.info(
+            f"{job_name}: {run.status} in {run.duration_ms}ms - "
+            f"{run.candidate_count} candidates, {run.created_count} created, "
+            f"{run.skipped_count} skipped, {run.email_sent_count} emailed, "
+            f"{run.email_failed_count} email failures"
+        )
+
+
+def _apply_counts(run, candidates, counts):
+    run.candidate_count = candidates
+    run.created_count = counts['created']
+    run.skipped_count = counts['skipped']
+    run.email_sent_count = counts['email_sent']
+    run.email_failed_count = counts['email_failed']
+
+
+def _get_notification_type(name):
+    try:
+        return NotificationType.objects.get(name=name, is_active=True)
+    except NotificationType.DoesNotExist:
+        logger.warning(f"Warning: Notification type '{name}' not found")
+        return None
+
+
+def _display_names(user_ids):
+    """Map user ID -> first name (or username) in one query"""
+    return {
+        row['id']: row['first_name'] or row['username']
+        for row in User.objects.filter(pk__in=user_ids).values('id', 'first_name', 'username')
+    }
+
+
+def run_deadline_reminders(now=None):
+    """
+    Remind learners about assignments due in 24-48 hours that they have not submitted.
+
+    Returns:
+        Number of reminder notifications created
+    """
+    from assignments.models import Assignment, AssignmentCourse, AssignmentSubmission
+    from courses.models import CourseEnrollment
+
+    with record_job_run('deadline_reminders') as run:
+        notification_type = _get_notification_type('deadline_reminder')
+        if notification_type is None:
+            return 0
+
+        now = now or timezone.now()
+        window_start = now + timedelta(days=1)
+        window_end = now + timedelta(days=2)
+
+        upcoming = Assignment.objects.filter(
+            due_date__gte=window_start,
+            due_date__lt=window_end,
+            is_active=True
+        )
+
+        # Anti-join: enrolled active users of any course carrying an upcoming
+        # assignment, without a submitted/graded submission for it
+        pairs = list(
+            CourseEnrollment.objects.filter(
+                user__is_active=True,
+                course__assignmentcourse__assignment__in=upcoming,
+            ).annotate(
+                assignment_id=F('course__assignmentcourse__assignment_id'),
+            ).filter(
+                ~Exists(AssignmentSubmission.objects.filter(
+                    assignment_id=OuterRef('assignment_id'),
+                    user_id=OuterRef('user_id'),
+                    status__in=['submitted', 'graded']
+                ))
+            ).values_list('user_id', 'assignment_id').distinct()
+        )
+
+        assignments = {
+            a.pk: a for a in upcoming.filter(pk__in={a_id for _, a_id in pairs})
+            .only('id', 'title', 'due_date')
+        }
+        # Primary course title per assignment (first row wins: primary, then oldest)
+        course_titles = {}
+        for assignment_id, title in AssignmentCourse.objects.filter(
+            assignment_id__in=assignments.keys()
+        ).order_by('-is_primary', 'created_at').values_list('assignment_id', 'course__title'):
+            course_titles.setdefault(assignment_id, title)
+        names = _display_names({user_id for user_id, _ in pairs})
+
+        def rows():
+            for user_id, assignment_id in pairs:
+                assignment = assignments[assignment_id]
+                hours_until = int((assignment.due_date - now).total_seconds() / 3600)
+                message = f"""
+                <h2>Assignment Deadline Reminder</h2>
+                <p>Dear {names.get(user_id, '')},</p>
+                <p>This is a reminder that the following assignment is due soon:</p>
+                <p><strong>Assignment Details:</strong></p>
+                <ul>
+                    <li><strong>Assignment:</strong> {assignment.title}</li>
+                    <li><strong>Course:</strong> {course_titles.get(assignment_id, 'Multiple Courses')}</li>
+                    <li><strong>Due Date:</strong> {assignment.due_date.strftime('%B %d, %Y at %I:%M %p')}</li>
+                    <li><strong>Time Remaining:</strong> Approximately {hours_until} hours</li>
+                </ul>
+                <p>Please make sure to complete and submit your assignment before the deadline.</p>
+                <p>Good luck!</p>
+                <p>Best regards,<br>The LMS Team</p>
+                """
+                # One reminder per learner and due date: rescheduling the
+                # assignment reminds again, repeated runs do not
+                yield {
+                    'idempotency_key': f"deadline_reminder:{assignment_id}:{user_id}:{assignment.due_date.isoformat()}",
+                    'recipient_id': user_id,
+                    'title': f"Deadline Reminder: {assignment.title}",
+                    'message': message,
+                    'short_message': f"Reminder: '{assignment.title}' is due in {hours_until} hours",
+                    'priority': 'high',
+                    'action_url': f"/assignments/{assignment_id}/",
+                    'action_text': "View Assignment",
+                    'related_assignment_id': assignment_id,
+                }
+
+        counts = send_keyed_notifications(notification_type, rows())
+        _apply_counts(run, len(pairs), counts)
+        return counts['created']
+
+
+def run_unread_message_digest(now=None):
+    """
+    Send one daily digest per user with unread received messages.
+
+    Returns:
+        Number of digest notifications created
+    """
+    from lms_messages.models import Message, MessageReadStatus
+
+    with record_job_run('unread_message_digest') as run:
+        notification_type = _get_notification_type('message_unread')
+        if notification_type is None:
+            return 0
+
+        now = now or timezone.now()
+        today = now.date().isoformat()
+
+        # Anti-join over the recipients table: received, not sent by the
+        # recipient, and no read-status row marking it read
+        unread = Message.recipients.through.objects.filter(
+            customuser__is_active=True
+        ).exclude(
+            message__sender_id=F('customuser_id')
+        ).filter(
+            ~Exists(MessageReadStatus.objects.filter(
+                message_id=OuterRef('message_id'),
+                user_id=OuterRef('customuser_id'),
+                is_read=True
+            ))
+        )
+
+        unread_counts = dict(
+            unread.order_by().values('customuser_id').annotate(n=Count('message_id'))
+            .values_list('customuser_id', 'n')
+        )
+
+        # Latest five unread messages per user in a single windowed query
+        previews = {}
+        for row in unread.annotate(
+            position=Window(
+                expression=RowNumber(),
+                partition_by=[F('customuser_id')],
+                order_by=[F('message__created_at').desc(), F('message_id').desc()],
+            )
+        ).filter(position__lte=5).order_by('customuser_id', 'position').values(
+            'customuser_id', 'message__subject',
+            'message__sender__first_name', 'message__sender__last_name',
+        ):
+            sender_name = (
+                f"{row['message__sender__first_name'] or ''} {row['message__sender__last_name'] or ''}".strip()
+                or "System"
+            )
+            previews.setdefault(row['customuser_id'], []).append(
+                f"<li><strong>From {sender_name}:</strong> {row['message__subject']}</li>"
+            )
+
+        names = _display_names(unread_counts.keys())
+
+        def rows():
+            for user_id, unread_count in unread_counts.items():
+                message_list = "".join(previews.get(user_id, []))
+                if unread_count > 5:
+                    message_list += f"<li><em>...and {unread_count - 5} more messages</em></li>"
+                plural = 's' if unread_count != 1 else ''
+                digest_message = f"""
+                <h2>Unread Messages Summary</h2>
+                <p>Dear {names.get(user_id, '')},</p>
+                <p>You have <strong>{unread_count}</strong> unread message{plural} in your inbox:</p>
+                <ul>
+                {message_list}
+                </ul>
+                <p>Please log in to your account to read and respond to your messages.</p>
+                <p>Best regards,<br>The LMS Team</p>
+                """
+                yield {
+                    'idempotency_key': f"message_unread:{user_id}:{today}",
+                    'recipient_id': user_id,
+                    'title': f"You have {unread_count} unread message{plural}",
+                    'message': digest_message,
+                    'short_message': f"You have {unread_count} unread message{plural} in your inbox",
+                    'priority': 'normal',
+                    'action_url': "/messages/",
+                    'action_text': "View Messages",
+                }
+
+        counts = send_keyed_notifications(notification_type, rows())
+        _apply_counts(run, len(unread_counts), counts)
+        return counts['created']
+
+
+def run_feedback_reminders(now=None):
+    """
+    Tell learners about feedback on submissions graded in the last three days.
+
+    Returns:
+        Number of feedback notifications created
+    """
+    from assignments.models import AssignmentCourse, AssignmentFeedback, AssignmentSubmission
+
+    with record_job_run('feedback_reminders') as run:
+        notification_type = _get_notification_type('feedback_available')
+        if notification_type is None:
+            return 0
+
+        now = now or timezone.now()
+        three_days_ago = now - timedelta(days=3)
+
+        visible_feedback = AssignmentFeedback.objects.filter(
+            submission_id=OuterRef('pk'),
+            is_private=False
+        ).exclude(
+            Q(feedback='') & (Q(audio_feedback='') | Q(audio_feedback__isnull=True))
+            & (Q(video_feedback='') | Q(video_feedback__isnull=True))
+        )
+
+        # Feedback notifications sent by other code paths since the grading
+        already_notified = Notification.objects.filter(
+            recipient_id=OuterRef('user_id'),
+            notification_type=notification_type,
+            related_assignment_id=OuterRef('assignment_id'),
+            created_at__gte=OuterRef('graded_at')
+        )
+
+        submissions = list(
+            AssignmentSubmission.objects.filter(
+                status='graded',
+                grade__isnull=False,
+                graded_at__gte=three_days_ago,
+                graded_at__lte=now,
+                user__is_active=True,
+                assignment__isnull=False,
+            ).filter(
+                Exists(visible_feedback),
+                ~Exists(already_notified),
+            ).values(
+                'id', 'user_id', 'grade', 'graded_at',
+                'assignment_id', 'assignment__title', 'assignment__points',
+            )
+        )
+
+        course_titles = {}
+        for assignment_id, title in AssignmentCourse.objects.filter(
+            assignment_id__in={s['assignment_id'] for s in submissions}
+        ).order_by('-is_primary', 'created_at').values_list('assignment_id', 'course__title'):
+            course_titles.setdefault(assignment_id, title)
+        names = _display_names({s['user_id'] for s in submissions})
+
+        def rows():
+            for submission in submissions:
+                points = submission['assignment__points']
+                grade = submission['grade']
+                title = submission['assignment__title']
+                grade_pct = (grade / points * 100) if points else 0
+                message = f"""
+                <h2>Assignment Feedback Available</h2>
+                <p>Dear {names.get(submission['user_id'], '')},</p>
+                <p>Your assignment has been graded and feedback is available for review:</p>
+                <p><strong>Assignment Details:</strong></p>
+                <ul>
+                    <li><strong>Assignment:</strong> {title}</li>
+                    <li><strong>Course:</strong> {course_titles.get(submission['assignment_id'], 'General')}</li>
+                    <li><strong>Grade:</strong> {grade} / {points}</li>
+                    <li><strong>Percentage:</strong> {grade_pct:.1f}%</li>
+                    <li><strong>Graded At:</strong> {submission['graded_at'].strftime('%B %d, %Y at %I:%M %p')}</li>
+                </ul>
+                <p>Your instructor has provided feedback on your submission. Please review it to improve your future work.</p>
+                <p>Keep up the good work!</p>
+                <p>Best regards,<br>The LMS Team</p>
+                """
+                yield {
+                    'idempotency_key': f"feedback_available:{submission['id']}:{submission['graded_at'].isoformat()}",
+                    'recipient_id': submission['user_id'],
+                    'title': f"Feedback Available: {title}",
+                    'message': message,
+                    'short_message': f"Your assignment '{title}' has been graded with feedback",
+                    'priority': 'normal',
+                    'action_url': f"/assignments/{submission['assignment_id']}/submission/{submission['id']}/",
+                    'action_text': "View Feedback",
+                    'related_assignment_id': submission['assignment_id'],
+                }
+
+        counts = send_keyed_notifications(notification_type, rows())
+        _apply_counts(run, len(submissions), counts)
+        return counts['created']
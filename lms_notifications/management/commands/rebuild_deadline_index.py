@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from lms_notifications.deadlines import SOURCE_MODELS, rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the deadline index from assignments, quizzes, topics, courses and certificates'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--type',
+            action='append',
+            dest='types',
+            help=f"Only rebuild these entity types ({', '.join(SOURCE_MODELS)})"
+        )
+
+    def handle(self, *args, **options):
+        types = options['types']
+        unknown = set(types or []) - set(SOURCE_MODELS)
+        if unknown:
+            raise CommandError(f"Unknown entity type(s): {', '.join(sorted(unknown))}")
+        for entity_type, count in rebuild(types).items():
+            self.stdout.write(f"{entity_type}: {count} deadlines")
+        self.stdout.write(self.style.SUCCESS('Deadline index rebuilt'))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from lms_notifications.deadlines import ENTITY_EVENTS, scan
+
+
+class Command(BaseCommand):
+    help = 'Send due-soon, overdue and expired notifications for deadlines passed since the last scan'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--type',
+            action='append',
+            dest='types',
+            help=f"Only scan these entity types ({', '.join(ENTITY_EVENTS)})"
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many notifications are due; sends nothing and keeps the high-water mark'
+        )
+
+    def handle(self, *args, **options):
+        types = options['types']
+        unknown = set(types or []) - set(ENTITY_EVENTS)
+        if unknown:
+            raise CommandError(f"Unknown entity type(s): {', '.join(sorted(unknown))}")
+        for entity_type, events in scan(types, dry_run=options['dry_run']).items():
+            summary = ', '.join(f'{event}: {count}' for event, count in events.items()) or 'nothing to scan'
+            self.stdout.write(f"{entity_type}: {summary}")
+        self.stdout.write(self.style.SUCCESS('Deadline scan complete'))
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.24 on 2026-10-18 21:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_notifications', '0003_auto_20251122_1101'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='idempotency_key',
+            field=models.CharField(blank=True, help_text='Unique key used by scheduled jobs to avoid sending the same notification twice', max_length=255, null=True, unique=True),
+        ),
+        migrations.CreateModel(
+            name='NotificationJobRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_name', models.CharField(max_length=100)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='running', max_length=20)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('duration_ms', models.PositiveIntegerField(blank=True, null=True)),
+                ('candidate_count', models.PositiveIntegerField(default=0, help_text="Rows returned by the job's candidate query")),
+                ('created_count', models.PositiveIntegerField(default=0, help_text='Notifications created')),
+                ('skipped_count', models.PositiveIntegerField(default=0, help_text='Candidates skipped (already sent or not eligible)')),
+                ('email_sent_count', models.PositiveIntegerField(default=0)),
+                ('email_failed_count', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['job_name', '-started_at'], name='lms_notific_job_nam_a77799_idx')],
+            },
+        ),
+    ]
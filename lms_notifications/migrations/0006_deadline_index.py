@@ -0,0 +1,47 @@
+# Generated by Django 4.2.24 on 2026-10-18 23:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0009_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('lms_notifications', '0005_alter_notificationlog_timestamp'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeadlineEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity_type', models.CharField(choices=[('assignment', 'Assignment'), ('quiz', 'Quiz'), ('topic', 'Topic'), ('course', 'Course'), ('certificate', 'Certificate')], max_length=20)),
+                ('entity_id', models.PositiveIntegerField()),
+                ('due_at', models.DateTimeField()),
+                ('title', models.CharField(max_length=800)),
+                ('url', models.CharField(max_length=255)),
+                ('closed', models.BooleanField(default=False, help_text='Set once the deadline scanner has passed due_at')),
+                ('course', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='courses.course')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['due_at'],
+                'indexes': [
+                    models.Index(condition=models.Q(('closed', False)), fields=['entity_type', 'due_at'], name='deadline_open_due_idx'),
+                    models.Index(fields=['entity_type', 'entity_id'], name='deadline_entity_idx'),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name='DeadlineScanState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity_type', models.CharField(choices=[('assignment', 'Assignment'), ('quiz', 'Quiz'), ('topic', 'Topic'), ('course', 'Course'), ('certificate', 'Certificate')], max_length=20, unique=True)),
+                ('scanned_until', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.24 on 2026-10-18 23:55
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_notifications', '0006_deadline_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deadlineentry',
+            name='synced_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='When this due_at was first indexed'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.24 on 2026-10-19 00:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_notifications', '0007_deadlineentry_synced_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bulknotification',
+            name='status',
+            field=models.CharField(choices=[('draft', 'Draft'), ('scheduled', 'Scheduled'), ('queued', 'Queued'), ('sending', 'Sending'), ('completed', 'Completed'), ('failed', 'Failed')], default='draft', max_length=20),
+        ),
+    ]
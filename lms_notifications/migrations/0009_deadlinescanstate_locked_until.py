@@ -0,0 +1,18 @@
+# Generated by Django 4.2.24 on 2026-10-19 01:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_notifications', '0008_alter_bulknotification_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deadlinescanstate',
+            name='locked_until',
+            field=models.DateTimeField(blank=True, help_text='Lease of the running scan', null=True),
+        ),
+    ]
@@ -175,6 +175,48 @@ class NotificationTypeSettings(models.Model):
         return f"{self.user.username} - {self.notification_type.display_name}"
 
 
+def get_notification_email_config():
+    """
+    Resolve how notification emails are sent.
+    
+    Returns:
+        (email_backend, from_email, reply_to_email) where email_backend is None
+        when Django's default EMAIL_BACKEND (OAuth2) should be used
+    
+    Raises:
+        Exception if neither OAuth2 nor Global Admin SMTP settings are configured
+    """
+    # Use OAuth2 backend by default, fallback to SMTP if configured
+    from_email = settings.DEFAULT_FROM_EMAIL
+    email_backend = None
+    reply_to_email = None
+    
+    # Check if OAuth2 backend is configured (preferred method)
+    if hasattr(settings, 'EMAIL_BACKEND') and 'oauth2' in settings.EMAIL_BACKEND.lower():
+        # Use OAuth2 backend with default settings
+        from_email = getattr(settings, 'OUTLOOK_FROM_EMAIL', settings.DEFAULT_FROM_EMAIL)
+        # Let Django use the default EMAIL_BACKEND (OAuth2)
+        email_backend = None
+    else:
+        # Use Global Admin Settings for SMTP configuration
+        try:
+            from account_settings.models import GlobalAdminSettings
+            global_settings = GlobalAdminSettings.get_settings()
+            
+            if global_settings.smtp_enabled and global_settings.smtp_host:
+                email_backend = global_settings.get_email_backend()
+                from_email = global_settings.get_from_email() or settings.DEFAULT_FROM_EMAIL
+                reply_to_email = global_settings.smtp_reply_to_email
+            else:
+                # Global Admin Settings not configured - cannot send email
+                raise Exception("Email configuration not found. Please configure SMTP settings via Global Admin Settings.")
+        except Exception as e:
+            # Re-raise the exception with a clear message
+            raise Exception(f"Email configuration error: {str(e)}. Please configure SMTP settings via Global Admin Settings.")
+    
+    return email_backend, from_email, reply_to_email
+
+
 class Notification(models.Model):
     """
     Individual notification instance
@@ -249,6 +291,16 @@ class Notification(models.Model):
         related_name='notifications'
     )
     
+    # Deduplication for scheduled jobs: re-running a job never creates a second
+    # notification with the same key
+    idempotency_key = models.CharField(
+        max_length=255,
+        null=True,
+        blank=True,
+        unique=True,
+        help_text="Unique key used by scheduled jobs to avoid sending the same notification twice"
+    )
+    
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField(null=True, blank=True, help_text="When this notification should expire")
@@ -298,67 +350,12 @@ class Notification(models.Model):
             if not type_settings.email_enabled:
                 return False
             
-
-            
-            # Prepare email content
-            context = {
-                'notification': self,
-                'user': self.recipient,
-                'site_name': 'LMS Platform',
-                'action_url': self.get_absolute_action_url(),
-            }
-            
-            subject = f"[LMS] {self.title}"
-            
-            # Use certificate template for certificate notifications
-            if self.notification_type.name == 'certificate_earned':
-                html_message = render_to_string('lms_notifications/email/certificate_notification.html', context)
-            else:
-                html_message = render_to_string('lms_notifications/email/notification.html', context)
-            
-            text_message = render_to_string('lms_notifications/email/notification.txt', context)
-            
-            # Use OAuth2 backend by default, fallback to SMTP if configured
-            from_email = settings.DEFAULT_FROM_EMAIL
-            email_backend = None
-            reply_to_email = None
-            
-            # Check if OAuth2 backend is configured (preferred method)
-            if hasattr(settings, 'EMAIL_BACKEND') and 'oauth2' in settings.EMAIL_BACKEND.lower():
-                # Use OAuth2 backend with default settings
-                from_email = getattr(settings, 'OUTLOOK_FROM_EMAIL', settings.DEFAULT_FROM_EMAIL)
-                # Let Django use the default EMAIL_BACKEND (OAuth2)
-                email_backend = None
-            else:
-                # Use Global Admin Settings for SMTP configuration
-                try:
-                    from account_settings.models import GlobalAdminSettings
-                    global_settings = GlobalAdminSettings.get_settings()
-                    
-                    if global_settings.smtp_enabled and global_settings.smtp_host:
-                        email_backend = global_settings.get_email_backend()
-                        from_email = global_settings.get_from_email() or settings.DEFAULT_FROM_EMAIL
-                        reply_to_email = global_settings.smtp_reply_to_email
-                    else:
-                        # Global Admin Settings not configured - cannot send email
-                        raise Exception("Email configuration not found. Please configure SMTP settings via Global Admin Settings.")
-                except Exception as e:
-                    # Re-raise the exception with a clear message
-                    raise Exception(f"Email configuration error: {str(e)}. Please configure SMTP settings via Global Admin Settings.")
-            
-            # Create email message
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=text_message,
+            email_backend, from_email, reply_to_email = get_notification_email_config()
+            email = self.build_email_message(
                 from_email=from_email,
-                to=[self.recipient.email],
-                connection=email_backend
+                connection=email_backend,
+                reply_to_email=reply_to_email,
             )
-            email.attach_alternative(html_message, "text/html")
-            
-            # Add reply-to if specified
-            if reply_to_email:
-                email.reply_to = [reply_to_email]
             
             # Send email
             email.send(fail_silently=False)
@@ -374,6 +371,47 @@ class Notification(models.Model):
             self.save(update_fields=['email_error'])
             return False
 
+    def build_email_message(self, from_email, connection=None, reply_to_email=None):
+        """
+        Render this notification into an email message without sending it.
+        
+        Used by send_email and by the bulk delivery queue, which sends many
+        rendered messages over one shared connection.
+        """
+        # Prepare email content
+        context = {
+            'notification': self,
+            'user': self.recipient,
+            'site_name': 'LMS Platform',
+            'action_url': self.get_absolute_action_url(),
+        }
+        
+        subject = f"[LMS] {self.title}"
+        
+        # Use certificate template for certificate notifications
+        if self.notification_type.name == 'certificate_earned':
+            html_message = render_to_string('lms_notifications/email/certificate_notification.html', context)
+        else:
+            html_message = render_to_string('lms_notifications/email/notification.html', context)
+        
+        text_message = render_to_string('lms_notifications/email/notification.txt', context)
+        
+        # Create email message
+        email = EmailMultiAlternatives(
+            subject=subject,
+            body=text_message,
+            from_email=from_email,
+            to=[self.recipient.email],
+            connection=connection
+        )
+        email.attach_alternative(html_message, "text/html")
+        
+        # Add reply-to if specified
+        if reply_to_email:
+            email.reply_to = [reply_to_email]
+        
+        return email
+
     def get_absolute_action_url(self):
         """Get full URL for action"""
         if self.action_url:
@@ -402,6 +440,7 @@ class BulkNotification(models.Model):
     STATUS_CHOICES = [
         ('draft', 'Draft'),
         ('scheduled', 'Scheduled'),
+        ('queued', 'Queued'),
         ('sending', 'Sending'),
         ('completed', 'Completed'),
         ('failed', 'Failed'),
@@ -464,85 +503,55 @@ class BulkNotification(models.Model):
     def __str__(self):
         return f"Bulk: {self.title} ({self.status})"
 
-    def get_recipients(self):
-        """Get list of users who should receive this notification"""
-        recipients = set()
+    def get_recipient_ids(self):
+        """
+        Return a queryset of distinct active recipient user IDs.
+        
+        The IDs are resolved in SQL and can be streamed with .iterator(), so
+        tenant-wide notifications never materialise full user objects.
+        """
+        from users.models import CustomUser
+        
+        users = CustomUser.objects.filter(is_active=True)
         
         if self.recipient_type == 'all_users':
-            from users.models import CustomUser
-            recipients.update(CustomUser.objects.filter(is_active=True))
-            
+            pass
         elif self.recipient_type == 'role':
-            from users.models import CustomUser
-            if self.target_roles:
-                recipients.update(CustomUser.objects.filter(
-                    role__in=self.target_roles,
-                    is_active=True
-                ))
-                
+            users = users.filter(role__in=self.target_roles or [])
         elif self.recipient_type == 'branch':
-            for branch in self.target_branches.all():
-                recipients.update(branch.users.filter(is_active=True))
-                
+            users = users.filter(branch__in=self.target_branches.all())
         elif self.recipient_type == 'group':
-            for group in self.target_groups.all():
-                recipients.update(group.students.filter(is_active=True))
-                
+            users = users.filter(
+                group_memberships__group__in=self.target_groups.all(),
+                group_memberships__is_active=True
+            )
         elif self.recipient_type == 'course':
-            for course in self.target_courses.all():
-                # Get enrolled students
-                recipients.update(course.enrolled_students.filter(is_active=True))
-                
+            users = users.filter(courseenrollment__course__in=self.target_courses.all())
         elif self.recipient_type == 'custom':
-            recipients.update(self.custom_recipients.filter(is_active=True))
+            users = users.filter(pk__in=self.custom_recipients.values('pk'))
+        else:
+            users = users.none()
         
-        return list(recipients)
+        return users.order_by('pk').values_list('pk', flat=True).distinct()
+
+    def get_recipients(self):
+        """Get list of users who should receive this notification"""
+        from users.models import CustomUser
+        return list(CustomUser.objects.filter(pk__in=self.get_recipient_ids()))
 
     def send_notifications(self):
-        """Send individual notifications to all recipients"""
-        if self.status != 'draft' and self.status != 'scheduled':
-            return False
-        
-        self.status = 'sending'
-        self.started_at = timezone.now()
-        self.save()
-        
-        recipients = self.get_recipients()
-        self.total_recipients = len(recipients)
-        self.save()
-        
-        sent_count = 0
-        failed_count = 0
+        """
+        Send individual notifications to all recipients.
         
-        for recipient in recipients:
-            try:
-                # Create individual notification
-                notification = Notification.objects.create(
-                    notification_type=self.notification_type,
-                    recipient=recipient,
-                    sender=self.sender,
-                    title=self.title,
-                    message=self.message,
-                    short_message=self.short_message,
-                    priority=self.priority,
-                    action_url=self.action_url,
-                    action_text=self.action_text,
-                )
-                
-                # Send email if needed
-                if notification.send_email():
-                    sent_count += 1
-                else:
-                    sent_count += 1  # Still count as sent even if email wasn't sent
-                    
-            except Exception as e:
-                failed_count += 1
+        Delegates to the bulk fan-out engine, which creates Notification rows
+        in chunks and hands emails to a batched delivery queue. Progress is
+        tracked in sent_count / failed_count while the send is running.
+        """
+        if self.status not in ('draft', 'scheduled', 'queued'):
+            return False
         
-        self.sent_count = sent_count
-        self.failed_count = failed_count
-        self.status = 'completed' if failed_count == 0 else 'failed'
-        self.completed_at = timezone.now()
-        self.save()
+        from .fanout import BulkNotificationFanout
+        BulkNotificationFanout(self).run()
         
         return True
 
@@ -642,7 +651,8 @@ class NotificationLog(models.Model):
     )
     
     details = models.JSONField(default=dict, blank=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the event happened; rows are written in batches by core.event_ingestion
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         ordering = ['-timestamp']
@@ -659,5 +669,111 @@ class NotificationLog(models.Model):
             return f"{self.action} - {self.bulk_notification.title}"
         return f"{self.action} - {self.user.username}"
 
+    @classmethod
+    def log_action(cls, action, user, notification=None, bulk_notification=None, details=None):
+        """Record a notification activity; written in a batch by core.event_ingestion"""
+        from core.event_ingestion import log_event
+
+        log_event(
+            cls,
+            action=action,
+            user=user,
+            notification=notification,
+            bulk_notification=bulk_notification,
+            details=details or {}
+        )
+
+
+class NotificationJobRun(models.Model):
+    """
+    Runtime and row counts for each execution of a scheduled notification job
+    """
+    STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+    
+    job_name = models.CharField(max_length=100)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='running')
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    duration_ms = models.PositiveIntegerField(null=True, blank=True)
+    
+    # Row counts
+    candidate_count = models.PositiveIntegerField(default=0, help_text="Rows returned by the job's candidate query")
+    created_count = models.PositiveIntegerField(default=0, help_text="Notifications created")
+    skipped_count = models.PositiveIntegerField(default=0, help_text="Candidates skipped (already sent or not eligible)")
+    email_sent_count = models.PositiveIntegerField(default=0)
+    email_failed_count = models.PositiveIntegerField(default=0)
+    
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['job_name', '-started_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.job_name} ({self.status}) - {self.started_at}"
+
 
 
+class DeadlineEntry(models.Model):
+    """
+    One dated deadline per entity and audience, scanned for reminders.
+
+    Maintained from assignment due dates, quiz expiries, topic and course end
+    dates and certificate expiries by lms_notifications.deadlines. Exactly
+    one of course or user is set: the audience the deadline applies to.
+    closed is set once the scanner has passed due_at, so the partial index
+    only covers deadlines still ahead of it. synced_at lets the scanner catch
+    up on deadlines created or moved when already inside a reminder lead.
+    """
+    ENTITY_CHOICES = [
+        ('assignment', 'Assignment'),
+        ('quiz', 'Quiz'),
+        ('topic', 'Topic'),
+        ('course', 'Course'),
+        ('certificate', 'Certificate'),
+    ]
+
+    entity_type = models.CharField(max_length=20, choices=ENTITY_CHOICES)
+    entity_id = models.PositiveIntegerField()
+    course = models.ForeignKey('courses.Course', on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    due_at = models.DateTimeField()
+    title = models.CharField(max_length=800)
+    url = models.CharField(max_length=255)
+    closed = models.BooleanField(default=False, help_text="Set once the deadline scanner has passed due_at")
+    synced_at = models.DateTimeField(default=timezone.now, help_text="When this due_at was first indexed")
+
+    class Meta:
+        ordering = ['due_at']
+        indexes = [
+            models.Index(
+                fields=['entity_type', 'due_at'],
+                name='deadline_open_due_idx',
+                condition=models.Q(closed=False),
+            ),
+            models.Index(fields=['entity_type', 'entity_id'], name='deadline_entity_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_entity_type_display()}: {self.title} ({self.due_at:%Y-%m-%d})"
+
+
+class DeadlineScanState(models.Model):
+    """
+    High-water mark of the deadline scanner per entity type: every deadline
+    event up to scanned_until has been emitted. locked_until is the lease of
+    the scan currently running, so scans of one type never overlap.
+    """
+    entity_type = models.CharField(max_length=20, unique=True, choices=DeadlineEntry.ENTITY_CHOICES)
+    scanned_until = models.DateTimeField()
+    locked_until = models.DateTimeField(null=True, blank=True, help_text="Lease of the running scan")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.entity_type} scanned until {self.scanned_until}"
@@ -114,6 +114,30 @@ def create_default_notification_types(sender, **kwargs):
                 'default_email_enabled': True,
                 'default_web_enabled': True,
             },
+            {
+                'name': 'deadline_overdue',
+                'display_name': 'Deadline Overdue',
+                'description': 'Notices about assignments, quizzes and topics whose deadline passed before you completed them',
+                'available_to_roles': ['learner'],
+                'default_email_enabled': True,
+                'default_web_enabled': True,
+            },
+            {
+                'name': 'deadline_expired',
+                'display_name': 'Access or Certificate Expired',
+                'description': 'Notices when your access to a course or one of your certificates expires',
+                'available_to_roles': ['globaladmin', 'superadmin', 'admin', 'instructor', 'learner'],
+                'default_email_enabled': True,
+                'default_web_enabled': True,
+            },
+            {
+                'name': 'certificate_expiry_reminder',
+                'display_name': 'Certificate Expiry Reminder',
+                'description': 'Reminders before your certificates expire',
+                'available_to_roles': ['globaladmin', 'superadmin', 'admin', 'instructor', 'learner'],
+                'default_email_enabled': True,
+                'default_web_enabled': True,
+            },
             {
                 'name': 'discussion_reply',
                 'display_name': 'Discussion Reply',
@@ -0,0 +1,159 @@
+"""
+Tests for the deadline index and its high-water-mark scanner.
+"""
+
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from assignments.models import Assignment, AssignmentCourse
+from certificates.models import CertificateTemplate, IssuedCertificate
+from courses.models import Course, CourseEnrollment
+
+from .deadlines import OVERDUE, scan_entity_type
+from .jobs import run_deadline_reminders
+from .models import DeadlineEntry, DeadlineScanState, Notification, NotificationSettings
+
+User = get_user_model()
+
+
+class DeadlineScanTestCase(TestCase):
+    """Each deadline event is sent once, whenever the scanner runs."""
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.instructor = User.objects.create_user(
+            username='deadline_instructor',
+            email='deadline_instructor@example.com',
+            password='testpass123',
+            role='instructor'
+        )
+        self.learner = User.objects.create_user(
+            username='deadline_learner',
+            email='deadline_learner@example.com',
+            password='testpass123',
+            role='learner'
+        )
+        self.course = Course.objects.create(title='Deadline course', instructor=self.instructor)
+        CourseEnrollment.objects.create(user=self.learner, course=self.course)
+
+    def create_assignment(self, due_date):
+        with self.captureOnCommitCallbacks(execute=True):
+            assignment = Assignment.objects.create(
+                title='Field report',
+                description='Report',
+                user=self.instructor,
+                due_date=due_date
+            )
+            AssignmentCourse.objects.create(assignment=assignment, course=self.course, is_primary=True)
+        return assignment
+
+    def notifications(self, type_name):
+        return Notification.objects.filter(recipient=self.learner, notification_type__name=type_name)
+
+    def test_second_scan_sends_nothing(self):
+        self.create_assignment(self.now + timedelta(hours=36))
+
+        scan_entity_type('assignment', now=self.now)
+        self.assertEqual(self.notifications('deadline_reminder').count(), 1)
+
+        scan_entity_type('assignment', now=self.now + timedelta(hours=1))
+        self.assertEqual(self.notifications('deadline_reminder').count(), 1)
+
+    def test_scan_does_not_go_back_behind_the_mark(self):
+        scan_entity_type('assignment', now=self.now)
+
+        self.assertEqual(scan_entity_type('assignment', now=self.now - timedelta(hours=1)), {})
+        self.assertEqual(DeadlineScanState.objects.get(entity_type='assignment').scanned_until, self.now)
+
+    def test_scan_is_skipped_while_another_holds_the_lock(self):
+        self.create_assignment(self.now - timedelta(hours=1))
+        DeadlineScanState.objects.create(
+            entity_type='assignment',
+            scanned_until=self.now - timedelta(hours=2),
+            locked_until=timezone.now() + timedelta(minutes=5)
+        )
+
+        self.assertEqual(scan_entity_type('assignment', now=self.now), {})
+        self.assertFalse(self.notifications('deadline_overdue').exists())
+        self.assertEqual(
+            DeadlineScanState.objects.get(entity_type='assignment').scanned_until, self.now - timedelta(hours=2)
+        )
+
+    def test_moved_due_date_resyncs_index(self):
+        assignment = self.create_assignment(self.now + timedelta(days=5))
+        scan_entity_type('assignment', now=self.now)
+        self.assertEqual(self.notifications('deadline_reminder').count(), 0)
+
+        moved = self.now + timedelta(days=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            assignment.due_date = moved
+            assignment.save()
+
+        entry = DeadlineEntry.objects.get(entity_type='assignment', entity_id=assignment.id)
+        self.assertEqual(entry.due_at, moved)
+        # Moved inside the lead after the mark passed its reminder window
+        scan_entity_type('assignment', now=self.now + timedelta(hours=1))
+        self.assertEqual(self.notifications('deadline_reminder').count(), 1)
+
+    def test_scan_closes_passed_rows(self):
+        assignment = self.create_assignment(self.now + timedelta(hours=1))
+        scan_entity_type('assignment', now=self.now)
+
+        scan_entity_type('assignment', now=self.now + timedelta(hours=2))
+
+        self.assertTrue(DeadlineEntry.objects.get(entity_type='assignment', entity_id=assignment.id).closed)
+        self.assertEqual(self.notifications('deadline_overdue').count(), 1)
+
+    def test_shares_key_with_run_deadline_reminders(self):
+        self.create_assignment(self.now + timedelta(hours=36))
+        self.assertEqual(run_deadline_reminders(now=self.now), 1)
+
+        scan_entity_type('assignment', now=self.now)
+
+        self.assertEqual(self.notifications('deadline_reminder').count(), 1)
+
+    def test_dry_run_sends_nothing_and_keeps_the_mark(self):
+        self.create_assignment(self.now - timedelta(hours=1))
+
+        found = scan_entity_type('assignment', now=self.now, dry_run=True)
+
+        self.assertEqual(found[OVERDUE], 1)
+        self.assertFalse(self.notifications('deadline_overdue').exists())
+        self.assertFalse(DeadlineScanState.objects.filter(entity_type='assignment').exists())
+        self.assertFalse(DeadlineEntry.objects.get(entity_type='assignment').closed)
+
+    def test_certificate_reminders_follow_user_intervals(self):
+        weekly = User.objects.create_user(
+            username='deadline_weekly',
+            email='deadline_weekly@example.com',
+            password='testpass123',
+            role='learner'
+        )
+        NotificationSettings.objects.filter(user=weekly).update(certificate_expiry_reminder_intervals=[7])
+        template = CertificateTemplate.objects.create(name='Safety', created_by=self.instructor)
+        scan_entity_type('certificate', now=self.now)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for index, recipient in enumerate((self.learner, weekly)):
+                IssuedCertificate.objects.create(
+                    template=template,
+                    recipient=recipient,
+                    issued_by=self.instructor,
+                    certificate_number=f'DEADLINE-{index}',
+                    expiry_date=self.now + timedelta(days=20)
+                )
+
+        # Issued inside the learner's default 30-day interval, outside the weekly one
+        scan_entity_type('certificate', now=self.now + timedelta(hours=1))
+        self.assertEqual(self.notifications('certificate_expiry_reminder').count(), 1)
+        self.assertFalse(Notification.objects.filter(recipient=weekly).exists())
+
+        scan_entity_type('certificate', now=self.now + timedelta(days=13, hours=12))
+        self.assertEqual(self.notifications('certificate_expiry_reminder').count(), 1)
+        self.assertEqual(
+            Notification.objects.filter(recipient=weekly, notification_type__name='certificate_expiry_reminder').count(),
+            1
+        )
@@ -89,10 +89,10 @@ def send_notification(
         )
         
         # Log creation
-        NotificationLog.objects.create(
+        NotificationLog.log_action(
+            'created',
+            sender or recipient,
             notification=notification,
-            action='created',
-            user=sender or recipient,
             details={'send_email': send_email}
         )
         
@@ -101,23 +101,19 @@ def send_notification(
             try:
                 email_sent = notification.send_email()
                 if email_sent:
-                    NotificationLog.objects.create(
-                        notification=notification,
-                        action='email_sent',
-                        user=recipient
-                    )
+                    NotificationLog.log_action('email_sent', recipient, notification=notification)
                 else:
-                    NotificationLog.objects.create(
+                    NotificationLog.log_action(
+                        'email_failed',
+                        recipient,
                         notification=notification,
-                        action='email_failed',
-                        user=recipient,
                         details={'reason': 'User settings'}
                     )
             except Exception as e:
-                NotificationLog.objects.create(
+                NotificationLog.log_action(
+                    'email_failed',
+                    recipient,
                     notification=notification,
-                    action='email_failed',
-                    user=recipient,
                     details={'error': str(e)}
                 )
         
@@ -214,10 +210,10 @@ def send_bulk_notification(
         if not scheduled_for:
             result = bulk_notification.send_notifications()
             if result:
-                NotificationLog.objects.create(
+                NotificationLog.log_action(
+                    'bulk_sent',
+                    sender,
                     bulk_notification=bulk_notification,
-                    action='bulk_sent',
-                    user=sender,
                     details={'total_recipients': bulk_notification.total_recipients}
                 )
         
@@ -261,15 +257,13 @@ def mark_notifications_read(user, notification_ids=None):
     if notification_ids:
         notifications = notifications.filter(id__in=notification_ids)
     
+    # Collect the ids first: once updated the rows no longer match is_read=False
+    read_ids = list(notifications.values_list('id', flat=True))
     count = notifications.update(is_read=True, read_at=timezone.now())
     
     # Log the action for each notification
-    for notification in notifications:
-        NotificationLog.objects.create(
-            notification=notification,
-            action='read',
-            user=user
-        )
+    for notification_id in read_ids:
+        NotificationLog.log_action('read', user, notification=notification_id)
     
     return count
 
@@ -17,6 +17,7 @@ from .models import (
     NotificationType, BulkNotification, NotificationTemplate, NotificationLog,
     BranchNotificationSettings
 )
+from .fanout import queue_bulk_notification
 from .forms import (
     NotificationSettingsForm, NotificationTypeSettingsForm, NotificationTypeSettingsFormSet,
     BulkNotificationForm, NotificationTemplateForm, QuickNotificationForm, 
@@ -238,11 +239,7 @@ def mark_notification_read(request, notification_id):
     notification.mark_as_read()
     
     # Log the action
-    NotificationLog.objects.create(
-        notification=notification,
-        action='read',
-        user=request.user
-    )
+    NotificationLog.log_action('read', request.user, notification=notification)
     
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return JsonResponse({'success': True})
@@ -638,25 +635,18 @@ def bulk_notification_send(request, bulk_id):
         sender=request.user
     )
     
-    if bulk_notification.status != 'draft':
+    # Send the notification (inline or on the notifications queue) and log it
+    if bulk_notification.status != 'draft' or not queue_bulk_notification(bulk_notification, request.user):
         messages.error(request, 'This bulk notification has already been sent or is in progress.')
         return redirect('lms_notifications:bulk_notification_list')
     
-    # Send the notification
-    bulk_notification.send_notifications()
-    
-    # Log the action
-    NotificationLog.objects.create(
-        bulk_notification=bulk_notification,
-        action='bulk_sent',
-        user=request.user,
-        details={'total_recipients': bulk_notification.total_recipients}
-    )
-    
-    messages.success(
-        request, 
-        f'Bulk notification sent to {bulk_notification.total_recipients} recipients.'
-    )
+    if bulk_notification.status == 'queued':
+        messages.success(request, 'Bulk notification has been queued for sending.')
+    else:
+        messages.success(
+            request, 
+            f'Bulk notification sent to {bulk_notification.total_recipients} recipients.'
+        )
     return redirect('lms_notifications:bulk_notification_list')
 
 
@@ -845,11 +835,7 @@ def mark_read_api(request, notification_id):
         notification.mark_as_read()
         
         # Log the action
-        NotificationLog.objects.create(
-            notification=notification,
-            action='read',
-            user=request.user
-        )
+        NotificationLog.log_action('read', request.user, notification=notification)
         
         return JsonResponse({'success': True})
     except Notification.DoesNotExist:
@@ -1117,7 +1103,8 @@ def branch_notification_settings(request):
             categorized_types['Session & Account'].append(item)
         elif nt.name in ['course_enrollment', 'course_announcement', 'course_completion', 'conference_reminder', 'enrollment_approved', 'enrollment_rejected']:
             categorized_types['Course Activities'].append(item)
-        elif nt.name in ['assignment_due', 'assignment_graded', 'quiz_available', 'quiz_reminder', 'certificate_earned', 'certificate_expiry_reminder']:
+        elif nt.name in ['assignment_due', 'assignment_graded', 'quiz_available', 'quiz_reminder', 'certificate_earned', 'certificate_expiry_reminder',
+                         'deadline_overdue', 'deadline_expired']:
             categorized_types['Assignments & Assessments'].append(item)
         elif nt.name in ['message_received', 'discussion_reply', 'instructor_feedback', 'bulk_announcement']:
             categorized_types['Communication'].append(item)
@@ -1434,6 +1434,11 @@ def submit_quiz(request, attempt_id):
         saved_count = process_quiz_answers(request, attempt)
         logger.info(f"Saved {saved_count} answers for attempt {attempt_id}")
         
+        # Write active time still pending in the heartbeat accumulator
+        from core.heartbeat import flush_heartbeat
+        if flush_heartbeat(request.user, 'quiz', attempt.id):
+            attempt.refresh_from_db(fields=['active_time_seconds', 'page_focus_time', 'is_currently_active'])
+        
         # Get and save active time from form submission
         active_time_seconds = request.POST.get('active_time_seconds')
         if active_time_seconds:
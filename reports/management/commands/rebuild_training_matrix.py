@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from courses.models import CourseEnrollment
+from reports.training_matrix import REFRESH_BATCH_SIZE, refresh_enrollments
+
+
+class Command(BaseCommand):
+    help = 'Recompute the precomputed training matrix cells from enrollments and topic progress'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', type=int, help='Only rebuild the cells of this course id')
+        parser.add_argument('--batch-size', type=int, default=REFRESH_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        queryset = CourseEnrollment.objects.all()
+        if options['course']:
+            queryset = queryset.filter(course_id=options['course'])
+        refreshed = refresh_enrollments(queryset, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {refreshed} training matrix cells"))
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.24 on 2026-10-18 22:30
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+# Status only; run rebuild_training_matrix afterwards to fill in progress
+BACKFILL_SQL = """
+INSERT INTO reports_trainingmatrixcell
+    (enrollment_id, user_id, course_id, status, progress, completed, completion_date, last_accessed, updated_at)
+SELECT id, user_id, course_id,
+       CASE WHEN completed THEN 'completed'
+            WHEN last_accessed IS NOT NULL THEN 'in_progress'
+            ELSE 'not_started' END,
+       CASE WHEN completed THEN 100 ELSE 0 END,
+       completed, completion_date, last_accessed, now()
+FROM courses_courseenrollment
+ON CONFLICT (enrollment_id) DO NOTHING;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('courses', '0009_search_vector'),
+        ('reports', '0003_auto_20251111_0047'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrainingMatrixCell',
+            fields=[
+                ('enrollment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='training_matrix_cell', serialize=False, to='courses.courseenrollment')),
+                ('status', models.CharField(choices=[('not_started', 'Not Started'), ('in_progress', 'In Progress'), ('completed', 'Completed')], default='not_started', max_length=20)),
+                ('progress', models.PositiveSmallIntegerField(default=0)),
+                ('completed', models.BooleanField(default=False)),
+                ('completion_date', models.DateTimeField(blank=True, null=True)),
+                ('last_accessed', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='courses.course')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'status', 'course'], name='matrix_cell_user_status_idx'), models.Index(fields=['course', 'status'], name='matrix_cell_course_status_idx')],
+            },
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
@@ -155,3 +155,44 @@ class ReportTemplate(models.Model):
 
     def __str__(self):
         return self.name
+
+
+class TrainingMatrixCell(models.Model):
+    """
+    Precomputed training matrix status of one enrollment.
+
+    Kept current by reports.training_matrix from CourseEnrollment, TopicProgress
+    and CourseTopic changes, so the matrix never computes progress per cell.
+    """
+    STATUS_NOT_STARTED = 'not_started'
+    STATUS_IN_PROGRESS = 'in_progress'
+    STATUS_COMPLETED = 'completed'
+    STATUS_CHOICES = [
+        (STATUS_NOT_STARTED, 'Not Started'),
+        (STATUS_IN_PROGRESS, 'In Progress'),
+        (STATUS_COMPLETED, 'Completed'),
+    ]
+
+    enrollment = models.OneToOneField(
+        'courses.CourseEnrollment',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='training_matrix_cell'
+    )
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    course = models.ForeignKey('courses.Course', on_delete=models.CASCADE, related_name='+')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_NOT_STARTED)
+    progress = models.PositiveSmallIntegerField(default=0)
+    completed = models.BooleanField(default=False)
+    completion_date = models.DateTimeField(null=True, blank=True)
+    last_accessed = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'status', 'course'], name='matrix_cell_user_status_idx'),
+            models.Index(fields=['course', 'status'], name='matrix_cell_course_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}/{self.course_id}: {self.status} ({self.progress}%)"
@@ -1,11 +1,12 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.signals import user_logged_in
-from courses.models import CourseEnrollment
+from courses.models import CourseEnrollment, CourseTopic, TopicProgress
 from quiz.models import QuizAttempt
 from assignments.models import AssignmentSubmission
 from discussions.models import Discussion, Comment
 from .models import Event
+from .training_matrix import schedule_refresh
 import logging
 
 logger = logging.getLogger(__name__)
@@ -120,4 +121,24 @@ def log_forum_post(sender, instance, created, **kwargs):
                 }
             )
     except Exception as e:
-        logger.error(f"Failed to log forum post event for user {instance.created_by.id}: {str(e)}") 
\ No newline at end of file
+        logger.error(f"Failed to log forum post event for user {instance.created_by.id}: {str(e)}")
+
+@receiver(post_save, sender=CourseEnrollment)
+def refresh_enrollment_matrix_cell(sender, instance, **kwargs):
+    """Keep the training matrix cell of a saved enrollment current"""
+    schedule_refresh(user_id=instance.user_id, course_id=instance.course_id)
+
+@receiver(post_save, sender=TopicProgress)
+def refresh_topic_progress_matrix_cells(sender, instance, **kwargs):
+    """Topic progress changes the course progress shown in the training matrix"""
+    if instance.course_id:
+        schedule_refresh(user_id=instance.user_id, course_id=instance.course_id)
+    else:
+        for course_id in CourseTopic.objects.filter(topic_id=instance.topic_id).values_list('course_id', flat=True):
+            schedule_refresh(user_id=instance.user_id, course_id=course_id)
+
+@receiver([post_save, post_delete], sender=CourseTopic)
+def refresh_course_matrix_cells(sender, instance, created=True, **kwargs):
+    """Adding or removing a topic changes the progress of every learner in the course"""
+    if created:
+        schedule_refresh(course_id=instance.course_id)
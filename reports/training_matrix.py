@@ -0,0 +1,267 @@
+"""
+Training matrix service.
+
+Each enrollment has a TrainingMatrixCell holding its status and progress.
+Cells are refreshed on commit when an enrollment or one of the learner's
+TopicProgress records is saved, and for a whole course when its topic list
+changes. Bulk enrollment refreshes the new cells explicitly, and
+rebuild_training_matrix recomputes everything.
+
+TrainingMatrix pushes the role, instructor and focus filters into SQL and
+pages learners by (username, id) keyset, then reads the cells of that page
+only, so any page costs the same as the first.
+"""
+
+import logging
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+REFRESH_BATCH_SIZE = 500
+MAX_PER_PAGE = 100
+
+FOCUS_STATUSES = {
+    'completed': ('completed',),
+    'not_passed': ('in_progress',),
+    'in_progress': ('in_progress',),
+    'not_started': ('not_started',),
+}
+
+
+def _cell_status(enrollment):
+    from .models import TrainingMatrixCell
+
+    if enrollment.completed:
+        return TrainingMatrixCell.STATUS_COMPLETED
+    if enrollment.last_accessed:
+        return TrainingMatrixCell.STATUS_IN_PROGRESS
+    return TrainingMatrixCell.STATUS_NOT_STARTED
+
+
+def _progress_map(enrollments):
+    """
+    {(user_id, course_id): progress} for enrollments, matching
+    CourseEnrollment.get_progress() in two queries
+    """
+    from courses.models import CourseTopic, TopicProgress
+
+    course_ids = {e.course_id for e in enrollments}
+    user_ids = {e.user_id for e in enrollments}
+    topics_by_course = defaultdict(set)
+    for course_id, topic_id in CourseTopic.objects.filter(
+        course_id__in=course_ids
+    ).values_list('course_id', 'topic_id'):
+        topics_by_course[course_id].add(topic_id)
+
+    all_topic_ids = set().union(*topics_by_course.values()) if topics_by_course else set()
+    scoped = defaultdict(dict)
+    legacy = defaultdict(dict)
+    if all_topic_ids:
+        for record in TopicProgress.objects.filter(
+            user_id__in=user_ids,
+            topic_id__in=all_topic_ids
+        ).select_related('topic'):
+            if record.course_id is None:
+                legacy[record.user_id][record.topic_id] = record
+            else:
+                scoped[(record.user_id, record.course_id)][record.topic_id] = record
+
+    progress = {}
+    for enrollment in enrollments:
+        topic_ids = topics_by_course.get(enrollment.course_id)
+        key = (enrollment.user_id, enrollment.course_id)
+        if not topic_ids:
+            progress[key] = 0
+            continue
+        # Like get_progress(), legacy records without a course only count
+        # when the learner has no course-scoped records
+        records = scoped.get(key)
+        if not records:
+            records = {
+                topic_id: record
+                for topic_id, record in legacy.get(enrollment.user_id, {}).items()
+                if topic_id in topic_ids
+            }
+        total = sum(
+            records[topic_id].get_progress_percentage()
+            for topic_id in topic_ids if topic_id in records
+        )
+        progress[key] = max(0, min(100, round(total / len(topic_ids))))
+    return progress
+
+
+def refresh_cells(enrollments):
+    """Recompute and upsert the cells of the given CourseEnrollment objects"""
+    from .models import TrainingMatrixCell
+
+    enrollments = list(enrollments)
+    if not enrollments:
+        return 0
+    now = timezone.now()
+    progress = _progress_map(enrollments)
+    cells = [
+        TrainingMatrixCell(
+            enrollment_id=e.pk,
+            user_id=e.user_id,
+            course_id=e.course_id,
+            status=_cell_status(e),
+            progress=100 if e.completed else progress.get((e.user_id, e.course_id), 0),
+            completed=e.completed,
+            completion_date=e.completion_date,
+            last_accessed=e.last_accessed,
+            updated_at=now,
+        )
+        for e in enrollments
+    ]
+    TrainingMatrixCell.objects.bulk_create(
+        cells,
+        update_conflicts=True,
+        unique_fields=['enrollment'],
+        update_fields=['status', 'progress', 'completed', 'completion_date', 'last_accessed', 'updated_at'],
+    )
+    return len(cells)
+
+
+def refresh_enrollments(queryset, batch_size=REFRESH_BATCH_SIZE):
+    """Refresh the cells of a CourseEnrollment queryset in batches"""
+    refreshed = 0
+    batch = []
+    for enrollment in queryset.only(
+        'id', 'user_id', 'course_id', 'completed', 'completion_date', 'last_accessed'
+    ).order_by('course_id', 'id').iterator(chunk_size=batch_size):
+        batch.append(enrollment)
+        if len(batch) >= batch_size:
+            refreshed += refresh_cells(batch)
+            batch = []
+    refreshed += refresh_cells(batch)
+    return refreshed
+
+
+def schedule_refresh(user_id=None, course_id=None, user_ids=None):
+    """Refresh the matching cells once the current transaction commits"""
+    from courses.models import CourseEnrollment
+
+    def _refresh():
+        queryset = CourseEnrollment.objects.all()
+        if course_id is not None:
+            queryset = queryset.filter(course_id=course_id)
+        if user_id is not None:
+            queryset = queryset.filter(user_id=user_id)
+        if user_ids is not None:
+            queryset = queryset.filter(user_id__in=user_ids)
+        try:
+            refresh_enrollments(queryset)
+        except Exception as e:
+            logger.error(f"Training matrix refresh failed (user={user_id}, course={course_id}): {e}")
+
+    transaction.on_commit(_refresh)
+
+
+class TrainingMatrix:
+    """One keyset page of the training matrix for a viewer"""
+
+    def __init__(self, users, courses, focus='all', instructor_only=False, per_page=20):
+        """
+        users is the learner scope (branch, search and business filters
+        already applied), courses the matrix columns.
+        """
+        self.courses = courses
+        self.focus = focus or 'all'
+        self.per_page = max(1, min(int(per_page), MAX_PER_PAGE))
+        self.users = self._filter_users(users.filter(role='learner'), instructor_only)
+
+    def _filter_users(self, users, instructor_only):
+        from courses.models import CourseEnrollment
+        from .models import TrainingMatrixCell
+
+        course_ids = self.courses.order_by().values('id')
+        if instructor_only:
+            users = users.filter(Exists(CourseEnrollment.objects.filter(
+                user_id=OuterRef('pk'), course_id__in=course_ids
+            )))
+
+        statuses = FOCUS_STATUSES.get(self.focus)
+        if statuses:
+            users = users.filter(Exists(TrainingMatrixCell.objects.filter(
+                user_id=OuterRef('pk'), course_id__in=course_ids, status__in=statuses
+            )))
+        elif self.focus == 'not_enrolled':
+            # Learners missing at least one of the matrix courses
+            enrolled = CourseEnrollment.objects.filter(
+                user_id=OuterRef('pk'), course_id__in=course_ids
+            ).order_by().values('user_id').annotate(n=Count('id')).values('n')
+            users = users.annotate(
+                matrix_enrolled=Coalesce(Subquery(enrolled), Value(0))
+            ).filter(matrix_enrolled__lt=self.courses.count())
+        return users
+
+    def page(self, after=None, before=None, last=False):
+        """
+        Learners after (or before) the given username, or the last page.
+
+        Returns (users, has_previous, has_next) with each user's
+        course_enrollments mapping course id to its cell.
+        """
+        users = self.users.order_by('username', 'id')
+        if before is not None or last:
+            if before is not None:
+                users = users.filter(username__lt=before)
+            rows = list(users.reverse()[:self.per_page + 1])
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            has_next = not last
+        else:
+            if after is not None:
+                users = users.filter(username__gt=after)
+            rows = list(users[:self.per_page + 1])
+            has_next = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            has_previous = after is not None
+        self.attach_cells(rows)
+        return rows, has_previous, has_next
+
+    def iter_users(self, limit, batch_size=REFRESH_BATCH_SIZE):
+        """All filtered learners, up to limit, with their cells attached"""
+        after = None
+        remaining = limit
+        users = self.users.order_by('username', 'id')
+        while remaining > 0:
+            chunk = users if after is None else users.filter(username__gt=after)
+            rows = list(chunk[:min(batch_size, remaining)])
+            if not rows:
+                return
+            self.attach_cells(rows)
+            yield from rows
+            remaining -= len(rows)
+            after = rows[-1].username
+
+    def attach_cells(self, users):
+        """Set user.course_enrollments for a page of users in one query"""
+        from courses.models import CourseEnrollment
+
+        by_user = {user.pk: user for user in users}
+        for user in users:
+            user.course_enrollments = {}
+        if not by_user:
+            return
+        enrollments = list(CourseEnrollment.objects.filter(
+            user_id__in=by_user, course_id__in=self.courses.order_by().values('id')
+        ).select_related('training_matrix_cell'))
+
+        # Enrollments created outside the maintained paths get their cell now
+        missing = [e for e in enrollments if not hasattr(e, 'training_matrix_cell')]
+        if missing:
+            refresh_cells(missing)
+            enrollments = list(CourseEnrollment.objects.filter(
+                pk__in=[e.pk for e in enrollments]
+            ).select_related('training_matrix_cell'))
+
+        for enrollment in enrollments:
+            cell = getattr(enrollment, 'training_matrix_cell', None)
+            if cell is not None:
+                by_user[enrollment.user_id].course_enrollments[enrollment.course_id] = cell
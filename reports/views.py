@@ -1,5 +1,5 @@
 from django.contrib.auth import get_user_model
-from django.db.models import Count, Q, Prefetch, F, ExpressionWrapper, FloatField, Sum, Avg, Max, fields, Case, When, Value, IntegerField, Subquery, OuterRef
+from django.db.models import Count, Q, F, ExpressionWrapper, FloatField, Sum, Avg, Max, fields, Case, When, Value, IntegerField, Subquery, OuterRef
 from django.urls import reverse
 from django.db.models.functions import TruncDate, Cast, ExtractMonth, ExtractYear
 from django.utils import timezone
@@ -17,6 +17,8 @@ from calendar_app.models import CalendarEvent
 from users.models import Branch
 from groups.models import BranchGroup
 from courses.models import Course, CourseEnrollment, TopicProgress, Topic, CourseTopic
+from courses.visibility import get_instructor_course_ids, get_user_course_index
+from .training_matrix import TrainingMatrix
 from categories.models import CourseCategory
 from core.utils.forms import CustomTinyMCEFormField
 from core.utils.business_filtering import filter_queryset_by_business
@@ -493,11 +495,7 @@ def apply_role_based_filtering(user, queryset, business_id=None, branch_id=None,
             elif queryset.model.__name__ == 'CourseEnrollment':
                 if user.role == 'instructor':
                     # For instructors, include enrollments from group-assigned courses
-                    group_courses = queryset.model.objects.filter(
-                        course__accessible_groups__memberships__user=user,
-                        course__accessible_groups__memberships__is_active=True,
-                        course__accessible_groups__memberships__custom_role__name__icontains='instructor'
-                    ).values_list('course_id', flat=True)
+                    group_courses = get_user_course_index(user).group_instructor
                     return queryset.filter(
                         Q(user__branch=effective_branch) | Q(course_id__in=group_courses)
                     )
@@ -510,20 +508,14 @@ def apply_role_based_filtering(user, queryset, business_id=None, branch_id=None,
                     # For instructors, include group-assigned courses
                     return queryset.filter(
                         Q(branch=effective_branch) |
-                        Q(accessible_groups__memberships__user=user,
-                          accessible_groups__memberships__is_active=True,
-                          accessible_groups__memberships__custom_role__name__icontains='instructor')
-                    ).distinct()
+                        Q(id__in=get_user_course_index(user).group_instructor)
+                    )
                 else:
                     return queryset.filter(branch=effective_branch)
             elif queryset.model.__name__ == 'TopicProgress':
                 if user.role == 'instructor':
                     # For instructors, include progress from group-assigned courses
-                    group_courses = queryset.model.objects.filter(
-                        topic__courses__accessible_groups__memberships__user=user,
-                        topic__courses__accessible_groups__memberships__is_active=True,
-                        topic__courses__accessible_groups__memberships__custom_role__name__icontains='instructor'
-                    ).values_list('topic__courses', flat=True)
+                    group_courses = get_user_course_index(user).group_instructor
                     return queryset.filter(
                         Q(user__branch=effective_branch) |
                         Q(topic__courses__in=group_courses)
@@ -633,12 +625,7 @@ def user_reports_list(request):
         from courses.models import Course
         
         # Get all courses the instructor has access to
-        instructor_courses = Course.objects.filter(
-            Q(instructor=request.user) |  # Primary instructor
-            Q(enrolled_users=request.user) |  # Enrolled as instructor
-            Q(accessible_groups__memberships__user=request.user,
-              accessible_groups__memberships__is_active=True)  # Group access
-        ).distinct()
+        instructor_courses = Course.objects.filter(id__in=get_instructor_course_ids(request.user))
         
         # Get only learner role users enrolled in these courses
         users = CustomUser.objects.filter(
@@ -660,12 +647,7 @@ def user_reports_list(request):
     enrollment_course_filter = Q()
     if request.user.role == 'instructor':
         # Get instructor's courses for filtering enrollment stats
-        instructor_courses = Course.objects.filter(
-            Q(instructor=request.user) |
-            Q(enrolled_users=request.user) |
-            Q(accessible_groups__memberships__user=request.user,
-              accessible_groups__memberships__is_active=True)
-        ).distinct()
+        instructor_courses = Course.objects.filter(id__in=get_instructor_course_ids(request.user))
         enrollment_course_filter = Q(courseenrollment__course__in=instructor_courses)
     
     # Annotate users with required statistics that templates expect
@@ -839,12 +821,7 @@ class LearningActivitiesView(LoginRequiredMixin, TemplateView):
             from courses.models import Course
             
             # Get courses the instructor has access to
-            accessible_courses = Course.objects.filter(
-                Q(instructor=user) |  # Primary instructor
-                Q(enrolled_users=user) |  # Enrolled as instructor (invited)
-                Q(accessible_groups__memberships__user=user,
-                  accessible_groups__memberships__is_active=True)  # Group access
-            ).distinct()
+            accessible_courses = Course.objects.filter(id__in=get_instructor_course_ids(user))
             
             # Filter topics and progress to only those accessible courses
             activities = Topic.objects.filter(
@@ -1711,51 +1688,22 @@ def training_matrix(request):
     if request.user.role == 'superadmin':
         courses_queryset = filter_queryset_by_business(courses_queryset, request.user, 'branch__business')
     elif request.user.role == 'instructor':
-        # For instructors, show only courses they have access to
-        # 1. Courses where they are the primary instructor
-        primary_instructor_courses = Q(instructor=request.user)
-        # 2. Courses where they are enrolled (invited instructor)
-        enrolled_instructor_courses = Q(enrolled_users=request.user)
-        # 3. Courses accessible through group membership
-        group_instructor_courses = Q(accessible_groups__memberships__user=request.user,
-                                    accessible_groups__memberships__is_active=True)
-        
-        # Filter courses to only those the instructor has access to
-        courses_queryset = courses_queryset.filter(
-            primary_instructor_courses | enrolled_instructor_courses | group_instructor_courses
-        ).distinct()
+        # For instructors, show only courses they have access to: primary instructor,
+        # enrolled (invited instructor) or through group membership
+        courses_queryset = courses_queryset.filter(id__in=get_instructor_course_ids(request.user))
     elif request.user.role not in ['globaladmin'] and not request.user.is_superuser and request.user.branch:
         # For branch-level users, only show courses with enrollments from their branch
         courses_queryset = courses_queryset.filter(
             courseenrollment__user__branch=request.user.branch
         ).distinct()
     
-    # Optimize queries with proper prefetch and select_related
-    users_queryset = users_queryset.select_related('branch').prefetch_related(
-        Prefetch('courseenrollment_set',
-                queryset=CourseEnrollment.objects.filter(course__in=courses_queryset).select_related('course'))
-    )
-    
-    # Get all users as a list and organize enrollments efficiently
-    user_list = list(users_queryset)
-    for user in user_list:
-        # Create enrollment lookup from prefetched data (no additional queries)
-        user.course_enrollments = {
-            enrollment.course_id: enrollment 
-            for enrollment in user.courseenrollment_set.all()
-        }
-    
     # Get filter parameters with safety limits to prevent memory issues
-    per_page = min(int(request.GET.get('per_page', 20)), 100)  # Cap at 100 per page
+    try:
+        per_page = min(int(request.GET.get('per_page', 20)), 100)  # Cap at 100 per page
+    except ValueError:
+        per_page = 20
     export_to_excel = request.GET.get('export') == 'excel'
     
-    # Memory protection: limit total dataset size for exports
-    if export_to_excel and user_list:
-        max_export_size = 10000  # Maximum 10k records for export
-        if len(user_list) > max_export_size:
-            messages.warning(request, f"Export limited to first {max_export_size} records due to size constraints.")
-            user_list = user_list[:max_export_size]
-    
     # Get view options and filters
     view_options = request.GET.getlist('view_option')
     focus = request.GET.get('focus', 'all')
@@ -1763,58 +1711,26 @@ def training_matrix(request):
     branch_filters = request.GET.getlist('branch')
     group_filters = request.GET.getlist('group')
 
-    # Filter to show only learners in training matrix
-    user_list = [user for user in user_list if user.role == 'learner']
-    
-    # Get course IDs for not_enrolled filter
-    course_ids = list(courses_queryset.values_list('id', flat=True))
-    
-    # For instructors, filter learners to show only those enrolled in their accessible courses
-    if request.user.role == 'instructor':
-        # Get learner IDs who are enrolled in instructor's accessible courses
-        learner_ids_in_instructor_courses = CourseEnrollment.objects.filter(
-            course_id__in=course_ids,
-            user__role='learner'
-        ).values_list('user_id', flat=True).distinct()
-        
-        # Filter user_list to only include these learners
-        user_list = [user for user in user_list if user.id in learner_ids_in_instructor_courses]
-    
-    # Apply focus filter to users
-    filtered_users = []
-    for user in user_list:
-        if focus == 'all':
-            filtered_users.append(user)
-        else:
-            # Check if user has enrollments matching the focus criteria
-            has_matching_enrollment = False
-            
-            for course_id, enrollment in user.course_enrollments.items():
-                if focus == 'completed' and enrollment.completed:
-                    has_matching_enrollment = True
-                    break
-                elif focus == 'not_passed' and not enrollment.completed and enrollment.last_accessed:
-                    has_matching_enrollment = True
-                    break
-                elif focus == 'in_progress' and not enrollment.completed and enrollment.last_accessed:
-                    has_matching_enrollment = True
-                    break
-                elif focus == 'not_started' and not enrollment.last_accessed:
-                    has_matching_enrollment = True
-                    break
-            
-            # For 'not_enrolled', check if user has no enrollments in any of the courses
-            if focus == 'not_enrolled':
-                user_enrolled_courses = set(user.course_enrollments.keys())
-                all_course_ids = set(course_ids)
-                if all_course_ids - user_enrolled_courses:  # User has courses they're not enrolled in
-                    has_matching_enrollment = True
-            
-            if has_matching_enrollment:
-                filtered_users.append(user)
-    paginator = Paginator(filtered_users, per_page)
-    page_number = request.GET.get('page', 1)
-    page_obj = paginator.get_page(page_number)
+    # Learners only; instructors see the learners enrolled in their accessible courses.
+    # Focus filters are applied in SQL against the precomputed matrix cells.
+    matrix = TrainingMatrix(
+        users_queryset,
+        courses_queryset,
+        focus=focus,
+        instructor_only=request.user.role == 'instructor',
+        per_page=per_page,
+    )
+
+    # Export to Excel if requested
+    if export_to_excel:
+        return export_training_matrix_to_excel(request, matrix, courses_queryset, search_query)
+
+    # Keyset pagination by username: page N costs the same as page 1
+    after = request.GET.get('after')
+    before = request.GET.get('before')
+    page_users, has_previous, has_next = matrix.page(
+        after=after, before=before, last=request.GET.get('last') == '1'
+    )
 
     # Get branches for the branch filter based on role requirements
     branches = Branch.objects.none()  # Default to no branches
@@ -1842,13 +1758,13 @@ def training_matrix(request):
     
     context = {
         'courses': courses_queryset,
-        'users': page_obj,
+        'users': page_users,
         'search_query': search_query,
         'per_page': per_page,
-        'current_page': page_obj.number,
-        'total_pages': paginator.num_pages,
-        'has_previous': page_obj.has_previous(),
-        'has_next': page_obj.has_next(),
+        'has_previous': has_previous,
+        'has_next': has_next,
+        'previous_cursor': page_users[0].username if page_users else '',
+        'next_cursor': page_users[-1].username if page_users else '',
         'branches': branches,
         'user_branch_id': request.user.branch_id,
         'status_filters': status_filters,
@@ -1863,13 +1779,9 @@ def training_matrix(request):
             {'label': 'Training Matrix', 'icon': 'fa-table'}
         ]
     }
-    # Export to Excel if requested
-    if export_to_excel:
-        return export_training_matrix_to_excel(request, filtered_users, courses_queryset, search_query)
-    
     return render(request, 'reports/training_matrix.html', context)
 
-def export_training_matrix_to_excel(request, users, courses, search_query):
+def export_training_matrix_to_excel(request, matrix, courses, search_query):
     """Export training matrix data to Excel with memory optimization"""
     import xlwt
     from django.http import HttpResponse
@@ -1878,10 +1790,11 @@ def export_training_matrix_to_excel(request, users, courses, search_query):
     max_export_users = 5000
     max_export_courses = 100
     
-    if len(users) > max_export_users:
+    if matrix.users.count() > max_export_users:
         messages.warning(request, f"Export limited to first {max_export_users} users due to memory constraints.")
-        users = users[:max_export_users]
+    users = matrix.iter_users(max_export_users)
     
+    courses = list(courses[:max_export_courses + 1])
     if len(courses) > max_export_courses:
         messages.warning(request, f"Export limited to first {max_export_courses} courses due to memory constraints.")
         courses = courses[:max_export_courses]
@@ -1921,7 +1834,7 @@ def export_training_matrix_to_excel(request, users, courses, search_query):
                 if enrollment.completed:
                     ws.write(row, col, 'Completed', completed_style)
                 elif enrollment.last_accessed:
-                    ws.write(row, col, f"{enrollment.get_progress():.0f}%", in_progress_style)
+                    ws.write(row, col, f"{enrollment.progress}%", in_progress_style)
                 else:
                     ws.write(row, col, 'Not Started', not_started_style)
             else:
@@ -1981,12 +1894,7 @@ def export_user_reports_to_excel(request):
                 from courses.models import Course
                 
                 # Get all courses the instructor has access to
-                instructor_courses = Course.objects.filter(
-                    Q(instructor=request.user) |  # Primary instructor
-                    Q(enrolled_users=request.user) |  # Enrolled as instructor
-                    Q(accessible_groups__memberships__user=request.user,
-                      accessible_groups__memberships__is_active=True)  # Group access
-                ).distinct()
+                instructor_courses = Course.objects.filter(id__in=get_instructor_course_ids(request.user))
                 
                 # Get only learner role users enrolled in these courses
                 users = CustomUser.objects.filter(
@@ -2314,13 +2222,7 @@ def subgroup_report(request):
         ).values_list('group_id', flat=True)
         
         # Get courses the instructor has access to
-        instructor_course_ids = Course.objects.filter(
-            Q(instructor=request.user) |  # Primary instructor
-            Q(enrolled_users=request.user, enrolled_users__role='instructor') |  # Enrolled as instructor
-            Q(accessible_groups__memberships__user=request.user,
-              accessible_groups__memberships__is_active=True,
-              accessible_groups__memberships__user__role='instructor')  # Group access as instructor
-        ).values_list('id', flat=True).distinct()
+        instructor_course_ids = get_instructor_course_ids(request.user)
         
         # Filter subgroups to only those the instructor has access to
         subgroups = subgroups.filter(
@@ -2346,13 +2248,7 @@ def subgroup_report(request):
     # Get accessible courses for statistics calculation based on user role
     if request.user.role == 'instructor':
         # For instructors, only include courses they have access to
-        accessible_course_ids = Course.objects.filter(
-            Q(instructor=request.user) |  # Primary instructor
-            Q(enrolled_users=request.user, enrolled_users__role='instructor') |  # Enrolled as instructor
-            Q(accessible_groups__memberships__user=request.user,
-              accessible_groups__memberships__is_active=True,
-              accessible_groups__memberships__user__role='instructor')  # Group access as instructor
-        ).values_list('id', flat=True).distinct()
+        accessible_course_ids = get_instructor_course_ids(request.user)
         
         # Get learner users from groups the instructor has access to
         accessible_user_ids = subgroups.values_list('memberships__user_id', flat=True).distinct()
@@ -2487,13 +2383,7 @@ def subgroup_detail(request, subgroup_id):
         ).exists()
         
         # Check if instructor has access to any courses in this group
-        instructor_course_ids = Course.objects.filter(
-            Q(instructor=request.user) |  # Primary instructor
-            Q(enrolled_users=request.user, enrolled_users__role='instructor') |  # Enrolled as instructor
-            Q(accessible_groups__memberships__user=request.user,
-              accessible_groups__memberships__is_active=True,
-              accessible_groups__memberships__user__role='instructor')  # Group access as instructor
-        ).values_list('id', flat=True).distinct()
+        instructor_course_ids = get_instructor_course_ids(request.user)
         
         has_course_access = subgroup.accessible_courses.filter(
             id__in=instructor_course_ids
@@ -2867,17 +2757,9 @@ def courses_report(request):
         elif request.user.branch:
             # For other roles (instructor, etc.), use their assigned branch
             if request.user.role == 'instructor':
-                # For instructors, show only courses they have access to (as instructor)
-                # 1. Courses where they are the primary instructor
-                primary_instructor_courses = Q(instructor=request.user)
-                # 2. Courses where they are enrolled (invited instructor)
-                enrolled_instructor_courses = Q(enrolled_users=request.user)
-                # 3. Courses accessible through group membership
-                group_instructor_courses = Q(accessible_groups__memberships__user=request.user,
-                                            accessible_groups__memberships__is_active=True)
-                
-                # Filter courses to only those the instructor has access to
-                courses = courses.filter(primary_instructor_courses | enrolled_instructor_courses | group_instructor_courses).distinct()
+                # For instructors, show only courses they have access to (as instructor):
+                # primary instructor, enrolled (invited instructor) or through group membership
+                courses = courses.filter(id__in=get_instructor_course_ids(request.user))
                 
                 # Get the course IDs for use in other filters
                 instructor_course_ids = list(courses.values_list('id', flat=True))
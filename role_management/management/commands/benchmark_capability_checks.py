@@ -0,0 +1,68 @@
+"""
+Management command to micro-benchmark capability checks per request
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from role_management.models import UserRole
+from role_management.utils import (
+    CAPABILITY_MASK_ATTR, PermissionManager, get_available_capabilities,
+)
+
+
+class Command(BaseCommand):
+    help = 'Measures the cost of PermissionManager capability checks within simulated requests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Username to benchmark (defaults to a user with an assigned role)')
+        parser.add_argument('--requests', type=int, default=200, help='Number of simulated requests')
+        parser.add_argument('--checks', type=int, default=50, help='Capability checks per request')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['user']}' does not exist")
+        else:
+            user_role = UserRole.objects.filter(
+                is_active=True, user__is_superuser=False
+            ).exclude(user__role__in=['globaladmin', 'superadmin']).select_related('user').first()
+            if not user_role:
+                raise CommandError('No user with an assigned role found; pass --user')
+            user = user_role.user
+
+        requests = max(1, options['requests'])
+        checks = max(1, options['checks'])
+        capabilities = get_available_capabilities()
+
+        # Warm the role bitsets so the steady state is measured
+        PermissionManager.get_user_capability_mask(user)
+
+        queries = 0
+        granted = 0
+        started = time.perf_counter()
+        for _ in range(requests):
+            # A new request starts without the memoised mask
+            user.__dict__.pop(CAPABILITY_MASK_ATTR, None)
+            with CaptureQueriesContext(connection) as context:
+                for i in range(checks):
+                    if PermissionManager.user_has_capability(user, capabilities[i % len(capabilities)]):
+                        granted += 1
+            queries += len(context.captured_queries)
+        elapsed = time.perf_counter() - started
+
+        total_checks = requests * checks
+        self.stdout.write(f'User: {user.username} ({user.role})')
+        self.stdout.write(f'Requests: {requests}, checks per request: {checks}, granted: {granted}/{total_checks}')
+        self.stdout.write(f'Queries per request: {queries / requests:.2f}')
+        self.stdout.write(f'Time per request: {elapsed / requests * 1000:.3f} ms')
+        self.stdout.write(self.style.SUCCESS(
+            f'Capability checks per second: {total_checks / elapsed:,.0f}'
+        ))
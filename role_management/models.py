@@ -4,10 +4,27 @@ from django.core.exceptions import ValidationError
 from django.core.cache import cache
 from django.utils import timezone
 import logging
+import time
 from django.db import transaction
 
 logger = logging.getLogger(__name__)
 
+
+def role_capability_version_key(role_pk):
+    """Cache key holding the version of a role's compiled capability bitset"""
+    return f"role_capability_version_{role_pk}"
+
+
+def bump_role_capability_version(role_pk):
+    """Invalidate the compiled capability bitsets of a role once the change is committed"""
+    def _bump():
+        try:
+            cache.set(role_capability_version_key(role_pk), time.time_ns(), None)
+        except Exception as e:
+            logger.warning(f"Unable to bump capability version for role {role_pk}: {str(e)}")
+
+    transaction.on_commit(_bump)
+
 class RoleManager(models.Manager):
     """Custom manager for Role model with caching and optimization"""
     
@@ -368,6 +385,7 @@ class Role(models.Model):
         if self.pk:
             cache.delete(f"role_capabilities_{self.pk}")
             cache.delete(f"user_capabilities_{self.pk}")
+            bump_role_capability_version(self.pk)
         super().save(*args, **kwargs)
         
         # Log role creation/update
@@ -378,6 +396,7 @@ class Role(models.Model):
         # Clear cache before deletion
         cache.delete(f"role_capabilities_{self.pk}")
         cache.delete(f"user_capabilities_{self.pk}")
+        bump_role_capability_version(self.pk)
         
         # Log role deletion
         logger.info(f"Role {self} was deleted")
@@ -487,6 +506,7 @@ class RoleCapability(models.Model):
         super().save(*args, **kwargs)
         # Clear role capabilities cache
         cache.delete(f"role_capabilities_{self.role.pk}")
+        bump_role_capability_version(self.role.pk)
         
         # Log capability assignment
         logger.info(f"Capability '{self.capability}' assigned to role {self.role}")
@@ -498,6 +518,7 @@ class RoleCapability(models.Model):
         
         # Clear cache
         cache.delete(f"role_capabilities_{role_pk}")
+        bump_role_capability_version(role_pk)
         
         # Log capability removal
         logger.info(f"Capability '{capability}' removed from role {self.role}")
@@ -13,8 +13,13 @@ from functools import wraps
 from django.http import HttpResponseForbidden, JsonResponse
 from django.shortcuts import redirect
 from django.contrib import messages
-from .models import Role, RoleCapability, UserRole, RoleAuditLog
+from .models import (
+    Role, RoleCapability, UserRole, RoleAuditLog,
+    bump_role_capability_version, role_capability_version_key,
+)
 import logging
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -44,168 +49,196 @@ def safe_cache_operation(operation, *args, **kwargs):
         
         return False, None
 
+
+# Compiled capability bitsets
+#
+# Every capability name is assigned a bit in this process. Each role's
+# capabilities are compiled once into an integer bitset and kept together with
+# the role's capability version from the shared cache; bumping that version
+# (bump_role_capability_version) makes every process recompile the role.
+CAPABILITY_MASK_ATTR = '_capability_mask'
+
+_capability_bits = {}
+_capability_names = []
+_capability_bits_lock = threading.Lock()
+_role_bits = {}
+_default_role_bits = {}
+
+
+def register_capability(capability):
+    """Return the bit assigned to a capability name, assigning one if needed"""
+    bit = _capability_bits.get(capability)
+    if bit is None:
+        with _capability_bits_lock:
+            bit = _capability_bits.get(capability)
+            if bit is None:
+                bit = 1 << len(_capability_names)
+                _capability_names.append(capability)
+                _capability_bits[capability] = bit
+    return bit
+
+
+def capability_mask(capabilities, register=True):
+    """
+    Compile capability names into a bitset.
+
+    Invalid names are ignored. With register=False, names that have no bit yet
+    are ignored instead of being assigned one.
+    """
+    mask = 0
+    for capability in capabilities:
+        if not isinstance(capability, str) or not capability.strip() or len(capability) > 100:
+            continue
+        if register:
+            mask |= register_capability(capability)
+        else:
+            mask |= _capability_bits.get(capability, 0)
+    return mask
+
+
+def capabilities_from_mask(mask):
+    """Decode a bitset back into a list of capability names"""
+    capabilities = []
+    while mask:
+        lowest = mask & -mask
+        capabilities.append(_capability_names[lowest.bit_length() - 1])
+        mask ^= lowest
+    return capabilities
+
+
+def get_default_role_bits(role_name):
+    """Get the compiled default capabilities of a primary role name"""
+    bits = _default_role_bits.get(role_name)
+    if bits is None:
+        bits = capability_mask(Role.objects.get_default_capabilities(role_name))
+        _default_role_bits[role_name] = bits
+    return bits
+
+
+def get_role_capability_versions(role_ids):
+    """
+    Get the capability version of each role from the shared cache.
+
+    Roles without a version get one. Returns an empty dict when the cache is
+    unavailable, in which case callers must not reuse compiled bitsets.
+    """
+    keys = {role_capability_version_key(role_id): role_id for role_id in role_ids}
+    success, cached = safe_cache_operation(cache.get_many, list(keys))
+    if not success:
+        return {}
+
+    missing = [key for key in keys if key not in cached]
+    if missing:
+        version = time.time_ns()
+        for key in missing:
+            safe_cache_operation(cache.add, key, version, None)
+        # Another process may have added a version first
+        success, added = safe_cache_operation(cache.get_many, missing)
+        if success:
+            cached.update(added)
+
+    return {keys[key]: version for key, version in cached.items()}
+
+
+def get_roles_capability_bits(role_ids, use_cache=True):
+    """
+    Get the OR of the compiled capability bitsets of the given roles.
+
+    Roles whose compiled bitset is missing or older than their cached version
+    are recompiled with a single query.
+    """
+    versions = get_role_capability_versions(role_ids) if use_cache else {}
+
+    mask = 0
+    stale = []
+    for role_id in role_ids:
+        compiled = _role_bits.get(role_id)
+        version = versions.get(role_id)
+        if version is not None and compiled is not None and compiled[0] == version:
+            mask |= compiled[1]
+        else:
+            stale.append(role_id)
+
+    if stale:
+        capabilities_by_role = {role_id: [] for role_id in stale}
+        rows = RoleCapability.objects.filter(role_id__in=stale).values_list('role_id', 'capability')
+        for role_id, capability in rows:
+            capabilities_by_role[role_id].append(capability)
+
+        for role_id, capabilities in capabilities_by_role.items():
+            bits = capability_mask(capabilities)
+            if versions.get(role_id) is not None:
+                _role_bits[role_id] = (versions[role_id], bits)
+            mask |= bits
+
+    return mask
+
+
 class PermissionManager:
     """Centralized permission management system"""
     
     @staticmethod
     def get_user_capabilities(user, use_cache=True, session_id=None):
-        """Get all capabilities for a user with enhanced Session and integrity validation"""
+        """
+        Get all capabilities for a user as a list of capability names.
+
+        Capabilities are resolved through the user's compiled capability mask
+        (see get_user_capability_mask). session_id is accepted for backwards
+        compatibility; role bitsets are shared by every session of a user.
+        """
         if not user or not user.is_authenticated:
             return []
-        
-        import hashlib
-        import json
-        
-        # Create session-aware cache keys to prevent session fixation
-        session_suffix = f"_{hashlib.md5(str(session_id).encode()).hexdigest()[:8]}" if session_id else ""
-        cache_key = f"user_capabilities_{user.pk}{session_suffix}"
-        cache_version_key = f"user_capabilities_version_{user.pk}{session_suffix}"
-        cache_integrity_key = f"user_capabilities_integrity_{user.pk}{session_suffix}"
-        
-        capabilities = []
-        
+
+        mask = PermissionManager.get_user_capability_mask(user, use_cache=use_cache)
+        return capabilities_from_mask(mask)
+
+    @staticmethod
+    def get_user_capability_mask(user, use_cache=True):
+        """
+        Get the effective capability bitset of a user.
+
+        The mask is the OR of the user's primary role defaults and the compiled
+        bitsets of their active, unexpired assigned roles. It is memoised on the
+        user object so repeated checks within a request are plain bit tests.
+        """
+        if not user or not user.is_authenticated:
+            return 0
+
         if use_cache:
-            # Try to get cached capabilities with enhanced validation
-            success, cached_data = safe_cache_operation(
-                cache.get_many, 
-                [cache_key, cache_version_key, cache_integrity_key]
-            )
-            
-            if success and cached_data:
-                capabilities = cached_data.get(cache_key)
-                cache_version = cached_data.get(cache_version_key)
-                cache_integrity = cached_data.get(cache_integrity_key)
-                
-                # Enhanced cache integrity validation
-                if capabilities is not None and cache_version is not None and cache_integrity is not None:
-                    from core.utils.type_guards import validate_cache_capabilities
-                    
-                    # Use type-safe cache validation
-                    validated_capabilities = validate_cache_capabilities(capabilities)
-                    if validated_capabilities is None:
-                        logger.warning(f"Cache validation failed for user {user.pk}")
-                        PermissionManager._clear_corrupted_cache(user, session_suffix)
-                    # Integrity checksum validation
-                    elif not PermissionManager._validate_cache_integrity(validated_capabilities, cache_version, cache_integrity):
-                        logger.warning(f"Cache integrity validation failed for user {user.pk}: checksum mismatch")
-                        PermissionManager._clear_corrupted_cache(user, session_suffix)
-                    else:
-                        # Cache is valid, return capabilities
-                        return capabilities
-            elif not success:
-                logger.info(f"Cache unavailable for user {user.pk}, proceeding without cache")
-        
-        # Fresh lookup - build capabilities from scratch
-        capabilities = set()
-        
-        # Get capabilities from primary role with validation
+            memo = getattr(user, CAPABILITY_MASK_ATTR, None)
+            if memo is not None:
+                return memo
+
+        mask = 0
+
+        # Capabilities from the primary role
         if hasattr(user, 'role') and user.role:
             try:
-                primary_role_capabilities = Role.objects.get_default_capabilities(user.role)
-                if isinstance(primary_role_capabilities, list):
-                    # Validate each capability
-                    validated_caps = [
-                        cap for cap in primary_role_capabilities 
-                        if isinstance(cap, str) and cap.strip() and len(cap) <= 100
-                    ]
-                    capabilities.update(validated_caps)
-                else:
-                    logger.error(f"Invalid primary role capabilities type for user {user.pk}: {type(primary_role_capabilities)}")
+                mask |= get_default_role_bits(user.role)
             except Exception as e:
                 logger.error(f"Error getting primary role capabilities for user {user.pk}: {str(e)}")
-        
-        # Get capabilities from assigned roles with enhanced validation
+
+        # Capabilities from assigned roles; expired assignments are excluded in SQL
         try:
-            user_roles = UserRole.objects.filter(
-                user=user, 
+            role_ids = list(UserRole.objects.filter(
+                Q(expires_at__isnull=True) | Q(expires_at__gt=timezone.now()),
+                user=user,
                 is_active=True,
-                role__is_active=True
-            ).select_related('role').prefetch_related('role__capabilities')
-            
-            for user_role in user_roles:
-                # Skip expired roles
-                if user_role.is_expired:
-                    continue
-                
-                # Validate role assignment integrity
-                if not user_role.role or not user_role.role.is_active:
-                    logger.warning(f"Inactive role found in user {user.pk} assignments: {user_role.role}")
-                    continue
-                    
-                role_capabilities = user_role.role.get_capabilities()
-                if isinstance(role_capabilities, list):
-                    # Validate each capability from role
-                    validated_caps = [
-                        cap for cap in role_capabilities 
-                        if isinstance(cap, str) and cap.strip() and len(cap) <= 100
-                    ]
-                    capabilities.update(validated_caps)
-                else:
-                    logger.error(f"Invalid role capabilities type for role {user_role.role.pk}: {type(role_capabilities)}")
+                role__is_active=True,
+            ).values_list('role_id', flat=True).distinct())
+
+            if role_ids:
+                mask |= get_roles_capability_bits(role_ids, use_cache=use_cache)
         except Exception as e:
             logger.error(f"Error getting assigned role capabilities for user {user.pk}: {str(e)}")
-        
-        # Convert to validated list
-        capabilities = list(capabilities)
-        
-        # Final validation before caching
-        if len(capabilities) > 500:
-            logger.error(f"User {user.pk} has excessive capabilities ({len(capabilities)}), truncating to prevent abuse")
-            capabilities = capabilities[:500]
-        
-        # Cache with enhanced Session
-        if use_cache and capabilities:
-            cache_version = timezone.now().timestamp()
-            cache_integrity = PermissionManager._generate_cache_integrity(capabilities, cache_version)
-            
-            cache_data = {
-                cache_key: capabilities,
-                cache_version_key: cache_version,
-                cache_integrity_key: cache_integrity
-            }
-            
-            # Use shorter cache duration for Session-sensitive data
-            success, _ = safe_cache_operation(cache.set_many, cache_data, 1800)  # 30 minutes instead of 1 hour
-            if not success:
-                logger.info(f"Unable to cache capabilities for user {user.pk}, continuing without cache")
-        
-        return capabilities
-    
-    @staticmethod
-    def _validate_cache_integrity(capabilities, cache_version, cached_integrity):
-        """Validate cache integrity using checksums"""
-        expected_integrity = PermissionManager._generate_cache_integrity(capabilities, cache_version)
-        return expected_integrity == cached_integrity
-    
-    @staticmethod 
-    def _generate_cache_integrity(capabilities, cache_version):
-        """Generate integrity checksum for cache validation"""
-        import hashlib
-        import json
-        
-        # Create deterministic string for hashing
-        content = json.dumps({
-            'capabilities': sorted(capabilities),  # Sort for consistency
-            'version': cache_version,
-            'salt': 'lms_role_Session_2024'  # Add salt to prevent rainbow table attacks
-        }, sort_keys=True)
-        
-        return hashlib.sha256(content.encode()).hexdigest()
-    
-    @staticmethod
-    def _clear_corrupted_cache(user, session_suffix=""):
-        """Clear corrupted cache entries for a user"""
-        cache_keys = [
-            f"user_capabilities_{user.pk}{session_suffix}",
-            f"user_capabilities_version_{user.pk}{session_suffix}",
-            f"user_capabilities_integrity_{user.pk}{session_suffix}"
-        ]
-        
-        success, _ = safe_cache_operation(cache.delete_many, cache_keys)
-        if not success:
-            for key in cache_keys:
-                safe_cache_operation(cache.delete, key)
-    
+
+        try:
+            setattr(user, CAPABILITY_MASK_ATTR, mask)
+        except AttributeError:
+            pass
+
+        return mask
+
     @staticmethod
     def user_has_capability(user, capability):
         """Check if user has a specific capability"""
@@ -216,19 +249,11 @@ class PermissionManager:
         if user.is_superuser or (hasattr(user, 'role') and user.role in ['globaladmin', 'superadmin']):
             return True
         
-        user_capabilities = PermissionManager.get_user_capabilities(user)
-        result = capability in user_capabilities
-        
-        # If capability not found and cache enabled, try fresh lookup once
-        if not result:
-            fresh_capabilities = PermissionManager.get_user_capabilities(user, use_cache=False)
-            result = capability in fresh_capabilities
-            # If fresh lookup finds the capability, clear and refresh cache
-            if result:
-                PermissionManager.clear_user_cache(user)
-                PermissionManager.get_user_capabilities(user)  # Rebuild cache
-        
-        return result
+        # Resolving the mask registers every capability of the user's roles, so
+        # a name without a bit afterwards is one the user cannot have.
+        mask = PermissionManager.get_user_capability_mask(user)
+        bit = _capability_bits.get(capability)
+        return bool(bit and mask & bit)
     
     @staticmethod
     def user_has_any_capability(user, capabilities):
@@ -239,19 +264,9 @@ class PermissionManager:
         if user.is_superuser or (hasattr(user, 'role') and user.role in ['globaladmin', 'superadmin']):
             return True
         
-        user_capabilities = PermissionManager.get_user_capabilities(user)
-        result = any(cap in user_capabilities for cap in capabilities)
-        
-        # If no capabilities found and cache enabled, try fresh lookup once
-        if not result:
-            fresh_capabilities = PermissionManager.get_user_capabilities(user, use_cache=False)
-            result = any(cap in fresh_capabilities for cap in capabilities)
-            # If fresh lookup finds capabilities, clear and refresh cache
-            if result:
-                PermissionManager.clear_user_cache(user)
-                PermissionManager.get_user_capabilities(user)  # Rebuild cache
-        
-        return result
+        mask = PermissionManager.get_user_capability_mask(user)
+        wanted = capability_mask(capabilities, register=False)
+        return bool(mask & wanted)
     
     @staticmethod
     def user_has_all_capabilities(user, capabilities):
@@ -262,19 +277,12 @@ class PermissionManager:
         if user.is_superuser or (hasattr(user, 'role') and user.role in ['globaladmin', 'superadmin']):
             return True
         
-        user_capabilities = PermissionManager.get_user_capabilities(user)
-        result = all(cap in user_capabilities for cap in capabilities)
-        
-        # If not all capabilities found and cache enabled, try fresh lookup once
-        if not result:
-            fresh_capabilities = PermissionManager.get_user_capabilities(user, use_cache=False)
-            result = all(cap in fresh_capabilities for cap in capabilities)
-            # If fresh lookup finds all capabilities, clear and refresh cache
-            if result:
-                PermissionManager.clear_user_cache(user)
-                PermissionManager.get_user_capabilities(user)  # Rebuild cache
-        
-        return result
+        capabilities = list(capabilities)
+        mask = PermissionManager.get_user_capability_mask(user)
+        if any(cap not in _capability_bits for cap in capabilities):
+            return False
+        wanted = capability_mask(capabilities, register=False)
+        return mask & wanted == wanted
     
     @staticmethod
     def get_user_highest_role(user):
@@ -492,39 +500,23 @@ class PermissionManager:
     
     @staticmethod
     def clear_user_cache(user, session_id=None):
-        """Clear all cached data for a user with enhanced session support"""
+        """
+        Forget the capability mask memoised on a user object.
+
+        Role bitsets are shared and versioned, so only the per-user memo and
+        entries written by the former per-user capability cache are removed.
+        """
         if user and user.pk:
-            import hashlib
-            
-            # Clear both session-specific and general caches
+            try:
+                delattr(user, CAPABILITY_MASK_ATTR)
+            except AttributeError:
+                pass
+
             cache_keys = [
                 f"user_capabilities_{user.pk}",
                 f"user_capabilities_version_{user.pk}",
                 f"user_session_capabilities_{user.pk}"
             ]
-            
-            # Add session-specific cache keys if session provided
-            if session_id:
-                session_suffix = f"_{hashlib.md5(str(session_id).encode()).hexdigest()[:8]}"
-                cache_keys.extend([
-                    f"user_capabilities_{user.pk}{session_suffix}",
-                    f"user_capabilities_version_{user.pk}{session_suffix}",
-                    f"user_capabilities_integrity_{user.pk}{session_suffix}"
-                ])
-            else:
-                # If no specific session, try to clear common session patterns
-                import re
-                try:
-                    from django.core.cache import cache
-                    # Get all cache keys matching user pattern (if supported by cache backend)
-                    if hasattr(cache, 'keys'):
-                        pattern = f"user_capabilities_{user.pk}_*"
-                        matching_keys = [key for key in cache.keys(pattern) if re.match(f"user_capabilities_{user.pk}_[a-f0-9]{{8}}", key)]
-                        cache_keys.extend(matching_keys)
-                except:
-                    pass  # Some cache backends don't support key listing
-            
-            # Use safe cache operations
             success, _ = safe_cache_operation(cache.delete_many, cache_keys)
             if not success:
                 # Fallback to individual deletions
@@ -533,29 +525,10 @@ class PermissionManager:
     
     @staticmethod
     def clear_role_cache(role):
-        """Clear all cached data for a role with safe operations"""
+        """Clear cached capabilities of a role and invalidate its compiled bitsets"""
         if role and role.pk:
-            # Clear role capabilities cache
-            success, _ = safe_cache_operation(cache.delete, f"role_capabilities_{role.pk}")
-            
-            # Also clear cache for all users with this role
-            try:
-                user_roles = UserRole.objects.filter(role=role).values_list('user_id', flat=True)
-                user_cache_keys = []
-                for user_id in user_roles:
-                    user_cache_keys.extend([
-                        f"user_capabilities_{user_id}",
-                        f"user_capabilities_version_{user_id}"
-                    ])
-                
-                if user_cache_keys:
-                    success, _ = safe_cache_operation(cache.delete_many, user_cache_keys)
-                    if not success:
-                        # Try individual deletions as fallback
-                        for key in user_cache_keys:
-                            safe_cache_operation(cache.delete, key)
-            except Exception as e:
-                logger.error(f"Error clearing user caches for role {role.pk}: {str(e)}")
+            safe_cache_operation(cache.delete, f"role_capabilities_{role.pk}")
+            bump_role_capability_version(role.pk)
 
 class RoleValidator:
     """Role validation utilities"""
@@ -0,0 +1,164 @@
+/**
+ * Direct uploads to storage (see core/direct_uploads.py)
+ * Sends the file bytes to the presigned storage URL returned by
+ * /api/uploads/initiate/ instead of posting them through Django, then asks
+ * Django to verify the stored file.
+ *
+ * Usage:
+ *   LMSDirectUpload.upload(file, {kind: 'editor_image', context: {}, onProgress: fn})
+ *       .then(function(result) { ... result.token, result.url ... })
+ *       .catch(function(error) { ... error.message ... });
+ *
+ * filename is optional and defaults to file.name (set it for a Blob).
+ */
+(function(window) {
+    'use strict';
+
+    const INITIATE_URL = '/api/uploads/initiate/';
+
+    function getCsrfToken() {
+        const input = document.querySelector('[name=csrfmiddlewaretoken]');
+        if (input && input.value) {
+            return input.value;
+        }
+        const match = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+        return match ? decodeURIComponent(match[1]) : '';
+    }
+
+    function parseError(xhr, fallback) {
+        try {
+            const response = JSON.parse(xhr.responseText);
+            if (response.error) {
+                return response.error;
+            }
+        } catch (e) {
+            // Not a JSON error from Django (e.g. an S3 XML error)
+        }
+        return fallback + (xhr.status ? ' (' + xhr.status + ')' : '');
+    }
+
+    /**
+     * Send one request; resolves with the XHR on a 2xx status.
+     * onProgress receives the bytes sent of this request.
+     */
+    function send(method, url, body, headers, onProgress) {
+        return new Promise(function(resolve, reject) {
+            const xhr = new XMLHttpRequest();
+            xhr.open(method, url);
+            Object.keys(headers || {}).forEach(function(name) {
+                xhr.setRequestHeader(name, headers[name]);
+            });
+            if (onProgress && xhr.upload) {
+                xhr.upload.onprogress = function(event) {
+                    if (event.lengthComputable) {
+                        onProgress(event.loaded);
+                    }
+                };
+            }
+            xhr.onload = function() {
+                if (xhr.status >= 200 && xhr.status < 300) {
+                    resolve(xhr);
+                } else {
+                    reject(new Error(parseError(xhr, 'Upload failed')));
+                }
+            };
+            xhr.onerror = function() {
+                reject(new Error('Network error during upload'));
+            };
+            xhr.send(body);
+        });
+    }
+
+    function postJson(url, data) {
+        return send('POST', url, JSON.stringify(data), {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': getCsrfToken(),
+            'X-Requested-With': 'XMLHttpRequest'
+        }).then(function(xhr) {
+            return JSON.parse(xhr.responseText);
+        });
+    }
+
+    function sendPost(file, instructions, report) {
+        const formData = new FormData();
+        Object.keys(instructions.fields).forEach(function(name) {
+            formData.append(name, instructions.fields[name]);
+        });
+        // S3 ignores any field after the file
+        formData.append('file', file);
+        return send('POST', instructions.url, formData, {}, report).then(function() {
+            return {};
+        });
+    }
+
+    function sendPut(file, instructions, report) {
+        return send('PUT', instructions.url, file, {
+            'Content-Type': 'application/octet-stream',
+            'X-CSRFToken': getCsrfToken()
+        }, report).then(function() {
+            return {};
+        });
+    }
+
+    function sendParts(file, instructions, report) {
+        const partSize = instructions.part_size;
+        const sent = {};
+        const parts = [];
+        // Parts go one after the other; each is already large enough to fill the connection
+        return instructions.parts.reduce(function(previous, part) {
+            return previous.then(function() {
+                const start = (part.part_number - 1) * partSize;
+                const blob = file.slice(start, Math.min(start + partSize, file.size));
+                return send('PUT', part.url, blob, {}, function(loaded) {
+                    sent[part.part_number] = loaded;
+                    report(Object.keys(sent).reduce(function(total, key) { return total + sent[key]; }, 0));
+                }).then(function(xhr) {
+                    const etag = xhr.getResponseHeader('ETag');
+                    if (!etag) {
+                        throw new Error('Storage did not return the part ETag; check the bucket CORS rules');
+                    }
+                    parts.push({part_number: part.part_number, etag: etag});
+                });
+            });
+        }, Promise.resolve()).then(function() {
+            return {parts: parts};
+        });
+    }
+
+    const SENDERS = {post: sendPost, put: sendPut, multipart: sendParts};
+
+    /**
+     * Upload file as the given kind; resolves with the finalize response
+     * (always including token), rejects with an Error whose message can be
+     * shown to the user.
+     */
+    function upload(file, options) {
+        options = options || {};
+        const report = function(loaded) {
+            if (options.onProgress && file.size) {
+                options.onProgress(Math.min(100, Math.round(loaded / file.size * 100)));
+            }
+        };
+
+        return postJson(INITIATE_URL, {
+            kind: options.kind,
+            filename: options.filename || file.name || 'upload',
+            content_type: file.type || 'application/octet-stream',
+            size: file.size,
+            context: options.context || {}
+        }).then(function(instructions) {
+            const sender = SENDERS[instructions.method];
+            if (!sender) {
+                throw new Error('Unsupported upload method ' + instructions.method);
+            }
+            return sender(file, instructions, report).then(function(body) {
+                return postJson(instructions.finalize_url, body);
+            }).then(function(result) {
+                result.token = result.token || instructions.token;
+                return result;
+            });
+        });
+    }
+
+    window.LMSDirectUpload = {upload: upload};
+})(window);
@@ -171,7 +171,17 @@ class ActiveTimeTracker {
     }
     
     sendRequest(data, synchronous = false) {
-        const url = `/quiz/attempt/${this.attemptId}/update-active-time/`;
+        // Coalesced heartbeat endpoint; the server writes the attempt at a bounded rate
+        const url = '/api/heartbeat/';
+        const payload = {
+            final: synchronous,
+            events: [{
+                kind: 'quiz',
+                id: this.attemptId,
+                seconds: data.additional_seconds || 0,
+                focused: data.action !== 'blur'
+            }]
+        };
         
         const requestOptions = {
             method: 'POST',
@@ -179,14 +189,14 @@ class ActiveTimeTracker {
                 'Content-Type': 'application/json',
                 'X-CSRFToken': this.getCSRFToken()
             },
-            body: JSON.stringify(data)
+            body: JSON.stringify(payload)
         };
         
         if (synchronous) {
             // Use sendBeacon for synchronous requests (more reliable on page unload)
             if ('sendBeacon' in navigator) {
                 const formData = new FormData();
-                formData.append('data', JSON.stringify(data));
+                formData.append('data', JSON.stringify(payload));
                 formData.append('csrfmiddlewaretoken', this.getCSRFToken());
                 
                 navigator.sendBeacon(url, formData);
@@ -269,6 +269,15 @@
         
         // Add proper handlers for TinyMCE 7.0 compatibility
         config.images_upload_handler = function(blobInfo, success, failure, progress) {
+            if (window.LMSDirectUpload) {
+                directUpload(blobInfo.blob(), 'editor_image', blobInfo.filename(), progress).then(function(response) {
+                    success(response.location || response.url);
+                }).catch(function(error) {
+                    failure(error.message);
+                });
+                return;
+            }
+
             const formData = new FormData();
             formData.append('file', blobInfo.blob(), blobInfo.filename());
             
@@ -306,6 +315,15 @@
         };
         
         config.media_upload_handler = function(blobInfo, success, failure, progress) {
+            if (window.LMSDirectUpload) {
+                directUpload(blobInfo.blob(), 'editor_media', blobInfo.filename(), progress).then(function(response) {
+                    success(response.location || response.url);
+                }).catch(function(error) {
+                    failure(error.message);
+                });
+                return;
+            }
+
             const formData = new FormData();
             formData.append('file', blobInfo.blob(), blobInfo.filename());
             
@@ -372,6 +390,18 @@
                         alert(`Image too large! The selected image is ${fileSizeMB}MB. Maximum allowed size is 10MB. Please choose a smaller image.`);
                         return;
                     }
+
+                    if (window.LMSDirectUpload) {
+                        directUpload(file, 'editor_image').then(function(response) {
+                            callback(response.location || response.url, {
+                                alt: response.alt || file.name.replace(/\.[^/.]+$/, ""),
+                                title: response.title || file.name.replace(/\.[^/.]+$/, "")
+                            });
+                        }).catch(function(error) {
+                            alert('Error uploading image: ' + error.message);
+                        });
+                        return;
+                    }
                     
                     // Create form data for upload
                     const formData = new FormData();
@@ -507,6 +537,16 @@
                         alert(`File too large! The selected file is ${fileSizeMB}MB. Maximum allowed size is ${sizeDescription}. Please choose a smaller file.`);
                         return;
                     }
+
+                    if (window.LMSDirectUpload) {
+                        directUpload(file, 'editor_media').then(function(response) {
+                            const title = response.filename || file.name;
+                            callback(response.location || response.url, { title: title, alt: title });
+                        }).catch(function(error) {
+                            alert('Upload failed: ' + error.message);
+                        });
+                        return;
+                    }
                     
                     // Create form data for upload
                     const formData = new FormData();
@@ -723,6 +763,19 @@
         });
     }
 
+    /**
+     * Upload a file straight to storage (static/core/js/direct-upload.js);
+     * the legacy POST to the upload views is used when that script is not loaded
+     * @returns {Promise<Object>} The upload view style response (location, url, alt, title)
+     */
+    function directUpload(file, kind, filename, progress) {
+        return window.LMSDirectUpload.upload(file, {
+            kind: kind,
+            filename: filename,
+            onProgress: typeof progress === 'function' ? progress : null
+        });
+    }
+
     /**
      * Get CSRF token from cookie
      * @returns {string|null} CSRF token or null if not found
@@ -0,0 +1,37 @@
+"""
+Management command to rebuild the AI token usage rollups from AITokenUsage rows
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tinymce_editor.models import AITokenUsageDay, AITokenUsageMonth
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute AITokenUsageMonth and AITokenUsageDay from the raw AITokenUsage rows. '
+        'Rows deleted or edited outside AITokenUsage.save() only reach the rollups this way.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help='Only rebuild the last N days (and the months they fall in); all history by default'
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['days'] is not None:
+            since = timezone.localdate() - timedelta(days=max(0, options['days']))
+
+        months = AITokenUsageMonth.rebuild(since)
+        # Month buckets start on the 1st, so the day rollups cover the same span
+        days = AITokenUsageDay.rebuild(since.replace(day=1) if since else None)
+        scope = f'since {since.replace(day=1)}' if since else 'for all history'
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {months} branch-month and {days} user-day rollups {scope}'
+        ))
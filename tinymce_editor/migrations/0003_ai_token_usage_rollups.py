@@ -0,0 +1,82 @@
+# Generated by Django 4.2.24 on 2026-10-18 23:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Days and months are bucketed in the connection time zone, which Django
+# sets to UTC (TIME_ZONE) when USE_TZ is on
+BACKFILL_SQL = """
+INSERT INTO tinymce_editor_aitokenusageday
+    (user_id, day, tokens_used, request_count, successful_requests, failed_requests, updated_at)
+SELECT user_id, created_at::date, SUM(tokens_used), COUNT(*),
+       COUNT(*) FILTER (WHERE success), COUNT(*) FILTER (WHERE NOT success), now()
+FROM tinymce_editor_aitokenusage
+GROUP BY user_id, created_at::date;
+
+INSERT INTO tinymce_editor_aitokenusagemonth
+    (branch_id, month, tokens_used, request_count, successful_requests, failed_requests, updated_at)
+SELECT u.branch_id, date_trunc('month', t.created_at)::date, SUM(t.tokens_used), COUNT(*),
+       COUNT(*) FILTER (WHERE t.success), COUNT(*) FILTER (WHERE NOT t.success), now()
+FROM tinymce_editor_aitokenusage t
+JOIN users_customuser u ON u.id = t.user_id
+WHERE u.branch_id IS NOT NULL
+GROUP BY u.branch_id, date_trunc('month', t.created_at)::date;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('branches', '__first__'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tinymce_editor', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AITokenUsageDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tokens_used', models.BigIntegerField(default=0)),
+                ('request_count', models.PositiveIntegerField(default=0)),
+                ('successful_requests', models.PositiveIntegerField(default=0)),
+                ('failed_requests', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('day', models.DateField(help_text='Day in TIME_ZONE')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ai_token_days', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'AI Token Usage (User Day)',
+                'verbose_name_plural': 'AI Token Usage (User Days)',
+                'indexes': [models.Index(fields=['day'], name='ai_usage_day_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='aitokenusageday',
+            constraint=models.UniqueConstraint(fields=('user', 'day'), name='ai_usage_day_user_uniq'),
+        ),
+        migrations.CreateModel(
+            name='AITokenUsageMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tokens_used', models.BigIntegerField(default=0)),
+                ('request_count', models.PositiveIntegerField(default=0)),
+                ('successful_requests', models.PositiveIntegerField(default=0)),
+                ('failed_requests', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('month', models.DateField(help_text='First day of the month (TIME_ZONE)')),
+                ('branch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ai_token_months', to='branches.branch')),
+            ],
+            options={
+                'verbose_name': 'AI Token Usage (Branch Month)',
+                'verbose_name_plural': 'AI Token Usage (Branch Months)',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='aitokenusagemonth',
+            constraint=models.UniqueConstraint(fields=('branch', 'month'), name='ai_usage_month_branch_uniq'),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
@@ -1,10 +1,11 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.functions import TruncDate, TruncMonth
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
 from django.utils import timezone
 from datetime import datetime, timedelta
-import calendar
 
 User = get_user_model()
 
@@ -52,19 +53,24 @@ class BranchAITokenLimit(models.Model):
             raise ValidationError("Monthly token limit must be greater than 0 if not unlimited")
 
     def get_current_month_usage(self):
-        """Get current month's token usage for this branch"""
-        now = timezone.now()
-        start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        """Get current month's token usage for this branch from its AITokenUsageMonth row"""
+        month = AITokenUsageMonth.current_month()
+        cached = getattr(self, '_month_usage', None)
+        if cached is not None and cached[0] == month:
+            return cached[1]
         
-        usage = AITokenUsage.objects.filter(
-            user__branch=self.branch,
-            created_at__gte=start_of_month
-        ).aggregate(
-            total_tokens=models.Sum('tokens_used')
-        )['total_tokens'] or 0
+        usage = AITokenUsageMonth.objects.filter(
+            branch_id=self.branch_id,
+            month=month
+        ).values_list('tokens_used', flat=True).first() or 0
         
+        self.cache_month_usage(usage, month)
         return usage
 
+    def cache_month_usage(self, usage, month=None):
+        """Use a usage total read in bulk (e.g. for a list of branches) for this instance"""
+        self._month_usage = (month or AITokenUsageMonth.current_month(), usage)
+
     def get_remaining_tokens(self):
         """Get remaining tokens for current month"""
         if self.is_unlimited:
@@ -143,7 +149,13 @@ class AITokenUsage(models.Model):
         # Truncate prompt for privacy and storage efficiency
         if self.prompt_text and len(self.prompt_text) > 500:
             self.prompt_text = self.prompt_text[:500] + "..."
-        super().save(*args, **kwargs)
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                # Rollups move in the same transaction as the raw row
+                AITokenUsageMonth.add(self)
+                AITokenUsageDay.add(self)
 
     @staticmethod
     def estimate_tokens_from_text(text):
@@ -155,45 +167,215 @@ class AITokenUsage(models.Model):
     @classmethod
     def get_branch_usage_stats(cls, branch, start_date=None, end_date=None):
         """Get usage statistics for a branch within date range"""
-        queryset = cls.objects.filter(user__branch=branch)
-        
-        if start_date:
-            queryset = queryset.filter(created_at__gte=start_date)
-        if end_date:
-            queryset = queryset.filter(created_at__lte=end_date)
-        
-        stats = queryset.aggregate(
-            total_requests=models.Count('id'),
-            total_tokens=models.Sum('tokens_used'),
-            successful_requests=models.Count('id', filter=models.Q(success=True)),
-            failed_requests=models.Count('id', filter=models.Q(success=False))
-        )
+        start_day = AITokenUsageDay.day_bound(start_date)
+        end_day = AITokenUsageDay.day_bound(end_date, end=True)
+        if (start_date is None or start_day) and (end_date is None or end_day):
+            # Whole days: read the daily rollups instead of the raw rows
+            queryset = AITokenUsageDay.objects.filter(user__branch=branch)
+            if start_day:
+                queryset = queryset.filter(day__gte=start_day)
+            if end_day:
+                queryset = queryset.filter(day__lte=end_day)
+            stats = queryset.aggregate(
+                total_requests=models.Sum('request_count'),
+                total_tokens=models.Sum('tokens_used'),
+                successful_requests=models.Sum('successful_requests'),
+                failed_requests=models.Sum('failed_requests')
+            )
+        else:
+            queryset = cls.objects.filter(user__branch=branch)
+            
+            if start_date:
+                queryset = queryset.filter(created_at__gte=start_date)
+            if end_date:
+                queryset = queryset.filter(created_at__lte=end_date)
+            
+            stats = queryset.aggregate(
+                total_requests=models.Count('id'),
+                total_tokens=models.Sum('tokens_used'),
+                successful_requests=models.Count('id', filter=models.Q(success=True)),
+                failed_requests=models.Count('id', filter=models.Q(success=False))
+            )
         
         return {
             'total_requests': stats['total_requests'] or 0,
             'total_tokens': stats['total_tokens'] or 0,
             'successful_requests': stats['successful_requests'] or 0,
             'failed_requests': stats['failed_requests'] or 0,
-            'success_rate': (stats['successful_requests'] / max(1, stats['total_requests'])) * 100
+            'success_rate': ((stats['successful_requests'] or 0) / max(1, stats['total_requests'] or 0)) * 100
         }
 
     @classmethod
     def get_user_monthly_usage(cls, user, year=None, month=None):
-        """Get user's token usage for a specific month"""
-        now = timezone.now()
+        """Get user's token usage for a specific month from the daily rollups"""
+        now = timezone.localdate()
         if not year:
             year = now.year
         if not month:
             month = now.month
         
-        start_date = datetime(year, month, 1, tzinfo=timezone.get_current_timezone())
-        end_date = datetime(year, month, calendar.monthrange(year, month)[1], 23, 59, 59, tzinfo=timezone.get_current_timezone())
-        
-        usage = cls.objects.filter(
+        usage = AITokenUsageDay.objects.filter(
             user=user,
-            created_at__range=[start_date, end_date]
+            day__year=year,
+            day__month=month
         ).aggregate(
             total_tokens=models.Sum('tokens_used')
         )['total_tokens'] or 0
         
         return usage
+
+
+_ROLLUP_AGGREGATES = {
+    'total_tokens': models.Sum('tokens_used'),
+    'total_requests': models.Count('id'),
+    'successes': models.Count('id', filter=models.Q(success=True)),
+    'failures': models.Count('id', filter=models.Q(success=False)),
+}
+
+
+def _rollup_values(row):
+    return {
+        'tokens_used': row['total_tokens'] or 0,
+        'request_count': row['total_requests'],
+        'successful_requests': row['successes'],
+        'failed_requests': row['failures'],
+    }
+
+
+def _as_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+class AITokenUsageRollup(models.Model):
+    """Running totals of AITokenUsage rows, incremented as each row is recorded"""
+    tokens_used = models.BigIntegerField(default=0)
+    request_count = models.PositiveIntegerField(default=0)
+    successful_requests = models.PositiveIntegerField(default=0)
+    failed_requests = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def _increment(cls, usage, **lookup):
+        row, _ = cls.objects.get_or_create(**lookup)
+        cls.objects.filter(pk=row.pk).update(
+            tokens_used=F('tokens_used') + (usage.tokens_used or 0),
+            request_count=F('request_count') + 1,
+            successful_requests=F('successful_requests') + (1 if usage.success else 0),
+            failed_requests=F('failed_requests') + (0 if usage.success else 1),
+            updated_at=timezone.now()
+        )
+
+
+class AITokenUsageMonth(AITokenUsageRollup):
+    """Per-branch monthly AI token totals; quota checks read one row"""
+    branch = models.ForeignKey(
+        'branches.Branch',
+        on_delete=models.CASCADE,
+        related_name='ai_token_months'
+    )
+    month = models.DateField(help_text="First day of the month (TIME_ZONE)")
+
+    class Meta:
+        verbose_name = 'AI Token Usage (Branch Month)'
+        verbose_name_plural = 'AI Token Usage (Branch Months)'
+        constraints = [
+            models.UniqueConstraint(fields=['branch', 'month'], name='ai_usage_month_branch_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.branch_id} {self.month:%Y-%m}: {self.tokens_used:,} tokens"
+
+    @staticmethod
+    def current_month():
+        return timezone.localdate().replace(day=1)
+
+    @classmethod
+    def add(cls, usage):
+        branch_id = getattr(usage.user, 'branch_id', None)
+        if branch_id:
+            month = timezone.localdate(usage.created_at).replace(day=1)
+            cls._increment(usage, branch_id=branch_id, month=month)
+
+    @classmethod
+    def rebuild(cls, since=None):
+        """Recompute the months from since (a date; all when None) from the raw rows"""
+        queryset = AITokenUsage.objects.filter(user__branch__isnull=False)
+        rollups = cls.objects.all()
+        if since:
+            since = since.replace(day=1)
+            queryset = queryset.filter(created_at__date__gte=since)
+            rollups = rollups.filter(month__gte=since)
+        rows = queryset.annotate(
+            bucket=TruncMonth('created_at')
+        ).values('user__branch_id', 'bucket').annotate(**_ROLLUP_AGGREGATES).order_by()
+        with transaction.atomic():
+            rollups.delete()
+            cls.objects.bulk_create([
+                cls(branch_id=row['user__branch_id'], month=_as_date(row['bucket']), **_rollup_values(row))
+                for row in rows
+            ], batch_size=1000)
+        return len(rows)
+
+
+class AITokenUsageDay(AITokenUsageRollup):
+    """Per-user daily AI token totals for usage charts and top-user lists"""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='ai_token_days'
+    )
+    day = models.DateField(help_text="Day in TIME_ZONE")
+
+    class Meta:
+        verbose_name = 'AI Token Usage (User Day)'
+        verbose_name_plural = 'AI Token Usage (User Days)'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'day'], name='ai_usage_day_user_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['day'], name='ai_usage_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.day}: {self.tokens_used:,} tokens"
+
+    @classmethod
+    def add(cls, usage):
+        cls._increment(usage, user_id=usage.user_id, day=timezone.localdate(usage.created_at))
+
+    @classmethod
+    def rebuild(cls, since=None):
+        """Recompute the days from since (a date; all when None) from the raw rows"""
+        queryset = AITokenUsage.objects.all()
+        rollups = cls.objects.all()
+        if since:
+            queryset = queryset.filter(created_at__date__gte=since)
+            rollups = rollups.filter(day__gte=since)
+        rows = queryset.annotate(
+            bucket=TruncDate('created_at')
+        ).values('user_id', 'bucket').annotate(**_ROLLUP_AGGREGATES).order_by()
+        with transaction.atomic():
+            rollups.delete()
+            cls.objects.bulk_create([
+                cls(user_id=row['user_id'], day=row['bucket'], **_rollup_values(row))
+                for row in rows
+            ], batch_size=1000)
+        return len(rows)
+
+    @staticmethod
+    def day_bound(value, end=False):
+        """
+        The date a range bound covers whole days of, or None when it cuts
+        through a day (end bounds are whole at 23:59:59 or later)
+        """
+        if value is None or not isinstance(value, datetime):
+            return value
+        local = timezone.localtime(value) if timezone.is_aware(value) else value
+        if not end and local.time() == datetime.min.time():
+            return local.date()
+        if end and local.time() >= datetime.max.time().replace(microsecond=0):
+            return local.date()
+        return None
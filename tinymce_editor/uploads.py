@@ -0,0 +1,114 @@
+"""
+Editor upload rules, shared by the upload views and the direct upload
+policies (see core.direct_uploads).
+"""
+
+import logging
+import os
+import uuid
+
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from core.direct_uploads import UploadPolicy
+
+from . import settings as tinymce_settings
+
+logger = logging.getLogger(__name__)
+
+IMAGE_TYPES = ('image/jpeg', 'image/png', 'image/gif', 'image/webp')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+IMAGE_MAX_SIZE = 10 * 1024 * 1024  # 10MB, matching the frontend validation
+
+MEDIA_TYPES = (
+    # Images
+    'image/jpeg', 'image/png', 'image/gif', 'image/webp',
+    # Audio
+    'audio/mpeg', 'audio/ogg', 'audio/wav',
+    # Video
+    'video/mp4', 'video/webm', 'video/ogg',
+    # Documents
+    'application/pdf', 'application/msword',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'application/vnd.ms-excel',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'application/vnd.ms-powerpoint',
+    'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+    # Other common types
+    'text/plain', 'application/zip', 'application/octet-stream', 'application/x-zip-compressed',
+)
+MEDIA_MAX_SIZE = 600 * 1024 * 1024  # 600MB
+
+ZIP_TYPES = ('application/zip', 'application/octet-stream', 'application/x-zip-compressed')
+
+
+def media_signature_allowed(declared, detected):
+    """Whether a detected MIME type is acceptable for a media upload of the declared type"""
+    if detected in MEDIA_TYPES:
+        return True
+    # ZIP files are often detected as octet-stream, and the other way round
+    return declared in ZIP_TYPES and detected in ZIP_TYPES
+
+
+def unique_filename(original_name):
+    """Sanitized name that keeps the original name and extension and adds uniqueness"""
+    file_ext = os.path.splitext(original_name)[1].lower()
+    sanitized_name = ''.join(c for c in os.path.splitext(original_name)[0] if c.isalnum() or c in '-_')
+    sanitized_name = sanitized_name[:50]  # Limit length
+    return f"{uuid.uuid4().hex[:8]}_{sanitized_name}{file_ext}"
+
+
+def upload_dir(path):
+    return path if path.endswith('/') else path + '/'
+
+
+class EditorImagePolicy(UploadPolicy):
+    content_types = IMAGE_TYPES
+    extensions = IMAGE_EXTENSIONS
+    max_size = IMAGE_MAX_SIZE
+    source_app = 'tinymce_editor'
+    source_model = 'Image'
+
+    def storage_name(self, user, filename, context):
+        return os.path.join(upload_dir(tinymce_settings.TINYMCE_UPLOAD_PATH), unique_filename(filename))
+
+    def response(self, upload):
+        file_url = default_storage.url(upload.storage_name)
+        title = os.path.splitext(upload.original_filename)[0]
+        return {
+            'location': file_url,  # For TinyMCE 5.x compatibility
+            'url': file_url,       # For TinyMCE 6.x compatibility
+            'filename': os.path.basename(upload.storage_name),
+            'alt': title,
+            'title': title,
+        }
+
+
+class EditorMediaPolicy(EditorImagePolicy):
+    content_types = MEDIA_TYPES
+    extensions = ()
+    max_size = MEDIA_MAX_SIZE
+    source_model = 'MediaFile'
+
+    def storage_name(self, user, filename, context):
+        upload_path = getattr(tinymce_settings, 'TINYMCE_MEDIA_UPLOAD_PATH', tinymce_settings.TINYMCE_UPLOAD_PATH)
+        return os.path.join(upload_dir(upload_path), unique_filename(filename))
+
+    def signature_allowed(self, detected, upload):
+        return media_signature_allowed(upload.content_type, detected)
+
+    def registered(self, upload):
+        try:
+            from lms_media.utils import register_media_file
+            register_media_file(
+                file_path=upload.storage_name,
+                uploaded_by=upload.user,
+                source_type='editor_upload',
+                filename=upload.original_filename,
+                description=f'Uploaded via TinyMCE editor on {timezone.now().date()}'
+            )
+        except ImportError:
+            # lms_media module not available, skip registration
+            pass
+        except Exception as e:
+            logger.error(f"Error registering media file: {str(e)}")
@@ -1,6 +1,5 @@
 from django.shortcuts import render
 import os
-import uuid
 import json
 import requests
 import logging
@@ -9,14 +8,17 @@ from django.views.decorators.csrf import csrf_protect, csrf_exempt
 from django.contrib.auth.decorators import login_required
 from django.conf import settings
 from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
 from django.views.decorators.http import require_POST, require_http_methods
 from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import ensure_csrf_cookie
 import magic
 from . import settings as tinymce_settings
-from .models import BranchAITokenLimit, AITokenUsage
+from .uploads import (
+    IMAGE_EXTENSIONS, IMAGE_MAX_SIZE, IMAGE_TYPES, MEDIA_TYPES, media_signature_allowed,
+    unique_filename as make_unique_filename,
+)
+from .models import BranchAITokenLimit, AITokenUsage, AITokenUsageDay, AITokenUsageMonth
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -41,8 +43,7 @@ def upload_image(request):
     logger.info(f"Received image upload: {uploaded_file.name}, size: {uploaded_file.size}, type: {uploaded_file.content_type}")
     
     # Validate file type using both MIME type and file signature
-    allowed_types = ['image/jpeg', 'image/png', 'image/gif', 'image/webp']
-    if uploaded_file.content_type not in allowed_types:
+    if uploaded_file.content_type not in IMAGE_TYPES:
         logger.warning(f"Image upload rejected: File type not allowed: {uploaded_file.content_type}")
         return JsonResponse({
             'error': 'File type not allowed. Please upload JPEG, PNG, GIF, or WebP.'
@@ -53,7 +54,7 @@ def upload_image(request):
         file_signature = magic.from_buffer(uploaded_file.read(1024), mime=True)
         uploaded_file.seek(0)  # Reset file pointer
         
-        if file_signature not in allowed_types:
+        if file_signature not in IMAGE_TYPES:
             logger.warning(f"Image upload rejected: File signature mismatch. MIME: {uploaded_file.content_type}, Signature: {file_signature}")
             return JsonResponse({
                 'error': 'File content does not match declared type.'
@@ -65,8 +66,7 @@ def upload_image(request):
         }, status=400)
     
     # Validate file size (max 10MB to match frontend validation)
-    max_size = 10 * 1024 * 1024  # 10MB in bytes
-    if uploaded_file.size > max_size:
+    if uploaded_file.size > IMAGE_MAX_SIZE:
         logger.warning(f"Image upload rejected: File too large: {uploaded_file.size} bytes")
         return JsonResponse({
             'error': 'File too large. Maximum size is 10MB.'
@@ -77,18 +77,13 @@ def upload_image(request):
     file_ext = os.path.splitext(original_name)[1].lower()
     
     # Additional extension validation
-    allowed_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.webp']
-    if file_ext not in allowed_extensions:
+    if file_ext not in IMAGE_EXTENSIONS:
         return JsonResponse({
             'error': f'File extension {file_ext} not allowed.'
         }, status=400)
     
-    timestamp = uuid.uuid4().hex[:8]
-    
     # Create a sanitized filename that preserves original name but adds uniqueness
-    sanitized_name = ''.join(c for c in os.path.splitext(original_name)[0] if c.isalnum() or c in '-_')
-    sanitized_name = sanitized_name[:50]  # Limit length
-    unique_filename = f"{timestamp}_{sanitized_name}{file_ext}"
+    unique_filename = make_unique_filename(original_name)
     
     # Define upload path - either use a specific TINYMCE_UPLOAD_PATH or default
     upload_path = tinymce_settings.TINYMCE_UPLOAD_PATH
@@ -102,8 +97,8 @@ def upload_image(request):
     logger.info(f"Saving uploaded image to: {file_path}")
     
     try:
-        # Save file using Django's storage API
-        saved_path = default_storage.save(file_path, ContentFile(uploaded_file.read()))
+        # Save file using Django's storage API, in chunks rather than read into memory
+        saved_path = default_storage.save(file_path, uploaded_file)
         
         # Register the file upload in storage tracking system
         try:
@@ -157,25 +152,7 @@ def upload_media_file(request):
     uploaded_file = request.FILES['file']
     
     # Validate file type
-    allowed_types = [
-        # Images
-        'image/jpeg', 'image/png', 'image/gif', 'image/webp',
-        # Audio
-        'audio/mpeg', 'audio/ogg', 'audio/wav', 
-        # Video
-        'video/mp4', 'video/webm', 'video/ogg',
-        # Documents
-        'application/pdf', 'application/msword', 
-        'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-        'application/vnd.ms-excel',
-        'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        'application/vnd.ms-powerpoint',
-        'application/vnd.openxmlformats-officedocument.presentationml.presentation',
-        # Other common types
-        'text/plain', 'application/zip', 'application/octet-stream', 'application/x-zip-compressed'
-    ]
-    
-    if uploaded_file.content_type not in allowed_types:
+    if uploaded_file.content_type not in MEDIA_TYPES:
         return JsonResponse({
             'error': 'File type not allowed. Please upload a supported file type.'
         }, status=400)
@@ -186,21 +163,11 @@ def upload_media_file(request):
         uploaded_file.seek(0)  # Reset file pointer
         
         # Allow common MIME type variations for ZIP files
-        if file_signature not in allowed_types:
-            # Check if this is a ZIP file variation
-            if (uploaded_file.content_type == 'application/zip' and 
-                file_signature in ['application/octet-stream', 'application/x-zip-compressed']):
-                # This is acceptable - ZIP files are often detected as octet-stream
-                pass
-            elif (file_signature == 'application/zip' and 
-                  uploaded_file.content_type in ['application/octet-stream', 'application/x-zip-compressed']):
-                # Also acceptable - reverse case
-                pass
-            else:
-                logger.warning(f"Media upload rejected: File signature mismatch. MIME: {uploaded_file.content_type}, Signature: {file_signature}")
-                return JsonResponse({
-                    'error': 'File content does not match declared type.'
-                }, status=400)
+        if not media_signature_allowed(uploaded_file.content_type, file_signature):
+            logger.warning(f"Media upload rejected: File signature mismatch. MIME: {uploaded_file.content_type}, Signature: {file_signature}")
+            return JsonResponse({
+                'error': 'File content does not match declared type.'
+            }, status=400)
     except Exception as e:
         logger.error(f"Error validating file signature: {str(e)}")
         return JsonResponse({
@@ -233,12 +200,9 @@ def upload_media_file(request):
     # Preserve original extension but sanitize filename
     original_name = uploaded_file.name
     file_ext = os.path.splitext(original_name)[1].lower()
-    timestamp = uuid.uuid4().hex[:8]
     
     # Create a sanitized filename that preserves original name but adds uniqueness
-    sanitized_name = ''.join(c for c in os.path.splitext(original_name)[0] if c.isalnum() or c in '-_')
-    sanitized_name = sanitized_name[:50]  # Limit length
-    unique_filename = f"{timestamp}_{sanitized_name}{file_ext}"
+    unique_filename = make_unique_filename(original_name)
     
     # Define upload path - either use a specific path for media or default
     upload_path = getattr(tinymce_settings, 'TINYMCE_MEDIA_UPLOAD_PATH', 
@@ -252,8 +216,8 @@ def upload_media_file(request):
     file_path = os.path.join(upload_path, unique_filename)
     
     try:
-        # Save file using Django's storage API
-        saved_path = default_storage.save(file_path, ContentFile(uploaded_file.read()))
+        # Save file using Django's storage API, in chunks rather than read into memory
+        saved_path = default_storage.save(file_path, uploaded_file)
         
         # Register file in media database for tracking
         try:
@@ -737,7 +701,7 @@ def generate_ai_content(request):
 from django.shortcuts import get_object_or_404, redirect
 from django.contrib import messages
 from django.core.paginator import Paginator
-from django.db.models import Q, Sum, Count
+from django.db.models import Q, Sum
 from branches.models import Branch
 from django.contrib.auth.decorators import user_passes_test
 
@@ -779,6 +743,12 @@ def ai_token_dashboard(request):
         total_monthly_limit = 0
         total_current_usage = 0
         
+        # Current month usage of every listed branch in one query
+        month_usage = dict(AITokenUsageMonth.objects.filter(
+            branch__in=branches,
+            month=AITokenUsageMonth.current_month()
+        ).values_list('branch_id', 'tokens_used'))
+        
         for branch in branches:
             try:
                 # Get or create token limits for this branch
@@ -786,6 +756,7 @@ def ai_token_dashboard(request):
                     branch=branch,
                     defaults={'monthly_token_limit': 10000, 'is_unlimited': False}
                 )
+                token_limits.cache_month_usage(month_usage.get(branch.id, 0))
                 
                 current_usage = token_limits.get_current_month_usage()
                 usage_percentage = token_limits.get_usage_percentage()
@@ -902,27 +873,22 @@ def manage_branch_tokens(request, branch_id):
             created_at__gte=thirty_days_ago
         ).order_by('-created_at')[:50]  # Last 50 requests
         
-        # Get top users by token usage this month
-        now = timezone.now()
-        start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        
-        top_users = AITokenUsage.objects.filter(
+        # Get top users by token usage this month, from the daily rollups
+        start_of_month = AITokenUsageMonth.current_month()
+        month_days = AITokenUsageDay.objects.filter(
             user__branch=branch,
-            created_at__gte=start_of_month
-        ).values('user__username', 'user__email', 'user__id').annotate(
+            day__gte=start_of_month
+        )
+        
+        top_users = month_days.values('user__username', 'user__email', 'user__id').annotate(
             total_tokens=Sum('tokens_used'),
-            request_count=Count('id')
+            request_count=Sum('request_count')
         ).order_by('-total_tokens')[:10]
         
         # Get daily usage for the current month (for chart)
-        daily_usage = AITokenUsage.objects.filter(
-            user__branch=branch,
-            created_at__gte=start_of_month
-        ).extra(
-            select={'day': 'DATE(created_at)'}
-        ).values('day').annotate(
+        daily_usage = month_days.values('day').annotate(
             total_tokens=Sum('tokens_used'),
-            request_count=Count('id')
+            request_count=Sum('request_count')
         ).order_by('day')
         
         context = {
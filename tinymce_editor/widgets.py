@@ -18,6 +18,7 @@ class TinyMCEWidget(forms.Textarea):
     class Media:
         js = (
             'tinymce_editor/tinymce/tinymce.min.js',
+            'core/js/direct-upload.js',
             'tinymce_editor/js/tinymce-widget.js',
         )
         css = {
@@ -0,0 +1,70 @@
+# Generated by Django 4.2.24 on 2026-10-18 22:04
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+USER_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION users_customuser_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('pg_catalog.simple', coalesce(NEW.username, '')), 'A') ||
+        setweight(to_tsvector('pg_catalog.simple', coalesce(NEW.first_name, '')), 'A') ||
+        setweight(to_tsvector('pg_catalog.simple', coalesce(NEW.last_name, '')), 'A') ||
+        setweight(to_tsvector('pg_catalog.simple', coalesce(NEW.email, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS users_customuser_search_vector_trigger ON users_customuser;
+CREATE TRIGGER users_customuser_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF username, first_name, last_name, email, search_vector
+    ON users_customuser FOR EACH ROW EXECUTE PROCEDURE users_customuser_search_vector_update();
+
+-- Backfill existing rows through the trigger
+UPDATE users_customuser SET search_vector = NULL;
+"""
+
+DROP_USER_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS users_customuser_search_vector_trigger ON users_customuser;
+DROP FUNCTION IF EXISTS users_customuser_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_auto_20251111_0047'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='customuser',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='users_search_vector_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass('username', name='gin_trgm_ops'), name='users_username_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass('first_name', name='gin_trgm_ops'), name='users_first_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass('last_name', name='gin_trgm_ops'), name='users_last_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass('email', name='gin_trgm_ops'), name='users_email_trgm'),
+        ),
+        migrations.RunSQL(USER_TRIGGER_SQL, DROP_USER_TRIGGER_SQL),
+    ]
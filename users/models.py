@@ -1,4 +1,6 @@
 from django.contrib.auth.models import AbstractUser, Permission
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from branches.models import Branch
 from django.core.exceptions import ValidationError
@@ -723,6 +725,9 @@ class CustomUser(AbstractUser):
         help_text="Achievements and awards"
     )
 
+    # Maintained by a database trigger from username, names and email (see core.search)
+    search_vector = SearchVectorField(null=True, editable=False)
+
     class Meta:
         verbose_name = "User"
         verbose_name_plural = "Users"
@@ -736,6 +741,12 @@ class CustomUser(AbstractUser):
             models.Index(fields=['role', 'branch', 'is_active']),
             models.Index(fields=['date_joined']),
             models.Index(fields=['branch', 'date_joined']),
+            # Global search
+            GinIndex(fields=['search_vector'], name='users_search_vector_gin'),
+            GinIndex(OpClass('username', name='gin_trgm_ops'), name='users_username_trgm'),
+            GinIndex(OpClass('first_name', name='gin_trgm_ops'), name='users_first_name_trgm'),
+            GinIndex(OpClass('last_name', name='gin_trgm_ops'), name='users_last_name_trgm'),
+            GinIndex(OpClass('email', name='gin_trgm_ops'), name='users_email_trgm'),
             # Existing indexes can be added here
         ]
 
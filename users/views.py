@@ -7529,22 +7529,25 @@ def get_user_todos(request):
     # Parse request parameters
     limit = int(request.GET.get('limit', 10))
     offset = int(request.GET.get('offset', 0))
+    cursor = request.GET.get('cursor') or None  # next_cursor of the previous page
     todo_type = request.GET.get('type', None)  # Filter by type if specified
     
     # Initialize TodoService for the current user
     todo_service = TodoService(request.user)
     
     try:
-        # Get todos based on type filter
-        if todo_type:
-            todos = todo_service.get_todos_by_type(todo_type, limit, offset)
+        # Keyset page from the stored feed; offset is kept for older clients
+        keyset = cursor is not None or offset == 0
+        if keyset:
+            todos, next_cursor = todo_service.get_page(limit, cursor=cursor, todo_type=todo_type)
+        elif todo_type:
+            todos, next_cursor = todo_service.get_todos_by_type(todo_type, limit, offset), None
         else:
-            todos = todo_service.get_todos(limit, offset)
+            todos, next_cursor = todo_service.get_todos(limit, offset), None
         
-        # Get total count for pagination
-        all_todos = todo_service.get_todos(limit=1000)  # Get more for count
-        total_count = len(all_todos)
-        has_more = (offset + limit) < total_count
+        # Get total count for pagination from the maintained counts
+        total_count = todo_service.get_total_count(todo_type)
+        has_more = next_cursor is not None if keyset else (offset + limit) < total_count
         
         # If it's an AJAX request, return JSON
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -7561,6 +7564,7 @@ def get_user_todos(request):
                 'todos': todos,
                 'total_count': total_count,
                 'has_more': has_more,
+                'next_cursor': next_cursor,
                 'current_count': offset + len(todos),
                 'todo_type': todo_type
             })
@@ -8236,207 +8240,54 @@ def user_settings(request):
 
 @login_required
 def search(request):
-    """Global search view for searching across various models in the LMS with enhanced PostgreSQL full-text search"""
+    """Global search view backed by the stored search vectors in core.search"""
     query = request.GET.get('q', '')
     category = request.GET.get('category', 'all')
+    page_number = request.GET.get('page', 1)
     
-    from courses.models import Course, CourseCategory
-    from django.contrib.postgres.search import SearchVector, SearchQuery, SearchRank
-    from django.db.models import F
+    from core.search import search as ranked_search
     
     results = {
         'courses': [],
         'users': [],
         'total_results': 0
     }
+    page_obj = None
     
     # Get categories for the dropdown - wrap in try-except for safety
     try:
-        categories = CourseCategory.objects.all()
+        categories = list(CourseCategory.objects.all())
     except Exception as e:
         logger.error(f"Error fetching course categories: {str(e)}")
         categories = []
     
     if query:
-        # Search users when 'users' category is selected
-        if category == 'users' and request.user.role in ['globaladmin', 'superadmin', 'admin', 'instructor']:
-            try:
-                # Use PostgreSQL full-text search for better accuracy
-                search_vector = SearchVector('username', weight='A') + \
-                               SearchVector('first_name', weight='A') + \
-                               SearchVector('last_name', weight='A') + \
-                               SearchVector('email', weight='B')
-                search_query = SearchQuery(query)
-                
-                # Perform full-text search with ranking
-                users = CustomUser.objects.annotate(
-                    rank=SearchRank(search_vector, search_query)
-                ).filter(rank__gt=0).order_by('-rank')
-                
-                # Fallback to basic search if no results found
-                if not users.exists():
-                    users = CustomUser.objects.filter(
-                        Q(username__icontains=query) | 
-                        Q(email__icontains=query) |
-                        Q(first_name__icontains=query) |
-                        Q(last_name__icontains=query)
-                    )
-                
-                # Filter users based on role permissions
-                if request.user.role == 'admin':
-                    # Admin users cannot see superadmin or globaladmin users
-                    users = users.filter(branch=request.user.branch).exclude(role__in=['superadmin', 'globaladmin'])
-                elif request.user.role == 'instructor':
-                    # Instructors can only see learner users
-                    users = users.filter(branch=request.user.branch, role='learner')
-                elif request.user.role == 'superadmin':
-                    # Super admin users cannot see globaladmin users
-                    users = users.exclude(role='globaladmin')
-                
-                results['users'] = users[:20]  # Increased limit for better results
-                results['total_results'] += users.count()
-            except Exception as e:
-                logger.error(f"User search error for query '{query}': {str(e)}")
-                # Fallback to basic search on error
-                try:
-                    users = CustomUser.objects.filter(
-                        Q(username__icontains=query) | 
-                        Q(email__icontains=query) |
-                        Q(first_name__icontains=query) |
-                        Q(last_name__icontains=query)
-                    )
-                    
-                    if request.user.role == 'admin':
-                        users = users.filter(branch=request.user.branch).exclude(role__in=['superadmin', 'globaladmin'])
-                    elif request.user.role == 'instructor':
-                        users = users.filter(branch=request.user.branch, role='learner')
-                    elif request.user.role == 'superadmin':
-                        users = users.exclude(role='globaladmin')
-                    
-                    results['users'] = users[:20]
-                    results['total_results'] += users.count()
-                except Exception as fallback_error:
-                    logger.error(f"User search fallback error: {str(fallback_error)}")
-                    results['users'] = []
-        
-        # Search courses when 'courses' category is selected or a specific category is selected
-        elif category == 'courses' or category == 'all' or any(str(cat.slug) == category for cat in categories):
-            try:
-                # Use PostgreSQL full-text search for better accuracy
-                # Create search vectors for different fields with different weights
-                search_vector = SearchVector('title', weight='A') + \
-                               SearchVector('description', weight='B') + \
-                               SearchVector('category__name', weight='C') + \
-                               SearchVector('instructor__first_name', weight='C') + \
-                               SearchVector('instructor__last_name', weight='C')
-                
-                search_query = SearchQuery(query)
-                
-                # Initialize courses queryset with full-text search
-                courses = Course.objects.select_related('category', 'instructor', 'branch').annotate(
-                    rank=SearchRank(search_vector, search_query)
-                ).filter(rank__gt=0).order_by('-rank')
-                
-                # Fallback to basic search if no results found
-                if not courses.exists():
-                    logger.info(f"Full-text search returned no results for '{query}', using fallback search")
-                    courses = Course.objects.select_related('category', 'instructor', 'branch').filter(
-                        Q(title__icontains=query) | 
-                        Q(description__icontains=query) |
-                        Q(category__name__icontains=query) |
-                        Q(instructor__first_name__icontains=query) |
-                        Q(instructor__last_name__icontains=query)
-                    ).distinct()
-                
-                # If a specific category is selected (not 'all' or 'courses'), filter by category
-                if category != 'all' and category != 'courses' and category != 'users':
-                    try:
-                        # Find the category by slug and filter courses directly
-                        selected_category = CourseCategory.objects.get(slug=category)
-                        courses = courses.filter(category=selected_category)
-                    except CourseCategory.DoesNotExist:
-                        logger.warning(f"Category '{category}' not found, continuing with unfiltered search")
-                        # If category doesn't exist, continue with unfiltered course search
-                        pass
-                
-                # Filter courses based on access permissions
-                if request.user.role == 'globaladmin':
-                    pass  # Global Admin can see all courses
-                elif request.user.role == 'superadmin':
-                    # Super Admin can see courses within their assigned businesses only
-                    from core.utils.business_filtering import filter_courses_by_business
-                    business_courses = filter_courses_by_business(request.user)
-                    business_course_ids = list(business_courses.values_list('id', flat=True))
-                    courses = courses.filter(id__in=business_course_ids)
-                elif request.user.role == 'admin':
-                    courses = courses.filter(branch=request.user.branch)
-                elif request.user.role == 'instructor':
-                    instructor_courses = list(request.user.instructor_courses.values_list('id', flat=True))
-                    courses = courses.filter(
-                        Q(id__in=instructor_courses) | 
-                        Q(branch=request.user.branch)
-                    )
-                else:  # Learner
-                    enrolled_courses = list(request.user.enrollments.values_list('course_id', flat=True))
-                    courses = courses.filter(
-                        Q(id__in=enrolled_courses) | 
-                        Q(is_public=True)
-                    )
-                
-                results['courses'] = courses[:20]  # Increased limit for better results
-                results['total_results'] += courses.count()
-                
-            except Exception as e:
-                # Log the error and try fallback search
-                logger.error(f"Course search error for query '{query}': {str(e)}")
-                try:
-                    # Fallback to basic search
-                    courses = Course.objects.select_related('category', 'instructor', 'branch').filter(
-                        Q(title__icontains=query) | 
-                        Q(description__icontains=query)
-                    ).distinct()
-                    
-                    # Apply category filter if needed
-                    if category != 'all' and category != 'courses' and category != 'users':
-                        try:
-                            selected_category = CourseCategory.objects.get(slug=category)
-                            courses = courses.filter(category=selected_category)
-                        except CourseCategory.DoesNotExist:
-                            pass
-                    
-                    # Apply permission filters
-                    if request.user.role == 'globaladmin':
-                        pass
-                    elif request.user.role == 'superadmin':
-                        from core.utils.business_filtering import filter_courses_by_business
-                        business_courses = filter_courses_by_business(request.user)
-                        business_course_ids = list(business_courses.values_list('id', flat=True))
-                        courses = courses.filter(id__in=business_course_ids)
-                    elif request.user.role == 'admin':
-                        courses = courses.filter(branch=request.user.branch)
-                    elif request.user.role == 'instructor':
-                        instructor_courses = list(request.user.instructor_courses.values_list('id', flat=True))
-                        courses = courses.filter(
-                            Q(id__in=instructor_courses) | 
-                            Q(branch=request.user.branch)
-                        )
-                    else:
-                        enrolled_courses = list(request.user.enrollments.values_list('course_id', flat=True))
-                        courses = courses.filter(
-                            Q(id__in=enrolled_courses) | 
-                            Q(is_public=True)
-                        )
-                    
-                    results['courses'] = courses[:20]
-                    results['total_results'] += courses.count()
-                except Exception as fallback_error:
-                    logger.error(f"Course search fallback error: {str(fallback_error)}")
-                    results['courses'] = []
+        if category == 'users':
+            kind = 'users'
+            selected_category = None
+        else:
+            kind = 'courses'
+            # A category slug narrows the course search; unknown slugs search all courses
+            selected_category = next((cat for cat in categories if str(cat.slug) == category), None)
+            if selected_category is None and category not in ('all', 'courses'):
+                logger.warning(f"Category '{category}' not found, continuing with unfiltered search")
+        
+        try:
+            page_obj = ranked_search(
+                request.user, query, kind=kind, page=page_number, category=selected_category
+            )
+            if page_obj is not None:
+                results[kind] = page_obj.object_list
+                results['total_results'] = page_obj.paginator.count
+        except Exception as e:
+            logger.error(f"{kind.title()} search error for query '{query}': {str(e)}")
+            page_obj = None
     
     context = {
         'query': query,
         'category': category,
         'results': results,
+        'page_obj': page_obj,
         'categories': categories,
         'breadcrumbs': [
             {'url': reverse('users:role_based_redirect'), 'label': 'Dashboard', 'icon': 'fa-home'},